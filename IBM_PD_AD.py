@@ -13,6 +13,18 @@ from collections import Counter, defaultdict
 from multiprocessing import Pool, cpu_count
 from functools import partial
 
+import contextlib
+import hashlib
+import importlib.util
+import json
+import queue as queue_module
+import shutil
+import sqlite3
+import sys
+import tempfile
+import uuid
+import warnings
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
@@ -27,6 +39,9 @@ except ImportError:
         """Fallback if tqdm not installed"""
         return iterable
 
+# Optional: numba for the 'jit' engine kernels (the NumPy engine is used if not installed)
+NUMBA_AVAILABLE = importlib.util.find_spec('numba') is not None
+
 # General configuration
 
 REPORTING_AGE_BANDS: List[Tuple[int, Optional[int]]] = [
@@ -123,25 +138,6 @@ def _beta_params_from_mean_rel_sd(mean: float, rel_sd: float) -> Optional[Tuple[
     return alpha, beta_param
 
 
-def _sample_probability_value(value: Any,
-                              rel_sd: float,
-                              rng: np.random.Generator) -> Any:
-    """Sample a beta-distributed value around the provided probability."""
-    try:
-        base = float(value)
-    except (TypeError, ValueError):
-        return value
-    if not math.isfinite(base) or base <= 0.0:
-        return value
-    epsilon = 1e-6
-    clipped = min(max(base, epsilon), 1.0 - epsilon)
-    params = _beta_params_from_mean_rel_sd(clipped, rel_sd)
-    if params is None:
-        return value
-    alpha, beta_param = params
-    return float(rng.beta(alpha, beta_param))
-
-
 def _gamma_params_from_mean_rel_sd(mean: float, rel_sd: float) -> Optional[Tuple[float, float]]:
     """Return (shape, scale) for a gamma distribution given mean and relative SD."""
     if mean <= 0.0 or rel_sd <= 0.0:
@@ -156,23 +152,6 @@ def _gamma_params_from_mean_rel_sd(mean: float, rel_sd: float) -> Optional[Tuple
     return shape, scale
 
 
-def _sample_gamma_value(value: Any,
-                        rel_sd: float,
-                        rng: np.random.Generator) -> Any:
-    """Sample a gamma-distributed value around the provided positive mean."""
-    try:
-        base = float(value)
-    except (TypeError, ValueError):
-        return value
-    if not math.isfinite(base) or base <= 0.0:
-        return value
-    params = _gamma_params_from_mean_rel_sd(base, rel_sd)
-    if params is None:
-        return value
-    shape, scale = params
-    return float(rng.gamma(shape, scale))
-
-
 def _lognormal_params_from_ci(point_estimate: float,
                               lower: float,
                               upper: float) -> Optional[Tuple[float, float]]:
@@ -186,80 +165,19 @@ def _lognormal_params_from_ci(point_estimate: float,
     return mu, sigma
 
 
-def _sample_lognormal_from_ci(point_estimate: float,
-                              lower: float,
-                              upper: float,
-                              rng: np.random.Generator) -> float:
-    """Sample a lognormal value using the supplied CI; fall back to point estimate."""
-    params = _lognormal_params_from_ci(point_estimate, lower, upper)
-    if params is None:
-        return point_estimate
-    mu, sigma = params
-    return float(rng.lognormal(mean=mu, sigma=sigma))
-
-
-def _apply_beta_to_mapping(mapping: Dict[Any, Any],
-                           rel_sd: float,
-                           rng: np.random.Generator) -> None:
-    """Recursively sample beta-distributed values for all numeric leaves."""
-    for key, val in mapping.items():
-        if isinstance(val, dict):
-            _apply_beta_to_mapping(val, rel_sd, rng)
-        else:
-            mapping[key] = _sample_probability_value(val, rel_sd, rng)
-
-
-def _sample_cost_structure(costs_cfg: Dict[str, Any],
-                           rel_sd: float,
-                           rng: np.random.Generator) -> None:
-    """Apply gamma sampling to nested cost dictionaries."""
-    for stage_meta in costs_cfg.values():
-        if not isinstance(stage_meta, dict):
-            continue
-        for setting_meta in stage_meta.values():
-            if not isinstance(setting_meta, dict):
-                continue
-            for payer, amount in setting_meta.items():
-                setting_meta[payer] = _sample_gamma_value(amount, rel_sd, rng)
-
-
-def _sample_risk_factor_prevalence(risk_defs: Dict[str, dict],
-                                   rel_sd: float,
-                                   rng: np.random.Generator) -> None:
-    """Apply beta sampling to each risk-factor prevalence entry."""
-    for meta in risk_defs.values():
-        prevalence = meta.get('prevalence')
-        if not isinstance(prevalence, dict):
-            continue
-        for sex_key, value in prevalence.items():
-            prevalence[sex_key] = _sample_probability_value(value, rel_sd, rng)
-
-
-def _sample_risk_factor_relative_risks(risk_defs: Dict[str, dict],
-                                       rng: np.random.Generator) -> None:
-    """Apply lognormal sampling to risk-factor hazard ratios when CI data is available."""
-    for risk_name, meta in risk_defs.items():
-        ci_lookup = RISK_FACTOR_HR_INTERVALS.get(risk_name, {})
-        rr_def = meta.get('relative_risks')
-        if not isinstance(rr_def, dict) or not ci_lookup:
-            continue
-        for transition, sex_map in rr_def.items():
-            if not isinstance(sex_map, dict):
-                continue
-            ci_transition = ci_lookup.get(transition, {})
-            if not ci_transition:
-                continue
-            for sex_key, value in sex_map.items():
-                ci_tuple = ci_transition.get(sex_key) or ci_transition.get('all')
-                if not ci_tuple:
-                    continue
-                point, lower, upper = ci_tuple
-                sex_map[sex_key] = _sample_lognormal_from_ci(point, lower, upper, rng)
-
-
 general_config = {
     'number_of_timesteps': 17,
     'population': 33167098,
+    'agent_weight': 1,        # real people represented by each simulated person (set automatically for reduced-size runs)
+    'engine': 'python',       # 'python' (per-person dicts), 'numpy' (columnar arrays) or 'jit' (columnar + Numba kernels)
+    'storage': {
+        'age_dtype': 'uint8',             # columnar age storage: 'uint8' or 'int16'
+        'accumulator_dtype': 'float64',   # columnar QALY/cost accumulators: 'float64' or 'float32'
+        'memory_budget_gb': None,         # refuse runs whose estimated peak memory exceeds this (None = no limit)
+        'memory_headroom': 0.85,          # share of available RAM automatically sized PSA pools may fill
+        'block_size': None,               # columnar records per block streamed through each step (None = one block)
+        'block_dir': None,                # directory for disk-backed (memmap) blocks (None = keep blocks in RAM)
+    },
          
     'time_step_years': 1,
 
@@ -326,6 +244,29 @@ general_config = {
         'n_jobs': None,             # Number of parallel jobs (None = use all CPU cores)
         'relative_sd_beta': 0.10,   # +/-10% relative SD for beta-distributed parameters
         'relative_sd_gamma': 0.10,  # +/-10% relative SD for gamma-distributed parameters
+        'sampling': 'random',  # parameter sampling: 'random', 'sobol' (scrambled) or 'lhs' (Latin hypercube)
+        'variance_reduction': {
+            'antithetic': False,      # pair each draw with its mirrored quantiles (1 - u)
+            'control_variates': [],   # registry names of sampled parameters used as controls (exact means)
+        },
+        'draw_store': None,  # SQLite file: each finished draw is saved at once and reused on restart
+        'paired': None,      # {'intervention': {...}, 'wtp': 20000}: comparator and intervention per draw (run_paired_psa)
+        'timeseries': {
+            'metrics': [],       # per-step summary keys captured per draw (e.g. ['incident_onsets']); [] = off
+            'path': None,        # .npy file for the draw x step x metric float32 array (None = temporary file)
+        },
+        'streaming': {
+            'use': False,        # aggregate draws as they finish (unordered) instead of keeping them all
+            'report_every': 100,  # draws between interim summaries passed to on_summary
+        },
+        'adaptive': {
+            'use': False,                       # stop before 'iterations' once the MC standard errors are small enough
+            'batch_size': 50,                   # draws scheduled between convergence checks
+            'min_iterations': 100,
+            'metrics': ['total_costs_all', 'total_qalys_combined', 'incident_onsets_total'],
+            'mean_relative_tolerance': 0.005,   # MCSE(mean) / |mean|
+            'quantile_relative_tolerance': 0.01,  # MCSE(2.5% / 97.5% quantile) / |quantile|
+        },
     },
 
     # Optional: override baseline (time step 0) summary metrics with known real-world data
@@ -381,6 +322,16 @@ general_config = {
         (80, 100): 0.09,
     },
 
+    # How the baseline cohort is drawn. 'proportional' samples ages/sex from the weights above;
+    # 'stratified' allocates exact counts per age band x sex; 'importance' additionally oversamples
+    # the listed age bands and prevalent dementia. Per-person weights compensate, so totals are unbiased.
+    'initial_population_sampling': {
+        'method': 'proportional',
+        'age_band_oversampling': {     # used by 'importance', e.g. {(65, 79): 2.0, (80, 100): 4.0}
+        },
+        'prevalent_dementia_oversampling': 1.0,   # used by 'importance'; odds multiplier for baseline dementia
+    },
+
     # #(VERIFED, NHS England)  #   Baseline annual probability of onset if no duration is provided for normal->mild
     'base_onset_probability': 0.0025,
 
@@ -870,6 +821,26 @@ DEMENTIA_STAGES = ['cognitively_normal', 'mild', 'moderate', 'severe', 'death']
 LIVING_SETTINGS = ['home', 'institution']
 random.seed(42)  # reproducibility
 
+# -------- Agent weights --------
+
+def get_agent_weight(config: dict) -> Union[int, float]:
+    """Return the number of real people each simulated person represents (defaults to 1)."""
+    weight = config.get('agent_weight', 1)
+    if weight is None:
+        return 1
+    try:
+        value = float(weight)
+    except (TypeError, ValueError):
+        raise ValueError(f"agent_weight must be numeric, got {weight!r}.")
+    if not math.isfinite(value) or value <= 0.0:
+        raise ValueError(f"agent_weight must be a positive finite number, got {weight!r}.")
+    return int(value) if value.is_integer() else value
+
+def _as_count(value: Any) -> Union[int, float]:
+    """Return whole-number totals as int (unweighted runs) and weighted totals as float."""
+    numeric = float(value or 0)
+    return int(numeric) if numeric.is_integer() else numeric
+
 # -------- Weighted age samplers --------
 
 def _normalize_weights(d: dict) -> dict:
@@ -989,6 +960,7 @@ def add_new_entrants(population_state: Dict[int, dict],
     sex_dist = op.get("sex_distribution") or config.get("sex_distribution", {})
     base_year = int(config.get('base_year', calendar_year))
     fixed_entry_age = op.get("fixed_entry_age")
+    weight = get_agent_weight(config)
     age_sampling_config = {
         "initial_age_band_weights": age_band_weights,
         "initial_age_range": config.get("initial_age_range", (35, 100)),
@@ -1021,6 +993,7 @@ def add_new_entrants(population_state: Dict[int, dict],
             'time_since_entry': 0.0,
             'ever_dementia': False,
             'age_at_onset': None,
+            'weight': weight,
         }
         next_id_start += 1
         entrants_added += 1
@@ -1752,6 +1725,21 @@ def get_background_mortality_hazard(age: int, hazard_table: Dict[int, float]) ->
     key = eligible[-1] if eligible else thresholds[0]
     return hazard_table[key]
 
+def _background_mortality_table_for_sex(config: dict, sex: Optional[str]) -> Dict[int, float]:
+    """Return the age->hazard table for a sex (nested tables) or the flat table (backwards compatible)."""
+    bg_table_all = config.get('background_mortality_hazards', {})
+    if isinstance(bg_table_all, dict) and any(isinstance(v, dict) for v in bg_table_all.values()):
+        # nested by sex: choose table by person's sex, or fall back to 'all' or first available
+        table = bg_table_all.get(sex) or bg_table_all.get('all')
+        if table is None:
+            # fall back to first nested dict if sex not found
+            for v in bg_table_all.values():
+                if isinstance(v, dict):
+                    table = v
+                    break
+        return table or {}
+    return bg_table_all
+
 def get_dementia_mortality_multiplier(stage: str, mults: Dict[str, float]) -> float:
     """Multiply background hazard by a stage-specific factor (optional)."""
     if not mults:
@@ -1787,6 +1775,129 @@ def sample_age(config: dict) -> int:
     lo, hi = config['initial_age_range']
     return random.randint(lo, hi)
 
+INITIAL_SAMPLING_METHODS = ('proportional', 'stratified', 'importance')
+
+def _initial_population_sampling_config(config: dict) -> dict:
+    """Validate and return the initial-population sampling settings with defaults filled in."""
+    sampling = dict(config.get('initial_population_sampling') or {})
+    method = str(sampling.get('method') or 'proportional').strip().lower()
+    if method not in INITIAL_SAMPLING_METHODS:
+        raise ValueError(
+            f"initial_population_sampling method must be one of {INITIAL_SAMPLING_METHODS}, got {method!r}."
+        )
+    band_factors = sampling.get('age_band_oversampling') or {}
+    prevalent_factor = sampling.get('prevalent_dementia_oversampling', 1.0)
+    if method != 'importance':
+        band_factors, prevalent_factor = {}, 1.0
+    for band, factor in band_factors.items():
+        if not float(factor) > 0.0:
+            raise ValueError(f"age_band_oversampling factor for {band} must be positive, got {factor!r}.")
+    prevalent_factor = float(1.0 if prevalent_factor is None else prevalent_factor)
+    if not prevalent_factor > 0.0:
+        raise ValueError(f"prevalent_dementia_oversampling must be positive, got {prevalent_factor!r}.")
+    return {
+        'method': method,
+        'age_band_oversampling': band_factors,
+        'prevalent_dementia_oversampling': prevalent_factor,
+    }
+
+def _largest_remainder_allocation(total: int, shares: List[float]) -> List[int]:
+    """Split an integer total across shares (summing to 1) so that counts sum exactly to total."""
+    quotas = [total * share for share in shares]
+    counts = [int(math.floor(q)) for q in quotas]
+    shortfall = total - sum(counts)
+    by_remainder = sorted(range(len(quotas)), key=lambda i: quotas[i] - counts[i], reverse=True)
+    for i in by_remainder[:shortfall]:
+        counts[i] += 1
+    return counts
+
+def plan_initial_population_strata(population: int, config: dict) -> List[dict]:
+    """
+    Allocate the initial cohort across age band x sex strata.
+
+    Each stratum's target share is its age-band weight times its sex share. Simulated counts follow
+    the target shares ('stratified') or the shares tilted by 'age_band_oversampling' ('importance'),
+    using largest-remainder rounding so they sum exactly to ``population``. Every stratum with positive
+    target share gets at least one record (taken from the largest strata), so no share drops out of
+    the weighted totals; a population smaller than the number of such strata raises ValueError. Each
+    stratum carries the per-person weight ``agent_weight * population * target_share / count`` that
+    restores the target totals.
+
+    Returns:
+        List of dicts with keys 'band', 'sex', 'target_share', 'sampling_share', 'count', 'weight'.
+    """
+    sampling = _initial_population_sampling_config(config)
+    agent_weight = get_agent_weight(config)
+
+    if config.get('initial_age_weights'):
+        band_weights = {(int(age), int(age)): w
+                        for age, w in _normalize_weights(config['initial_age_weights']).items()}
+    elif config.get('initial_age_band_weights'):
+        band_weights = _normalize_weights(config['initial_age_band_weights'])
+    else:
+        lo, hi = config['initial_age_range']
+        band_weights = {(int(lo), int(hi)): 1.0}
+
+    sex_dist = config.get('sex_distribution') or {}
+    if sex_dist:
+        sex_weights = _normalize_weights({_canonical_sex_label(k): float(v) for k, v in sex_dist.items()})
+    else:
+        sex_weights = {'unspecified': 1.0}
+
+    factor_bands = [band for band in sampling['age_band_oversampling'] if isinstance(band, tuple)]
+    strata = []
+    for band, band_share in band_weights.items():
+        matched = assign_age_to_reporting_band(band[0], factor_bands) if factor_bands else None
+        factor = float(sampling['age_band_oversampling'][matched]) if matched is not None else 1.0
+        for sex, sex_share in sex_weights.items():
+            strata.append({
+                'band': band,
+                'sex': sex,
+                'target_share': band_share * sex_share,
+                'tilted': band_share * sex_share * factor,
+            })
+
+    populated = [i for i, stratum in enumerate(strata) if stratum['target_share'] > 0]
+    if int(population) < len(populated):
+        raise ValueError(
+            f"A population of {int(population)} cannot cover the {len(populated)} age band x sex strata "
+            f"with positive weight; use a larger population or proportional sampling."
+        )
+    tilted_total = sum(stratum['tilted'] for stratum in strata)
+    counts = _largest_remainder_allocation(
+        int(population), [stratum['tilted'] / tilted_total for stratum in strata]
+    )
+    # Rounding can leave a small stratum empty, which would drop its share from the weighted totals
+    for i in populated:
+        if counts[i] == 0:
+            donor = max(range(len(counts)), key=lambda j: counts[j])
+            counts[donor] -= 1
+            counts[i] = 1
+    for stratum, count in zip(strata, counts):
+        stratum['sampling_share'] = stratum.pop('tilted') / tilted_total
+        stratum['count'] = count
+        if count > 0:
+            stratum['weight'] = agent_weight * population * stratum['target_share'] / count
+        else:
+            stratum['weight'] = 0.0
+    return strata
+
+def _oversampled_probability(probability: float, factor: float) -> float:
+    """Scale the odds of an event by ``factor``; the inverse of the compensating weight."""
+    if factor == 1.0 or probability <= 0.0 or probability >= 1.0:
+        return probability
+    return factor * probability / (1.0 - probability + factor * probability)
+
+def _initial_population_slots(population: int, config: dict, sampling: dict):
+    """Yield None per person for proportional sampling, else the stratum each person is drawn from."""
+    if sampling['method'] == 'proportional':
+        for _ in range(population):
+            yield None
+        return
+    for stratum in plan_initial_population_strata(population, config):
+        for _ in range(stratum['count']):
+            yield stratum
+
 def assign_risk_factors(risk_factors: Dict[str, dict], age: int, sex: str) -> Dict[str, bool]:
     assigned = {}
     for rf, meta in risk_factors.items():
@@ -1796,15 +1907,32 @@ def assign_risk_factors(risk_factors: Dict[str, dict], age: int, sex: str) -> Di
 
 def initialize_population(population: int,
                           config: dict) -> Tuple[Dict[int, dict], Counter]:
+    """
+    Draw the baseline cohort according to ``config['initial_population_sampling']``.
+
+    Proportional sampling gives every person the agent weight. Stratified and importance
+    sampling draw exact counts per age band x sex (and, for importance, tilt the odds of
+    prevalent dementia), storing the compensating design weight on each person.
+    """
     base_year = int(config.get('base_year', 2023))
     stage_mix_config = config.get('initial_stage_mix', None)
+    agent_weight = get_agent_weight(config)
+    sampling = _initial_population_sampling_config(config)
+    prevalent_factor = sampling['prevalent_dementia_oversampling']
 
     population_state: Dict[int, dict] = {}
     age_counter: Counter = Counter()
 
-    for individual in range(population):
-        age = sample_age(config)
-        sex = sample_sex(config.get('sex_distribution', {}))
+    for individual, stratum in enumerate(_initial_population_slots(population, config, sampling)):
+        if stratum is None:
+            age = sample_age(config)
+            sex = sample_sex(config.get('sex_distribution', {}))
+            weight = agent_weight
+        else:
+            low, high = stratum['band']
+            age = random.randint(low, high)
+            sex = stratum['sex']
+            weight = stratum['weight']
 
         stage0: Optional[str] = None
 
@@ -1814,14 +1942,19 @@ def initialize_population(population: int,
             sex
         )
         if prevalence is not None:
-            if random.random() < prevalence:
+            draw_probability = _oversampled_probability(prevalence, prevalent_factor)
+            if random.random() < draw_probability:
                 dementia_stage_weights = get_dementia_stage_weights_for_sex(stage_mix_config, sex)
                 if dementia_stage_weights:
                     stage0 = sample_stage_from_mix(dementia_stage_weights, default_stage='mild')
                 else:
                     stage0 = 'mild'
+                if draw_probability != prevalence:
+                    weight = weight * prevalence / draw_probability
             else:
                 stage0 = 'cognitively_normal'
+                if draw_probability != prevalence:
+                    weight = weight * (1.0 - prevalence) / (1.0 - draw_probability)
 
         if stage0 is None:
             stage_weights = get_stage_mix_for_age_and_sex(
@@ -1853,8 +1986,9 @@ def initialize_population(population: int,
             'time_since_entry': 0.0,
             'ever_dementia': stage0 in ('mild', 'moderate', 'severe'),
             'age_at_onset': age if stage0 in ('mild', 'moderate', 'severe') else None,
+            'weight': weight,
         }
-        age_counter[age] += 1
+        age_counter[age] += weight
 
     return population_state, age_counter
 
@@ -1872,33 +2006,20 @@ def advance_population_state(population_state: Dict[int, dict],
 
 # Accumulation (QALYs/costs)
 
-def apply_stage_accumulations(individual_data: dict, config: dict, time_step: int) -> None:
-    """
-    Update cumulative QALYs and costs for the current cycle given stage and living setting.
-    Applies NICE discounting at rate config['discount_rate_annual'] to this cycle's flows.
-    Discounting is end-of-cycle: factor = 1 / (1 + r) ** (time_step * dt)
-    """
-    if not individual_data['alive']:
-        return
-
-    stage = individual_data['dementia_stage']
-    setting = individual_data['living_setting']
-    utility_norm = get_age_specific_utility(
-        individual_data['age'],
-        config['utility_norms_by_age'],
-        individual_data.get('sex')
-    )
+def _cycle_utility_weights(config: dict,
+                           stage: str,
+                           setting: Optional[str],
+                           age: float,
+                           sex: Optional[str]) -> Tuple[float, float]:
+    """Return the (patient, caregiver) utility weights for one cycle in a stage/setting at an age."""
+    utility_norm = get_age_specific_utility(age, config['utility_norms_by_age'], sex)
 
     stage_age_qalys = config.get('stage_age_qalys')
-    patient_weight = get_stage_age_qaly(
-        'patient', stage, individual_data['age'], setting, stage_age_qalys
-    )
+    patient_weight = get_stage_age_qaly('patient', stage, age, setting, stage_age_qalys)
 
     caregiver_weight: float
     if setting == 'home':
-        caregiver_override = get_stage_age_qaly(
-            'caregiver', stage, individual_data['age'], setting, stage_age_qalys
-        )
+        caregiver_override = get_stage_age_qaly('caregiver', stage, age, setting, stage_age_qalys)
         if caregiver_override is None:
             caregiver_mult = config['utility_multipliers']['caregiver'].get(stage, {}).get(setting, 0.0)
             caregiver_weight = utility_norm * caregiver_mult
@@ -1911,6 +2032,23 @@ def apply_stage_accumulations(individual_data: dict, config: dict, time_step: in
         patient_mult = config['utility_multipliers']['patient'].get(stage, {}).get(setting, 0.0)
         patient_weight = utility_norm * patient_mult
 
+    return patient_weight, caregiver_weight
+
+def apply_stage_accumulations(individual_data: dict, config: dict, time_step: int) -> None:
+    """
+    Update cumulative QALYs and costs for the current cycle given stage and living setting.
+    Applies NICE discounting at rate config['discount_rate_annual'] to this cycle's flows.
+    Discounting is end-of-cycle: factor = 1 / (1 + r) ** (time_step * dt)
+    """
+    if not individual_data['alive']:
+        return
+
+    stage = individual_data['dementia_stage']
+    setting = individual_data['living_setting']
+    patient_weight, caregiver_weight = _cycle_utility_weights(
+        config, stage, setting, individual_data['age'], individual_data.get('sex')
+    )
+
     costs = config['costs'].get(stage, {}).get(setting, {'nhs': 0.0, 'informal': 0.0})
 
     dt = config['time_step_years']
@@ -1932,6 +2070,18 @@ def apply_stage_accumulations(individual_data: dict, config: dict, time_step: in
 
 # Progression with mortality
 
+def _incidence_growth_multiplier(config: dict, time_step: int) -> float:
+    """Return the macro incidence growth factor applied to the onset hazard in this time step."""
+    base_year = int(config.get('base_year', 2023))
+    calendar_year = base_year + time_step
+    growth_cfg = config.get('incidence_growth') or {}
+    if growth_cfg.get('use'):
+        rate = float(growth_cfg.get('annual_rate', 0.0))
+        ref_year = int(growth_cfg.get('reference_year', base_year))
+        years_since_ref = max(0, calendar_year - ref_year)
+        return (1.0 + rate) ** years_since_ref
+    return 1.0
+
 def update_dementia_progression(population_state: Dict[int, dict],
                                 config: dict,
                                 time_step: int,
@@ -1942,18 +2092,12 @@ def update_dementia_progression(population_state: Dict[int, dict],
                                 age_band_exposure_by_sex: Optional[Dict[str, Dict[Tuple[int, Optional[int]], float]]] = None,
                                 age_band_onsets_by_sex: Optional[Dict[str, Dict[Tuple[int, Optional[int]], int]]] = None
                                 ) -> Tuple[int, int, Dict[Tuple[str, str], int], Dict[str, int]]:
-    """Advance dementia stages and apply background/dementia mortality using hazards."""
+    """Advance dementia stages and apply background/dementia mortality using hazards.
+
+    Deaths, onsets, transition counts and exposure are accumulated using each person's
+    agent weight, so the returned totals are on the population scale."""
     dt = config['time_step_years']
-    base_year = int(config.get('base_year', 2023))
-    calendar_year = base_year + time_step
-    growth_cfg = config.get('incidence_growth') or {}
-    if growth_cfg.get('use'):
-        rate = float(growth_cfg.get('annual_rate', 0.0))
-        ref_year = int(growth_cfg.get('reference_year', base_year))
-        years_since_ref = max(0, calendar_year - ref_year)
-        incidence_growth_multiplier = (1.0 + rate) ** years_since_ref
-    else:
-        incidence_growth_multiplier = 1.0
+    incidence_growth_multiplier = _incidence_growth_multiplier(config, time_step)
     deaths_this_step = 0
     onsets_this_step = 0
     transition_counter: Counter = Counter()
@@ -1963,33 +2107,21 @@ def update_dementia_progression(population_state: Dict[int, dict],
             continue
 
         stage = person['dementia_stage']
-        stage_start_counts[stage] += 1
+        weight = person.get('weight', 1)
+        stage_start_counts[stage] += weight
         incidence_band: Optional[Tuple[int, Optional[int]]] = None
         sex_bucket = person.get('sex', 'unspecified')
         if stage == 'cognitively_normal':
             incidence_band = assign_age_to_reporting_band(person['age'], INCIDENCE_AGE_BANDS)
             if incidence_band is not None:
                 if age_band_exposure is not None:
-                    age_band_exposure[incidence_band] = age_band_exposure.get(incidence_band, 0.0) + dt
+                    age_band_exposure[incidence_band] = age_band_exposure.get(incidence_band, 0.0) + dt * weight
                 if age_band_exposure_by_sex is not None:
                     exposure_by_band = age_band_exposure_by_sex.setdefault(sex_bucket, {})
-                    exposure_by_band[incidence_band] = exposure_by_band.get(incidence_band, 0.0) + dt
+                    exposure_by_band[incidence_band] = exposure_by_band.get(incidence_band, 0.0) + dt * weight
 
         # --- Mortality step (competing risks if severe) ---
-        bg_table_all = config.get('background_mortality_hazards', {})
-        if isinstance(bg_table_all, dict) and any(isinstance(v, dict) for v in bg_table_all.values()):
-            # nested by sex: choose table by person's sex, or fall back to 'all' or first available
-            table = bg_table_all.get(sex_bucket) or bg_table_all.get('all')
-            if table is None:
-                # fall back to first nested dict if sex not found
-                for v in bg_table_all.values():
-                    if isinstance(v, dict):
-                        table = v
-                        break
-            h_bg = get_background_mortality_hazard(person['age'], table or {})
-        else:
-            # flat table (backwards compatible)
-            h_bg = get_background_mortality_hazard(person['age'], bg_table_all)
+        h_bg = get_background_mortality_hazard(person['age'], _background_mortality_table_for_sex(config, sex_bucket))
 
         # stage multiplier
         h_bg *= get_dementia_mortality_multiplier(stage, config.get('dementia_mortality_multipliers', {}))
@@ -2006,9 +2138,9 @@ def update_dementia_progression(population_state: Dict[int, dict],
             person['dementia_stage'] = 'death'
             person['alive'] = False
             person['living_setting'] = None
-            death_age_counter[int(round(person['age']))] += 1
-            deaths_this_step += 1
-            transition_counter[(stage, 'death')] += 1
+            death_age_counter[int(round(person['age']))] += weight
+            deaths_this_step += weight
+            transition_counter[(stage, 'death')] += weight
             continue  # skip progression if death occurs
 
         # --- If still alive, apply stage progression (non-death transitions) ---
@@ -2040,19 +2172,19 @@ def update_dementia_progression(population_state: Dict[int, dict],
                     person['age_at_onset'] = float(person.get('age', 0.0))
                 elif person.get('age_at_onset') is None:
                     person['age_at_onset'] = float(person.get('age', 0.0))
-                onsets_this_step += 1
+                onsets_this_step += weight
                 onset_triggered = True
                 if onset_tracker is not None:
                     risk_flags = person.get('risk_factors', {})
                     for risk_name, counts in onset_tracker.items():
                         exposed = bool(risk_flags.get(risk_name, False))
                         bucket = 'with' if exposed else 'without'
-                        counts[bucket] = counts.get(bucket, 0) + 1
+                        counts[bucket] = counts.get(bucket, 0) + weight
                 if onset_triggered and age_band_onsets is not None and incidence_band is not None:
-                    age_band_onsets[incidence_band] = age_band_onsets.get(incidence_band, 0) + 1
+                    age_band_onsets[incidence_band] = age_band_onsets.get(incidence_band, 0) + weight
                 if onset_triggered and age_band_onsets_by_sex is not None and incidence_band is not None:
                     onset_by_band = age_band_onsets_by_sex.setdefault(sex_bucket, {})
-                    onset_by_band[incidence_band] = onset_by_band.get(incidence_band, 0) + 1
+                    onset_by_band[incidence_band] = onset_by_band.get(incidence_band, 0) + weight
 
         elif stage == 'mild':
             p = transition_prob_from_config(config, person, 'mild_to_moderate')
@@ -2073,7 +2205,7 @@ def update_dementia_progression(population_state: Dict[int, dict],
         else:
             continue
         end_stage = person['dementia_stage']
-        transition_counter[(stage, end_stage)] += 1
+        transition_counter[(stage, end_stage)] += weight
 
     return deaths_this_step, onsets_this_step, dict(transition_counter), dict(stage_start_counts)
 
@@ -2141,11 +2273,16 @@ def summarize_population_state(population_state: Dict[int, dict],
                                entrants: int = 0,
                                deaths: int = 0,
                                new_onsets: int = 0) -> dict:
-    """Aggregate key metrics for the current time step."""
+    """Aggregate key metrics for the current time step.
+
+    Every count and total is weighted by each person's agent weight; ``entrants``, ``deaths``
+    and ``new_onsets`` are expected to be weighted already (as returned by the model steps).
+    """
     stage_counter = Counter()
     living_counter = Counter()
     age_band_dementia_counter = Counter()
 
+    population_total = 0
     alive_count = 0
     age_alive_sum = 0.0
     baseline_alive_count = 0
@@ -2158,24 +2295,26 @@ def summarize_population_state(population_state: Dict[int, dict],
 
     for person in population_state.values():
         stage = person['dementia_stage']
-        stage_counter[stage] += 1
-        total_qalys_patient += person['cumulative_qalys_patient']
-        total_qalys_caregiver += person['cumulative_qalys_caregiver']
-        total_costs_nhs += person['cumulative_costs_nhs']
-        total_costs_informal += person['cumulative_costs_informal']
+        weight = person.get('weight', 1)
+        population_total += weight
+        stage_counter[stage] += weight
+        total_qalys_patient += person['cumulative_qalys_patient'] * weight
+        total_qalys_caregiver += person['cumulative_qalys_caregiver'] * weight
+        total_costs_nhs += person['cumulative_costs_nhs'] * weight
+        total_costs_informal += person['cumulative_costs_informal'] * weight
 
         if person['alive']:
-            alive_count += 1
-            age_alive_sum += person['age']
-            living_counter[person.get('living_setting', 'unknown')] += 1
+            alive_count += weight
+            age_alive_sum += person['age'] * weight
+            living_counter[person.get('living_setting', 'unknown')] += weight
             if stage in ('mild', 'moderate', 'severe'):
-                dementia_age_sum += person['age']
-                dementia_count += 1
+                dementia_age_sum += person['age'] * weight
+                dementia_count += weight
                 band = assign_age_to_reporting_band(person['age'])
                 if band is not None:
-                    age_band_dementia_counter[band] += 1
+                    age_band_dementia_counter[band] += weight
             if person.get('entry_time_step', 0) == 0:
-                baseline_alive_count += 1
+                baseline_alive_count += weight
 
     mean_age_alive = age_alive_sum / alive_count if alive_count else 0.0
     mean_age_dementia = dementia_age_sum / dementia_count if dementia_count else 0.0
@@ -2183,7 +2322,7 @@ def summarize_population_state(population_state: Dict[int, dict],
     summary = {
         'time_step': time_step,
         'calendar_year': base_year + time_step,
-        'population_total': len(population_state),
+        'population_total': population_total,
         'population_alive': alive_count,
         'baseline_alive': baseline_alive_count,
         'entrants': entrants,
@@ -2248,6 +2387,7 @@ def compute_lifetime_risk_by_entry_age(population_state: Dict[int, dict],
     -------
     A list of records sorted by entry age with keys:
         entry_age, population, dementia_cases, lifetime_risk.
+    Population and case counts are weighted by each person's agent weight.
     """
     total_by_age: Counter = Counter()
     dementia_by_age: Counter = Counter()
@@ -2267,13 +2407,14 @@ def compute_lifetime_risk_by_entry_age(population_state: Dict[int, dict],
         if restrict_to_cognitively_normal and baseline_stage != 'cognitively_normal':
             continue
 
-        total_by_age[entry_age_int] += 1
+        weight = person.get('weight', 1)
+        total_by_age[entry_age_int] += weight
 
         ever_dementia = bool(person.get('ever_dementia', False))
         if baseline_stage in ('mild', 'moderate', 'severe'):
             ever_dementia = True
         if ever_dementia:
-            dementia_by_age[entry_age_int] += 1
+            dementia_by_age[entry_age_int] += weight
 
     records: List[dict] = []
     for age in sorted(total_by_age.keys()):
@@ -2301,6 +2442,7 @@ def collect_individual_survival(population_state: Dict[int, dict]) -> List[dict]
             'time': float(person.get('time_since_entry', 0.0)),
             'event': 0 if person.get('alive', False) else 1,
             'entry_time_step': int(person.get('entry_time_step', 0)),
+            'weight': person.get('weight', 1),
         }
         records.append(record)
     return records
@@ -2315,191 +2457,126 @@ def summaries_to_dataframe(model_results: dict) -> pd.DataFrame:
         rows.append(summary)
     return pd.DataFrame(rows)
 
-def run_model(config: dict, seed: Optional[int] = None) -> dict:
-    if seed is not None:
-        random.seed(seed)
-        np.random.seed(seed)
-    number_of_timesteps = config['number_of_timesteps'] + 1
-    population = config['population']
-    base_year = int(config.get('base_year', 2023))
-
-    summary_history = initialize_model_dictionary()
-    population_state, initial_age_counter = initialize_population(population, config)
-    death_age_counter: Counter = Counter()
-    transition_history: Dict[int, dict] = {}
-    risk_onset_tracker: Dict[str, Dict[str, int]] = {
-        name: {'with': 0, 'without': 0} for name in config.get('risk_factors', {})
-    }
-    incidence_age_exposure: Dict[Tuple[int, Optional[int]], float] = defaultdict(float)
-    incidence_age_onsets: Dict[Tuple[int, Optional[int]], int] = defaultdict(int)
-
-    baseline_summary = summarize_population_state(population_state, 0, base_year, entrants=0, deaths=0)
-    baseline_overrides = config.get('initial_summary_overrides') or {}
-    if baseline_overrides:
-        baseline_summary.update(baseline_overrides)
-        if 'incident_onsets' in baseline_overrides:
-            alive = baseline_summary.get('population_alive', 0) or 0
-            baseline_summary['incident_onsets'] = baseline_overrides['incident_onsets']
-            baseline_summary['incidence_per_1000_alive'] = (
-                (baseline_summary['incident_onsets'] / alive) * 1000.0 if alive else 0.0
-            )
-        if 'deaths' in baseline_overrides:
-            baseline_summary['deaths'] = baseline_overrides['deaths']
-        if 'entrants' in baseline_overrides:
-            baseline_summary['entrants'] = baseline_overrides['entrants']
-        if 'calendar_year' in baseline_overrides:
-            baseline_summary['calendar_year'] = baseline_overrides['calendar_year']
-        if 'time_step' in baseline_overrides:
-            baseline_summary['time_step'] = baseline_overrides['time_step']
-
-    create_time_step_dictionary(summary_history, 0, baseline_summary)
-    generate_output(summary_history, 0)
-
-    next_id = len(population_state)
-    yearly_incidence_records: List[dict] = []
-
-    for time_step in range(1, number_of_timesteps):
-        calendar_year = base_year + time_step
-        advance_population_state(population_state, config, calendar_year)
-
-        next_id, entrants_this_step = add_new_entrants(population_state, config, next_id, calendar_year)
-        per_sex_exposure: Dict[str, Dict[Tuple[int, Optional[int]], float]] = {}
-        per_sex_onsets: Dict[str, Dict[Tuple[int, Optional[int]], int]] = {}
-        deaths_this_step, onsets_this_step, transition_counts, stage_start_counts = update_dementia_progression(
-            population_state,
-            config,
-            time_step,
-            death_age_counter,
-            risk_onset_tracker,
-            incidence_age_exposure,
-            incidence_age_onsets,
-            per_sex_exposure,
-            per_sex_onsets
-        )
-        update_stage_accumulations(population_state, time_step, config)
-
-        alive_counts_by_sex_band: Dict[str, Dict[Tuple[int, Optional[int]], int]] = {}
-        prevalent_counts_by_sex_band: Dict[str, Dict[Tuple[int, Optional[int]], int]] = {}
-        for person in population_state.values():
-            if not person.get('alive', False):
-                continue
-            band = assign_age_to_reporting_band(float(person.get('age', 0.0)), INCIDENCE_AGE_BANDS)
-            if band is None:
-                continue
-            sex_key = person.get('sex', 'unspecified')
-            alive_bucket = alive_counts_by_sex_band.setdefault(sex_key, {})
-            alive_bucket[band] = alive_bucket.get(band, 0) + 1
-            if person.get('dementia_stage') in ('mild', 'moderate', 'severe'):
-                prevalent_bucket = prevalent_counts_by_sex_band.setdefault(sex_key, {})
-                prevalent_bucket[band] = prevalent_bucket.get(band, 0) + 1
-
-        sexes_present = (
-            set(per_sex_exposure.keys())
-            | set(per_sex_onsets.keys())
-            | set(alive_counts_by_sex_band.keys())
-            | set(prevalent_counts_by_sex_band.keys())
-            | {'female', 'male'}
+def _apply_baseline_overrides(baseline_summary: dict, baseline_overrides: dict) -> None:
+    """Overlay known real-world time-step-0 metrics onto the simulated baseline summary."""
+    if not baseline_overrides:
+        return
+    baseline_summary.update(baseline_overrides)
+    if 'incident_onsets' in baseline_overrides:
+        alive = baseline_summary.get('population_alive', 0) or 0
+        baseline_summary['incident_onsets'] = baseline_overrides['incident_onsets']
+        baseline_summary['incidence_per_1000_alive'] = (
+            (baseline_summary['incident_onsets'] / alive) * 1000.0 if alive else 0.0
         )
-        sexes_present.discard('all')
-
-        totals_per_band = defaultdict(lambda: {
-            'person_years_at_risk': 0.0,
-            'incident_onsets_at_risk': 0,
-            'population_alive_in_band': 0,
-            'prevalent_dementia_cases_in_band': 0,
-        })
-
-        for sex in sorted(sexes_present):
-            exposure_by_band = per_sex_exposure.get(sex, {})
-            onsets_by_band = per_sex_onsets.get(sex, {})
-            alive_by_band = alive_counts_by_sex_band.get(sex, {})
-            prevalence_by_band = prevalent_counts_by_sex_band.get(sex, {})
-            for band in INCIDENCE_AGE_BANDS:
-                lower, upper = band
-                band_label = age_band_label(band)
-                person_years = float(exposure_by_band.get(band, 0.0))
-                incident_onsets = int(onsets_by_band.get(band, 0))
-                alive_count = int(alive_by_band.get(band, 0))
-                prevalent_count = int(prevalence_by_band.get(band, 0))
-                record = {
-                    'time_step': time_step,
-                    'calendar_year': calendar_year,
-                    'sex': sex,
-                    'age_band': band_label,
-                    'age_lower': lower,
-                    'age_upper': upper,
-                    'person_years_at_risk': person_years,
-                    'incident_onsets_at_risk': incident_onsets,
-                    'population_alive_in_band': alive_count,
-                    'prevalent_dementia_cases_in_band': prevalent_count,
-                }
-                yearly_incidence_records.append(record)
-                totals_metrics = totals_per_band[band]
-                totals_metrics['person_years_at_risk'] += person_years
-                totals_metrics['incident_onsets_at_risk'] += incident_onsets
-                totals_metrics['population_alive_in_band'] += alive_count
-                totals_metrics['prevalent_dementia_cases_in_band'] += prevalent_count
-
+    if 'deaths' in baseline_overrides:
+        baseline_summary['deaths'] = baseline_overrides['deaths']
+    if 'entrants' in baseline_overrides:
+        baseline_summary['entrants'] = baseline_overrides['entrants']
+    if 'calendar_year' in baseline_overrides:
+        baseline_summary['calendar_year'] = baseline_overrides['calendar_year']
+    if 'time_step' in baseline_overrides:
+        baseline_summary['time_step'] = baseline_overrides['time_step']
+
+def _incidence_records_for_step(time_step: int,
+                                calendar_year: int,
+                                per_sex_exposure: Dict[str, Dict[Tuple[int, Optional[int]], float]],
+                                per_sex_onsets: Dict[str, Dict[Tuple[int, Optional[int]], int]],
+                                alive_counts_by_sex_band: Dict[str, Dict[Tuple[int, Optional[int]], int]],
+                                prevalent_counts_by_sex_band: Dict[str, Dict[Tuple[int, Optional[int]], int]]
+                                ) -> List[dict]:
+    """Build the per-sex and all-sex incidence rows (by incidence age band) for one time step."""
+    records: List[dict] = []
+    sexes_present = (
+        set(per_sex_exposure.keys())
+        | set(per_sex_onsets.keys())
+        | set(alive_counts_by_sex_band.keys())
+        | set(prevalent_counts_by_sex_band.keys())
+        | {'female', 'male'}
+    )
+    sexes_present.discard('all')
+
+    totals_per_band = defaultdict(lambda: {
+        'person_years_at_risk': 0.0,
+        'incident_onsets_at_risk': 0,
+        'population_alive_in_band': 0,
+        'prevalent_dementia_cases_in_band': 0,
+    })
+
+    for sex in sorted(sexes_present):
+        exposure_by_band = per_sex_exposure.get(sex, {})
+        onsets_by_band = per_sex_onsets.get(sex, {})
+        alive_by_band = alive_counts_by_sex_band.get(sex, {})
+        prevalence_by_band = prevalent_counts_by_sex_band.get(sex, {})
         for band in INCIDENCE_AGE_BANDS:
             lower, upper = band
             band_label = age_band_label(band)
-            totals_metrics = totals_per_band[band]
-            record_all = {
+            person_years = float(exposure_by_band.get(band, 0.0))
+            incident_onsets = _as_count(onsets_by_band.get(band, 0))
+            alive_count = _as_count(alive_by_band.get(band, 0))
+            prevalent_count = _as_count(prevalence_by_band.get(band, 0))
+            record = {
                 'time_step': time_step,
                 'calendar_year': calendar_year,
-                'sex': 'all',
+                'sex': sex,
                 'age_band': band_label,
                 'age_lower': lower,
                 'age_upper': upper,
-                'person_years_at_risk': float(totals_metrics['person_years_at_risk']),
-                'incident_onsets_at_risk': int(totals_metrics['incident_onsets_at_risk']),
-                'population_alive_in_band': int(totals_metrics['population_alive_in_band']),
-                'prevalent_dementia_cases_in_band': int(totals_metrics['prevalent_dementia_cases_in_band']),
+                'person_years_at_risk': person_years,
+                'incident_onsets_at_risk': incident_onsets,
+                'population_alive_in_band': alive_count,
+                'prevalent_dementia_cases_in_band': prevalent_count,
             }
-            yearly_incidence_records.append(record_all)
+            records.append(record)
+            totals_metrics = totals_per_band[band]
+            totals_metrics['person_years_at_risk'] += person_years
+            totals_metrics['incident_onsets_at_risk'] += incident_onsets
+            totals_metrics['population_alive_in_band'] += alive_count
+            totals_metrics['prevalent_dementia_cases_in_band'] += prevalent_count
 
-        transition_history[time_step] = {
-            'transition_counts': transition_counts,
-            'stage_start_counts': stage_start_counts,
+    for band in INCIDENCE_AGE_BANDS:
+        lower, upper = band
+        band_label = age_band_label(band)
+        totals_metrics = totals_per_band[band]
+        record_all = {
+            'time_step': time_step,
+            'calendar_year': calendar_year,
+            'sex': 'all',
+            'age_band': band_label,
+            'age_lower': lower,
+            'age_upper': upper,
+            'person_years_at_risk': float(totals_metrics['person_years_at_risk']),
+            'incident_onsets_at_risk': _as_count(totals_metrics['incident_onsets_at_risk']),
+            'population_alive_in_band': _as_count(totals_metrics['population_alive_in_band']),
+            'prevalent_dementia_cases_in_band': _as_count(totals_metrics['prevalent_dementia_cases_in_band']),
         }
+        records.append(record_all)
+    return records
 
-        summary = summarize_population_state(population_state,
-                                             time_step,
-                                             base_year,
-                                             entrants=entrants_this_step,
-                                             deaths=deaths_this_step,
-                                             new_onsets=onsets_this_step)
-        create_time_step_dictionary(summary_history, time_step, summary)
-        generate_output(summary_history, time_step)
-
-    lifetime_risk_normal = compute_lifetime_risk_by_entry_age(population_state, restrict_to_cognitively_normal=True)
-    lifetime_risk_all = compute_lifetime_risk_by_entry_age(population_state, restrict_to_cognitively_normal=False)
-    if config.get('store_individual_survival', True):
-        survival_records = collect_individual_survival(population_state)
-    else:
-        survival_records = []
-
-    # Capture final alive/dementia counts by incidence age band
-    age_band_alive_counts: Dict[Tuple[int, Optional[int]], int] = defaultdict(int)
-    age_band_dementia_counts: Dict[Tuple[int, Optional[int]], int] = defaultdict(int)
-    for person in population_state.values():
-        if not person.get('alive', False):
-            continue
-        band = assign_age_to_reporting_band(float(person.get('age', 0.0)), INCIDENCE_AGE_BANDS)
-        if band is None:
-            continue
-        age_band_alive_counts[band] += 1
-        if person.get('dementia_stage') in ('mild', 'moderate', 'severe'):
-            age_band_dementia_counts[band] += 1
-
+def _build_model_results(*,
+                         summary_history: Dict[int, dict],
+                         agent_weight: Union[int, float],
+                         initial_age_counter: Counter,
+                         death_age_counter: Counter,
+                         survival_records: List[dict],
+                         transition_history: Dict[int, dict],
+                         risk_onset_tracker: Dict[str, Dict[str, int]],
+                         lifetime_risk_normal: List[dict],
+                         lifetime_risk_all: List[dict],
+                         incidence_age_exposure: Dict[Tuple[int, Optional[int]], float],
+                         incidence_age_onsets: Dict[Tuple[int, Optional[int]], int],
+                         yearly_incidence_records: List[dict],
+                         age_band_alive_counts: Dict[Tuple[int, Optional[int]], int],
+                         age_band_dementia_counts: Dict[Tuple[int, Optional[int]], int],
+                         onset_age_counter: Counter) -> dict:
+    """Assemble the run_model result dictionary from the accumulated (weighted) tallies."""
     incidence_age_records: List[dict] = []
     for band in INCIDENCE_AGE_BANDS:
         exposure = float(incidence_age_exposure.get(band, 0.0))
-        events = int(incidence_age_onsets.get(band, 0))
+        events = _as_count(incidence_age_onsets.get(band, 0))
         hazard_per_year = (events / exposure) if exposure > 0 else 0.0
         probability_per_year = hazard_to_prob(hazard_per_year, dt=1.0)
-        alive_count = int(age_band_alive_counts.get(band, 0))
-        dementia_count = int(age_band_dementia_counts.get(band, 0))
+        alive_count = _as_count(age_band_alive_counts.get(band, 0))
+        dementia_count = _as_count(age_band_dementia_counts.get(band, 0))
         prevalence_value = (dementia_count / alive_count) if alive_count > 0 else 0.0
         lower, upper = band
         incidence_age_records.append({
@@ -2569,19 +2646,9 @@ def run_model(config: dict, seed: Optional[int] = None) -> dict:
         incidence_by_year_sex_df.sort_values(['calendar_year', 'sex', 'age_lower'], inplace=True)
         incidence_by_year_sex_df.reset_index(drop=True, inplace=True)
 
-    onset_age_counter: Counter = Counter()
-    for person in population_state.values():
-        age_at_onset = person.get('age_at_onset')
-        if age_at_onset is None:
-            continue
-        try:
-            age_int = int(round(float(age_at_onset)))
-        except (TypeError, ValueError):
-            continue
-        onset_age_counter[age_int] += 1
-
     return {
         'summaries': summary_history,
+        'agent_weight': agent_weight,
         'initial_age_distribution': dict(initial_age_counter),
         'age_at_death_distribution': dict(death_age_counter),
         'individual_survival': survival_records,
@@ -2594,8 +2661,8 @@ def run_model(config: dict, seed: Optional[int] = None) -> dict:
         'incidence_by_year_sex': yearly_incidence_records,
         'incidence_by_year_sex_df': incidence_by_year_sex_df,
         'age_at_onset_distribution': dict(onset_age_counter),
-        'age_band_alive_counts': {age_band_label(b): int(count) for b, count in age_band_alive_counts.items()},
-        'age_band_dementia_counts': {age_band_label(b): int(count) for b, count in age_band_dementia_counts.items()},
+        'age_band_alive_counts': {age_band_label(b): _as_count(count) for b, count in age_band_alive_counts.items()},
+        'age_band_dementia_counts': {age_band_label(b): _as_count(count) for b, count in age_band_dementia_counts.items()},
         'age_band_incidence_summary': incidence_age_df[['age band',
                                                         'age mid',
                                                         'cases (all)',
@@ -2607,203 +2674,2854 @@ def run_model(config: dict, seed: Optional[int] = None) -> dict:
                                                         'log(h/h_ref)']].copy() if not incidence_age_df.empty else pd.DataFrame(),
     }
 
+MODEL_ENGINES = ('python', 'numpy', 'jit')
 
-def _total_incident_onsets(model_results: dict) -> int:
-    """Sum dementia onsets across all simulated time steps."""
-    summaries = model_results.get('summaries', {}) if isinstance(model_results, dict) else {}
-    total = 0
-    for summary in summaries.values():
-        total += int(summary.get('incident_onsets', 0) or 0)
-    return total
-
+def resolve_engine(engine: Optional[str] = None, config: Optional[dict] = None) -> str:
+    """Return the engine name to use: explicit argument, then config['engine'], then 'python'."""
+    if engine is None and config is not None:
+        engine = config.get('engine')
+    name = str(engine or 'python').strip().lower()
+    if name not in MODEL_ENGINES:
+        raise ValueError(f"engine must be one of {MODEL_ENGINES}, got {engine!r}.")
+    return name
 
-def _replace_nested_values(structure: Any, value: float) -> Any:
-    """Recursively replace all numeric leaves in a nested mapping with the provided value."""
-    if isinstance(structure, dict):
-        return {key: _replace_nested_values(nested, value) for key, nested in structure.items()}
-    return float(value)
+def run_model(config: dict, seed: Optional[int] = None, engine: Optional[str] = None) -> dict:
+    """
+    Run the microsimulation and return per-timestep summaries plus incidence, transition and
+    lifetime-risk outputs. Counts and totals are weighted by ``config['agent_weight']`` so
+    reduced-size runs report population-scale numbers directly.
 
+    Args:
+        config: Model configuration (see ``general_config``)
+        seed: Random seed for reproducibility
+        engine: 'python' (per-person dicts, the reference implementation), 'numpy' (columnar
+            arrays) or 'jit' (columnar arrays with Numba-compiled kernels; falls back to 'numpy'
+            when Numba is not installed). Defaults to ``config['engine']``, then 'python'.
 
-def _counterfactual_config_without_risk(config: dict, risk_factor: str) -> dict:
+    Returns:
+        Results dictionary with the same keys for every engine. The columnar engines draw from
+        ``numpy.random.default_rng(seed)``, so they agree with each other draw-for-draw and with
+        the python engine in distribution.
+    """
+    engine_name = resolve_engine(engine, config)
+    check_memory_budget(config, engine=engine_name)
+    if engine_name != 'python':
+        return _run_model_columnar(config, seed, engine_name)
+
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+    number_of_timesteps = config['number_of_timesteps'] + 1
+    population = config['population']
+    base_year = int(config.get('base_year', 2023))
+    agent_weight = get_agent_weight(config)
+
+    summary_history = initialize_model_dictionary()
+    population_state, initial_age_counter = initialize_population(population, config)
+    death_age_counter: Counter = Counter()
+    transition_history: Dict[int, dict] = {}
+    risk_onset_tracker: Dict[str, Dict[str, int]] = {
+        name: {'with': 0, 'without': 0} for name in config.get('risk_factors', {})
+    }
+    incidence_age_exposure: Dict[Tuple[int, Optional[int]], float] = defaultdict(float)
+    incidence_age_onsets: Dict[Tuple[int, Optional[int]], int] = defaultdict(int)
+
+    baseline_summary = summarize_population_state(population_state, 0, base_year, entrants=0, deaths=0)
+    _apply_baseline_overrides(baseline_summary, config.get('initial_summary_overrides') or {})
+
+    create_time_step_dictionary(summary_history, 0, baseline_summary)
+    generate_output(summary_history, 0)
+
+    next_id = len(population_state)
+    yearly_incidence_records: List[dict] = []
+
+    for time_step in range(1, number_of_timesteps):
+        calendar_year = base_year + time_step
+        advance_population_state(population_state, config, calendar_year)
+
+        next_id, entrants_added = add_new_entrants(population_state, config, next_id, calendar_year)
+        entrants_this_step = entrants_added * agent_weight
+        per_sex_exposure: Dict[str, Dict[Tuple[int, Optional[int]], float]] = {}
+        per_sex_onsets: Dict[str, Dict[Tuple[int, Optional[int]], int]] = {}
+        deaths_this_step, onsets_this_step, transition_counts, stage_start_counts = update_dementia_progression(
+            population_state,
+            config,
+            time_step,
+            death_age_counter,
+            risk_onset_tracker,
+            incidence_age_exposure,
+            incidence_age_onsets,
+            per_sex_exposure,
+            per_sex_onsets
+        )
+        update_stage_accumulations(population_state, time_step, config)
+
+        alive_counts_by_sex_band: Dict[str, Dict[Tuple[int, Optional[int]], int]] = {}
+        prevalent_counts_by_sex_band: Dict[str, Dict[Tuple[int, Optional[int]], int]] = {}
+        for person in population_state.values():
+            if not person.get('alive', False):
+                continue
+            band = assign_age_to_reporting_band(float(person.get('age', 0.0)), INCIDENCE_AGE_BANDS)
+            if band is None:
+                continue
+            sex_key = person.get('sex', 'unspecified')
+            weight = person.get('weight', 1)
+            alive_bucket = alive_counts_by_sex_band.setdefault(sex_key, {})
+            alive_bucket[band] = alive_bucket.get(band, 0) + weight
+            if person.get('dementia_stage') in ('mild', 'moderate', 'severe'):
+                prevalent_bucket = prevalent_counts_by_sex_band.setdefault(sex_key, {})
+                prevalent_bucket[band] = prevalent_bucket.get(band, 0) + weight
+
+        yearly_incidence_records.extend(_incidence_records_for_step(
+            time_step,
+            calendar_year,
+            per_sex_exposure,
+            per_sex_onsets,
+            alive_counts_by_sex_band,
+            prevalent_counts_by_sex_band,
+        ))
+
+        transition_history[time_step] = {
+            'transition_counts': transition_counts,
+            'stage_start_counts': stage_start_counts,
+        }
+
+        summary = summarize_population_state(population_state,
+                                             time_step,
+                                             base_year,
+                                             entrants=entrants_this_step,
+                                             deaths=deaths_this_step,
+                                             new_onsets=onsets_this_step)
+        create_time_step_dictionary(summary_history, time_step, summary)
+        generate_output(summary_history, time_step)
+
+    lifetime_risk_normal = compute_lifetime_risk_by_entry_age(population_state, restrict_to_cognitively_normal=True)
+    lifetime_risk_all = compute_lifetime_risk_by_entry_age(population_state, restrict_to_cognitively_normal=False)
+    if config.get('store_individual_survival', True):
+        survival_records = collect_individual_survival(population_state)
+    else:
+        survival_records = []
+
+    # Capture final alive/dementia counts by incidence age band
+    age_band_alive_counts: Dict[Tuple[int, Optional[int]], int] = defaultdict(int)
+    age_band_dementia_counts: Dict[Tuple[int, Optional[int]], int] = defaultdict(int)
+    for person in population_state.values():
+        if not person.get('alive', False):
+            continue
+        band = assign_age_to_reporting_band(float(person.get('age', 0.0)), INCIDENCE_AGE_BANDS)
+        if band is None:
+            continue
+        weight = person.get('weight', 1)
+        age_band_alive_counts[band] += weight
+        if person.get('dementia_stage') in ('mild', 'moderate', 'severe'):
+            age_band_dementia_counts[band] += weight
+
+    onset_age_counter: Counter = Counter()
+    for person in population_state.values():
+        age_at_onset = person.get('age_at_onset')
+        if age_at_onset is None:
+            continue
+        try:
+            age_int = int(round(float(age_at_onset)))
+        except (TypeError, ValueError):
+            continue
+        onset_age_counter[age_int] += person.get('weight', 1)
+
+    return _build_model_results(
+        summary_history=summary_history,
+        agent_weight=agent_weight,
+        initial_age_counter=initial_age_counter,
+        death_age_counter=death_age_counter,
+        survival_records=survival_records,
+        transition_history=transition_history,
+        risk_onset_tracker=risk_onset_tracker,
+        lifetime_risk_normal=lifetime_risk_normal,
+        lifetime_risk_all=lifetime_risk_all,
+        incidence_age_exposure=incidence_age_exposure,
+        incidence_age_onsets=incidence_age_onsets,
+        yearly_incidence_records=yearly_incidence_records,
+        age_band_alive_counts=age_band_alive_counts,
+        age_band_dementia_counts=age_band_dementia_counts,
+        onset_age_counter=onset_age_counter,
+    )
+
+
+# -------- Columnar engine (NumPy / Numba) --------
+#
+# The columnar engines hold the population as one array per attribute (sex, stage and living setting
+# as small integer codes, risk factors as a bitmask) and look every per-person quantity up in tables
+# compiled once per config from the scalar helpers above. Probabilities are tabulated per
+# (sex, age, risk mask), so the NumPy and Numba kernels compare the same uniforms against the same
+# numbers and produce identical trajectories.
+
+STAGE_CODES = {stage: code for code, stage in enumerate(DEMENTIA_STAGES)}
+SETTING_CODES = {setting: code for code, setting in enumerate(LIVING_SETTINGS)}
+DEATH_CODE = STAGE_CODES['death']
+MAX_COLUMNAR_RISK_FACTORS = 10
+
+def _columnar_sex_labels(config: dict) -> List[str]:
+    """Canonical sex labels that can appear in a run (initial cohort and entrants)."""
+    labels: List[str] = []
+    op = config.get('open_population', {}) or {}
+    distributions = [config.get('sex_distribution') or {}]
+    if op.get('use', False):
+        distributions.append(op.get('sex_distribution') or config.get('sex_distribution') or {})
+    for dist in distributions:
+        if not dist:
+            if 'unspecified' not in labels:
+                labels.append('unspecified')
+            continue
+        for key in _normalize_weights({_canonical_sex_label(k): float(v) for k, v in dist.items()}):
+            if key not in labels:
+                labels.append(key)
+    return labels
+
+def _columnar_max_age(config: dict) -> int:
+    """Length of the integer-age lookup tables: oldest possible starting age plus the horizon."""
+    oldest = [int(config.get('initial_age_range', (35, 100))[1])]
+    oldest.extend(int(age) for age in (config.get('initial_age_weights') or {}))
+    band_sources = [config.get('initial_age_band_weights') or {}]
+    op = config.get('open_population', {}) or {}
+    band_sources.append(op.get('age_band_weights') or {})
+    band_sources.extend((op.get('age_band_weights_schedule') or {}).values())
+    for bands in band_sources:
+        oldest.extend(int(band[1]) for band in bands if isinstance(band, tuple) and band[1] is not None)
+    if op.get('fixed_entry_age') is not None:
+        oldest.append(int(op['fixed_entry_age']))
+    horizon = int(config['number_of_timesteps']) * int(config['time_step_years'])
+    return max(oldest) + horizon + 1
+
+def _stage_cdf(mix: Optional[Dict[str, float]], default_stage: str) -> np.ndarray:
+    """Cumulative probabilities over the alive stage codes, mirroring sample_stage_from_mix."""
+    probs = np.zeros(DEATH_CODE)
+    try:
+        weights = _normalize_weights(mix) if mix else {default_stage: 1.0}
+    except ValueError:
+        weights = {default_stage: 1.0}
+    for stage, weight in weights.items():
+        if stage not in STAGE_CODES or STAGE_CODES[stage] == DEATH_CODE:
+            raise ValueError(f"Unsupported stage {stage!r} in initial stage mix.")
+        probs[STAGE_CODES[stage]] += weight
+    return np.cumsum(probs)
+
+def _hazard_to_prob_array(hazard: np.ndarray, dt: float) -> np.ndarray:
+    """Vectorised hazard_to_prob."""
+    return np.where(hazard > 0.0, 1.0 - np.exp(-np.maximum(hazard, 0.0) * dt), 0.0)
+
+def _risk_masked_hazard(base: np.ndarray, rr_pow: np.ndarray, mask_bits: np.ndarray) -> np.ndarray:
+    """Expand a (sex, age) base hazard to (sex, age, mask), multiplying active RRs in config order."""
+    hazard = np.repeat(base[:, :, None], mask_bits.shape[0], axis=2)
+    for k in range(mask_bits.shape[1]):
+        hazard[:, :, mask_bits[:, k]] *= rr_pow[k][:, :, None]
+    return hazard
+
+def compile_model_tables(config: dict) -> dict:
+    """
+    Tabulate every per-person model quantity by integer age for the columnar engines.
+
+    The tables are filled by calling the scalar helpers used by the python engine (hazards,
+    relative risks, utilities, costs, living-setting and prevalence lookups), so both engines
+    share one definition of the model.
+
+    Args:
+        config: Model configuration
+
+    Returns:
+        Dictionary of NumPy arrays indexed by stage, setting, sex code, age and risk mask,
+        plus the label lists ('sex_labels', 'risk_names') that define the codes.
+    """
+    dt = config['time_step_years']
+    if float(dt) <= 0 or not float(dt).is_integer():
+        raise ValueError("The columnar engines require a whole-year time_step_years; use engine='python'.")
+    dt = int(dt)
+
+    risk_defs = config.get('risk_factors', {}) or {}
+    risk_names = list(risk_defs)
+    n_risk = len(risk_names)
+    if n_risk > MAX_COLUMNAR_RISK_FACTORS:
+        raise ValueError(
+            f"The columnar engines support at most {MAX_COLUMNAR_RISK_FACTORS} risk factors "
+            f"(got {n_risk}); use engine='python'."
+        )
+    masks = np.arange(1 << n_risk)
+    mask_bits = ((masks[:, None] >> np.arange(n_risk)) & 1).astype(bool)
+
+    sex_labels = _columnar_sex_labels(config)
+    n_ages = _columnar_max_age(config)
+    ages = range(n_ages)
+    alive_stages = DEMENTIA_STAGES[:DEATH_CODE]
+
+    def _rr_pow(transition: str) -> np.ndarray:
+        table = np.ones((n_risk, len(sex_labels), n_ages))
+        for k, name in enumerate(risk_names):
+            weight = _get_rr_weight(config, name, transition)
+            for s, sex in enumerate(sex_labels):
+                for age in ages:
+                    table[k, s, age] = get_relative_risk_for_person(risk_defs[name], transition, age, sex) ** weight
+        return table
+
+    def _transition_hazard(transition: str) -> np.ndarray:
+        h0 = base_hazard_from_duration(config['stage_transition_durations'].get(transition))
+        base = np.array([[h0 * get_age_hr_for_transition(age, config, transition) for age in ages]
+                         for _ in sex_labels])
+        return _risk_masked_hazard(base, _rr_pow(transition), mask_bits)
+
+    progression_prob = np.stack([
+        np.minimum(1.0, _hazard_to_prob_array(_transition_hazard(transition), dt))
+        for transition in ('mild_to_moderate', 'moderate_to_severe')
+    ])
+
+    # Onset: either a fixed duration-driven table or base probability x calendar growth per step
+    if 'normal_to_mild' in config['stage_transition_durations']:
+        onset_fixed_prob = np.minimum(1.0, _hazard_to_prob_array(_transition_hazard('normal_to_mild'), dt))
+        onset_age_hr = np.ones(n_ages)
+        onset_rr_pow = np.ones((n_risk, len(sex_labels), n_ages))
+    else:
+        onset_fixed_prob = None
+        onset_age_hr = np.array([get_age_hr_for_transition(age, config, 'onset') for age in ages])
+        onset_rr_pow = _rr_pow('onset')
+
+    # Mortality: background x stage multiplier, plus severe->death as a competing risk
+    mortality_mults = config.get('dementia_mortality_multipliers', {})
+    severe_hazard = _transition_hazard('severe_to_death')
+    death_prob = np.zeros((DEATH_CODE, len(sex_labels), n_ages, masks.size))
+    for stage_code, stage in enumerate(alive_stages):
+        h_bg = np.array([
+            [get_background_mortality_hazard(age, _background_mortality_table_for_sex(config, sex))
+             * get_dementia_mortality_multiplier(stage, mortality_mults) for age in ages]
+            for sex in sex_labels
+        ])
+        h_total = np.repeat(h_bg[:, :, None], masks.size, axis=2)
+        if stage == 'severe':
+            h_total = h_total + severe_hazard
+        death_prob[stage_code] = _hazard_to_prob_array(h_total, dt)
+
+    to_institution = np.zeros((DEATH_CODE, n_ages))
+    to_home = np.zeros((DEATH_CODE, n_ages))
+    for stage in ('mild', 'moderate', 'severe'):
+        for age in ages:
+            probs = _select_living_setting_transition(config, stage, float(age))
+            to_institution[STAGE_CODES[stage], age] = probs.get('to_institution', 0.0)
+            to_home[STAGE_CODES[stage], age] = probs.get('to_home', 0.0)
+
+    patient_qaly = np.zeros((DEATH_CODE, len(LIVING_SETTINGS), len(sex_labels), n_ages))
+    caregiver_qaly = np.zeros_like(patient_qaly)
+    cost_nhs = np.zeros((DEATH_CODE, len(LIVING_SETTINGS)))
+    cost_informal = np.zeros_like(cost_nhs)
+    for stage_code, stage in enumerate(alive_stages):
+        for setting_code, setting in enumerate(LIVING_SETTINGS):
+            costs = config['costs'].get(stage, {}).get(setting, {'nhs': 0.0, 'informal': 0.0})
+            cost_nhs[stage_code, setting_code] = costs['nhs']
+            cost_informal[stage_code, setting_code] = costs['informal']
+            for s, sex in enumerate(sex_labels):
+                for age in ages:
+                    patient, caregiver = _cycle_utility_weights(config, stage, setting, age, sex)
+                    patient_qaly[stage_code, setting_code, s, age] = patient
+                    caregiver_qaly[stage_code, setting_code, s, age] = caregiver
+
+    # Initial-state lookups
+    stage_mix_config = config.get('initial_stage_mix', None)
+    risk_prevalence = np.zeros((n_risk, len(sex_labels), n_ages))
+    dementia_prevalence = np.full((len(sex_labels), n_ages), np.nan)
+    prevalent_stage_cdf = np.zeros((len(sex_labels), DEATH_CODE))
+    fallback_stage_cdf = np.zeros((len(sex_labels), n_ages, DEATH_CODE))
+    for s, sex in enumerate(sex_labels):
+        prevalent_stage_cdf[s] = _stage_cdf(get_dementia_stage_weights_for_sex(stage_mix_config, sex), 'mild')
+        for age in ages:
+            for k, name in enumerate(risk_names):
+                risk_prevalence[k, s, age] = get_prevalence_for_person(risk_defs[name], age, sex)
+            prevalence = get_dementia_prevalence_for_age_and_sex(
+                config.get('initial_dementia_prevalence_by_age_band'), age, sex
+            )
+            if prevalence is not None:
+                dementia_prevalence[s, age] = prevalence
+            stage_weights = get_stage_mix_for_age_and_sex(config.get('initial_stage_mix_by_age_band'), age, sex)
+            if stage_weights is None:
+                stage_weights = get_stage_mix_for_sex(stage_mix_config, sex)
+            fallback_stage_cdf[s, age] = _stage_cdf(stage_weights, 'cognitively_normal')
+
+    def _band_index(bands: List[Tuple[int, Optional[int]]]) -> np.ndarray:
+        lookup = np.full(n_ages, -1, dtype=np.int64)
+        for age in ages:
+            band = assign_age_to_reporting_band(float(age), bands)
+            if band is not None:
+                lookup[age] = bands.index(band)
+        return lookup
+
+    return {
+        'dt': dt,
+        'n_ages': n_ages,
+        'sex_labels': sex_labels,
+        'risk_names': risk_names,
+        'n_masks': int(masks.size),
+        'mask_bits': mask_bits,
+        'progression_prob': progression_prob,
+        'onset_fixed_prob': onset_fixed_prob,
+        'onset_base_hazard': prob_to_hazard(config.get('base_onset_probability', 0.0), dt=dt),
+        'onset_age_hr': onset_age_hr,
+        'onset_rr_pow': onset_rr_pow,
+        'death_prob': death_prob,
+        'to_institution': to_institution,
+        'to_home': to_home,
+        'patient_qaly': patient_qaly,
+        'caregiver_qaly': caregiver_qaly,
+        'cost_nhs': cost_nhs,
+        'cost_informal': cost_informal,
+        'discount_rate': float(config.get('discount_rate_annual', 0.0)),
+        'risk_prevalence': risk_prevalence,
+        'dementia_prevalence': dementia_prevalence,
+        'prevalent_stage_cdf': prevalent_stage_cdf,
+        'fallback_stage_cdf': fallback_stage_cdf,
+        'incidence_band': _band_index(INCIDENCE_AGE_BANDS),
+        'reporting_band': _band_index(REPORTING_AGE_BANDS),
+    }
+
+def _columnar_onset_probability(tables: dict, config: dict, time_step: int) -> np.ndarray:
+    """Onset probability by (sex, age, risk mask) for one time step (includes incidence growth)."""
+    if tables['onset_fixed_prob'] is not None:
+        return tables['onset_fixed_prob']
+    h0 = tables['onset_base_hazard'] * _incidence_growth_multiplier(config, time_step)
+    base = np.tile(h0 * tables['onset_age_hr'], (len(tables['sex_labels']), 1))
+    hazard = _risk_masked_hazard(base, tables['onset_rr_pow'], tables['mask_bits'])
+    return _hazard_to_prob_array(hazard, tables['dt'])
+
+# Columnar population state: one array per attribute, sized for the initial cohort plus all entrants.
+# These are the widest dtypes; columnar_dtypes() narrows age, risk mask and accumulators per config['storage'].
+COLUMNAR_FIELDS = {
+    'age': np.int16,
+    'sex': np.int8,
+    'stage': np.int8,
+    'setting': np.int8,            # -1 once dead
+    'alive': np.bool_,
+    'risk_mask': np.uint16,
+    'weight': np.float64,
+    'baseline_stage': np.int8,
+    'entry_age': np.int16,
+    'entry_step': np.int16,
+    'death_step': np.int16,        # -1 while alive
+    'ever_dementia': np.bool_,
+    'age_at_onset': np.float32,    # NaN until onset (whole ages, exact in float32)
+    'qalys_patient': np.float64,
+    'qalys_caregiver': np.float64,
+    'costs_nhs': np.float64,
+    'costs_informal': np.float64,
+}
+
+ACCUMULATOR_FIELDS = ('qalys_patient', 'qalys_caregiver', 'costs_nhs', 'costs_informal')
+STORAGE_DTYPE_OPTIONS = {
+    'age_dtype': ('uint8', 'int16'),
+    'accumulator_dtype': ('float64', 'float32'),
+}
+
+# Rough per-record footprints used by estimate_memory (measured on the default config)
+PYTHON_ENGINE_BYTES_PER_PERSON = 900          # person dict incl. risk-factor dict and boxed floats
+SURVIVAL_RECORD_BYTES = 420                   # one collect_individual_survival() dict
+COLUMNAR_STEP_BYTES_PER_RECORD = {'numpy': 160, 'jit': 48}   # uniforms, row index and kernel temporaries
+PROCESS_BASELINE_BYTES = 100 * 1024 ** 2      # interpreter plus numpy/pandas/matplotlib imports
+
+def _storage_config(config: dict) -> dict:
+    """Validated storage policy (config['storage']) with defaults filled in."""
+    storage = {'age_dtype': 'uint8', 'accumulator_dtype': 'float64', 'memory_budget_gb': None,
+               'memory_headroom': 0.85, 'block_size': None, 'block_dir': None}
+    storage.update(config.get('storage') or {})
+    for key, allowed in STORAGE_DTYPE_OPTIONS.items():
+        if storage[key] not in allowed:
+            raise ValueError(f"storage['{key}'] must be one of {allowed}, got {storage[key]!r}.")
+    budget = storage['memory_budget_gb']
+    if budget is not None and float(budget) <= 0:
+        raise ValueError("storage['memory_budget_gb'] must be positive or None.")
+    if not 0 < float(storage['memory_headroom']) <= 1:
+        raise ValueError("storage['memory_headroom'] must be in (0, 1].")
+    if storage['block_size'] is not None and int(storage['block_size']) <= 0:
+        raise ValueError("storage['block_size'] must be a positive number of records or None.")
+    return storage
+
+def columnar_dtypes(config: dict, n_ages: Optional[int] = None) -> Dict[str, np.dtype]:
+    """
+    Per-field dtypes for the columnar population under the configured storage policy.
+
+    Ages use ``storage['age_dtype']`` (uint8 unless ages can exceed 255), the risk-factor bitmask is
+    uint8 for up to 8 factors and uint16 otherwise, and QALY/cost accumulators use
+    ``storage['accumulator_dtype']``. Agent weights stay float64.
+    """
+    storage = _storage_config(config)
+    if n_ages is None:
+        n_ages = _columnar_max_age(config)
+    dtypes = {name: np.dtype(dtype) for name, dtype in COLUMNAR_FIELDS.items()}
+    age_dtype = np.dtype(storage['age_dtype'])
+    if n_ages - 1 > np.iinfo(age_dtype).max:
+        raise ValueError(f"Ages up to {n_ages - 1} do not fit storage['age_dtype'] = {storage['age_dtype']!r}.")
+    dtypes['age'] = dtypes['entry_age'] = age_dtype
+    n_risk = len(config.get('risk_factors', {}) or {})
+    dtypes['risk_mask'] = np.dtype(np.uint8 if n_risk <= 8 else np.uint16)
+    for name in ACCUMULATOR_FIELDS:
+        dtypes[name] = np.dtype(storage['accumulator_dtype'])
+    return dtypes
+
+def _columnar_allocate(capacity: int, dtypes: Optional[Dict[str, np.dtype]] = None) -> Dict[str, np.ndarray]:
+    """Allocate an empty columnar population with room for ``capacity`` records."""
+    dtypes = dtypes or COLUMNAR_FIELDS
+    state = {name: np.zeros(capacity, dtype=dtype) for name, dtype in dtypes.items()}
+    state['death_step'].fill(-1)
+    state['setting'].fill(-1)
+    state['age_at_onset'].fill(np.nan)
+    return state
+
+def _columnar_store(capacity: int, config: dict, dtypes: Dict[str, np.dtype]) -> dict:
+    """
+    Block store for the columnar population.
+
+    Records live in fixed-size blocks of ``storage['block_size']`` (one block holding every record
+    when unset). With ``storage['block_dir']`` the blocks are ``.npy`` memmaps in a per-run temporary
+    directory, so resident memory is bounded by the block being processed rather than the population.
+    """
+    storage = _storage_config(config)
+    block_size = int(storage['block_size'] or max(1, capacity))
+    directory = None
+    if storage['block_dir'] is not None:
+        Path(storage['block_dir']).mkdir(parents=True, exist_ok=True)
+        directory = Path(tempfile.mkdtemp(prefix='ibm_blocks_', dir=storage['block_dir']))
+    return {'block_size': block_size, 'dtypes': dtypes, 'directory': directory, 'blocks': [], 'counts': []}
+
+def _store_new_block(store: dict) -> Dict[str, np.ndarray]:
+    if store['directory'] is None:
+        block = _columnar_allocate(store['block_size'], store['dtypes'])
+    else:
+        index = len(store['blocks'])
+        block = {
+            name: np.lib.format.open_memmap(store['directory'] / f'block_{index:05d}_{name}.npy', mode='w+',
+                                            dtype=dtype, shape=(store['block_size'],))
+            for name, dtype in store['dtypes'].items()
+        }
+        block['death_step'].fill(-1)
+        block['setting'].fill(-1)
+        block['age_at_onset'].fill(np.nan)
+    store['blocks'].append(block)
+    store['counts'].append(0)
+    return block
+
+def _store_append(store: dict, count: int) -> List[Tuple[Dict[str, np.ndarray], slice]]:
+    """Reserve ``count`` new records at the end of the store as (block, slice) segments in order."""
+    segments = []
+    while count > 0:
+        if not store['blocks'] or store['counts'][-1] == store['block_size']:
+            _store_new_block(store)
+        start = store['counts'][-1]
+        take = min(count, store['block_size'] - start)
+        segments.append((store['blocks'][-1], slice(start, start + take)))
+        store['counts'][-1] += take
+        count -= take
+    return segments
+
+def _store_segments(store: dict) -> List[Tuple[int, Dict[str, np.ndarray], int]]:
+    """(first record ID, block, filled count) for every block, in record order."""
+    return [(index * store['block_size'], block, n)
+            for index, (block, n) in enumerate(zip(store['blocks'], store['counts']))]
+
+def _close_store(store: dict) -> None:
+    """Drop the blocks and delete any disk-backed block files."""
+    store['blocks'].clear()
+    store['counts'].clear()
+    if store['directory'] is not None:
+        shutil.rmtree(store['directory'], ignore_errors=True)
+
+def estimate_memory(config: dict, n_workers: int = 1, engine: Optional[str] = None) -> dict:
+    """
+    Predict peak memory for a planned run before launching it.
+
+    Args:
+        config: Model configuration (population, entrants, horizon, engine, storage policy)
+        n_workers: Concurrent model runs, e.g. the PSA job count
+        engine: Engine override (defaults to config['engine'])
+
+    Returns:
+        Dictionary with the record count, the per-run breakdown in bytes ('population_bytes',
+        'table_bytes', 'step_bytes', 'results_bytes', 'per_run_bytes'), 'peak_bytes' / 'peak_gb'
+        across all workers, the configured 'budget_bytes' and 'within_budget'. For the columnar
+        engines, per-step temporaries scale with ``storage['block_size']``, and with
+        ``storage['block_dir']`` only one block of the population counts as resident.
+    """
+    engine_name = resolve_engine(engine, config)
+    storage = _storage_config(config)
+    n_workers = max(1, int(n_workers))
+    op = config.get('open_population', {}) or {}
+    entrants = max(0, int(op.get('entrants_per_year', 0))) if op.get('use', False) else 0
+    records = int(config['population']) + entrants * int(config['number_of_timesteps'])
+
+    if engine_name == 'python':
+        bytes_per_record = PYTHON_ENGINE_BYTES_PER_PERSON
+        table_bytes = 0
+        step_bytes = 0
+    else:
+        n_ages = _columnar_max_age(config)
+        bytes_per_record = sum(dtype.itemsize for dtype in columnar_dtypes(config, n_ages).values())
+        # (sex, age, mask) grids: two progression, four mortality, onset and its per-step rebuild
+        grid = len(_columnar_sex_labels(config)) * n_ages * (1 << len(config.get('risk_factors', {}) or {}))
+        table_bytes = 10 * grid * 8
+        block_records = min(records, int(storage['block_size'] or records))
+        step_bytes = COLUMNAR_STEP_BYTES_PER_RECORD[engine_name] * block_records
+    resident_records = records
+    if engine_name != 'python' and storage['block_dir'] is not None:
+        resident_records = block_records
+    population_bytes = bytes_per_record * resident_records
+    results_bytes = SURVIVAL_RECORD_BYTES * records if config.get('store_individual_survival', True) else 0
+    per_run_bytes = PROCESS_BASELINE_BYTES + population_bytes + table_bytes + step_bytes + results_bytes
+    # Parallel runs each hold a full model; the parent process stays resident alongside them
+    peak_bytes = per_run_bytes * n_workers + (PROCESS_BASELINE_BYTES if n_workers > 1 else 0)
+
+    budget_gb = storage['memory_budget_gb']
+    budget_bytes = int(float(budget_gb) * 1024 ** 3) if budget_gb is not None else None
+    return {
+        'engine': engine_name,
+        'records': records,
+        'bytes_per_record': bytes_per_record,
+        'population_bytes': population_bytes,
+        'table_bytes': table_bytes,
+        'step_bytes': step_bytes,
+        'results_bytes': results_bytes,
+        'per_run_bytes': per_run_bytes,
+        'n_workers': n_workers,
+        'peak_bytes': peak_bytes,
+        'peak_gb': peak_bytes / 1024 ** 3,
+        'budget_bytes': budget_bytes,
+        'within_budget': budget_bytes is None or peak_bytes <= budget_bytes,
+    }
+
+def check_memory_budget(config: dict, n_workers: int = 1, engine: Optional[str] = None) -> dict:
+    """Return estimate_memory(...) or raise MemoryError if it exceeds storage['memory_budget_gb']."""
+    estimate = estimate_memory(config, n_workers=n_workers, engine=engine)
+    if not estimate['within_budget']:
+        raise MemoryError(
+            f"Estimated peak memory {estimate['peak_gb']:.2f} GB for {estimate['records']:,} records "
+            f"x {estimate['n_workers']} worker(s) on the {estimate['engine']} engine exceeds the "
+            f"configured budget of {estimate['budget_bytes'] / 1024 ** 3:.2f} GB. Reduce the population, "
+            f"the worker count or use a compact columnar engine."
+        )
+    return estimate
+
+def available_memory_bytes() -> Optional[int]:
+    """
+    Memory this process can still use: MemAvailable, further limited by a cgroup (container) limit.
+
+    Falls back to psutil where /proc is missing; None when neither source is available.
+    """
+    candidates = []
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    candidates.append(int(line.split()[1]) * 1024)
+                    break
+    except OSError:
+        pass
+    # cgroup v2, then v1: the limit minus current usage (unlimited shows as 'max' or a huge number)
+    for limit_path, usage_path in (('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+                                   ('/sys/fs/cgroup/memory/memory.limit_in_bytes',
+                                    '/sys/fs/cgroup/memory/memory.usage_in_bytes')):
+        try:
+            limit = Path(limit_path).read_text().strip()
+            usage = int(Path(usage_path).read_text().strip())
+        except (OSError, ValueError):
+            continue
+        if limit.isdigit() and int(limit) < 1 << 60:
+            candidates.append(max(0, int(limit) - usage))
+        break
+    if not candidates:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        candidates.append(int(psutil.virtual_memory().available))
+    return min(candidates)
+
+def plan_psa_workers(config: dict, n_jobs: Optional[int] = None, *,
+                     available_bytes: Optional[int] = None, engine: Optional[str] = None) -> dict:
+    """
+    Size a PSA pool so that concurrent model runs fit in memory.
+
+    The memory for worker runs is storage['memory_budget_gb'] (less the parent process) when set,
+    otherwise storage['memory_headroom'] of the currently available RAM. The job count is the
+    requested one (default cpu_count()) capped at that memory divided by estimate_memory's
+    per-run peak, and never below 1.
+
+    Args:
+        config: Model configuration of the runs (population, entrants, horizon, engine, storage)
+        n_jobs: Requested job count (None = cpu_count())
+        available_bytes: Available memory override (default available_memory_bytes())
+        engine: Engine override (defaults to config['engine'])
+
+    Returns:
+        Dictionary with 'requested', 'n_jobs', 'per_run_bytes' (estimate), 'worker_budget_bytes'
+        (None when memory cannot be determined) and 'limited_by' ('cpu', 'memory' or 'budget')
+    """
+    requested = _resolve_n_jobs(n_jobs)
+    storage = _storage_config(config)
+    per_run_bytes = estimate_memory(config, n_workers=1, engine=engine)['per_run_bytes']
+    if storage['memory_budget_gb'] is not None:
+        worker_budget = int(float(storage['memory_budget_gb']) * 1024 ** 3) - PROCESS_BASELINE_BYTES
+        source = 'budget'
+    else:
+        available = available_memory_bytes() if available_bytes is None else int(available_bytes)
+        worker_budget = None if available is None else int(available * float(storage['memory_headroom']))
+        source = 'memory'
+    plan = {'requested': requested, 'n_jobs': requested, 'per_run_bytes': per_run_bytes,
+            'worker_budget_bytes': worker_budget, 'limited_by': 'cpu'}
+    if worker_budget is not None:
+        fits = max(1, worker_budget // per_run_bytes)
+        if fits < requested:
+            plan['n_jobs'], plan['limited_by'] = int(fits), source
+    return plan
+
+def _inverse_cdf(cdf: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """Index drawn from a cumulative distribution (last axis) by uniforms ``u``."""
+    if cdf.ndim == 1:
+        index = np.searchsorted(cdf, u, side='right')
+        return np.minimum(index, cdf.size - 1)
+    index = (u[:, None] >= cdf).sum(axis=1)
+    return np.minimum(index, cdf.shape[-1] - 1)
+
+def _columnar_sample_ages(age_config: dict, u_choice: np.ndarray, u_within: np.ndarray) -> np.ndarray:
+    """Vectorised sample_age: exact-age weights, band weights (uniform within band) or a uniform range."""
+    if age_config.get('initial_age_weights'):
+        weights = _normalize_weights(age_config['initial_age_weights'])
+        values = np.array(list(weights), dtype=np.int64)
+        return values[_inverse_cdf(np.cumsum(list(weights.values())), u_choice)]
+    if age_config.get('initial_age_band_weights'):
+        weights = _normalize_weights(age_config['initial_age_band_weights'])
+        bands = np.array(list(weights), dtype=np.int64)
+        chosen = bands[_inverse_cdf(np.cumsum(list(weights.values())), u_choice)]
+        return chosen[:, 0] + np.floor(u_within * (chosen[:, 1] - chosen[:, 0] + 1)).astype(np.int64)
+    lo, hi = age_config['initial_age_range']
+    return int(lo) + np.floor(u_within * (int(hi) - int(lo) + 1)).astype(np.int64)
+
+def _columnar_sample_sex(sex_distribution: Dict[str, float], tables: dict, u: np.ndarray) -> np.ndarray:
+    """Vectorised sample_sex returning sex codes into tables['sex_labels']."""
+    if not sex_distribution:
+        return np.full(u.size, tables['sex_labels'].index('unspecified'), dtype=np.int64)
+    weights = _normalize_weights({_canonical_sex_label(k): float(v) for k, v in sex_distribution.items()})
+    codes = np.array([tables['sex_labels'].index(label) for label in weights], dtype=np.int64)
+    return codes[_inverse_cdf(np.cumsum(list(weights.values())), u)]
+
+def _columnar_risk_masks(tables: dict, sex: np.ndarray, age: np.ndarray, u: np.ndarray) -> np.ndarray:
+    """Draw risk-factor flags (one uniform per factor) and pack them into a bitmask."""
+    mask = np.zeros(sex.size, dtype=np.int64)
+    for k in range(len(tables['risk_names'])):
+        active = u[:, k] < tables['risk_prevalence'][k, sex, age]
+        mask |= active.astype(np.int64) << k
+    return mask
+
+def _columnar_initialize_population(population: int,
+                                    config: dict,
+                                    tables: dict,
+                                    rng: np.random.Generator,
+                                    store: dict) -> Counter:
+    """
+    Columnar counterpart of initialize_population, appending ``population`` records to the store.
+
+    Each record consumes one row of uniforms: age choice, age within band, sex, prevalent-dementia
+    draw, stage draw, then one per risk factor. Rows are drawn block by block in record order, which
+    reproduces a single ``rng.random((population, 5 + n_risk))`` draw whatever the block size.
+    """
+    n_risk = len(tables['risk_names'])
+    agent_weight = get_agent_weight(config)
+    sampling = _initial_population_sampling_config(config)
+    prevalent_factor = sampling['prevalent_dementia_oversampling']
+    if sampling['method'] != 'proportional':
+        strata = [stratum for stratum in plan_initial_population_strata(population, config) if stratum['count']]
+        stratum_ends = np.cumsum([stratum['count'] for stratum in strata])
+        stratum_low = np.array([stratum['band'][0] for stratum in strata], dtype=np.int64)
+        stratum_high = np.array([stratum['band'][1] for stratum in strata], dtype=np.int64)
+        stratum_sex = np.array([tables['sex_labels'].index(stratum['sex']) for stratum in strata], dtype=np.int64)
+        stratum_weight = np.array([float(stratum['weight']) for stratum in strata])
+
+    age_totals: Counter = Counter()
+    first = 0
+    for state, rows in _store_append(store, population):
+        count = rows.stop - rows.start
+        u = rng.random((count, 5 + n_risk))
+        if sampling['method'] == 'proportional':
+            age = _columnar_sample_ages(config, u[:, 0], u[:, 1])
+            sex = _columnar_sample_sex(config.get('sex_distribution', {}), tables, u[:, 2])
+            weight = np.full(count, float(agent_weight))
+        else:
+            stratum = np.searchsorted(stratum_ends, np.arange(first, first + count), side='right')
+            low = stratum_low[stratum]
+            age = low + np.floor(u[:, 1] * (stratum_high[stratum] - low + 1)).astype(np.int64)
+            sex = stratum_sex[stratum]
+            weight = stratum_weight[stratum]
+        first += count
+
+        prevalence = tables['dementia_prevalence'][sex, age]
+        has_prevalence = ~np.isnan(prevalence)
+        draw_probability = np.where(has_prevalence, prevalence, 0.0)
+        if prevalent_factor != 1.0:
+            tilt = (draw_probability > 0.0) & (draw_probability < 1.0)
+            tilted = prevalent_factor * draw_probability / (1.0 - draw_probability + prevalent_factor * draw_probability)
+            draw_probability = np.where(tilt, tilted, draw_probability)
+        prevalent = has_prevalence & (u[:, 3] < draw_probability)
+
+        stage = np.zeros(count, dtype=np.int64)
+        if prevalent.any():
+            stage[prevalent] = _inverse_cdf(tables['prevalent_stage_cdf'][sex[prevalent]], u[prevalent, 4])
+        if (~has_prevalence).any():
+            fallback = ~has_prevalence
+            stage[fallback] = _inverse_cdf(tables['fallback_stage_cdf'][sex[fallback], age[fallback]], u[fallback, 4])
+        if prevalent_factor != 1.0:
+            tilted_rows = has_prevalence & (draw_probability != prevalence)
+            ratio = np.where(prevalent,
+                             prevalence / np.where(prevalent, draw_probability, 1.0),
+                             (1.0 - prevalence) / np.where(prevalent, 1.0, 1.0 - draw_probability))
+            weight = np.where(tilted_rows, weight * ratio, weight)
+
+        dementia = stage > 0
+        state['age'][rows] = age
+        state['sex'][rows] = sex
+        state['stage'][rows] = stage
+        state['baseline_stage'][rows] = stage
+        state['setting'][rows] = SETTING_CODES['home']
+        state['alive'][rows] = True
+        state['risk_mask'][rows] = _columnar_risk_masks(tables, sex, age, u[:, 5:])
+        state['weight'][rows] = weight
+        state['entry_age'][rows] = age
+        state['entry_step'][rows] = 0
+        state['ever_dementia'][rows] = dementia
+        state['age_at_onset'][rows] = np.where(dementia, age.astype(np.float64), np.nan)
+        age_totals.update(_weighted_counter(age, weight))
+
+    return Counter({age: _as_count(total) for age, total in age_totals.items()})
+
+def _columnar_add_entrants(config: dict,
+                           tables: dict,
+                           rng: np.random.Generator,
+                           store: dict,
+                           calendar_year: int,
+                           time_step: int) -> int:
+    """Columnar counterpart of add_new_entrants; returns the number of records appended to the store."""
+    op = config.get("open_population", {}) or {}
+    if not op.get("use", False):
+        return 0
+    n_new = int(op.get("entrants_per_year", 0))
+    if n_new <= 0:
+        return 0
+
+    baseline_weights = config.get("initial_age_band_weights", {})
+    age_band_weights = age_band_weights_for_year(op, calendar_year, baseline_weights) or baseline_weights
+    sex_dist = op.get("sex_distribution") or config.get("sex_distribution", {})
+    fixed_entry_age = op.get("fixed_entry_age")
+    age_sampling_config = {
+        "initial_age_band_weights": age_band_weights,
+        "initial_age_range": config.get("initial_age_range", (35, 100)),
+    }
+
+    for state, rows in _store_append(store, n_new):
+        count = rows.stop - rows.start
+        u = rng.random((count, 3 + len(tables['risk_names'])))
+        if fixed_entry_age is not None:
+            age = np.full(count, int(fixed_entry_age), dtype=np.int64)
+        else:
+            age = _columnar_sample_ages(age_sampling_config, u[:, 0], u[:, 1])
+        sex = _columnar_sample_sex(sex_dist, tables, u[:, 2])
+
+        state['age'][rows] = age
+        state['sex'][rows] = sex
+        state['stage'][rows] = STAGE_CODES['cognitively_normal']
+        state['baseline_stage'][rows] = STAGE_CODES['cognitively_normal']
+        state['setting'][rows] = SETTING_CODES['home']
+        state['alive'][rows] = True
+        state['risk_mask'][rows] = _columnar_risk_masks(tables, sex, age, u[:, 3:])
+        state['weight'][rows] = float(get_agent_weight(config))
+        state['entry_age'][rows] = age
+        state['entry_step'][rows] = time_step
+    return n_new
+
+def _weighted_counter(keys: np.ndarray, weights: np.ndarray) -> Counter:
+    """Counter of summed weights per integer key, keeping keys that occur (as run_model does)."""
+    counter: Counter = Counter()
+    if keys.size == 0:
+        return counter
+    keys = np.asarray(keys, dtype=np.int64)
+    offset = int(keys.min())
+    totals = np.bincount(keys - offset, weights=weights)
+    present = np.bincount(keys - offset)
+    for index in np.flatnonzero(present):
+        counter[int(index) + offset] = _as_count(totals[index])
+    return counter
+
+# Step kernels. Each has a NumPy implementation and a loop implementation that is compiled with
+# Numba for engine='jit'; both read the same uniforms and tables.
+
+def _progression_buffers(tables: dict) -> Dict[str, np.ndarray]:
+    n_sex = len(tables['sex_labels'])
+    n_bands = len(INCIDENCE_AGE_BANDS)
+    return {
+        'stage_start': np.zeros((2, len(DEMENTIA_STAGES))),                  # [weighted, records]
+        'transitions': np.zeros((2, len(DEMENTIA_STAGES), len(DEMENTIA_STAGES))),
+        'exposure': np.zeros((2, n_sex, n_bands)),
+        'band_onsets': np.zeros((2, n_sex, n_bands)),
+        'death_ages': np.zeros((2, tables['n_ages'])),
+        'risk_onsets': np.zeros((2, max(1, len(tables['risk_names'])))),     # [with, without]
+        'totals': np.zeros(2),                                               # [deaths, onsets]
+    }
+
+def _progression_numpy(state, rows, u, tables, onset_prob, time_step, out):
+    """Mortality (competing risks for severe) then stage progression for the alive ``rows``."""
+    dt = tables['dt']
+    stage = state['stage'][rows].astype(np.int64)
+    sex = state['sex'][rows].astype(np.int64)
+    age = state['age'][rows].astype(np.int64)
+    mask = state['risk_mask'][rows].astype(np.int64)
+    weight = state['weight'][rows]
+    n_stages = len(DEMENTIA_STAGES)
+    n_bands = len(INCIDENCE_AGE_BANDS)
+    n_sex = len(tables['sex_labels'])
+
+    out['stage_start'][0] += np.bincount(stage, weights=weight, minlength=n_stages)
+    out['stage_start'][1] += np.bincount(stage, minlength=n_stages)
+
+    band = tables['incidence_band'][age]
+    at_risk = (stage == 0) & (band >= 0)
+    cell = sex[at_risk] * n_bands + band[at_risk]
+    out['exposure'][0] += np.bincount(cell, weights=dt * weight[at_risk], minlength=n_sex * n_bands).reshape(n_sex, n_bands)
+    out['exposure'][1] += np.bincount(cell, minlength=n_sex * n_bands).reshape(n_sex, n_bands)
+
+    dies = u[:, 0] < tables['death_prob'][stage, sex, age, mask]
+    survives = ~dies
+    progress_prob = np.zeros(rows.size)
+    for stage_code in (0, 1, 2):
+        sel = survives & (stage == stage_code)
+        table = onset_prob if stage_code == 0 else tables['progression_prob'][stage_code - 1]
+        progress_prob[sel] = table[sex[sel], age[sel], mask[sel]]
+    advances = survives & (u[:, 1] < progress_prob)
+    end_stage = np.where(dies, DEATH_CODE, stage + advances)
+
+    cell = stage * n_stages + end_stage
+    out['transitions'][0] += np.bincount(cell, weights=weight, minlength=n_stages ** 2).reshape(n_stages, n_stages)
+    out['transitions'][1] += np.bincount(cell, minlength=n_stages ** 2).reshape(n_stages, n_stages)
+    out['death_ages'][0] += np.bincount(age[dies], weights=weight[dies], minlength=tables['n_ages'])
+    out['death_ages'][1] += np.bincount(age[dies], minlength=tables['n_ages'])
+    out['totals'][0] += weight[dies].sum()
+
+    onset = advances & (stage == 0)
+    onset_rows = rows[onset]
+    out['totals'][1] += weight[onset].sum()
+    banded = onset & (band >= 0)
+    cell = sex[banded] * n_bands + band[banded]
+    out['band_onsets'][0] += np.bincount(cell, weights=weight[banded], minlength=n_sex * n_bands).reshape(n_sex, n_bands)
+    out['band_onsets'][1] += np.bincount(cell, minlength=n_sex * n_bands).reshape(n_sex, n_bands)
+    for k in range(len(tables['risk_names'])):
+        exposed = ((mask[onset] >> k) & 1).astype(bool)
+        out['risk_onsets'][0, k] += weight[onset][exposed].sum()
+        out['risk_onsets'][1, k] += weight[onset][~exposed].sum()
+
+    state['stage'][rows] = end_stage
+    dead_rows = rows[dies]
+    state['alive'][dead_rows] = False
+    state['setting'][dead_rows] = -1
+    state['death_step'][dead_rows] = time_step
+    first_onset = ~state['ever_dementia'][onset_rows] | np.isnan(state['age_at_onset'][onset_rows])
+    state['age_at_onset'][onset_rows[first_onset]] = age[onset][first_onset]
+    state['ever_dementia'][onset_rows] = True
+
+def _accumulate_numpy(state, rows, u, tables, disc_factor):
+    """Living-setting transitions, then discounted QALYs/costs for the alive ``rows``."""
+    dt = tables['dt']
+    alive = state['alive'][rows]
+    rows = rows[alive]
+    u_setting = u[alive, 2]
+    stage = state['stage'][rows].astype(np.int64)
+    sex = state['sex'][rows].astype(np.int64)
+    age = state['age'][rows].astype(np.int64)
+    setting = state['setting'][rows].astype(np.int64)
+
+    dementia = stage > 0
+    at_home = setting == SETTING_CODES['home']
+    moves_in = dementia & at_home & (u_setting < tables['to_institution'][stage, age])
+    moves_home = dementia & ~at_home & (u_setting < tables['to_home'][stage, age])
+    setting = np.where(moves_in, SETTING_CODES['institution'], setting)
+    setting = np.where(moves_home | ~dementia, SETTING_CODES['home'], setting)
+    state['setting'][rows] = setting
+
+    state['qalys_patient'][rows] += (tables['patient_qaly'][stage, setting, sex, age] * dt) * disc_factor
+    state['qalys_caregiver'][rows] += (tables['caregiver_qaly'][stage, setting, sex, age] * dt) * disc_factor
+    state['costs_nhs'][rows] += (tables['cost_nhs'][stage, setting] * dt) * disc_factor
+    state['costs_informal'][rows] += (tables['cost_informal'][stage, setting] * dt) * disc_factor
+
+def _summary_buffers(tables: dict) -> Dict[str, np.ndarray]:
+    n_sex = len(tables['sex_labels'])
+    n_bands = len(INCIDENCE_AGE_BANDS)
+    return {
+        'stages': np.zeros(len(DEMENTIA_STAGES)),
+        'living': np.zeros(len(LIVING_SETTINGS)),
+        'reporting_bands': np.zeros(len(REPORTING_AGE_BANDS)),
+        # population_total, alive, age sum (alive), baseline alive, dementia, age sum (dementia),
+        # QALYs patient, QALYs caregiver, NHS costs, informal costs
+        'scalars': np.zeros(10),
+        'alive_by_band': np.zeros((2, n_sex, n_bands)),
+        'prevalent_by_band': np.zeros((2, n_sex, n_bands)),
+    }
+
+def _summary_numpy(state, n, tables, out):
+    """Weighted population totals over records [0, n)."""
+    weight = state['weight'][:n]
+    stage = state['stage'][:n].astype(np.int64)
+    alive = state['alive'][:n]
+    n_sex = len(tables['sex_labels'])
+    n_bands = len(INCIDENCE_AGE_BANDS)
+
+    out['stages'] += np.bincount(stage, weights=weight, minlength=len(DEMENTIA_STAGES))
+    scalars = out['scalars']
+    scalars[0] += weight.sum()
+    scalars[6] += (state['qalys_patient'][:n] * weight).sum()
+    scalars[7] += (state['qalys_caregiver'][:n] * weight).sum()
+    scalars[8] += (state['costs_nhs'][:n] * weight).sum()
+    scalars[9] += (state['costs_informal'][:n] * weight).sum()
+
+    w_alive = weight[alive]
+    age = state['age'][:n][alive].astype(np.int64)
+    stage_alive = stage[alive]
+    sex = state['sex'][:n][alive].astype(np.int64)
+    scalars[1] += w_alive.sum()
+    scalars[2] += (age * w_alive).sum()
+    scalars[3] += w_alive[state['entry_step'][:n][alive] == 0].sum()
+    out['living'] += np.bincount(state['setting'][:n][alive].astype(np.int64), weights=w_alive,
+                                 minlength=len(LIVING_SETTINGS))
+
+    dementia = (stage_alive > 0) & (stage_alive < DEATH_CODE)
+    scalars[4] += w_alive[dementia].sum()
+    scalars[5] += (age[dementia] * w_alive[dementia]).sum()
+    reporting = tables['reporting_band'][age]
+    keep = dementia & (reporting >= 0)
+    out['reporting_bands'] += np.bincount(reporting[keep], weights=w_alive[keep],
+                                          minlength=len(REPORTING_AGE_BANDS))
+
+    band = tables['incidence_band'][age]
+    for target, selector in (('alive_by_band', band >= 0), ('prevalent_by_band', (band >= 0) & dementia)):
+        cell = sex[selector] * n_bands + band[selector]
+        out[target][0] += np.bincount(cell, weights=w_alive[selector], minlength=n_sex * n_bands).reshape(n_sex, n_bands)
+        out[target][1] += np.bincount(cell, minlength=n_sex * n_bands).reshape(n_sex, n_bands)
+
+def _progression_loop(rows, u, stage_arr, sex_arr, age_arr, mask_arr, weight_arr, alive_arr, setting_arr,
+                      death_step_arr, ever_arr, onset_age_arr, death_prob, onset_prob, progression_prob,
+                      incidence_band, dt, time_step, n_risk, stage_start, transitions, exposure,
+                      band_onsets, death_ages, risk_onsets, totals):
+    """Per-record loop version of _progression_numpy (compiled by Numba for engine='jit')."""
+    for j in range(rows.shape[0]):
+        i = rows[j]
+        stage = stage_arr[i]
+        sex = sex_arr[i]
+        age = age_arr[i]
+        mask = mask_arr[i]
+        w = weight_arr[i]
+        stage_start[0, stage] += w
+        stage_start[1, stage] += 1.0
+        band = incidence_band[age]
+        if stage == 0 and band >= 0:
+            exposure[0, sex, band] += dt * w
+            exposure[1, sex, band] += 1.0
+
+        if u[j, 0] < death_prob[stage, sex, age, mask]:
+            stage_arr[i] = 4
+            alive_arr[i] = False
+            setting_arr[i] = -1
+            death_step_arr[i] = time_step
+            transitions[0, stage, 4] += w
+            transitions[1, stage, 4] += 1.0
+            death_ages[0, age] += w
+            death_ages[1, age] += 1.0
+            totals[0] += w
+            continue
+
+        end_stage = stage
+        if stage == 0:
+            if u[j, 1] < onset_prob[sex, age, mask]:
+                end_stage = 1
+                if (not ever_arr[i]) or np.isnan(onset_age_arr[i]):
+                    onset_age_arr[i] = age
+                ever_arr[i] = True
+                totals[1] += w
+                if band >= 0:
+                    band_onsets[0, sex, band] += w
+                    band_onsets[1, sex, band] += 1.0
+                for k in range(n_risk):
+                    if (mask >> k) & 1:
+                        risk_onsets[0, k] += w
+                    else:
+                        risk_onsets[1, k] += w
+        elif stage < 3:
+            if u[j, 1] < progression_prob[stage - 1, sex, age, mask]:
+                end_stage = stage + 1
+        stage_arr[i] = end_stage
+        transitions[0, stage, end_stage] += w
+        transitions[1, stage, end_stage] += 1.0
+
+def _accumulate_loop(rows, u, stage_arr, sex_arr, age_arr, alive_arr, setting_arr, to_institution, to_home,
+                     patient_qaly, caregiver_qaly, cost_nhs, cost_informal, dt, disc_factor,
+                     qalys_patient, qalys_caregiver, costs_nhs, costs_informal):
+    """Per-record loop version of _accumulate_numpy (compiled by Numba for engine='jit')."""
+    for j in range(rows.shape[0]):
+        i = rows[j]
+        if not alive_arr[i]:
+            continue
+        stage = stage_arr[i]
+        age = age_arr[i]
+        setting = setting_arr[i]
+        if stage > 0:
+            if setting == 0:
+                if u[j, 2] < to_institution[stage, age]:
+                    setting = 1
+            elif u[j, 2] < to_home[stage, age]:
+                setting = 0
+        else:
+            setting = 0
+        setting_arr[i] = setting
+        sex = sex_arr[i]
+        qalys_patient[i] += (patient_qaly[stage, setting, sex, age] * dt) * disc_factor
+        qalys_caregiver[i] += (caregiver_qaly[stage, setting, sex, age] * dt) * disc_factor
+        costs_nhs[i] += (cost_nhs[stage, setting] * dt) * disc_factor
+        costs_informal[i] += (cost_informal[stage, setting] * dt) * disc_factor
+
+def _summary_loop(n, weight_arr, stage_arr, alive_arr, age_arr, sex_arr, setting_arr, entry_step_arr,
+                  qalys_patient, qalys_caregiver, costs_nhs, costs_informal, reporting_band, incidence_band,
+                  stages, living, reporting_bands, scalars, alive_by_band, prevalent_by_band):
+    """Per-record loop version of _summary_numpy (compiled by Numba for engine='jit')."""
+    for i in range(n):
+        w = weight_arr[i]
+        stage = stage_arr[i]
+        scalars[0] += w
+        stages[stage] += w
+        scalars[6] += qalys_patient[i] * w
+        scalars[7] += qalys_caregiver[i] * w
+        scalars[8] += costs_nhs[i] * w
+        scalars[9] += costs_informal[i] * w
+        if not alive_arr[i]:
+            continue
+        age = age_arr[i]
+        sex = sex_arr[i]
+        scalars[1] += w
+        scalars[2] += age * w
+        if entry_step_arr[i] == 0:
+            scalars[3] += w
+        living[setting_arr[i]] += w
+        dementia = stage > 0 and stage < 4
+        if dementia:
+            scalars[4] += w
+            scalars[5] += age * w
+            if reporting_band[age] >= 0:
+                reporting_bands[reporting_band[age]] += w
+        band = incidence_band[age]
+        if band >= 0:
+            alive_by_band[0, sex, band] += w
+            alive_by_band[1, sex, band] += 1.0
+            if dementia:
+                prevalent_by_band[0, sex, band] += w
+                prevalent_by_band[1, sex, band] += 1.0
+
+_JIT_KERNELS: Dict[str, Any] = {}
+_NUMBA_FALLBACK_WARNED = False
+
+def _warn_numba_fallback() -> None:
+    """Warn (once per process) that engine='jit' runs on the NumPy kernels because Numba is missing."""
+    global _NUMBA_FALLBACK_WARNED
+    if not _NUMBA_FALLBACK_WARNED:
+        _NUMBA_FALLBACK_WARNED = True
+        warnings.warn("Numba is not installed; engine='jit' uses the NumPy engine kernels instead.",
+                      RuntimeWarning, stacklevel=3)
+
+def _jit_kernels() -> Optional[Dict[str, Any]]:
+    """Compile (once per process) the loop kernels with Numba; None if Numba is not installed."""
+    if not NUMBA_AVAILABLE:
+        return None
+    if not _JIT_KERNELS:
+        import numba
+        for name, func in (('progression', _progression_loop),
+                           ('accumulate', _accumulate_loop),
+                           ('summary', _summary_loop)):
+            _JIT_KERNELS[name] = numba.njit(cache=True, nogil=True)(func)
+    return _JIT_KERNELS
+
+def _progression_jit(state, rows, u, tables, onset_prob, time_step, out):
+    _JIT_KERNELS['progression'](
+        rows, u, state['stage'], state['sex'], state['age'], state['risk_mask'], state['weight'],
+        state['alive'], state['setting'], state['death_step'], state['ever_dementia'], state['age_at_onset'],
+        tables['death_prob'], onset_prob, tables['progression_prob'], tables['incidence_band'],
+        float(tables['dt']), time_step, len(tables['risk_names']),
+        out['stage_start'], out['transitions'], out['exposure'], out['band_onsets'], out['death_ages'],
+        out['risk_onsets'], out['totals'],
+    )
+
+def _accumulate_jit(state, rows, u, tables, disc_factor):
+    _JIT_KERNELS['accumulate'](
+        rows, u, state['stage'], state['sex'], state['age'], state['alive'], state['setting'],
+        tables['to_institution'], tables['to_home'], tables['patient_qaly'], tables['caregiver_qaly'],
+        tables['cost_nhs'], tables['cost_informal'], float(tables['dt']), disc_factor,
+        state['qalys_patient'], state['qalys_caregiver'], state['costs_nhs'], state['costs_informal'],
+    )
+
+def _summary_jit(state, n, tables, out):
+    _JIT_KERNELS['summary'](
+        n, state['weight'], state['stage'], state['alive'], state['age'], state['sex'], state['setting'],
+        state['entry_step'], state['qalys_patient'], state['qalys_caregiver'], state['costs_nhs'],
+        state['costs_informal'], tables['reporting_band'], tables['incidence_band'],
+        out['stages'], out['living'], out['reporting_bands'], out['scalars'], out['alive_by_band'],
+        out['prevalent_by_band'],
+    )
+
+def columnar_kernels(engine: str) -> Dict[str, Any]:
+    """
+    Return the step kernels for a columnar engine.
+
+    'jit' uses the Numba-compiled loops when Numba is installed and otherwise falls back to the
+    NumPy kernels (the results are the same, only slower).
+    """
+    if engine == 'jit':
+        if _jit_kernels() is not None:
+            return {'name': 'jit', 'progression': _progression_jit,
+                    'accumulate': _accumulate_jit, 'summary': _summary_jit}
+        _warn_numba_fallback()
+    return {'name': 'numpy', 'progression': _progression_numpy,
+            'accumulate': _accumulate_numpy, 'summary': _summary_numpy}
+
+def _by_sex_and_band(buffer: np.ndarray, tables: dict) -> Dict[str, Dict[Tuple[int, Optional[int]], float]]:
+    """Turn a [weighted, records] x sex x band buffer into run_model's nested sex -> band dicts."""
+    nested: Dict[str, Dict[Tuple[int, Optional[int]], float]] = {}
+    for s, b in zip(*np.nonzero(buffer[1])):
+        nested.setdefault(tables['sex_labels'][s], {})[INCIDENCE_AGE_BANDS[b]] = _as_count(buffer[0, s, b])
+    return nested
+
+def _columnar_summary(sums: Dict[str, np.ndarray],
+                      time_step: int,
+                      base_year: int,
+                      entrants: Union[int, float] = 0,
+                      deaths: Union[int, float] = 0,
+                      new_onsets: Union[int, float] = 0) -> dict:
+    """Build the summarize_population_state dictionary from summary kernel totals."""
+    scalars = sums['scalars']
+    alive_count = _as_count(scalars[1])
+    dementia_count = scalars[4]
+    summary = {
+        'time_step': time_step,
+        'calendar_year': base_year + time_step,
+        'population_total': _as_count(scalars[0]),
+        'population_alive': alive_count,
+        'baseline_alive': _as_count(scalars[3]),
+        'entrants': entrants,
+        'deaths': deaths,
+        'incident_onsets': new_onsets,
+        'incidence_per_1000_alive': (new_onsets / alive_count * 1000.0) if alive_count else 0.0,
+        'total_qalys_patient': float(scalars[6]),
+        'total_qalys_caregiver': float(scalars[7]),
+        'total_costs_nhs': float(scalars[8]),
+        'total_costs_informal': float(scalars[9]),
+        'mean_age_alive': float(scalars[2] / scalars[1]) if scalars[1] else 0.0,
+        'mean_age_dementia': float(scalars[5] / dementia_count) if dementia_count else 0.0,
+    }
+    for code, stage in enumerate(DEMENTIA_STAGES):
+        summary[f'stage_{stage}'] = _as_count(sums['stages'][code])
+    for code, setting in enumerate(LIVING_SETTINGS):
+        summary[f'living_{setting}'] = _as_count(sums['living'][code])
+    summary['living_unknown'] = 0
+    for index, band in enumerate(REPORTING_AGE_BANDS):
+        summary[f'ad_cases_age_{age_band_key(band)}'] = _as_count(sums['reporting_bands'][index])
+    return summary
+
+def _columnar_lifetime_risk(store: dict, restrict_to_cognitively_normal: bool) -> List[dict]:
+    """compute_lifetime_risk_by_entry_age over the columnar store."""
+    totals: Counter = Counter()
+    dementia: Counter = Counter()
+    for _, state, n in _store_segments(store):
+        keep = np.ones(n, dtype=bool)
+        if restrict_to_cognitively_normal:
+            keep = state['baseline_stage'][:n] == STAGE_CODES['cognitively_normal']
+        entry_age = state['entry_age'][:n][keep]
+        weight = state['weight'][:n][keep]
+        cases = state['ever_dementia'][:n][keep] | (state['baseline_stage'][:n][keep] > 0)
+        totals.update(_weighted_counter(entry_age, weight))
+        dementia.update(_weighted_counter(entry_age[cases], weight[cases]))
+    records: List[dict] = []
+    for age in sorted(totals):
+        population = _as_count(totals[age])
+        if population <= 0:
+            continue
+        dementia_cases = _as_count(dementia.get(age, 0))
+        records.append({
+            'entry_age': age,
+            'population': population,
+            'dementia_cases': dementia_cases,
+            'lifetime_risk': dementia_cases / population if population else 0.0,
+        })
+    return records
+
+def _columnar_survival_records(store: dict, final_step: int, dt: int) -> List[dict]:
+    """collect_individual_survival over the columnar store (IDs are record positions)."""
+    records: List[dict] = []
+    for first, state, n in _store_segments(store):
+        exit_step = np.where(state['death_step'][:n] >= 0, state['death_step'][:n], final_step)
+        times = (exit_step - state['entry_step'][:n]).astype(np.float64) * dt
+        records.extend(
+            {
+                'ID': first + i,
+                'baseline_stage': DEMENTIA_STAGES[state['baseline_stage'][i]],
+                'time': float(times[i]),
+                'event': 0 if state['alive'][i] else 1,
+                'entry_time_step': int(state['entry_step'][i]),
+                'weight': _as_count(state['weight'][i]),
+            }
+            for i in range(n)
+        )
+    return records
+
+def _run_model_columnar(config: dict, seed: Optional[int], engine: str) -> dict:
+    """
+    Columnar implementation of run_model (see run_model for the contract).
+
+    Each time step streams the store's blocks through the kernels in record order and merges the
+    per-block accumulators, so results do not depend on ``storage['block_size']``.
+    """
+    kernels = columnar_kernels(engine)
+    tables = compile_model_tables(config)
+    dtypes = columnar_dtypes(config, tables['n_ages'])
+    rng = np.random.default_rng(seed)
+
+    op = config.get('open_population', {}) or {}
+    entrants_per_year = max(0, int(op.get('entrants_per_year', 0))) if op.get('use', False) else 0
+    capacity = int(config['population']) + entrants_per_year * int(config['number_of_timesteps'])
+    store = _columnar_store(capacity, config, dtypes)
+    try:
+        return _run_columnar_store(config, kernels, tables, rng, store)
+    finally:
+        _close_store(store)
+
+def _run_columnar_store(config: dict,
+                        kernels: Dict[str, Any],
+                        tables: dict,
+                        rng: np.random.Generator,
+                        store: dict) -> dict:
+    """Time-step loop of _run_model_columnar over an allocated block store."""
+    dt = tables['dt']
+    number_of_timesteps = config['number_of_timesteps'] + 1
+    population = int(config['population'])
+    base_year = int(config.get('base_year', 2023))
+    agent_weight = get_agent_weight(config)
+    risk_names = tables['risk_names']
+    initial_age_counter = _columnar_initialize_population(population, config, tables, rng, store)
+
+    summary_history = initialize_model_dictionary()
+    sums = _summary_buffers(tables)
+    for _, state, n in _store_segments(store):
+        kernels['summary'](state, n, tables, sums)
+    baseline_summary = _columnar_summary(sums, 0, base_year)
+    _apply_baseline_overrides(baseline_summary, config.get('initial_summary_overrides') or {})
+    create_time_step_dictionary(summary_history, 0, baseline_summary)
+    generate_output(summary_history, 0)
+
+    transition_history: Dict[int, dict] = {}
+    yearly_incidence_records: List[dict] = []
+    totals = _progression_buffers(tables)
+    r = tables['discount_rate']
+
+    for time_step in range(1, number_of_timesteps):
+        calendar_year = base_year + time_step
+        for _, state, n in _store_segments(store):
+            alive = state['alive'][:n]
+            state['age'][:n][alive] += dt
+
+        added = _columnar_add_entrants(config, tables, rng, store, calendar_year, time_step)
+
+        step = _progression_buffers(tables)
+        onset_prob = _columnar_onset_probability(tables, config, time_step)
+        disc_factor = 1.0 / ((1.0 + r) ** (time_step * dt))
+        sums = _summary_buffers(tables)
+        for _, state, n in _store_segments(store):
+            rows = np.flatnonzero(state['alive'][:n])
+            u = rng.random((rows.size, 3))
+            kernels['progression'](state, rows, u, tables, onset_prob, time_step, step)
+            kernels['accumulate'](state, rows, u, tables, disc_factor)
+            kernels['summary'](state, n, tables, sums)
+        for key in totals:
+            totals[key] += step[key]
+
+        yearly_incidence_records.extend(_incidence_records_for_step(
+            time_step,
+            calendar_year,
+            _by_sex_and_band(step['exposure'], tables),
+            _by_sex_and_band(step['band_onsets'], tables),
+            _by_sex_and_band(sums['alive_by_band'], tables),
+            _by_sex_and_band(sums['prevalent_by_band'], tables),
+        ))
+        transition_history[time_step] = {
+            'transition_counts': {
+                (DEMENTIA_STAGES[a], DEMENTIA_STAGES[b]): _as_count(step['transitions'][0, a, b])
+                for a, b in zip(*np.nonzero(step['transitions'][1]))
+            },
+            'stage_start_counts': {
+                DEMENTIA_STAGES[a]: _as_count(step['stage_start'][0, a])
+                for a in np.flatnonzero(step['stage_start'][1])
+            },
+        }
+
+        summary = _columnar_summary(sums, time_step, base_year,
+                                    entrants=added * agent_weight,
+                                    deaths=_as_count(step['totals'][0]),
+                                    new_onsets=_as_count(step['totals'][1]))
+        create_time_step_dictionary(summary_history, time_step, summary)
+        generate_output(summary_history, time_step)
+
+    final_step = number_of_timesteps - 1
+    age_band_alive_counts = {
+        INCIDENCE_AGE_BANDS[b]: sums['alive_by_band'][0, :, b].sum()
+        for b in np.flatnonzero(sums['alive_by_band'][1].sum(axis=0))
+    }
+    age_band_dementia_counts = {
+        INCIDENCE_AGE_BANDS[b]: sums['prevalent_by_band'][0, :, b].sum()
+        for b in np.flatnonzero(sums['prevalent_by_band'][1].sum(axis=0))
+    }
+    onset_age_totals: Counter = Counter()
+    for _, state, n in _store_segments(store):
+        onset_known = ~np.isnan(state['age_at_onset'][:n])
+        onset_age_totals.update(_weighted_counter(np.rint(state['age_at_onset'][:n][onset_known]),
+                                                  state['weight'][:n][onset_known]))
+    death_age_counter: Counter = Counter({
+        int(age): _as_count(totals['death_ages'][0, age]) for age in np.flatnonzero(totals['death_ages'][1])
+    })
+
+    return _build_model_results(
+        summary_history=summary_history,
+        agent_weight=agent_weight,
+        initial_age_counter=initial_age_counter,
+        death_age_counter=death_age_counter,
+        survival_records=(_columnar_survival_records(store, final_step, dt)
+                          if config.get('store_individual_survival', True) else []),
+        transition_history=transition_history,
+        risk_onset_tracker={
+            name: {'with': _as_count(totals['risk_onsets'][0, k]), 'without': _as_count(totals['risk_onsets'][1, k])}
+            for k, name in enumerate(risk_names)
+        },
+        lifetime_risk_normal=_columnar_lifetime_risk(store, restrict_to_cognitively_normal=True),
+        lifetime_risk_all=_columnar_lifetime_risk(store, restrict_to_cognitively_normal=False),
+        incidence_age_exposure={
+            band: float(totals['exposure'][0, :, b].sum()) for b, band in enumerate(INCIDENCE_AGE_BANDS)
+        },
+        incidence_age_onsets={
+            band: _as_count(totals['band_onsets'][0, :, b].sum()) for b, band in enumerate(INCIDENCE_AGE_BANDS)
+        },
+        yearly_incidence_records=yearly_incidence_records,
+        age_band_alive_counts=age_band_alive_counts,
+        age_band_dementia_counts=age_band_dementia_counts,
+        onset_age_counter=Counter({age: _as_count(total) for age, total in onset_age_totals.items()}),
+    )
+
+
+def _total_incident_onsets(model_results: dict) -> Union[int, float]:
+    """Sum (weighted) dementia onsets across all simulated time steps."""
+    summaries = model_results.get('summaries', {}) if isinstance(model_results, dict) else {}
+    total = 0
+    for summary in summaries.values():
+        total += summary.get('incident_onsets', 0) or 0
+    return _as_count(total)
+
+
+def _replace_nested_values(structure: Any, value: float) -> Any:
+    """Recursively replace all numeric leaves in a nested mapping with the provided value."""
+    if isinstance(structure, dict):
+        return {key: _replace_nested_values(nested, value) for key, nested in structure.items()}
+    return float(value)
+
+
+def _counterfactual_config_without_risk(config: dict, risk_factor: str) -> dict:
     """
     Create a deep copy of the configuration where the chosen risk factor has zero prevalence
     and neutral (1.0) hazard ratios across all transitions.
     """
-    cfg = copy.deepcopy(config)
-    risk_defs = cfg.get('risk_factors', {})
-    meta = risk_defs.get(risk_factor)
-    if not isinstance(meta, dict):
-        return cfg
+    cfg = copy.deepcopy(config)
+    risk_defs = cfg.get('risk_factors', {})
+    meta = risk_defs.get(risk_factor)
+    if not isinstance(meta, dict):
+        return cfg
+
+    meta['prevalence'] = 0.0
+    rr_spec = meta.get('relative_risks', {})
+    if isinstance(rr_spec, dict) and rr_spec:
+        meta['relative_risks'] = _replace_nested_values(rr_spec, 1.0)
+    else:
+        meta['relative_risks'] = {
+            'onset': 1.0,
+            'mild_to_moderate': 1.0,
+            'moderate_to_severe': 1.0,
+            'severe_to_death': 1.0,
+        }
+    return cfg
+
+
+def _map_nested_values(structure: Any, func: Any) -> Any:
+    """Recursively apply ``func`` to every numeric leaf of a nested mapping."""
+    if isinstance(structure, dict):
+        return {key: _map_nested_values(nested, func) for key, nested in structure.items()}
+    return func(float(structure))
+
+
+def apply_intervention(config: dict, intervention: dict) -> dict:
+    """
+    Return ``config`` with a risk-factor intervention applied.
+
+    Args:
+        config: Model configuration (not modified; only the targeted risk factor is copied)
+        intervention: 'risk_factor' (name in config['risk_factors']), 'prevalence_multiplier'
+            (scales every prevalence leaf, capped at 1; default 1.0) and 'excess_risk_multiplier'
+            (scales every hazard ratio's excess over 1, HR -> 1 + m (HR - 1); default 1.0)
+
+    Returns:
+        Configuration for the intervention arm
+    """
+    risk_factor = intervention.get('risk_factor')
+    risk_defs = config.get('risk_factors', {})
+    if risk_factor not in risk_defs:
+        raise ValueError(f"Unknown intervention risk factor {risk_factor!r}.")
+    prevalence_multiplier = float(intervention.get('prevalence_multiplier', 1.0))
+    excess_multiplier = float(intervention.get('excess_risk_multiplier', 1.0))
+    if prevalence_multiplier < 0 or excess_multiplier < 0:
+        raise ValueError("Intervention multipliers must be non-negative.")
+
+    meta = dict(risk_defs[risk_factor])
+    if 'prevalence' in meta:
+        meta['prevalence'] = _map_nested_values(meta['prevalence'],
+                                                lambda value: min(1.0, value * prevalence_multiplier))
+    if 'relative_risks' in meta:
+        meta['relative_risks'] = _map_nested_values(meta['relative_risks'],
+                                                    lambda value: 1.0 + excess_multiplier * (value - 1.0))
+    cfg = dict(config)
+    cfg['risk_factors'] = dict(risk_defs)
+    cfg['risk_factors'][risk_factor] = meta
+    return cfg
+
+
+def compute_population_attributable_fraction(config: dict,
+                                             risk_factor: str,
+                                             baseline_results: Optional[dict] = None,
+                                             seed: Optional[int] = None) -> Optional[dict]:
+    """
+    Estimate the population attributable fraction (PAF) for a named risk factor by
+    comparing baseline simulation results with a counterfactual scenario in which
+    the risk factor is removed (zero prevalence and neutral hazard ratios).
+    """
+    baseline_results_local = baseline_results
+    if baseline_results_local is None:
+        baseline_results_local = run_model(copy.deepcopy(config), seed=seed)
+
+    counterfactual_results = run_model(
+        _counterfactual_config_without_risk(config, risk_factor),
+        seed=seed,
+    )
+
+    baseline_onsets = _total_incident_onsets(baseline_results_local)
+    counterfactual_onsets = _total_incident_onsets(counterfactual_results)
+    if baseline_onsets <= 0:
+        return None
+
+    paf = (baseline_onsets - counterfactual_onsets) / baseline_onsets
+    paf = max(0.0, min(1.0, paf))
+
+    baseline_breakdown = (
+        baseline_results_local
+        .get('incident_onsets_by_risk_factor', {})
+        .get(risk_factor, {})
+        if isinstance(baseline_results_local, dict) else {}
+    )
+
+    return {
+        'risk_factor': risk_factor,
+        'baseline_onsets': baseline_onsets,
+        'counterfactual_onsets': counterfactual_onsets,
+        'paf': paf,
+        'baseline_with_risk_onsets': baseline_breakdown.get('with', 0),
+        'baseline_without_risk_onsets': baseline_breakdown.get('without', 0),
+    }
+
+
+# -------- Probabilistic sensitivity analysis (PSA) utilities --------
+
+# PSA parameter matrix: the uncertain leaves are enumerated and their distributions fitted once, all
+# draws come from one vectorised call per distribution family, and each draw is applied to the base
+# config as a path-copy overlay (only the dicts on the path to a sampled leaf are copied).
+
+def _positive_float(value: Any) -> Optional[float]:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(number) or number <= 0.0:
+        return None
+    return number
+
+
+def _beta_leaf(path: Tuple[Any, ...], value: Any, rel_sd: float) -> Optional[dict]:
+    """Beta parameter record for a probability leaf, fitted to its value and relative SD."""
+    base = _positive_float(value)
+    if base is None:
+        return None
+    epsilon = 1e-6
+    params = _beta_params_from_mean_rel_sd(min(max(base, epsilon), 1.0 - epsilon), rel_sd)
+    if params is None:
+        return None
+    return {'path': path, 'family': 'beta', 'params': params, 'base': base}
+
+
+def _gamma_leaf(path: Tuple[Any, ...], value: Any, rel_sd: float) -> Optional[dict]:
+    """Gamma parameter record for a positive cost leaf, fitted to its value and relative SD."""
+    base = _positive_float(value)
+    if base is None:
+        return None
+    params = _gamma_params_from_mean_rel_sd(base, rel_sd)
+    if params is None:
+        return None
+    return {'path': path, 'family': 'gamma', 'params': params, 'base': base}
+
+
+def _beta_leaves_in_mapping(mapping: Dict[Any, Any], path: Tuple[Any, ...], rel_sd: float) -> List[dict]:
+    leaves: List[dict] = []
+    for key, val in mapping.items():
+        if isinstance(val, dict):
+            leaves.extend(_beta_leaves_in_mapping(val, path + (key,), rel_sd))
+        else:
+            leaf = _beta_leaf(path + (key,), val, rel_sd)
+            if leaf is not None:
+                leaves.append(leaf)
+    return leaves
+
+
+def enumerate_psa_parameters(base_config: dict, psa_cfg: Optional[dict] = None) -> List[dict]:
+    """
+    List the uncertain leaves sampled by the PSA, with their fitted distributions.
+
+    Covers the base onset probability and utilities (beta), costs (gamma), risk-factor
+    prevalence (beta) and risk-factor hazard ratios with intervals in RISK_FACTOR_HR_INTERVALS
+    (lognormal).
+
+    Args:
+        base_config: Model configuration
+        psa_cfg: PSA configuration (relative SDs); defaults to base_config['psa']
+
+    Returns:
+        One dictionary per parameter: 'path' (tuple of keys into the config), 'family'
+        ('beta', 'gamma' or 'lognormal'), 'params' ((alpha, beta), (shape, scale) or (mu, sigma))
+        and 'base' (the value in base_config).
+    """
+    psa_meta = psa_cfg or base_config.get('psa') or {}
+    rel_beta = float(psa_meta.get('relative_sd_beta', PSA_DEFAULT_RELATIVE_SD))
+    rel_gamma = float(psa_meta.get('relative_sd_gamma', PSA_DEFAULT_RELATIVE_SD))
+    parameters: List[dict] = []
+
+    leaf = _beta_leaf(('base_onset_probability',), base_config.get('base_onset_probability'), rel_beta)
+    if leaf is not None:
+        parameters.append(leaf)
+
+    costs_cfg = base_config.get('costs')
+    if isinstance(costs_cfg, dict):
+        for stage, stage_meta in costs_cfg.items():
+            if not isinstance(stage_meta, dict):
+                continue
+            for setting, setting_meta in stage_meta.items():
+                if not isinstance(setting_meta, dict):
+                    continue
+                for payer, amount in setting_meta.items():
+                    leaf = _gamma_leaf(('costs', stage, setting, payer), amount, rel_gamma)
+                    if leaf is not None:
+                        parameters.append(leaf)
+
+    for key in ('utility_norms_by_age', 'utility_multipliers', 'stage_age_qalys', 'dementia_stage_qalys'):
+        mapping = base_config.get(key)
+        if isinstance(mapping, dict):
+            parameters.extend(_beta_leaves_in_mapping(mapping, (key,), rel_beta))
+
+    risk_defs = base_config.get('risk_factors')
+    if isinstance(risk_defs, dict):
+        for risk_name, meta in risk_defs.items():
+            prevalence = meta.get('prevalence')
+            if not isinstance(prevalence, dict):
+                continue
+            for sex_key, value in prevalence.items():
+                leaf = _beta_leaf(('risk_factors', risk_name, 'prevalence', sex_key), value, rel_beta)
+                if leaf is not None:
+                    parameters.append(leaf)
+        for risk_name, meta in risk_defs.items():
+            ci_lookup = RISK_FACTOR_HR_INTERVALS.get(risk_name, {})
+            rr_def = meta.get('relative_risks')
+            if not isinstance(rr_def, dict) or not ci_lookup:
+                continue
+            for transition, sex_map in rr_def.items():
+                ci_transition = ci_lookup.get(transition, {})
+                if not isinstance(sex_map, dict) or not ci_transition:
+                    continue
+                for sex_key in sex_map:
+                    ci_tuple = ci_transition.get(sex_key) or ci_transition.get('all')
+                    if not ci_tuple:
+                        continue
+                    point, lower, upper = ci_tuple
+                    path = ('risk_factors', risk_name, 'relative_risks', transition, sex_key)
+                    params = _lognormal_params_from_ci(point, lower, upper)
+                    if params is None:
+                        # Degenerate interval: fixed at the point estimate, as the per-draw sampler does
+                        parameters.append({'path': path, 'family': 'fixed', 'params': (point, 0.0), 'base': point})
+                    else:
+                        parameters.append({'path': path, 'family': 'lognormal', 'params': params, 'base': point})
+    return parameters
+
+
+PSA_SAMPLING_METHODS = ('random', 'sobol', 'lhs')
+
+
+def psa_parameter_uniforms(n_draws: int, n_dims: int, method: str = 'random',
+                           rng: Optional[np.random.Generator] = None) -> np.ndarray:
+    """
+    Points in the unit hypercube for PSA sampling.
+
+    Args:
+        n_draws: Number of points (rows)
+        n_dims: Number of uncertain parameters (columns)
+        method: 'random' (independent uniforms), 'sobol' (scrambled Sobol; the first n_draws
+                points of the next power-of-two sequence) or 'lhs' (Latin hypercube)
+        rng: Random generator (seeds the scrambling / stratum permutations)
+
+    Returns:
+        Array of shape (n_draws, n_dims) with values strictly inside (0, 1)
+    """
+    if method not in PSA_SAMPLING_METHODS:
+        raise ValueError(f"Unknown PSA sampling method {method!r}; expected one of {PSA_SAMPLING_METHODS}.")
+    if rng is None:
+        rng = np.random.default_rng()
+    n_draws, n_dims = int(n_draws), int(n_dims)
+    if n_dims == 0 or n_draws == 0:
+        return np.empty((n_draws, n_dims))
+    if method == 'random':
+        points = rng.random((n_draws, n_dims))
+    else:
+        from scipy.stats import qmc
+        # An integer seed taken from rng keeps the points tied to the PSA random stream
+        engine_seed = int(rng.integers(0, 2**32 - 1))
+        if method == 'sobol':
+            m = max(0, math.ceil(math.log2(n_draws)))
+            points = qmc.Sobol(n_dims, scramble=True, seed=engine_seed).random_base2(m)[:n_draws]
+        else:
+            points = qmc.LatinHypercube(n_dims, seed=engine_seed).random(n_draws)
+    eps = np.finfo(float).eps
+    return np.clip(points, eps, 1.0 - eps)
+
+
+def psa_parameter_quantiles(parameters: List[dict], uniforms: np.ndarray) -> np.ndarray:
+    """
+    Map unit-hypercube points through each parameter's inverse CDF.
+
+    Args:
+        parameters: Output of enumerate_psa_parameters()
+        uniforms: Array of shape (n_draws, number of non-fixed parameters), columns in parameter order
+
+    Returns:
+        Parameter matrix of shape (n_draws, len(parameters)); fixed parameters keep their value.
+    """
+    from scipy import stats
+    matrix = np.empty((uniforms.shape[0], len(parameters)))
+    column = 0
+    for j, parameter in enumerate(parameters):
+        first, second = parameter['params']
+        if parameter['family'] == 'fixed':
+            matrix[:, j] = first
+            continue
+        u = uniforms[:, column]
+        column += 1
+        if parameter['family'] == 'beta':
+            matrix[:, j] = stats.beta.ppf(u, first, second)
+        elif parameter['family'] == 'gamma':
+            matrix[:, j] = stats.gamma.ppf(u, first, scale=second)
+        else:
+            matrix[:, j] = stats.lognorm.ppf(u, second, scale=math.exp(first))
+    return matrix
+
+
+def psa_parameter_means(parameters: List[dict]) -> np.ndarray:
+    """Exact expectation of each PSA parameter under its sampling distribution."""
+    means = np.empty(len(parameters))
+    for j, parameter in enumerate(parameters):
+        first, second = parameter['params']
+        if parameter['family'] == 'beta':
+            means[j] = first / (first + second)
+        elif parameter['family'] == 'gamma':
+            means[j] = first * second
+        elif parameter['family'] == 'lognormal':
+            means[j] = math.exp(first + second ** 2 / 2.0)
+        else:
+            means[j] = first
+    return means
+
+
+def draw_psa_parameter_matrix(parameters: List[dict],
+                              n_draws: int,
+                              rng: Optional[np.random.Generator] = None,
+                              method: str = 'random',
+                              antithetic: bool = False) -> np.ndarray:
+    """
+    Draw every PSA iteration at once.
+
+    Args:
+        parameters: Output of enumerate_psa_parameters()
+        n_draws: Number of PSA iterations (rows)
+        rng: Random generator
+        method: 'random' (independent draws), 'sobol' or 'lhs' (quasi-random points mapped
+                through each parameter's inverse CDF; see psa_parameter_uniforms)
+        antithetic: Rows 2k and 2k+1 use the points u and 1 - u (mirrored quantiles)
+
+    Returns:
+        Array of shape (n_draws, len(parameters)); column j follows parameters[j]['family'].
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    if antithetic:
+        n_uncertain = sum(parameter['family'] != 'fixed' for parameter in parameters)
+        points = psa_parameter_uniforms((int(n_draws) + 1) // 2, n_uncertain, method, rng)
+        paired = np.empty((2 * points.shape[0], n_uncertain))
+        paired[0::2] = points
+        paired[1::2] = 1.0 - points
+        return psa_parameter_quantiles(parameters, paired[:int(n_draws)])
+    if method != 'random':
+        n_uncertain = sum(parameter['family'] != 'fixed' for parameter in parameters)
+        return psa_parameter_quantiles(parameters, psa_parameter_uniforms(n_draws, n_uncertain, method, rng))
+    matrix = np.empty((int(n_draws), len(parameters)))
+    samplers = {'beta': rng.beta, 'gamma': rng.gamma, 'lognormal': rng.lognormal}
+    for family in ('beta', 'gamma', 'lognormal', 'fixed'):
+        columns = [j for j, parameter in enumerate(parameters) if parameter['family'] == family]
+        if not columns:
+            continue
+        first = np.array([parameters[j]['params'][0] for j in columns])
+        if family == 'fixed':
+            matrix[:, columns] = first
+            continue
+        second = np.array([parameters[j]['params'][1] for j in columns])
+        matrix[:, columns] = samplers[family](first, second, size=(matrix.shape[0], len(columns)))
+    return matrix
+
+
+def apply_psa_parameter_row(base_config: dict, parameters: List[dict], row: np.ndarray) -> dict:
+    """
+    Overlay one row of the parameter matrix on ``base_config``.
 
-    meta['prevalence'] = 0.0
-    rr_spec = meta.get('relative_risks', {})
-    if isinstance(rr_spec, dict) and rr_spec:
-        meta['relative_risks'] = _replace_nested_values(rr_spec, 1.0)
+    Only the dictionaries on the path to each sampled leaf are copied; every other section is
+    shared with ``base_config``, so the returned config must be treated as read-only.
+    """
+    cfg = dict(base_config)
+    copies: Dict[Tuple[Any, ...], dict] = {(): cfg}
+    for parameter, value in zip(parameters, row):
+        path = parameter['path']
+        node = cfg
+        for depth in range(1, len(path)):
+            prefix = path[:depth]
+            child = copies.get(prefix)
+            if child is None:
+                child = dict(node[path[depth - 1]])
+                node[path[depth - 1]] = child
+                copies[prefix] = child
+            node = child
+        node[path[-1]] = float(value)
+    return cfg
+
+
+def apply_psa_draw(base_config: dict,
+                   psa_cfg: Optional[dict] = None,
+                   rng: Optional[np.random.Generator] = None) -> dict:
+    """
+    Return a config with PSA sampling applied to costs, utilities,
+    probabilities, and risk-factor parameters.
+
+    Single-draw convenience around enumerate_psa_parameters / draw_psa_parameter_matrix /
+    apply_psa_parameter_row; unsampled sections are shared with ``base_config``.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    parameters = enumerate_psa_parameters(base_config, psa_cfg)
+    row = draw_psa_parameter_matrix(parameters, 1, rng)[0]
+    return apply_psa_parameter_row(base_config, parameters, row)
+
+
+# Parameter registry: a flat, named view of the uncertain parameters so PSA, DSA, calibration and
+# metamodels can read and write them as one float array.
+
+PARAMETER_FAMILY_BOUNDS = {
+    'beta': (0.0, 1.0),
+    'gamma': (0.0, math.inf),
+    'lognormal': (0.0, math.inf),
+}
+
+
+def _parameter_key_label(key: Any) -> str:
+    if isinstance(key, tuple) and len(key) == 2 and isinstance(key[0], int):
+        return age_band_label(key)
+    if isinstance(key, tuple):
+        return '-'.join(str(part) for part in key)
+    return str(key)
+
+
+def parameter_path_name(path: Tuple[Any, ...]) -> str:
+    """Stable dotted name for a config path, e.g. ``costs.mild.home.nhs`` or ``utility_norms_by_age.female.65``."""
+    return '.'.join(_parameter_key_label(key) for key in path)
+
+
+def build_parameter_registry(config: dict, psa_cfg: Optional[dict] = None) -> dict:
+    """
+    Build a flat registry of the uncertain parameters in ``config``.
+
+    Args:
+        config: Model configuration
+        psa_cfg: PSA configuration used to fit the distributions (defaults to config['psa'])
+
+    Returns:
+        Dictionary with 'names' (dotted paths), 'index' (name -> slot), 'paths' (key tuples),
+        'family' and 'params' per slot, 'base', 'lower' and 'upper' arrays, and 'parameters'
+        (the enumerate_psa_parameters records, for draw_psa_parameter_matrix).
+    """
+    parameters = enumerate_psa_parameters(config, psa_cfg)
+    names = [parameter_path_name(parameter['path']) for parameter in parameters]
+    if len(set(names)) != len(names):
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        raise ValueError(f"Parameter paths collide after naming: {duplicates}")
+    base = np.array([parameter['base'] for parameter in parameters], dtype=float)
+    bounds = [PARAMETER_FAMILY_BOUNDS.get(parameter['family']) for parameter in parameters]
+    lower = np.array([b[0] if b else value for b, value in zip(bounds, base)], dtype=float)
+    upper = np.array([b[1] if b else value for b, value in zip(bounds, base)], dtype=float)
+    return {
+        'names': names,
+        'index': {name: slot for slot, name in enumerate(names)},
+        'paths': [parameter['path'] for parameter in parameters],
+        'family': [parameter['family'] for parameter in parameters],
+        'params': [parameter['params'] for parameter in parameters],
+        'base': base,
+        'lower': lower,
+        'upper': upper,
+        'parameters': parameters,
+    }
+
+
+def _registry_slots(registry: dict, names: Optional[List[str]]) -> List[int]:
+    if names is None:
+        return list(range(len(registry['names'])))
+    missing = [name for name in names if name not in registry['index']]
+    if missing:
+        raise KeyError(f"Unknown parameter(s): {missing}")
+    return [registry['index'][name] for name in names]
+
+
+def registry_get(registry: dict, config: dict, names: Optional[List[str]] = None) -> np.ndarray:
+    """Read the registry parameters (all, or ``names`` in that order) from ``config`` as a float array."""
+    values = []
+    for slot in _registry_slots(registry, names):
+        node = config
+        for key in registry['paths'][slot]:
+            node = node[key]
+        values.append(float(node))
+    return np.array(values, dtype=float)
+
+
+def registry_set(registry: dict,
+                 config: dict,
+                 values: Any,
+                 names: Optional[List[str]] = None) -> dict:
+    """
+    Return ``config`` with the registry parameters (all, or ``names``) replaced by ``values``.
+
+    The result is a path-copy overlay (see apply_psa_parameter_row); ``config`` is not modified.
+    Values outside a parameter's distribution support raise ValueError.
+    """
+    slots = _registry_slots(registry, names)
+    values = np.asarray(values, dtype=float).reshape(-1)
+    if values.size != len(slots):
+        raise ValueError(f"Expected {len(slots)} values, got {values.size}.")
+    lower = registry['lower'][slots]
+    upper = registry['upper'][slots]
+    outside = (values < lower) | (values > upper)
+    if outside.any():
+        bad = [registry['names'][slots[j]] for j in np.flatnonzero(outside)]
+        raise ValueError(f"Values outside parameter bounds for: {bad}")
+    return apply_psa_parameter_row(config, [registry['parameters'][slot] for slot in slots], values)
+
+
+def registry_to_frame(registry: dict) -> pd.DataFrame:
+    """Tabulate the registry: name, family, base value, bounds and distribution parameters."""
+    return pd.DataFrame({
+        'parameter': registry['names'],
+        'family': registry['family'],
+        'base': registry['base'],
+        'lower': registry['lower'],
+        'upper': registry['upper'],
+        'param_1': [params[0] for params in registry['params']],
+        'param_2': [params[1] for params in registry['params']],
+    })
+
+
+def extract_psa_metrics(model_results: dict) -> dict:
+    """
+    Pull decision metrics (costs, QALYs, incidence, severity) from a single model run.
+    """
+    summaries = model_results.get('summaries', {}) if isinstance(model_results, dict) else {}
+    if not summaries:
+        return {}
+    final_step = max(summaries)
+    final_summary = summaries[final_step]
+
+    total_incidence = 0.0
+    for summary in summaries.values():
+        total_incidence += float(summary.get('incident_onsets', 0) or 0)
+
+    metrics = {
+        'total_costs_nhs': float(final_summary.get('total_costs_nhs', 0.0) or 0.0),
+        'total_costs_informal': float(final_summary.get('total_costs_informal', 0.0) or 0.0),
+        'total_qalys_patient': float(final_summary.get('total_qalys_patient', 0.0) or 0.0),
+        'total_qalys_caregiver': float(final_summary.get('total_qalys_caregiver', 0.0) or 0.0),
+        'incident_onsets_total': float(total_incidence),
+    }
+    metrics['total_costs_all'] = metrics['total_costs_nhs'] + metrics['total_costs_informal']
+    metrics['total_qalys_combined'] = metrics['total_qalys_patient'] + metrics['total_qalys_caregiver']
+
+    for stage in ('mild', 'moderate', 'severe'):
+        key = f'stage_{stage}'
+        metrics[key] = float(final_summary.get(key, 0) or 0)
+
+    return metrics
+
+
+def summarize_psa_results(metrics_df: pd.DataFrame) -> Dict[str, dict]:
+    """
+    Compute mean and 95% intervals for each numeric PSA metric.
+    """
+    if metrics_df is None or metrics_df.empty:
+        return {}
+    summary: Dict[str, dict] = {}
+    for column in metrics_df.columns:
+        if column == 'iteration':
+            continue
+        if not pd.api.types.is_numeric_dtype(metrics_df[column]):
+            continue
+        series = metrics_df[column].dropna()
+        if series.empty:
+            continue
+        summary[column] = {
+            'mean': float(series.mean()),
+            'lower_95': float(series.quantile(0.025)),
+            'upper_95': float(series.quantile(0.975)),
+        }
+    return summary
+
+
+def _p2_quantile_init(prob: float) -> dict:
+    """State of a P-squared (Jain & Chlamtac) streaming estimator of the ``prob`` quantile."""
+    return {
+        'prob': prob,
+        'heights': [],
+        'positions': [1.0, 2.0, 3.0, 4.0, 5.0],
+        'desired': [1.0, 1.0 + 2.0 * prob, 1.0 + 4.0 * prob, 3.0 + 2.0 * prob, 5.0],
+        'increments': [0.0, prob / 2.0, prob, (1.0 + prob) / 2.0, 1.0],
+    }
+
+
+def _p2_quantile_update(state: dict, value: float) -> None:
+    """Add one observation to a P-squared quantile estimator (five markers, O(1) memory)."""
+    heights = state['heights']
+    if len(heights) < 5:
+        heights.append(value)
+        heights.sort()
+        return
+    positions, desired = state['positions'], state['desired']
+    if value < heights[0]:
+        heights[0] = value
+        cell = 0
+    elif value >= heights[4]:
+        heights[4] = value
+        cell = 3
     else:
-        meta['relative_risks'] = {
-            'onset': 1.0,
-            'mild_to_moderate': 1.0,
-            'moderate_to_severe': 1.0,
-            'severe_to_death': 1.0,
+        cell = next(i for i in range(4) if heights[i] <= value < heights[i + 1])
+    for i in range(cell + 1, 5):
+        positions[i] += 1.0
+    for i in range(5):
+        desired[i] += state['increments'][i]
+
+    # Move the three middle markers towards their desired positions
+    for i in range(1, 4):
+        offset = desired[i] - positions[i]
+        if ((offset >= 1.0 and positions[i + 1] - positions[i] > 1.0)
+                or (offset <= -1.0 and positions[i - 1] - positions[i] < -1.0)):
+            step = 1.0 if offset > 0 else -1.0
+            parabolic = heights[i] + step / (positions[i + 1] - positions[i - 1]) * (
+                (positions[i] - positions[i - 1] + step) * (heights[i + 1] - heights[i])
+                / (positions[i + 1] - positions[i])
+                + (positions[i + 1] - positions[i] - step) * (heights[i] - heights[i - 1])
+                / (positions[i] - positions[i - 1])
+            )
+            if heights[i - 1] < parabolic < heights[i + 1]:
+                heights[i] = parabolic
+            else:
+                j = i + int(step)
+                heights[i] += step * (heights[j] - heights[i]) / (positions[j] - positions[i])
+            positions[i] += step
+
+
+def _p2_quantile_value(state: dict) -> float:
+    """Current quantile estimate (exact interpolation until five observations have been seen)."""
+    heights = state['heights']
+    if not heights:
+        return float('nan')
+    if len(heights) < 5:
+        return float(np.quantile(heights, state['prob']))
+    return float(heights[2])
+
+
+def new_psa_accumulator() -> dict:
+    """
+    Empty streaming PSA aggregate: per metric, a Welford running mean/variance and
+    P-squared estimators of the 2.5% and 97.5% quantiles.
+    """
+    return {'draws': 0, 'metrics': {}}
+
+
+def update_psa_accumulator(accumulator: dict, metrics: dict) -> None:
+    """Fold one draw's metrics into a streaming PSA aggregate (non-numeric and NaN values are skipped)."""
+    accumulator['draws'] += 1
+    for name, value in metrics.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float, np.integer, np.floating)):
+            continue
+        value = float(value)
+        if math.isnan(value):
+            continue
+        stats = accumulator['metrics'].get(name)
+        if stats is None:
+            stats = accumulator['metrics'][name] = {
+                'n': 0, 'mean': 0.0, 'm2': 0.0,
+                'lower_95': _p2_quantile_init(0.025), 'upper_95': _p2_quantile_init(0.975),
+            }
+        stats['n'] += 1
+        delta = value - stats['mean']
+        stats['mean'] += delta / stats['n']
+        stats['m2'] += delta * (value - stats['mean'])
+        _p2_quantile_update(stats['lower_95'], value)
+        _p2_quantile_update(stats['upper_95'], value)
+
+
+def psa_accumulator_summary(accumulator: dict) -> Dict[str, dict]:
+    """
+    Interim or final summary of a streaming PSA aggregate, in the summarize_psa_results layout
+    ('mean', 'lower_95', 'upper_95') plus the running 'sd' and draw count 'n'.
+    """
+    summary: Dict[str, dict] = {}
+    for name, stats in accumulator['metrics'].items():
+        summary[name] = {
+            'mean': stats['mean'],
+            'lower_95': _p2_quantile_value(stats['lower_95']),
+            'upper_95': _p2_quantile_value(stats['upper_95']),
+            'sd': math.sqrt(stats['m2'] / (stats['n'] - 1)) if stats['n'] > 1 else 0.0,
+            'n': stats['n'],
         }
-    return cfg
+    return summary
+
+
+PSA_PRECISION_METRICS = ('total_costs_all', 'total_qalys_combined', 'incident_onsets_total')
+PAIRED_PSA_METRICS = ('incremental_cost', 'incremental_qalys', 'incremental_nmb')
+
+
+def _adaptive_psa_config(psa_meta: dict) -> dict:
+    """Validated psa_meta['adaptive'] settings with defaults filled in."""
+    adaptive = {
+        'use': False,
+        'batch_size': 50,
+        'min_iterations': 100,
+        'metrics': list(PAIRED_PSA_METRICS if psa_meta.get('paired') else PSA_PRECISION_METRICS),
+        'mean_relative_tolerance': 0.005,
+        'quantile_relative_tolerance': 0.01,
+    }
+    adaptive.update(psa_meta.get('adaptive') or {})
+    if int(adaptive['batch_size']) <= 0:
+        raise ValueError("psa['adaptive']['batch_size'] must be a positive integer.")
+    for key in ('mean_relative_tolerance', 'quantile_relative_tolerance'):
+        if float(adaptive[key]) <= 0:
+            raise ValueError(f"psa['adaptive']['{key}'] must be positive.")
+    return adaptive
+
+
+def _quantile_mcse(values: np.ndarray, prob: float) -> float:
+    """
+    Monte Carlo standard error of a sample quantile from the order-statistic 95% interval:
+    the draws ranked n*p -/+ 1.96*sqrt(n*p*(1-p)) bracket the quantile, and MCSE ~ width / (2*1.96).
+    """
+    ordered = np.sort(values)
+    n = ordered.size
+    half_width = 1.96 * math.sqrt(n * prob * (1.0 - prob))
+    lo = int(np.clip(math.floor(n * prob - half_width), 0, n - 1))
+    hi = int(np.clip(math.ceil(n * prob + half_width), 0, n - 1))
+    return float(ordered[hi] - ordered[lo]) / (2.0 * 1.96)
+
+
+def psa_precision(metrics_df: pd.DataFrame,
+                  metrics: Optional[List[str]] = None,
+                  mean_relative_tolerance: float = 0.005,
+                  quantile_relative_tolerance: float = 0.01) -> dict:
+    """
+    Monte Carlo standard errors of the PSA mean and 95% interval limits.
+
+    Args:
+        metrics_df: Draw-level metrics (one row per iteration)
+        metrics: Columns to assess (default: total costs, combined QALYs, incident onsets)
+        mean_relative_tolerance: Target MCSE(mean) / |mean|
+        quantile_relative_tolerance: Target MCSE(quantile) / |quantile| for the 2.5% and 97.5% limits
+
+    Returns:
+        Dictionary with 'iterations', per-metric 'metrics' entries (estimates, MCSEs, relative
+        MCSEs and 'converged') and an overall 'converged' flag.
+    """
+    metrics = list(metrics or PSA_PRECISION_METRICS)
+    report: Dict[str, dict] = {}
+    for metric in metrics:
+        if metric not in metrics_df:
+            continue
+        values = metrics_df[metric].dropna().to_numpy(dtype=float)
+        if values.size < 2:
+            continue
+        mean = float(values.mean())
+        entry = {
+            'mean': mean,
+            'mcse_mean': float(values.std(ddof=1) / math.sqrt(values.size)),
+            'lower_95': float(np.quantile(values, 0.025)),
+            'mcse_lower_95': _quantile_mcse(values, 0.025),
+            'upper_95': float(np.quantile(values, 0.975)),
+            'mcse_upper_95': _quantile_mcse(values, 0.975),
+        }
+        converged = True
+        for stat, tolerance in (('mean', mean_relative_tolerance),
+                                ('lower_95', quantile_relative_tolerance),
+                                ('upper_95', quantile_relative_tolerance)):
+            scale = abs(entry[stat])
+            relative = entry[f'mcse_{stat}'] / scale if scale > 0 else (0.0 if entry[f'mcse_{stat}'] == 0 else math.inf)
+            entry[f'relative_mcse_{stat}'] = relative
+            converged = converged and relative <= tolerance
+        entry['converged'] = converged
+        report[metric] = entry
+    return {
+        'iterations': int(len(metrics_df)),
+        'metrics': report,
+        'converged': bool(report) and all(entry['converged'] for entry in report.values()),
+    }
+
+
+def antithetic_variance_reduction(metrics_df: pd.DataFrame,
+                                  metrics: Optional[List[str]] = None) -> Dict[str, dict]:
+    """
+    Precision gained by antithetic pairing (draws 2k and 2k+1 are mirrored).
+
+    Returns:
+        {metric: 'mean', 'mcse_independent' (sd / sqrt(n), as if draws were independent),
+        'mcse_antithetic' (from the spread of pair averages), 'variance_reduction' (ratio of the
+        two variances; > 1 means pairing helped) and 'pairs'}
+    """
+    report: Dict[str, dict] = {}
+    n_pairs = len(metrics_df) // 2
+    if n_pairs < 2:
+        return report
+    for metric in (metrics or PSA_PRECISION_METRICS):
+        if metric not in metrics_df:
+            continue
+        values = metrics_df[metric].to_numpy(dtype=float)[:2 * n_pairs]
+        pair_means = values.reshape(n_pairs, 2).mean(axis=1)
+        var_independent = values.var(ddof=1) / values.size
+        var_antithetic = pair_means.var(ddof=1) / n_pairs
+        report[metric] = {
+            'mean': float(values.mean()),
+            'mcse_independent': math.sqrt(var_independent),
+            'mcse_antithetic': math.sqrt(var_antithetic),
+            'variance_reduction': float(var_independent / var_antithetic) if var_antithetic > 0 else math.inf,
+            'pairs': n_pairs,
+        }
+    return report
+
+
+def control_variate_adjustment(metrics_df: pd.DataFrame,
+                               controls: np.ndarray,
+                               control_means: np.ndarray,
+                               metrics: Optional[List[str]] = None) -> Dict[str, dict]:
+    """
+    Control-variate estimate of each metric's mean.
+
+    The metric is regressed on the controls (quantities drawn alongside it whose expectation is
+    known exactly), and the mean is corrected by the coefficient times the controls' sampling error:
+    mean_adjusted = mean - beta . (mean(controls) - control_means).
+
+    Args:
+        metrics_df: Draw-level metrics (one row per draw)
+        controls: Array of shape (n_draws, k) with each draw's control values
+        control_means: Exact expectations of the k controls
+        metrics: Metrics to adjust (default: total costs, combined QALYs, incident onsets)
+
+    Returns:
+        {metric: 'mean', 'mean_adjusted', 'coefficients', 'mcse', 'mcse_adjusted',
+        'variance_reduction' (residual vs raw variance ratio; > 1 means the controls helped)}
+    """
+    controls = np.asarray(controls, dtype=float).reshape(len(metrics_df), -1)
+    n, k = controls.shape
+    report: Dict[str, dict] = {}
+    if k == 0 or n <= k + 2:
+        return report
+    centred = controls - controls.mean(axis=0)
+    for metric in (metrics or PSA_PRECISION_METRICS):
+        if metric not in metrics_df:
+            continue
+        values = metrics_df[metric].to_numpy(dtype=float)
+        coefficients, *_ = np.linalg.lstsq(centred, values - values.mean(), rcond=None)
+        residuals = values - values.mean() - centred @ coefficients
+        var_raw = values.var(ddof=1) / n
+        var_adjusted = residuals.var(ddof=k + 1) / n
+        report[metric] = {
+            'mean': float(values.mean()),
+            'mean_adjusted': float(values.mean() - (controls.mean(axis=0) - control_means) @ coefficients),
+            'coefficients': coefficients.tolist(),
+            'mcse': math.sqrt(var_raw),
+            'mcse_adjusted': math.sqrt(var_adjusted),
+            'variance_reduction': float(var_raw / var_adjusted) if var_adjusted > 0 else math.inf,
+        }
+    return report
+
+
+def _run_psa_batches(map_batch: Any, iterations: int, adaptive: dict) -> Tuple[List[dict], dict]:
+    """
+    Run draws 0..iterations-1 through ``map_batch`` (a list of draw indices -> metrics), in batches
+    of adaptive['batch_size'] when adaptive stopping is on, stopping once psa_precision converges.
+    """
+    if not adaptive['use']:
+        draw_metrics = map_batch(list(range(iterations)))
+        return draw_metrics, psa_precision(pd.DataFrame(draw_metrics), adaptive['metrics'],
+                                           adaptive['mean_relative_tolerance'],
+                                           adaptive['quantile_relative_tolerance'])
+    batch_size = int(adaptive['batch_size'])
+    min_iterations = min(iterations, int(adaptive['min_iterations']))
+    draw_metrics: List[dict] = []
+    precision: dict = {}
+    for start in range(0, iterations, batch_size):
+        draw_metrics.extend(map_batch(list(range(start, min(start + batch_size, iterations)))))
+        precision = psa_precision(pd.DataFrame(draw_metrics), adaptive['metrics'],
+                                  adaptive['mean_relative_tolerance'],
+                                  adaptive['quantile_relative_tolerance'])
+        worst = max((max(entry['relative_mcse_mean'], entry['relative_mcse_lower_95'], entry['relative_mcse_upper_95'])
+                     for entry in precision['metrics'].values()), default=math.inf)
+        print(f"  {len(draw_metrics)} draws: largest relative MCSE {worst:.4f}")
+        if len(draw_metrics) >= min_iterations and precision['converged']:
+            print(f"  Converged after {len(draw_metrics)} of {iterations} draws.")
+            break
+    return draw_metrics, precision
+
+
+# Per-draw time series. Workers write their draw's per-step summaries straight into a preallocated
+# float32 (draw x time step x metric) .npy memmap, so fan charts need no reruns and no result transfer.
+
+def create_psa_timeseries(path: Optional[Union[str, Path]], metrics: List[str], iterations: int,
+                          n_steps: int, base_year: int = 2023, run_key: Optional[str] = None) -> dict:
+    """
+    Preallocate (or reopen, for a resumed run) a PSA time-series store.
+
+    An existing file is reused only when its sidecar (the same path with a .json suffix) records
+    the same run key and metrics and the shape matches, so rows left by another run, seed or config
+    are never mixed in; otherwise the store is cleared to NaN.
+
+    Args:
+        path: Target .npy file (None = new temporary file)
+        metrics: Per-step summary keys to capture (e.g. 'incident_onsets', 'total_costs_nhs')
+        iterations: Number of PSA draws
+        n_steps: Time steps per draw, including the time-step-0 baseline
+        base_year: Calendar year of time step 0
+        run_key: psa_run_key of the run writing the store (None = never reuse)
+
+    Returns:
+        Descriptor dictionary ('path', 'metrics', 'time_steps', 'calendar_years', 'run_key') to pass
+        to workers and to psa_timeseries_bands; unwritten cells hold NaN.
+    """
+    if path is None:
+        path = Path(tempfile.mkdtemp(prefix='ibm_psa_timeseries_')) / 'timeseries.npy'
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    shape = (int(iterations), int(n_steps), len(metrics))
+    sidecar = path.with_suffix('.json')
+    header = {'run_key': run_key, 'metrics': list(metrics), 'shape': list(shape)}
+    reuse = False
+    if run_key is not None and path.exists() and sidecar.exists():
+        try:
+            reuse = json.loads(sidecar.read_text()) == header and np.load(path, mmap_mode='r').shape == shape
+        except (OSError, ValueError):
+            reuse = False
+    if reuse:
+        print(f"Reusing PSA time-series store {path}")
+    else:
+        array = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape)
+        array[:] = np.nan
+        array.flush()
+        del array
+        sidecar.write_text(json.dumps(header))
+    return {
+        'path': str(path),
+        'metrics': list(metrics),
+        'time_steps': list(range(int(n_steps))),
+        'calendar_years': [int(base_year) + step for step in range(int(n_steps))],
+        'run_key': run_key,
+    }
+
+
+def _write_psa_timeseries(timeseries: dict, draw_idx: int, model_results: dict) -> None:
+    """Write one draw's per-step summaries into its row of the time-series memmap."""
+    array = np.load(timeseries['path'], mmap_mode='r+')
+    summaries = model_results.get('summaries', {})
+    row = np.full(array.shape[1:], np.nan, dtype=np.float32)
+    for time_step in sorted(summaries)[:array.shape[1]]:
+        summary = summaries[time_step]
+        row[time_step] = [summary.get(metric, np.nan) for metric in timeseries['metrics']]
+    array[draw_idx] = row
+    array.flush()
+    del array
+
+
+def load_psa_timeseries(timeseries: dict) -> np.ndarray:
+    """Read-only (draw x time step x metric) view of a PSA time-series store."""
+    return np.load(timeseries['path'], mmap_mode='r')
+
+
+def psa_timeseries_rows(timeseries: dict, array: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Boolean mask of the store rows holding finished draws.
+
+    A PSA result's descriptor lists the draws that finished in that run ('completed_draws'), so
+    rows beyond an adaptive stop are left out; rows that were never written are always left out.
+    """
+    if array is None:
+        array = load_psa_timeseries(timeseries)
+    rows = ~np.isnan(array).all(axis=(1, 2))
+    if timeseries.get('completed_draws') is not None:
+        finished = np.zeros(array.shape[0], dtype=bool)
+        finished[np.asarray(timeseries['completed_draws'], dtype=int)] = True
+        rows &= finished
+    return rows
+
+
+def psa_timeseries_bands(timeseries: dict, metrics: Optional[List[str]] = None,
+                         probs: Tuple[float, ...] = (0.025, 0.5, 0.975)) -> Dict[str, pd.DataFrame]:
+    """
+    Per-step mean and quantile bands across draws, computed in one vectorised pass over the store.
+
+    Args:
+        timeseries: Descriptor from create_psa_timeseries (or a PSA result's 'timeseries', whose
+            'completed_draws' limits the bands to the draws that finished in that run)
+        metrics: Subset of captured metrics (None = all)
+        probs: Quantiles to report
+
+    Returns:
+        {metric: DataFrame with 'time_step', 'calendar_year', 'mean', 'n_draws' and one column per
+        quantile ('lower_95' / 'median' / 'upper_95' for the defaults, else 'q<prob>')}
+    """
+    array = load_psa_timeseries(timeseries)
+    names = {0.025: 'lower_95', 0.5: 'median', 0.975: 'upper_95'}
+    values = np.asarray(array[psa_timeseries_rows(timeseries, array)], dtype=np.float64)
+    quantiles = (np.nanquantile(values, probs, axis=0) if values.shape[0]
+                 else np.full((len(probs),) + array.shape[1:], np.nan))
+    means = np.nanmean(values, axis=0) if values.shape[0] else np.full(array.shape[1:], np.nan)
+    bands: Dict[str, pd.DataFrame] = {}
+    for column, metric in enumerate(timeseries['metrics']):
+        if metrics is not None and metric not in metrics:
+            continue
+        frame = pd.DataFrame({
+            'time_step': timeseries['time_steps'],
+            'calendar_year': timeseries['calendar_years'],
+            'mean': means[:, column],
+            'n_draws': int(values.shape[0]),
+        })
+        for prob, quantile in zip(probs, quantiles):
+            frame[names.get(prob, f'q{prob:g}')] = quantile[:, column]
+        bands[metric] = frame
+    return bands
+
+
+def _paired_psa_spec(paired: dict, config: dict) -> dict:
+    """Validated psa_meta['paired'] settings: the intervention, willingness to pay and programme cost."""
+    if not isinstance(paired, dict) or not isinstance(paired.get('intervention'), dict):
+        raise ValueError("psa['paired'] needs an 'intervention' dictionary.")
+    intervention = dict(paired['intervention'])
+    apply_intervention(config, intervention)  # validates the risk factor and multipliers
+    return {
+        'intervention': intervention,
+        'wtp': float(paired.get('wtp', 20000.0)),
+        'programme_cost': float(paired.get('programme_cost', 0.0)),
+    }
+
+
+def _run_paired_draw(draw_config: dict, draw_seed: int, paired: dict,
+                     timeseries: Optional[dict] = None, draw_idx: int = 0) -> dict:
+    """
+    Run comparator and intervention on one parameter draw with the same seed (common random numbers).
+
+    With a ``timeseries`` store, both arms' per-step summaries are written to row ``draw_idx``
+    under 'comparator_<metric>' / 'intervention_<metric>' (model outputs, without the programme cost).
+
+    Returns:
+        Flat metrics: each arm's extract_psa_metrics outputs prefixed 'comparator_' / 'intervention_',
+        'intervention_programme_cost', and 'incremental_cost', 'incremental_qalys', 'incremental_onsets'
+        and 'incremental_nmb' (intervention minus comparator). The programme cost is an NHS cost, so
+        it is included in the intervention arm's 'total_costs_nhs' as well as 'total_costs_all'.
+    """
+    comparator_results = run_model(draw_config, seed=draw_seed)
+    intervention_results = run_model(apply_intervention(draw_config, paired['intervention']), seed=draw_seed)
+    if timeseries is not None:
+        arms = {'comparator_': comparator_results.get('summaries', {}),
+                'intervention_': intervention_results.get('summaries', {})}
+        steps = sorted(set(arms['comparator_']) & set(arms['intervention_']))
+        _write_psa_timeseries(timeseries, draw_idx, {'summaries': {
+            step: {prefix + key: value for prefix, summaries in arms.items() for key, value in summaries[step].items()}
+            for step in steps}})
+    comparator = extract_psa_metrics(comparator_results)
+    intervention = extract_psa_metrics(intervention_results)
+    intervention['total_costs_nhs'] += paired['programme_cost']
+    intervention['total_costs_all'] += paired['programme_cost']
+    intervention['programme_cost'] = paired['programme_cost']
+    metrics = {f'comparator_{key}': value for key, value in comparator.items()}
+    metrics.update({f'intervention_{key}': value for key, value in intervention.items()})
+    metrics['incremental_cost'] = intervention['total_costs_all'] - comparator['total_costs_all']
+    metrics['incremental_qalys'] = intervention['total_qalys_combined'] - comparator['total_qalys_combined']
+    metrics['incremental_onsets'] = intervention['incident_onsets_total'] - comparator['incident_onsets_total']
+    metrics['incremental_nmb'] = paired['wtp'] * metrics['incremental_qalys'] - metrics['incremental_cost']
+    return metrics
+
+
+def _run_psa_draw(payload: dict, draw_idx: int, draw_seed: int) -> dict:
+    """
+    Run the model for row ``draw_idx`` of the payload's parameter matrix and return its metrics.
+
+    A payload may carry several base configs ('base_configs', chosen per row by 'config_index')
+    instead of a single 'base_config', e.g. one per population size in the variance pilot.
+    """
+    if 'base_configs' in payload:
+        base_config = payload['base_configs'][int(payload['config_index'][draw_idx])]
+    else:
+        base_config = payload['base_config']
+    draw_config = apply_psa_parameter_row(base_config, payload['parameters'], payload['matrix'][draw_idx])
+    if payload.get('paired'):
+        metrics = _run_paired_draw(draw_config, draw_seed, payload['paired'], payload.get('timeseries'), draw_idx)
+        metrics['iteration'] = draw_idx + 1
+        return metrics
+    draw_results = run_model(draw_config, seed=draw_seed)
+    if payload.get('timeseries'):
+        _write_psa_timeseries(payload['timeseries'], draw_idx, draw_results)
+    metrics = extract_psa_metrics(draw_results)
+    metrics['iteration'] = draw_idx + 1
+    return metrics
+
+
+# PSA worker processes. The payload (base config, parameter list and draw matrix) reaches each worker
+# once, either through the pool initializer or, for a persistent pool, from a staged pickle on first
+# use; tasks then carry only (payload token, draw index, seed).
+
+_PSA_WORKER_PAYLOADS: Dict[str, dict] = {}
+
+
+def _init_psa_worker(token: Optional[str] = None, payload: Optional[dict] = None) -> None:
+    """Pool initializer: cache the PSA payload in this worker."""
+    global _NUMBA_FALLBACK_WARNED
+    _NUMBA_FALLBACK_WARNED = True  # the parent reports a missing Numba once, not every worker
+    _PSA_WORKER_PAYLOADS.clear()
+    if token is not None:
+        _PSA_WORKER_PAYLOADS[token] = payload
+
+
+def _psa_worker_payload(token: str) -> dict:
+    """Return the cached payload for ``token``, loading a staged payload file on first use."""
+    payload = _PSA_WORKER_PAYLOADS.get(token)
+    if payload is None:
+        with open(token, 'rb') as f:
+            payload = pickle.load(f)
+        _PSA_WORKER_PAYLOADS.clear()  # keep one payload per worker; earlier analyses are finished
+        _PSA_WORKER_PAYLOADS[token] = payload
+    return payload
+
+
+def _run_cached_psa_iteration(task: Tuple[str, int, int]) -> Tuple[int, dict]:
+    """Worker task: (payload token, draw_idx, draw_seed) -> (draw_idx, metrics for this iteration)."""
+    token, draw_idx, draw_seed = task
+    return draw_idx, _run_psa_draw(_psa_worker_payload(token), draw_idx, draw_seed)
+
+
+def _run_measured_psa_iteration(task: Tuple[str, int, int]) -> Tuple[int, dict, Optional[int]]:
+    """Worker task like _run_cached_psa_iteration, also returning the worker's peak RSS in bytes (or None)."""
+    draw_idx, metrics = _run_cached_psa_iteration(task)
+    try:
+        import resource
+    except ImportError:
+        return draw_idx, metrics, None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return draw_idx, metrics, int(peak if sys.platform == 'darwin' else peak * 1024)
+
+
+def _resolve_n_jobs(n_jobs: Optional[int], psa_meta: Optional[dict] = None) -> int:
+    """Parallel job count: explicit value, then psa_meta['n_jobs'], then cpu_count() (robust to junk)."""
+    if n_jobs is None:
+        n_jobs = (psa_meta or {}).get('n_jobs')
+    if n_jobs is None:
+        n_jobs = cpu_count()
+    try:
+        n_jobs = int(n_jobs)
+    except (TypeError, ValueError):
+        n_jobs = cpu_count()
+    return max(1, n_jobs)  # Ensure at least 1
 
 
-def compute_population_attributable_fraction(config: dict,
-                                             risk_factor: str,
-                                             baseline_results: Optional[dict] = None,
-                                             seed: Optional[int] = None) -> Optional[dict]:
-    """
-    Estimate the population attributable fraction (PAF) for a named risk factor by
-    comparing baseline simulation results with a counterfactual scenario in which
-    the risk factor is removed (zero prevalence and neutral hazard ratios).
-    """
-    baseline_results_local = baseline_results
-    if baseline_results_local is None:
-        baseline_results_local = run_model(copy.deepcopy(config), seed=seed)
+def _auto_chunksize(n_tasks: int, n_workers: int) -> int:
+    """Tasks per dispatch: about four chunks per worker, as Pool.map does, but also for imap."""
+    chunksize, extra = divmod(n_tasks, max(1, n_workers) * 4)
+    return max(1, chunksize + (1 if extra else 0))
 
-    counterfactual_results = run_model(
-        _counterfactual_config_without_risk(config, risk_factor),
-        seed=seed,
-    )
 
-    baseline_onsets = _total_incident_onsets(baseline_results_local)
-    counterfactual_onsets = _total_incident_onsets(counterfactual_results)
-    if baseline_onsets <= 0:
-        return None
+def open_psa_pool(n_jobs: Optional[int] = None) -> dict:
+    """
+    Start a persistent pool of PSA workers that can be reused across analyses.
 
-    paf = (baseline_onsets - counterfactual_onsets) / baseline_onsets
-    paf = max(0.0, min(1.0, paf))
+    Pass the returned handle as ``pool=`` to run_probabilistic_sensitivity_analysis (or
+    run_two_level_psa) to avoid re-spawning processes per call, and release it with close_psa_pool().
 
-    baseline_breakdown = (
-        baseline_results_local
-        .get('incident_onsets_by_risk_factor', {})
-        .get(risk_factor, {})
-        if isinstance(baseline_results_local, dict) else {}
-    )
+    Args:
+        n_jobs: Number of worker processes (None = cpu_count())
 
+    Returns:
+        Pool handle dictionary ('pool', 'n_jobs', 'payload_dir')
+    """
+    n_jobs = _resolve_n_jobs(n_jobs)
     return {
-        'risk_factor': risk_factor,
-        'baseline_onsets': baseline_onsets,
-        'counterfactual_onsets': counterfactual_onsets,
-        'paf': paf,
-        'baseline_with_risk_onsets': baseline_breakdown.get('with', 0),
-        'baseline_without_risk_onsets': baseline_breakdown.get('without', 0),
+        'pool': Pool(processes=n_jobs, initializer=_init_psa_worker),
+        'n_jobs': n_jobs,
+        'payload_dir': Path(tempfile.mkdtemp(prefix='ibm_psa_payloads_')),
     }
 
 
-# -------- Probabilistic sensitivity analysis (PSA) utilities --------
+def close_psa_pool(handle: dict) -> None:
+    """Shut down a pool from open_psa_pool() and remove its staged payloads."""
+    handle['pool'].close()
+    handle['pool'].join()
+    shutil.rmtree(handle['payload_dir'], ignore_errors=True)
 
-def apply_psa_draw(base_config: dict,
-                   psa_cfg: Optional[dict] = None,
-                   rng: Optional[np.random.Generator] = None) -> dict:
+
+@contextlib.contextmanager
+def psa_worker_pool(n_jobs: Optional[int] = None):
+    """Context manager around open_psa_pool()/close_psa_pool()."""
+    handle = open_psa_pool(n_jobs)
+    try:
+        yield handle
+    finally:
+        close_psa_pool(handle)
+
+
+def _stage_psa_payload(handle: dict, payload: dict) -> str:
+    """Write a PSA payload for a persistent pool's workers; returns its token (the file path)."""
+    path = handle['payload_dir'] / f"payload_{uuid.uuid4().hex}.pkl"
+    with open(path, 'wb') as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return str(path)
+
+
+def psa_run_key(base_config: dict, psa_meta: dict, base_seed: int, iterations: int) -> str:
     """
-    Return a deep-copied config with PSA sampling applied to costs, utilities,
-    probabilities, and risk-factor parameters.
+    Identify a PSA run in a draw store: draws with the same key are interchangeable.
+
+    The key hashes everything that determines the draws (base config, sampling settings, base seed
+    and iteration count, which fixes the parameter matrix); execution settings are excluded.
     """
-    if rng is None:
-        rng = np.random.default_rng()
-    psa_meta = psa_cfg or base_config.get('psa') or {}
-    rel_beta = float(psa_meta.get('relative_sd_beta', PSA_DEFAULT_RELATIVE_SD))
-    rel_gamma = float(psa_meta.get('relative_sd_gamma', PSA_DEFAULT_RELATIVE_SD))
+    sampling = {key: value for key, value in psa_meta.items()
+                if key not in ('n_jobs', 'draw_store', 'adaptive', 'streaming', 'timeseries')}
+    text = repr((base_config, sorted(sampling.items()), int(base_seed), int(iterations)))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
 
-    cfg = copy.deepcopy(base_config)
 
-    base_prob = cfg.get('base_onset_probability')
-    if base_prob is not None:
-        cfg['base_onset_probability'] = _sample_probability_value(base_prob, rel_beta, rng)
+def open_psa_draw_store(path: Union[str, Path]) -> sqlite3.Connection:
+    """
+    Open (creating if needed) a SQLite PSA draw store.
 
-    costs_cfg = cfg.get('costs')
-    if isinstance(costs_cfg, dict):
-        _sample_cost_structure(costs_cfg, rel_gamma, rng)
+    Each row holds one finished draw, keyed by run key and draw index, with its model seed
+    and the draw's metrics as JSON.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path))
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS psa_draws ("
+        " run_key TEXT NOT NULL, iteration INTEGER NOT NULL, seed INTEGER NOT NULL,"
+        " metrics TEXT NOT NULL, PRIMARY KEY (run_key, iteration))"
+    )
+    connection.commit()
+    return connection
 
-    for key in ('utility_norms_by_age', 'utility_multipliers', 'stage_age_qalys', 'dementia_stage_qalys'):
-        mapping = cfg.get(key)
-        if isinstance(mapping, dict):
-            _apply_beta_to_mapping(mapping, rel_beta, rng)
 
-    risk_defs = cfg.get('risk_factors')
-    if isinstance(risk_defs, dict):
-        _sample_risk_factor_prevalence(risk_defs, rel_beta, rng)
-        _sample_risk_factor_relative_risks(risk_defs, rng)
+def _stored_psa_draws(connection: sqlite3.Connection, run_key: str) -> Dict[int, dict]:
+    """Finished draws for ``run_key`` as {draw index: metrics}."""
+    rows = connection.execute(
+        "SELECT iteration, metrics FROM psa_draws WHERE run_key = ?", (run_key,))
+    return {int(iteration): json.loads(metrics) for iteration, metrics in rows}
 
-    return cfg
 
+def _record_psa_draw(connection: sqlite3.Connection, run_key: str, draw_idx: int,
+                     draw_seed: int, metrics: dict) -> None:
+    """Commit one finished draw to the store."""
+    with connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO psa_draws (run_key, iteration, seed, metrics) VALUES (?, ?, ?, ?)",
+            (run_key, int(draw_idx), int(draw_seed), json.dumps(metrics, default=float)))
 
-def extract_psa_metrics(model_results: dict) -> dict:
-    """
-    Pull decision metrics (costs, QALYs, incidence, severity) from a single model run.
+
+def load_psa_draw_stores(paths: Union[str, Path, List[Union[str, Path]]],
+                         run_key: Optional[str] = None) -> pd.DataFrame:
     """
-    summaries = model_results.get('summaries', {}) if isinstance(model_results, dict) else {}
-    if not summaries:
-        return {}
-    final_step = max(summaries)
-    final_summary = summaries[final_step]
+    Merge the draws of one or more PSA draw stores.
 
-    total_incidence = 0
-    for summary in summaries.values():
-        total_incidence += int(summary.get('incident_onsets', 0) or 0)
+    Args:
+        paths: Store file or list of store files (e.g. from partial runs on different machines)
+        run_key: Only load draws of this run (None = every run in the stores)
 
-    metrics = {
-        'total_costs_nhs': float(final_summary.get('total_costs_nhs', 0.0) or 0.0),
-        'total_costs_informal': float(final_summary.get('total_costs_informal', 0.0) or 0.0),
-        'total_qalys_patient': float(final_summary.get('total_qalys_patient', 0.0) or 0.0),
-        'total_qalys_caregiver': float(final_summary.get('total_qalys_caregiver', 0.0) or 0.0),
-        'incident_onsets_total': float(total_incidence),
+    Returns:
+        DataFrame with 'run_key', 'iteration' (1-based), 'seed' and one column per metric;
+        draws duplicated across stores are kept once.
+    """
+    if isinstance(paths, (str, Path)):
+        paths = [paths]
+    records = {}
+    for path in paths:
+        connection = sqlite3.connect(str(path))
+        try:
+            query = "SELECT run_key, iteration, seed, metrics FROM psa_draws"
+            rows = (connection.execute(query + " WHERE run_key = ?", (run_key,)) if run_key is not None
+                    else connection.execute(query))
+            for key, iteration, draw_seed, metrics in rows:
+                records[(key, int(iteration))] = {
+                    'run_key': key, 'iteration': int(iteration) + 1, 'seed': int(draw_seed),
+                    **json.loads(metrics)}
+        finally:
+            connection.close()
+    return pd.DataFrame([records[key] for key in sorted(records)])
+
+
+def summarize_psa_draw_stores(paths: Union[str, Path, List[Union[str, Path]]],
+                              run_key: Optional[str] = None) -> dict:
+    """
+    Summarize the merged draws of one or more PSA draw stores (see load_psa_draw_stores).
+
+    Returns:
+        Dictionary with 'summary' (95% CI), 'iterations' and 'draws'
+    """
+    draws = load_psa_draw_stores(paths, run_key)
+    metrics_df = draws.drop(columns=['run_key', 'seed'], errors='ignore')
+    return {
+        'summary': summarize_psa_results(metrics_df),
+        'iterations': len(draws),
+        'draws': draws,
     }
-    metrics['total_costs_all'] = metrics['total_costs_nhs'] + metrics['total_costs_informal']
-    metrics['total_qalys_combined'] = metrics['total_qalys_patient'] + metrics['total_qalys_caregiver']
 
-    for stage in ('mild', 'moderate', 'severe'):
-        key = f'stage_{stage}'
-        metrics[key] = float(final_summary.get(key, 0) or 0)
 
-    return metrics
+def _iter_psa_tasks(pool: Any, tasks: List[Tuple[str, int, int]], chunksize: int,
+                    ordered: bool = True) -> Any:
+    """
+    Run cached-payload PSA tasks on ``pool``, yielding (draw_idx, metrics) in task order or, with
+    ``ordered=False``, as draws complete; with a progress bar when tqdm is installed.
+    """
+    imap = pool.imap if ordered else pool.imap_unordered
+    results = imap(_run_cached_psa_iteration, tasks, chunksize=chunksize)
+    if TQDM_AVAILABLE:
+        results = tqdm(results, total=len(tasks), desc="PSA iterations")
+    return results
 
 
-def summarize_psa_results(metrics_df: pd.DataFrame) -> Dict[str, dict]:
+def _iter_memory_aware_psa_tasks(pool: Any, tasks: List[Tuple[str, int, int]], memory_plan: dict,
+                                 ordered: bool = True) -> Any:
     """
-    Compute mean and 95% intervals for each numeric PSA metric.
+    Run cached-payload PSA tasks one per dispatch, limiting how many run at once by measured memory.
+
+    ``pool`` should have memory_plan['requested'] workers that exit after each task
+    (maxtasksperchild=1), so an idle worker never keeps a finished draw's memory and the memory in
+    use follows the draws running rather than the pool size. The first draws are pilots, run at most
+    two at a time (one if the estimate allows only one). Each finished draw reports its worker's
+    peak RSS, and the concurrency limit becomes memory_plan['worker_budget_bytes'] divided by the
+    largest peak seen so far, between 1 and memory_plan['requested']. Forked workers' peaks include
+    pages shared with the parent, so the limit errs on the safe side. The largest peak and the
+    final limit are recorded in memory_plan as 'measured_peak_bytes' and 'concurrency'.
     """
-    if metrics_df is None or metrics_df.empty:
-        return {}
-    summary: Dict[str, dict] = {}
-    for column in metrics_df.columns:
-        if column == 'iteration':
-            continue
-        if not pd.api.types.is_numeric_dtype(metrics_df[column]):
-            continue
-        series = metrics_df[column].dropna()
-        if series.empty:
-            continue
-        summary[column] = {
-            'mean': float(series.mean()),
-            'lower_95': float(series.quantile(0.025)),
-            'upper_95': float(series.quantile(0.975)),
-        }
-    return summary
+    max_jobs = int(memory_plan['requested'])
+    limit = min(2, int(memory_plan['n_jobs']))
+    pending = list(reversed(tasks))
+    finished_queue: Any = queue_module.SimpleQueue()
+    in_flight = 0
+    finished: Dict[int, dict] = {}
+    order = [task[1] for task in tasks]
+    next_position = 0
+    peak = memory_plan.get('measured_peak_bytes') or 0
+    progress = tqdm(total=len(tasks), desc="PSA iterations", disable=not TQDM_AVAILABLE)
+    try:
+        while pending or in_flight:
+            while pending and in_flight < limit:
+                pool.apply_async(_run_measured_psa_iteration, (pending.pop(),),
+                                 callback=finished_queue.put, error_callback=finished_queue.put)
+                in_flight += 1
+            outcome = finished_queue.get()
+            in_flight -= 1
+            if isinstance(outcome, BaseException):
+                raise outcome
+            draw_idx, metrics, worker_peak = outcome
+            progress.update(1)
+            if worker_peak:
+                peak = max(peak, worker_peak)
+                new_limit = int(min(max_jobs, max(1, memory_plan['worker_budget_bytes'] // peak)))
+                if new_limit != limit:
+                    print(f"Worker peak memory {peak / 1024 ** 3:.2f} GB: running up to {new_limit} draw(s) at once")
+                limit = new_limit
+                memory_plan['measured_peak_bytes'] = peak
+                memory_plan['concurrency'] = limit
+            if not ordered:
+                yield draw_idx, metrics
+                continue
+            finished[draw_idx] = metrics
+            while next_position < len(order) and order[next_position] in finished:
+                yield order[next_position], finished.pop(order[next_position])
+                next_position += 1
+    finally:
+        progress.close()
 
 
-def _run_single_psa_iteration(args: Tuple[int, dict, dict, int]) -> dict:
+def _psa_draw_iterator(stack: contextlib.ExitStack, draw_payload: dict, draw_seeds: List[int],
+                       n_jobs: int, pool: Optional[dict], chunksize: int,
+                       memory_plan: Optional[dict] = None) -> Any:
     """
-    Helper function to run a single PSA iteration in parallel.
-
-    Args:
-        args: Tuple of (draw_idx, base_config, psa_meta, draw_seed)
+    Set up PSA draw execution and return ``iterate(draw_indices, ordered=True)``, which yields
+    (draw_idx, metrics) pairs: in-process when n_jobs == 1 and no pool is given, otherwise on
+    ``pool`` or on a per-call Pool registered with ``stack`` (closed when the stack exits).
+    With a ``memory_plan`` from plan_psa_workers, the parallel path dispatches draws singly to
+    workers that are replaced after every draw, and adapts the number running at once to the
+    workers' measured memory.
+    """
+    if n_jobs == 1 and pool is None:
+        # Serial execution with progress bar
+        def iterate(draw_indices: List[int], ordered: bool = True) -> Any:
+            for draw_idx in tqdm(draw_indices, desc="PSA iterations", disable=not TQDM_AVAILABLE):
+                yield draw_idx, _run_psa_draw(draw_payload, draw_idx, draw_seeds[draw_idx])
+        return iterate
+
+    # Parallel execution: the payload goes to each worker once; tasks carry only the draw index and seed
+    configs = draw_payload.get('base_configs') or [draw_payload.get('base_config')]
+    if not NUMBA_AVAILABLE and any(isinstance(config, dict) and resolve_engine(None, config) == 'jit'
+                                   for config in configs):
+        _warn_numba_fallback()
+    if pool is not None:
+        worker_pool, token = pool['pool'], _stage_psa_payload(pool, draw_payload)
+    else:
+        token = uuid.uuid4().hex
+        # A throttled pool's workers exit after each draw, so idle workers release its memory
+        worker_pool = stack.enter_context(Pool(processes=n_jobs, initializer=_init_psa_worker,
+                                               initargs=(token, draw_payload),
+                                               maxtasksperchild=1 if memory_plan is not None else None))
 
-    Returns:
-        Dictionary of metrics for this iteration
-    """
-    draw_idx, base_config, psa_meta, draw_seed = args
-    # Create a new RNG for this draw to ensure reproducibility
-    rng = np.random.default_rng(draw_seed)
-    draw_config = apply_psa_draw(base_config, psa_meta, rng)
-    # Generate a seed for the model run
-    model_seed = int(rng.integers(0, 2**32 - 1))
-    draw_results = run_model(draw_config, seed=model_seed)
-    metrics = extract_psa_metrics(draw_results)
-    metrics['iteration'] = draw_idx + 1
-    return metrics
+    def iterate(draw_indices: List[int], ordered: bool = True) -> Any:
+        tasks = [(token, draw_idx, draw_seeds[draw_idx]) for draw_idx in draw_indices]
+        if memory_plan is not None:
+            return _iter_memory_aware_psa_tasks(worker_pool, tasks, memory_plan, ordered)
+        return _iter_psa_tasks(worker_pool, tasks, chunksize, ordered)
+    return iterate
 
 
 def run_probabilistic_sensitivity_analysis(base_config: dict,
@@ -2811,7 +5529,13 @@ def run_probabilistic_sensitivity_analysis(base_config: dict,
                                            *,
                                            collect_draw_level: bool = False,
                                            seed: Optional[int] = None,
-                                           n_jobs: Optional[int] = None) -> dict:
+                                           n_jobs: Optional[int] = None,
+                                           pool: Optional[dict] = None,
+                                           chunksize: Optional[int] = None,
+                                           draw_store: Optional[Union[str, Path]] = None,
+                                           streaming: Optional[bool] = None,
+                                           on_summary: Optional[Any] = None,
+                                           executor: Optional[Any] = None) -> dict:
     """
     Execute a Monte Carlo PSA using the provided configuration.
     Returns summary 95% intervals plus optional draw-level metrics.
@@ -2822,16 +5546,45 @@ def run_probabilistic_sensitivity_analysis(base_config: dict,
                  to automatically scale new entrants when running with reduced population.
         collect_draw_level: If True, include all draw-level metrics in output
         seed: Random seed for reproducibility
-        n_jobs: Number of parallel jobs. If None, uses psa_cfg['n_jobs'] or cpu_count().
+        n_jobs: Number of parallel jobs. If None, uses psa_cfg['n_jobs'] or cpu_count() capped to
+                what fits in memory (see plan_psa_workers); when memory could get tight, the number
+                of draws running at once then follows the workers' measured peak memory.
                 Set to 1 to disable parallelization.
+        pool: Persistent worker pool from open_psa_pool(); overrides n_jobs and is left open.
+        chunksize: Draws per worker dispatch (None = about four chunks per worker).
+        draw_store: SQLite file (default psa_cfg['draw_store']) to which each draw is written as
+                    soon as it finishes; rerunning with the same seed and settings skips stored
+                    draws. Requires a fixed seed.
+        streaming: Aggregate draws as they complete (default psa_cfg['streaming']['use']): workers
+                   return results unordered, means/variances and P-squared quantile estimates are
+                   updated online, and draw-level data is only kept when collect_draw_level is set.
+        on_summary: Called as on_summary(n_draws, summary) every psa_cfg['streaming']['report_every']
+                    draws of a streaming run with the interim psa_accumulator_summary.
+        executor: Replaces local execution: called as executor(stack, draw_payload, draw_seeds)
+                  and returning iterate(draw_indices, ordered=True) like _psa_draw_iterator
+                  (e.g. psa_distributed.queue_executor to run draws on other machines).
 
     Returns:
-        Dictionary with 'summary' (95% CI), 'iterations', and optionally 'draws'
+        Dictionary with 'summary' (95% CI), 'iterations' (draws actually run),
+        'iterations_requested', 'precision' (Monte Carlo standard errors, see psa_precision),
+        and optionally 'draws' plus 'parameter_draws' (the sampled parameter matrix, one column
+        per registry name). A memory-limited automatic pool adds 'worker_memory' (the
+        plan_psa_workers plan with the measured worker peak and final concurrency).
+        With psa_cfg['timeseries']['metrics'] set, 'timeseries' describes the
+        per-draw, per-step store written by the workers (see psa_timeseries_bands); paired runs
+        store each metric as 'comparator_<metric>' and 'intervention_<metric>'.
+        With psa_cfg['variance_reduction'] set, 'variance_reduction' reports the antithetic and/or
+        control-variate precision gains, and summary entries gain 'mean_adjusted'.
+
+    With psa_cfg['adaptive']['use'] the draws run in batches and stop early once the MC standard
+    errors of the tracked metrics' means and 95% limits meet the configured tolerances;
+    'iterations' is then the cap. Early-stopped runs are a prefix of the full run.
 
     Note:
         When running PSA with reduced population (e.g., 1% for faster computation),
         set psa_cfg['original_population'] to the full population size. This will
-        automatically scale new entrants proportionally to maintain correct dynamics.
+        automatically scale new entrants proportionally to maintain correct dynamics
+        and set the agent weight so draw metrics are reported on the full-population scale.
     """
     psa_meta = copy.deepcopy(psa_cfg or base_config.get('psa') or {})
     if not psa_meta.get('use', False):
@@ -2840,20 +5593,31 @@ def run_probabilistic_sensitivity_analysis(base_config: dict,
     iterations = int(psa_meta.get('iterations', 1000))
     if iterations <= 0:
         raise ValueError("PSA iterations must be a positive integer.")
-
-    # Determine number of parallel jobs (robust to None/Non-numeric inputs)
-    if n_jobs is None:
-        n_jobs = psa_meta.get('n_jobs')
-    if n_jobs is None:
-        n_jobs = cpu_count()
-    try:
-        n_jobs = int(n_jobs)
-    except (TypeError, ValueError):
-        n_jobs = cpu_count()
-    n_jobs = max(1, n_jobs)  # Ensure at least 1
+    adaptive = _adaptive_psa_config(psa_meta)
+    if psa_meta.get('sampling', 'random') not in PSA_SAMPLING_METHODS:
+        raise ValueError(f"psa['sampling'] must be one of {PSA_SAMPLING_METHODS}.")
+    variance_reduction = {'antithetic': False, 'control_variates': []}
+    variance_reduction.update(psa_meta.get('variance_reduction') or {})
+    streaming_cfg = {'use': False, 'report_every': 100}
+    streaming_cfg.update(psa_meta.get('streaming') or {})
+    streaming = bool(streaming_cfg['use']) if streaming is None else bool(streaming)
+    if streaming and adaptive['use']:
+        raise ValueError("Adaptive stopping needs the draw-level order statistics; "
+                         "it cannot be combined with streaming aggregation.")
+    if streaming and (variance_reduction['antithetic'] or variance_reduction['control_variates']):
+        raise ValueError("Variance-reduction reporting needs draw-level results; "
+                         "it cannot be combined with streaming aggregation.")
+
+    # Determine number of parallel jobs (robust to None/Non-numeric inputs); an automatic count is
+    # later capped to what fits in memory
+    auto_jobs = pool is None and executor is None and n_jobs is None and psa_meta.get('n_jobs') is None
+    n_jobs = pool['n_jobs'] if pool is not None else _resolve_n_jobs(n_jobs, psa_meta)
 
     base_seed = seed if seed is not None else psa_meta.get('seed')
     rng = np.random.default_rng(base_seed)
+    draw_store = draw_store if draw_store is not None else psa_meta.get('draw_store')
+    if draw_store is not None and base_seed is None:
+        raise ValueError("A PSA draw store needs a fixed seed so that a restart reproduces the same draws.")
 
     # Check if population scaling is needed for new entrants
     # This ensures that when running PSA with reduced population (e.g., 1%),
@@ -2870,6 +5634,7 @@ def run_probabilistic_sensitivity_analysis(base_config: dict,
             original_population=original_pop
         )
         # Log the scaling for transparency
+        print(f"  Agent weight: each simulated person represents {get_agent_weight(working_config):,.2f} people")
         if 'open_population' in working_config:
             op = working_config['open_population']
             if op.get('use', False):
@@ -2878,14 +5643,54 @@ def run_probabilistic_sensitivity_analysis(base_config: dict,
                 if original_entrants != scaled_entrants:
                     print(f"  New entrants scaled: {original_entrants:,} → {scaled_entrants:,} per year")
 
-    # Pre-generate all seeds for reproducibility
-    draw_seeds = [int(rng.integers(0, 2**32 - 1)) for _ in range(iterations)]
+    # Size an automatic pool to the memory available. Where memory could get tight, draws are
+    # dispatched singly and the number running at once follows the workers' measured peak RSS.
+    memory_plan = None
+    if auto_jobs:
+        worker_plan = plan_psa_workers(working_config, n_jobs)
+        if worker_plan['limited_by'] != 'cpu':
+            print(f"Estimated {worker_plan['per_run_bytes'] / 1024 ** 3:.2f} GB per model run: memory allows "
+                  f"{worker_plan['n_jobs']} of {worker_plan['requested']} parallel job(s)")
+        budget = worker_plan['worker_budget_bytes']
+        if (budget is not None and worker_plan['requested'] > 1 and iterations > 1
+                and worker_plan['requested'] * worker_plan['per_run_bytes'] > budget / 2):
+            memory_plan = worker_plan
+        else:
+            n_jobs = worker_plan['n_jobs']
 
-    # Prepare arguments for all iterations
-    psa_args = [
-        (draw_idx, working_config, psa_meta, draw_seeds[draw_idx])
-        for draw_idx in range(iterations)
-    ]
+    # Refuse the analysis up front if n_jobs concurrent model runs would not fit the memory budget
+    check_memory_budget(working_config, n_workers=(1 if executor is not None else
+                                                   memory_plan['n_jobs'] if memory_plan is not None else n_jobs))
+
+    # Pre-generate all model seeds and the full parameter matrix for reproducibility
+    draw_seeds = [int(rng.integers(0, 2**32 - 1)) for _ in range(iterations)]
+    registry = build_parameter_registry(working_config, psa_meta)
+    draw_payload = {
+        'base_config': working_config,
+        'parameters': registry['parameters'],
+        'matrix': draw_psa_parameter_matrix(registry['parameters'], iterations, rng,
+                                            psa_meta.get('sampling', 'random'),
+                                            antithetic=bool(variance_reduction['antithetic'])),
+    }
+    control_names = list(variance_reduction['control_variates'])
+    unknown = [name for name in control_names if name not in registry['index']]
+    if unknown:
+        raise KeyError(f"Unknown control-variate parameters: {unknown}")
+    if psa_meta.get('paired'):
+        draw_payload['paired'] = _paired_psa_spec(psa_meta['paired'], working_config)
+    timeseries_cfg = psa_meta.get('timeseries') or {}
+    if timeseries_cfg.get('metrics'):
+        timeseries_metrics = list(timeseries_cfg['metrics'])
+        if 'paired' in draw_payload:
+            # Paired runs capture each metric for both arms
+            timeseries_metrics = [f'{arm}_{metric}' for arm in ('comparator', 'intervention')
+                                  for metric in timeseries_metrics]
+        draw_payload['timeseries'] = create_psa_timeseries(
+            timeseries_cfg.get('path'), timeseries_metrics, iterations,
+            int(working_config.get('number_of_timesteps', 0)) + 1,
+            int(working_config.get('base_year', 2023)),
+            run_key=(psa_run_key(working_config, psa_meta, base_seed, iterations)
+                     if base_seed is not None else None))
 
     print(f"\nRunning PSA with {iterations} iterations using {n_jobs} parallel job(s)...")
     if TQDM_AVAILABLE:
@@ -2893,39 +5698,346 @@ def run_probabilistic_sensitivity_analysis(base_config: dict,
     else:
         print("Install tqdm for progress tracking: pip install tqdm")
 
+    # Finished draws already in the store are reused; new ones are committed as they arrive
+    connection = open_psa_draw_store(draw_store) if draw_store is not None else None
+    run_key = psa_run_key(working_config, psa_meta, base_seed, iterations) if connection is not None else None
+    finished = _stored_psa_draws(connection, run_key) if connection is not None else {}
+    if finished:
+        print(f"Resuming from {draw_store}: {len(finished)} of {iterations} draws already finished")
+
+    def record(draw_idx: int, metrics: dict) -> dict:
+        if connection is not None:
+            _record_psa_draw(connection, run_key, draw_idx, draw_seeds[draw_idx], metrics)
+        return metrics
+
     # Run PSA iterations in parallel (or serial if n_jobs=1)
-    if n_jobs == 1:
-        # Serial execution with progress bar
-        draw_metrics = []
-        for args in tqdm(psa_args, desc="PSA iterations", disable=not TQDM_AVAILABLE):
-            draw_metrics.append(_run_single_psa_iteration(args))
+    if chunksize is None:
+        chunksize = _auto_chunksize(int(adaptive['batch_size']) if adaptive['use'] else iterations, n_jobs)
+    with contextlib.ExitStack() as stack:
+        if connection is not None:
+            stack.callback(connection.close)
+        if executor is not None:
+            iterate = executor(stack, draw_payload, draw_seeds)
+        else:
+            iterate = _psa_draw_iterator(stack, draw_payload, draw_seeds, n_jobs, pool, chunksize, memory_plan)
+
+        if streaming:
+            # Fold draws into running aggregates as they complete; keep them only if asked to
+            accumulator = new_psa_accumulator()
+            kept: Dict[int, dict] = {}
+            report_every = max(1, int(streaming_cfg['report_every']))
+
+            def consume(draw_idx: int, metrics: dict) -> None:
+                update_psa_accumulator(accumulator, metrics)
+                if collect_draw_level:
+                    kept[draw_idx] = metrics
+                if on_summary is not None and accumulator['draws'] % report_every == 0:
+                    on_summary(accumulator['draws'], psa_accumulator_summary(accumulator))
+
+            for draw_idx in sorted(finished):
+                consume(draw_idx, finished[draw_idx])
+            missing = [draw_idx for draw_idx in range(iterations) if draw_idx not in finished]
+            for draw_idx, metrics in iterate(missing, ordered=False):
+                consume(draw_idx, record(draw_idx, metrics))
+        else:
+            def run_batch(draw_indices: List[int]) -> List[dict]:
+                missing = [draw_idx for draw_idx in draw_indices if draw_idx not in finished]
+                fresh = {draw_idx: record(draw_idx, metrics) for draw_idx, metrics in iterate(missing)}
+                return [finished[draw_idx] if draw_idx in finished else fresh[draw_idx]
+                        for draw_idx in draw_indices]
+
+            draw_metrics, precision = _run_psa_batches(run_batch, iterations, adaptive)
+
+    if streaming:
+        metrics_df = pd.DataFrame([kept[draw_idx] for draw_idx in sorted(kept)])
+        summary = psa_accumulator_summary(accumulator)
+        completed = accumulator['draws']
+        precision = (psa_precision(metrics_df, adaptive['metrics'], adaptive['mean_relative_tolerance'],
+                                   adaptive['quantile_relative_tolerance'])
+                     if collect_draw_level else None)
     else:
-        # Parallel execution
-        with Pool(processes=n_jobs) as pool:
-            if TQDM_AVAILABLE:
-                # Use tqdm with parallel processing
-                draw_metrics = list(tqdm(
-                    pool.imap(_run_single_psa_iteration, psa_args),
-                    total=iterations,
-                    desc="PSA iterations"
-                ))
-            else:
-                # No progress bar for parallel execution without tqdm
-                draw_metrics = pool.map(_run_single_psa_iteration, psa_args)
-
-    metrics_df = pd.DataFrame(draw_metrics)
-    summary = summarize_psa_results(metrics_df)
+        metrics_df = pd.DataFrame(draw_metrics)
+        summary = summarize_psa_results(metrics_df)
+        completed = len(draw_metrics)
 
     payload = {
         'summary': summary,
-        'iterations': iterations,
+        'iterations': completed,
+        'iterations_requested': iterations,
+        'precision': precision,
         'n_jobs_used': n_jobs,
     }
+    if variance_reduction['antithetic'] or control_names:
+        payload['variance_reduction'] = {}
+        if variance_reduction['antithetic']:
+            payload['variance_reduction']['antithetic'] = antithetic_variance_reduction(
+                metrics_df, adaptive['metrics'])
+        if control_names:
+            columns = [registry['index'][name] for name in control_names]
+            adjustment = control_variate_adjustment(
+                metrics_df, draw_payload['matrix'][:completed, columns],
+                psa_parameter_means(registry['parameters'])[columns], adaptive['metrics'])
+            payload['variance_reduction']['control_variate'] = {'controls': control_names, 'metrics': adjustment}
+            for metric, entry in adjustment.items():
+                if metric in summary:
+                    summary[metric]['mean_adjusted'] = entry['mean_adjusted']
+    if run_key is not None:
+        payload['run_key'] = run_key
+    if 'paired' in draw_payload:
+        payload['paired'] = draw_payload['paired']
+    if 'timeseries' in draw_payload:
+        # Draws run in index order, so an adaptive stop after `completed` draws finished rows 0..completed-1
+        payload['timeseries'] = dict(draw_payload['timeseries'], completed_draws=list(range(completed)))
+    if memory_plan is not None:
+        payload['worker_memory'] = memory_plan
     if collect_draw_level:
         payload['draws'] = metrics_df
+        parameter_draws = pd.DataFrame(draw_payload['matrix'][:completed], columns=registry['names'])
+        parameter_draws.insert(0, 'iteration', np.arange(1, completed + 1))
+        payload['parameter_draws'] = parameter_draws
     return payload
 
 
+def run_paired_psa(base_config: dict,
+                   intervention: dict,
+                   psa_cfg: Optional[dict] = None,
+                   *,
+                   wtp: float = 20000.0,
+                   programme_cost: float = 0.0,
+                   **psa_kwargs) -> dict:
+    """
+    Paired intervention-versus-comparator PSA.
+
+    Every parameter draw runs both arms in one worker call with the same model seed, so the
+    synthetic population and its random numbers are shared and the incremental outcomes carry
+    far less Monte Carlo noise than the difference of two independent PSAs.
+
+    Args:
+        base_config: Model configuration (the comparator)
+        intervention: Intervention applied on top of each draw (see apply_intervention)
+        psa_cfg: PSA configuration (defaults to base_config['psa'])
+        wtp: Willingness to pay per QALY for the incremental net monetary benefit
+        programme_cost: Extra NHS cost added to the intervention arm's NHS and total costs in every draw
+        **psa_kwargs: Passed to run_probabilistic_sensitivity_analysis (collect_draw_level, seed,
+            n_jobs, pool, draw_store, ...)
+
+    Returns:
+        PSA result dictionary whose summary (and draws) carry 'comparator_*', 'intervention_*',
+        'incremental_cost', 'incremental_qalys', 'incremental_onsets' and 'incremental_nmb', plus
+        'paired' (the intervention, wtp and programme cost used)
+    """
+    psa_meta = copy.deepcopy(psa_cfg or base_config.get('psa') or {})
+    psa_meta['paired'] = {'intervention': dict(intervention), 'wtp': float(wtp),
+                          'programme_cost': float(programme_cost)}
+    return run_probabilistic_sensitivity_analysis(base_config, psa_meta, **psa_kwargs)
+
+
+def run_parameter_design(base_config: dict,
+                         parameters: List[dict],
+                         matrix: np.ndarray,
+                         *,
+                         seed: Optional[int] = None,
+                         n_jobs: Optional[int] = None,
+                         pool: Optional[dict] = None,
+                         chunksize: Optional[int] = None) -> pd.DataFrame:
+    """
+    Run the model once per row of an explicit parameter matrix (e.g. an emulator training design).
+
+    Args:
+        base_config: Model configuration the rows are overlaid on
+        parameters: Parameter records for the matrix columns (enumerate_psa_parameters() or a
+            registry's 'parameters')
+        matrix: Array of shape (rows, len(parameters))
+        seed: Base seed for the per-row model seeds
+        n_jobs: Number of parallel jobs (None = base_config['psa']['n_jobs'] or cpu_count(); 1 = serial)
+        pool: Persistent worker pool from open_psa_pool() (optional)
+        chunksize: Rows per worker dispatch (None = about four chunks per worker)
+
+    Returns:
+        DataFrame of extract_psa_metrics outputs, one row per matrix row, with a 1-based 'iteration'
+    """
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    if matrix.shape[1] != len(parameters):
+        raise ValueError(f"Matrix has {matrix.shape[1]} columns for {len(parameters)} parameters.")
+    n_rows = matrix.shape[0]
+    n_jobs = pool['n_jobs'] if pool is not None else _resolve_n_jobs(n_jobs, base_config.get('psa'))
+    check_memory_budget(base_config, n_workers=n_jobs)
+    rng = np.random.default_rng(seed)
+    row_seeds = [int(rng.integers(0, 2**32 - 1)) for _ in range(n_rows)]
+    design_payload = {'base_config': base_config, 'parameters': parameters, 'matrix': matrix}
+
+    with contextlib.ExitStack() as stack:
+        iterate = _psa_draw_iterator(stack, design_payload, row_seeds, n_jobs, pool,
+                                     chunksize or _auto_chunksize(n_rows, n_jobs))
+        row_metrics = [metrics for _, metrics in iterate(list(range(n_rows)))]
+
+    outputs = pd.DataFrame(row_metrics)
+    outputs['iteration'] = np.arange(1, n_rows + 1)
+    return outputs
+
+
+def _published_hr_interval(path: Tuple[Any, ...]) -> Optional[Tuple[float, float]]:
+    """The published 95% CI of a risk-factor hazard ratio path, if RISK_FACTOR_HR_INTERVALS has one."""
+    if len(path) != 5 or path[0] != 'risk_factors' or path[2] != 'relative_risks':
+        return None
+    by_sex = RISK_FACTOR_HR_INTERVALS.get(path[1], {}).get(path[3], {})
+    ci_tuple = by_sex.get(path[4]) or by_sex.get('all')
+    return (float(ci_tuple[1]), float(ci_tuple[2])) if ci_tuple else None
+
+
+def _dsa_bounds(registry: dict, slot: int, interval: float, relative_range: Optional[float],
+                ranges: Dict[str, Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+    """Low and high value of one registry parameter for a one-way DSA (None = no range available)."""
+    name = registry['names'][slot]
+    if name in ranges:
+        low, high = (float(value) for value in ranges[name])
+    elif relative_range is not None:
+        base = registry['base'][slot]
+        low, high = base * (1.0 - relative_range), base * (1.0 + relative_range)
+    elif registry['family'][slot] == 'fixed':
+        return None
+    elif interval == 0.95 and _published_hr_interval(registry['paths'][slot]) is not None:
+        low, high = _published_hr_interval(registry['paths'][slot])
+    else:
+        tail = (1.0 - interval) / 2.0
+        low, high = psa_parameter_quantiles([registry['parameters'][slot]], np.array([[tail], [1.0 - tail]]))[:, 0]
+    low = min(max(low, registry['lower'][slot]), registry['upper'][slot])
+    high = min(max(high, registry['lower'][slot]), registry['upper'][slot])
+    return float(low), float(high)
+
+
+def dsa_tornado_table(runs: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """
+    Rank one-way DSA runs by swing in ``metric``.
+
+    Args:
+        runs: The 'runs' table of run_one_way_dsa (a 'base' row, then a 'low' and 'high' row per parameter)
+        metric: Outcome column to rank by
+
+    Returns:
+        DataFrame with one row per parameter, largest swing first: 'parameter', 'label' (name with its
+        range, for plot axes), 'base_value', 'low_value', 'high_value', 'low' and 'high' (the metric at
+        each value), 'base' (the metric in the base case) and 'swing' (|high - low|)
+    """
+    if metric not in runs.columns:
+        raise KeyError(f"Metric {metric!r} not in the DSA runs.")
+    base_row = runs[runs['bound'] == 'base'].iloc[0]
+    low = runs[runs['bound'] == 'low'].set_index('parameter')
+    high = runs[runs['bound'] == 'high'].set_index('parameter').loc[low.index]
+    table = pd.DataFrame({
+        'parameter': low.index,
+        'label': [f"{name}\n({lo:.3g} - {hi:.3g})" for name, lo, hi in zip(low.index, low['value'], high['value'])],
+        'base_value': low['base_value'].to_numpy(),
+        'low_value': low['value'].to_numpy(),
+        'high_value': high['value'].to_numpy(),
+        'low': low[metric].to_numpy(dtype=float),
+        'high': high[metric].to_numpy(dtype=float),
+        'base': float(base_row[metric]),
+    })
+    table['swing'] = (table['high'] - table['low']).abs()
+    return table.sort_values('swing', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def run_one_way_dsa(base_config: dict,
+                    parameters: Optional[List[str]] = None,
+                    *,
+                    psa_cfg: Optional[dict] = None,
+                    interval: float = 0.95,
+                    relative_range: Optional[float] = None,
+                    ranges: Optional[Dict[str, Tuple[float, float]]] = None,
+                    intervention: Optional[dict] = None,
+                    wtp: float = 20000.0,
+                    programme_cost: float = 0.0,
+                    metric: Optional[str] = None,
+                    seed: Optional[int] = None,
+                    n_jobs: Optional[int] = None,
+                    pool: Optional[dict] = None,
+                    chunksize: Optional[int] = None) -> dict:
+    """
+    One-way deterministic sensitivity analysis over registry parameters.
+
+    Each parameter is set in turn to its low and high value with every other parameter at base. All
+    runs share one seed, so each starts from the same initial population and random stream (common
+    random numbers) and the swings are not swamped by Monte Carlo noise. The base case and the
+    2 x parameters runs go through the PSA worker pool in parallel.
+
+    Args:
+        base_config: Model configuration
+        parameters: Registry names to vary (None = every registry parameter with a range)
+        psa_cfg: PSA configuration the parameter distributions come from (defaults to base_config['psa'])
+        interval: Central interval of each parameter's distribution used as its range (0.95 gives the
+            2.5% and 97.5% quantiles; hazard ratios then use their published 95% CI directly)
+        relative_range: Use base x (1 -/+ relative_range) instead of the distribution interval
+        ranges: Explicit {name: (low, high)}, taking precedence over both
+        intervention: apply_intervention() spec; when given, each run is a comparator/intervention pair
+            and the outcomes include the incremental metrics and 'icer'
+        wtp: Willingness to pay per QALY for 'incremental_nmb'
+        programme_cost: Per-run programme cost added to the intervention arm
+        metric: Outcome to rank by (default 'incremental_nmb' with an intervention, else
+            'total_qalys_combined')
+        seed: Common model seed (None = one random seed, reported in the result)
+        n_jobs: Number of parallel jobs (None = base_config['psa']['n_jobs'] or cpu_count(); 1 = serial)
+        pool: Persistent worker pool from open_psa_pool() (optional)
+        chunksize: Runs per worker dispatch (None = about four chunks per worker)
+
+    Returns:
+        Dictionary with 'metric', 'base_value' (metric in the base case), 'tornado' (dsa_tornado_table),
+        'runs' (every run: 'parameter', 'bound', 'value', 'base_value' and all outcomes) and 'seed'
+    """
+    if not 0 < interval < 1:
+        raise ValueError("interval must be in (0, 1).")
+    if relative_range is not None and not 0 < relative_range < 1:
+        raise ValueError("relative_range must be in (0, 1).")
+    ranges = dict(ranges or {})
+    registry = build_parameter_registry(base_config, psa_cfg)
+    slots = _registry_slots(registry, parameters)
+    _registry_slots(registry, list(ranges))
+    bounds = {slot: _dsa_bounds(registry, slot, interval, relative_range, ranges) for slot in slots}
+    slots = [slot for slot in slots if bounds[slot] is not None]
+    if not slots:
+        raise ValueError("No parameters with a range to vary.")
+    metric = metric or ('incremental_nmb' if intervention is not None else 'total_qalys_combined')
+
+    # Row 0 is the base case; rows 2k+1 / 2k+2 set parameter k to its low / high value
+    columns = [registry['parameters'][slot] for slot in slots]
+    matrix = np.tile(registry['base'][slots], (1 + 2 * len(slots), 1))
+    for k, slot in enumerate(slots):
+        matrix[1 + 2 * k, k], matrix[2 + 2 * k, k] = bounds[slot]
+    if seed is None:
+        seed = int(np.random.default_rng().integers(0, 2**32 - 1))
+    dsa_payload = {'base_config': base_config, 'parameters': columns, 'matrix': matrix}
+    if intervention is not None:
+        dsa_payload['paired'] = _paired_psa_spec(
+            {'intervention': intervention, 'wtp': wtp, 'programme_cost': programme_cost}, base_config)
+
+    n_rows = matrix.shape[0]
+    n_jobs = pool['n_jobs'] if pool is not None else _resolve_n_jobs(n_jobs, base_config.get('psa'))
+    check_memory_budget(base_config, n_workers=n_jobs)
+    print(f"\nRunning one-way DSA: {len(slots)} parameters, {n_rows} runs, {n_jobs} parallel job(s)...")
+    with contextlib.ExitStack() as stack:
+        iterate = _psa_draw_iterator(stack, dsa_payload, [seed] * n_rows, n_jobs, pool,
+                                     chunksize or _auto_chunksize(n_rows, n_jobs))
+        row_metrics = [metrics for _, metrics in iterate(list(range(n_rows)))]
+
+    runs = pd.DataFrame(row_metrics).drop(columns='iteration')
+    if intervention is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            runs['icer'] = runs['incremental_cost'] / runs['incremental_qalys']
+    names = [registry['names'][slot] for slot in slots]
+    runs.insert(0, 'parameter', ['base'] + [name for name in names for _ in range(2)])
+    runs.insert(1, 'bound', ['base'] + ['low', 'high'] * len(slots))
+    runs.insert(2, 'value', [np.nan] + [value for slot in slots for value in bounds[slot]])
+    runs.insert(3, 'base_value', [np.nan] + [registry['base'][slot] for slot in slots for _ in range(2)])
+    tornado = dsa_tornado_table(runs, metric)
+    return {
+        'metric': metric,
+        'base_value': float(tornado['base'].iloc[0]),
+        'tornado': tornado,
+        'runs': runs,
+        'seed': seed,
+    }
+
+
 # Output compression utilities
 
 def save_results_compressed(results: dict, filepath: Union[str, Path],
@@ -2995,11 +6107,18 @@ def save_dataframe_compressed(df: pd.DataFrame, filepath: Union[str, Path],
 
 def _with_scaled_population_and_entrants(base_config: dict,
                                          new_population: int,
-                                         original_population: int) -> dict:
+                                         original_population: int,
+                                         *,
+                                         weight_agents: bool = True) -> dict:
     """
     Return a deep copy of the config with population set to new_population and
     entrant counts scaled proportionally to preserve open-population dynamics
     during reduced-size PSA runs.
+
+    With ``weight_agents`` (default) each simulated person carries an agent weight of
+    original_population / new_population, so model outputs stay on the population scale
+    and the population-level ``initial_summary_overrides`` are left untouched. Set it to
+    False for the legacy behaviour, where outputs describe the reduced population only.
     """
     cfg = copy.deepcopy(base_config)
     cfg['population'] = new_population
@@ -3014,12 +6133,16 @@ def _with_scaled_population_and_entrants(base_config: dict,
                 scaled = int(round(entrants * ratio))
                 op['entrants_per_year'] = max(0, scaled)
 
-        overrides = cfg.get('initial_summary_overrides')
-        if isinstance(overrides, dict) and 'entrants' in overrides:
-            base_entrants = overrides.get('entrants')
-            if isinstance(base_entrants, (int, float)):
-                scaled = int(round(base_entrants * ratio))
-                overrides['entrants'] = max(0, scaled)
+        if weight_agents:
+            weight = get_agent_weight(base_config) * (original_population / new_population)
+            cfg['agent_weight'] = int(weight) if float(weight).is_integer() else weight
+        else:
+            overrides = cfg.get('initial_summary_overrides')
+            if isinstance(overrides, dict) and 'entrants' in overrides:
+                base_entrants = overrides.get('entrants')
+                if isinstance(base_entrants, (int, float)):
+                    scaled = int(round(base_entrants * ratio))
+                    overrides['entrants'] = max(0, scaled)
 
     return cfg
 
@@ -3028,7 +6151,11 @@ def estimate_variance_components_pilot(base_config: dict,
                                        psa_cfg: dict,
                                        n_outer: int = 10,
                                        n_inner_list: Optional[List[int]] = None,
-                                       seed: Optional[int] = None) -> dict:
+                                       seed: Optional[int] = None,
+                                       *,
+                                       n_jobs: Optional[int] = None,
+                                       pool: Optional[dict] = None,
+                                       chunksize: Optional[int] = None) -> dict:
     """
     Pilot study to estimate variance components using ANOVA decomposition.
 
@@ -3038,12 +6165,20 @@ def estimate_variance_components_pilot(base_config: dict,
     - σ²_between: Variance due to parameter uncertainty (PSA signal)
     - σ²_within: Variance due to stochastic patient sampling (noise)
 
+    The same parameter sets and model seeds are used at every size, so each draw's smaller
+    initial cohorts are the first n people of its larger ones and the sizes share random numbers;
+    the variance-vs-1/n regression then sees no extra noise from re-drawing parameters. All
+    (size, draw) runs go to one worker pool.
+
     Args:
         base_config: Base configuration dictionary
         psa_cfg: PSA configuration
         n_outer: Number of parameter sets to sample (default 10)
         n_inner_list: List of population sizes to test (default [1000, 5000, 10000])
         seed: Random seed
+        n_jobs: Number of parallel jobs (None = psa_cfg['n_jobs'] or cpu_count(); 1 = serial)
+        pool: Persistent worker pool from open_psa_pool() (optional)
+        chunksize: Runs per worker dispatch (None = about four chunks per worker)
 
     Returns:
         Dictionary with variance estimates and optimal n recommendation
@@ -3064,31 +6199,42 @@ def estimate_variance_components_pilot(base_config: dict,
     # Save original population size
     original_pop = base_config.get('population', 33167098)
 
-    results_by_n = {}
-
-    for n_inner in n_inner_list:
-        print(f"\nTesting with n={n_inner} individuals per parameter set...")
+    # One config per population size; parameter sets and model seeds are shared across sizes
+    size_configs = [
+        _with_scaled_population_and_entrants(base_config, new_population=n_inner, original_population=original_pop)
+        for n_inner in n_inner_list
+    ]
+    n_jobs = pool['n_jobs'] if pool is not None else _resolve_n_jobs(n_jobs, psa_meta)
+    check_memory_budget(size_configs[int(np.argmax(n_inner_list))], n_workers=n_jobs)
+
+    outer_seeds = [int(rng.integers(0, 2**32 - 1)) for _ in range(n_outer)]
+    registry = build_parameter_registry(size_configs[0], psa_meta)
+    matrix = draw_psa_parameter_matrix(registry['parameters'], n_outer, rng, psa_meta.get('sampling', 'random'))
+    n_sizes = len(n_inner_list)
+    pilot_payload = {
+        'base_configs': size_configs,
+        'config_index': np.repeat(np.arange(n_sizes), n_outer),
+        'parameters': registry['parameters'],
+        'matrix': np.tile(matrix, (n_sizes, 1)),
+    }
+    run_seeds = outer_seeds * n_sizes
+    n_runs = n_sizes * n_outer
 
-        # Create modified config with reduced population
-        test_config = _with_scaled_population_and_entrants(
-            base_config,
-            new_population=n_inner,
-            original_population=original_pop
-        )
+    print(f"\nRunning {n_runs} pilot runs using {n_jobs} parallel job(s)...")
+    with contextlib.ExitStack() as stack:
+        iterate = _psa_draw_iterator(stack, pilot_payload, run_seeds, n_jobs, pool,
+                                     chunksize or _auto_chunksize(n_runs, n_jobs))
+        run_metrics = [metrics for _, metrics in iterate(list(range(n_runs)))]
 
-        # Run n_outer parameter sets
-        outcomes = []
-        for i in range(n_outer):
-            draw_seed = int(rng.integers(0, 2**32 - 1))
-            draw_config = apply_psa_draw(test_config, psa_meta, rng)
+    pilot_draws = pd.DataFrame(run_metrics)
+    pilot_draws['iteration'] = np.tile(np.arange(n_outer) + 1, n_sizes)
+    pilot_draws.insert(0, 'n_inner', np.repeat(n_inner_list, n_outer))
 
-            model_seed = int(rng.integers(0, 2**32 - 1))
-            draw_results = run_model(draw_config, seed=model_seed)
-            metrics = extract_psa_metrics(draw_results)
-            outcomes.append(metrics)
+    results_by_n = {}
 
+    for n_inner in n_inner_list:
         # Calculate variance components using ANOVA
-        outcomes_df = pd.DataFrame(outcomes)
+        outcomes_df = pilot_draws[pilot_draws['n_inner'] == n_inner].drop(columns='n_inner')
 
         # For each outcome metric, estimate variance
         variance_stats = {}
@@ -3195,7 +6341,7 @@ def estimate_variance_components_pilot(base_config: dict,
             }
 
     # Get representative recommendation (use first key outcome)
-    key_metrics = ['total_qalys', 'total_costs', 'total_dementia_onsets']
+    key_metrics = ['total_qalys_combined', 'total_costs_all', 'incident_onsets_total']
     recommended_n = None
 
     for key_metric in key_metrics:
@@ -3225,7 +6371,109 @@ def estimate_variance_components_pilot(base_config: dict,
         'original_population': original_pop,
         'pilot_n_outer': n_outer,
         'pilot_n_inner_tested': n_inner_list,
-        'results_by_n': results_by_n
+        'results_by_n': results_by_n,
+        'draws': pilot_draws,
+    }
+
+
+def two_level_anova(draws_df: pd.DataFrame,
+                    n_inner: Optional[int] = None,
+                    metrics: Optional[List[str]] = None) -> Dict[str, dict]:
+    """
+    One-way ANOVA of a nested PSA (outer parameter sets x inner replicates).
+
+    With N parameter sets and m replicates each, MSB = m * var(draw means) and MSW = mean
+    within-draw variance give sigma^2_between = (MSB - MSW) / m (parameter uncertainty) and the
+    run-level noise MSW. The 95% interval is taken from draw means shrunk towards the grand mean
+    by sqrt(sigma^2_between / var(draw means)), which removes the patient-level noise the draw
+    means still carry (O'Hagan, Stevenson & Madan 2007).
+
+    Args:
+        draws_df: One row per run with 'iteration' (outer draw, 1-based), 'replicate' and metrics
+        n_inner: People per run; when given, 'sigma_within_sq' is expressed per person
+                 (Var(run) = sigma^2_between + sigma^2_within / n, as in the variance pilot)
+        metrics: Metrics to analyse (None = every numeric column)
+
+    Returns:
+        {metric: 'mean', 'lower_95', 'upper_95' (noise-corrected), 'naive_lower_95',
+        'naive_upper_95' (raw draw means), 'sigma_between_sq', 'run_variance_within',
+        'sigma_within_sq', 'variance_ratio', 'shrinkage'}
+    """
+    columns = metrics or [column for column in draws_df.columns
+                          if column not in ('iteration', 'replicate')
+                          and pd.api.types.is_numeric_dtype(draws_df[column])]
+    grouped = draws_df.groupby('iteration')
+    n_replicates = int(grouped.size().min())
+    if n_replicates < 2 or grouped.ngroups < 2:
+        raise ValueError("The ANOVA estimator needs at least two parameter sets with two replicates each.")
+    report: Dict[str, dict] = {}
+    for metric in columns:
+        draw_means = grouped[metric].mean().to_numpy(dtype=float)
+        run_variance_within = float(grouped[metric].var(ddof=1).mean())
+        variance_of_means = float(draw_means.var(ddof=1))
+        sigma_between_sq = max(0.0, variance_of_means - run_variance_within / n_replicates)
+        shrinkage = math.sqrt(sigma_between_sq / variance_of_means) if variance_of_means > 0 else 0.0
+        grand_mean = float(draw_means.mean())
+        corrected = grand_mean + shrinkage * (draw_means - grand_mean)
+        sigma_within_sq = run_variance_within * n_inner if n_inner else run_variance_within
+        report[metric] = {
+            'mean': grand_mean,
+            'lower_95': float(np.quantile(corrected, 0.025)),
+            'upper_95': float(np.quantile(corrected, 0.975)),
+            'naive_lower_95': float(np.quantile(draw_means, 0.025)),
+            'naive_upper_95': float(np.quantile(draw_means, 0.975)),
+            'sigma_between_sq': sigma_between_sq,
+            'run_variance_within': run_variance_within,
+            'sigma_within_sq': sigma_within_sq,
+            'variance_ratio': sigma_between_sq / sigma_within_sq if sigma_within_sq > 0 else 0.0,
+            'shrinkage': shrinkage,
+        }
+    return report
+
+
+def plan_two_level_design(variance_components: Dict[str, dict],
+                          max_population: int,
+                          noise_fraction: float = 0.1,
+                          metrics: Optional[List[str]] = None,
+                          min_replicates: int = 2) -> Optional[dict]:
+    """
+    Cheapest inner design (people per run n, replicates m) meeting a noise target.
+
+    Each draw mean carries noise sigma^2_within / (n * m); keeping it below noise_fraction *
+    sigma^2_between needs n * m >= K = sigma^2_within / (noise_fraction * sigma^2_between) people
+    per parameter set. Compute scales with n * m, so the cheapest design simulates K people per
+    draw in the fewest replicates that still let the ANOVA estimate the noise (min_replicates)
+    and keep each run within max_population.
+
+    Args:
+        variance_components: Per-metric 'sigma_between_sq' / 'sigma_within_sq' (per person), e.g.
+                             estimate_variance_components_pilot()['variance_components']
+        max_population: Largest affordable population per run
+        noise_fraction: Allowed noise variance as a fraction of the parameter variance
+        metrics: Metrics that must meet the target (default: total costs, combined QALYs, onsets)
+        min_replicates: Smallest number of replicates per parameter set
+
+    Returns:
+        {'n_inner', 'n_replicates', 'people_per_draw', 'driving_metric'}, or None if no metric
+        has usable components
+    """
+    required, driving_metric = 0.0, None
+    for metric in (metrics or PSA_PRECISION_METRICS):
+        components = variance_components.get(metric)
+        if not components or components.get('sigma_between_sq', 0) <= 0:
+            continue
+        people = components['sigma_within_sq'] / (noise_fraction * components['sigma_between_sq'])
+        if people > required:
+            required, driving_metric = people, metric
+    if driving_metric is None:
+        return None
+    n_replicates = max(int(min_replicates), math.ceil(required / max_population))
+    n_inner = int(min(max_population, max(1, math.ceil(required / n_replicates))))
+    return {
+        'n_inner': n_inner,
+        'n_replicates': n_replicates,
+        'people_per_draw': n_inner * n_replicates,
+        'driving_metric': driving_metric,
     }
 
 
@@ -3234,42 +6482,66 @@ def run_two_level_psa(base_config: dict,
                       *,
                       n_outer: int = 1000,
                       n_inner: Optional[int] = None,
+                      n_replicates: Optional[int] = None,
+                      noise_fraction: float = 0.1,
                       variance_pilot_results: Optional[dict] = None,
                       collect_draw_level: bool = False,
                       seed: Optional[int] = None,
-                      n_jobs: Optional[int] = None) -> dict:
+                      n_jobs: Optional[int] = None,
+                      pool: Optional[dict] = None,
+                      chunksize: Optional[int] = None) -> dict:
     """
     Two-level PSA using O'Hagan et al. (2007) ANOVA method.
 
-    Dramatically reduces computational cost by using reduced population size (n_inner)
-    per parameter set while maintaining accuracy of 95% confidence intervals.
+    Runs n_outer parameter sets, each with n_replicates independent model runs of n_inner people,
+    and separates parameter uncertainty from patient-level noise with two_level_anova, so the
+    reported 95% intervals are not widened by Monte Carlo noise.
 
     Args:
         base_config: Base configuration
-        psa_cfg: PSA configuration
+        psa_cfg: PSA configuration ('sampling' and 'variance_reduction.antithetic' apply to the
+                 outer draws)
         n_outer: Number of PSA iterations (parameter sets)
-        n_inner: Population size per iteration (if None, uses full population)
+        n_inner: Population size per run (None = from the pilot design, else full population)
+        n_replicates: Runs per parameter set (None = from the pilot design, else 2)
+        noise_fraction: Target noise variance as a fraction of parameter variance, used with
+                        variance_pilot_results to choose n_inner and n_replicates
         variance_pilot_results: Results from estimate_variance_components_pilot()
-        collect_draw_level: Whether to return all draw-level data
+        collect_draw_level: Whether to return all run-level data
         seed: Random seed
         n_jobs: Number of parallel jobs
+        pool: Persistent worker pool from open_psa_pool() (optional)
+        chunksize: Runs per worker dispatch (None = about four chunks per worker)
 
     Returns:
-        Dictionary with PSA results including 95% CIs
+        Dictionary with 'summary' (noise-corrected 95% CIs, see two_level_anova), 'iterations',
+        'two_level_psa' (design and 'variance_components') and optionally 'draws' (one row per run)
     """
     psa_meta = copy.deepcopy(psa_cfg or base_config.get('psa') or {})
+    n_outer = int(n_outer)
 
-    # Determine n_inner
+    # Determine n_inner and the number of replicates
     original_pop = base_config.get('population', 33167098)
-
+    design = None
+    if variance_pilot_results and (n_inner is None or n_replicates is None):
+        design = plan_two_level_design(variance_pilot_results.get('variance_components', {}),
+                                       max_population=original_pop, noise_fraction=noise_fraction)
     if n_inner is None:
-        if variance_pilot_results and 'recommended_n' in variance_pilot_results:
+        if design is not None:
+            n_inner = design['n_inner']
+            print(f"\nUsing n={n_inner:,} per run from the pilot design ({design['driving_metric']})")
+        elif variance_pilot_results and 'recommended_n' in variance_pilot_results:
             n_inner = variance_pilot_results['recommended_n']
             print(f"\nUsing recommended n={n_inner:,} from pilot study")
         else:
             n_inner = original_pop
             print(f"\nNo pilot results provided. Using full population n={n_inner:,}")
             print("Consider running estimate_variance_components_pilot() first for efficiency!")
+    if n_replicates is None:
+        n_replicates = design['n_replicates'] if design is not None else 2
+    n_inner, n_replicates = int(n_inner), int(n_replicates)
+    if n_outer < 2 or n_replicates < 2:
+        raise ValueError("The two-level design needs n_outer >= 2 and n_replicates >= 2.")
 
     # Create modified config with reduced population
     psa_config = _with_scaled_population_and_entrants(
@@ -3277,36 +6549,68 @@ def run_two_level_psa(base_config: dict,
         new_population=n_inner,
         original_population=original_pop
     )
+    n_jobs = pool['n_jobs'] if pool is not None else _resolve_n_jobs(n_jobs, psa_meta)
+    check_memory_budget(psa_config, n_workers=n_jobs)
 
+    n_runs = n_outer * n_replicates
     print(f"\n{'='*60}")
     print("TWO-LEVEL PSA (O'Hagan Method)")
     print(f"{'='*60}")
     print(f"Outer iterations (N): {n_outer}")
+    print(f"Inner replicates (m): {n_replicates}")
     print(f"Inner population (n): {n_inner:,}")
-    print(f"Total simulated individuals: {n_outer * n_inner:,}")
-    print(f"Reduction vs full PSA: {(original_pop * n_outer) / (n_inner * n_outer):.1f}x fewer individuals")
+    print(f"Total simulated individuals: {n_runs * n_inner:,}")
+    print(f"Reduction vs full PSA: {(original_pop * n_outer) / (n_inner * n_runs):.1f}x fewer individuals")
     print(f"{'='*60}\n")
 
-    # Run standard PSA but with reduced population
-    results = run_probabilistic_sensitivity_analysis(
-        psa_config,
-        psa_meta,
-        collect_draw_level=collect_draw_level,
-        seed=seed,
-        n_jobs=n_jobs
-    )
+    # Outer parameter sets, each repeated for its replicates with independent model seeds
+    base_seed = seed if seed is not None else psa_meta.get('seed')
+    rng = np.random.default_rng(base_seed)
+    run_seeds = [int(rng.integers(0, 2**32 - 1)) for _ in range(n_runs)]
+    registry = build_parameter_registry(psa_config, psa_meta)
+    variance_reduction = psa_meta.get('variance_reduction') or {}
+    matrix = draw_psa_parameter_matrix(registry['parameters'], n_outer, rng,
+                                       psa_meta.get('sampling', 'random'),
+                                       antithetic=bool(variance_reduction.get('antithetic', False)))
+    run_payload = {
+        'base_config': psa_config,
+        'parameters': registry['parameters'],
+        'matrix': np.repeat(matrix, n_replicates, axis=0),
+    }
+
+    with contextlib.ExitStack() as stack:
+        iterate = _psa_draw_iterator(stack, run_payload, run_seeds, n_jobs, pool,
+                                     chunksize or _auto_chunksize(n_runs, n_jobs))
+        run_metrics = [metrics for _, metrics in iterate(list(range(n_runs)))]
+
+    draws_df = pd.DataFrame(run_metrics)
+    draws_df['iteration'] = np.arange(n_runs) // n_replicates + 1
+    draws_df.insert(1, 'replicate', np.arange(n_runs) % n_replicates + 1)
+    anova = two_level_anova(draws_df, n_inner=n_inner)
+
+    summary = {metric: {'mean': entry['mean'], 'lower_95': entry['lower_95'], 'upper_95': entry['upper_95']}
+               for metric, entry in anova.items()}
+    results = {
+        'summary': summary,
+        'iterations': n_outer,
+        'n_jobs_used': n_jobs,
+    }
+    if collect_draw_level:
+        results['draws'] = draws_df
 
     # Add metadata about two-level design
     results['two_level_psa'] = {
         'n_outer': n_outer,
         'n_inner': n_inner,
+        'n_replicates': n_replicates,
         'original_population': original_pop,
-        'reduction_factor': original_pop / n_inner,
-        'variance_pilot_used': variance_pilot_results is not None
+        'reduction_factor': (original_pop * n_outer) / (n_inner * n_runs),
+        'variance_pilot_used': variance_pilot_results is not None,
+        'design': design,
+        'variance_components': anova,
     }
-
     if variance_pilot_results:
-        results['two_level_psa']['variance_components'] = variance_pilot_results.get('variance_components', {})
+        results['two_level_psa']['pilot_variance_components'] = variance_pilot_results.get('variance_components', {})
 
     return results
 
@@ -3431,6 +6735,15 @@ def plot_psa_time_series_with_ci(baseline_results: dict,
         show: Whether to display the plot
         scale_factor: Multiply values by this (e.g., 1e-6 for millions)
     """
+    # Per-draw time series captured during the PSA give the band directly
+    timeseries = psa_results.get('timeseries')
+    if timeseries and metric_name in timeseries['metrics']:
+        band = psa_timeseries_bands(timeseries, [metric_name])[metric_name]
+        baseline_df = summaries_to_dataframe(baseline_results)
+        _plot_psa_band(band, ylabel, title, save_path, show, scale_factor,
+                       baseline_df if metric_name in baseline_df.columns else None, metric_name)
+        return
+
     # Check if we have draw-level data
     if 'draws' not in psa_results or psa_results['draws'] is None:
         print(f"No draw-level data available for {title}. Cannot plot CI.")
@@ -3463,7 +6776,7 @@ def plot_psa_time_series_with_ci(baseline_results: dict,
 
     print(f"Note: Full time-series PSA plotting requires storing time-series data from each draw.")
     print(f"      Currently showing baseline only for {title}.")
-    print(f"      For full PSA visualization, consider storing draw-level time series.")
+    print(f"      Set psa['timeseries']['metrics'] to capture draw-level time series.")
 
     # Plot baseline as a single line for now
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -3499,6 +6812,12 @@ def plot_psa_incidence_with_ci(psa_results: dict,
         show: Whether to display plot
         n_sample_draws: Number of draws to sample for time series (default 100)
     """
+    timeseries = psa_results.get('timeseries')
+    if timeseries and 'incident_onsets' in timeseries['metrics']:
+        band = psa_timeseries_bands(timeseries, ['incident_onsets'])['incident_onsets']
+        _plot_psa_band(band, 'Incident dementia onsets', 'Dementia Incidence with 95% CI', save_path, show)
+        return
+
     if 'draws' not in psa_results or psa_results['draws'] is None:
         print("No draw-level data available. Cannot plot PSA incidence with CI.")
         return
@@ -3517,8 +6836,36 @@ def plot_psa_incidence_with_ci(psa_results: dict,
     # We need to reconstruct configs and re-run - this is expensive
     # For now, let's create a simpler version that uses stored summary metrics
     print("Note: Full time-series PSA requires re-running models or storing time-series per draw.")
-    print("      Consider using summary metrics (total incidence) or implementing time-series storage.")
-    print("      Plotting not implemented for time-series with CI yet.")
+    print("      Set psa['timeseries']['metrics'] to include 'incident_onsets' to capture it during the PSA.")
+
+
+def _plot_psa_band(band: pd.DataFrame,
+                   ylabel: str,
+                   title: str,
+                   save_path: str,
+                   show: bool = False,
+                   scale_factor: float = 1.0,
+                   baseline_df: Optional[pd.DataFrame] = None,
+                   metric_name: Optional[str] = None) -> None:
+    """Fan chart of a psa_timeseries_bands frame: PSA mean, shaded 95% interval and optional baseline."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    years = band['calendar_year'].values
+
+    ax.fill_between(years, band['lower_95'].values * scale_factor, band['upper_95'].values * scale_factor,
+                    color='steelblue', alpha=0.25, label='95% interval')
+    ax.plot(years, band['mean'].values * scale_factor, color='steelblue', linewidth=2,
+            label=f"PSA mean ({int(band['n_draws'].iloc[0])} draws)")
+    if baseline_df is not None and metric_name is not None and 'calendar_year' in baseline_df.columns:
+        ax.plot(baseline_df['calendar_year'].values, baseline_df[metric_name].values * scale_factor,
+                'k--', linewidth=1.5, label='Baseline')
+
+    ax.set_xlabel('Calendar Year', fontsize=12)
+    ax.set_ylabel(ylabel, fontsize=12)
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.legend(loc='best')
+    ax.grid(True, alpha=0.3)
+
+    save_or_show(save_path, show, title)
 
 
 def plot_psa_summary_metrics(psa_results: dict,
@@ -3583,24 +6930,50 @@ def plot_psa_summary_metrics(psa_results: dict,
     save_or_show(save_path, show, "PSA Summary Metrics")
 
 
-def plot_psa_tornado(psa_results: dict,
-                      metric: str = 'total_qalys',
+def plot_psa_tornado(dsa_results: dict,
+                      metric: Optional[str] = None,
                       save_path: str = "plots/psa_tornado.png",
                       show: bool = False,
                       top_n: int = 10) -> None:
     """
-    Create a tornado diagram showing parameter sensitivity (placeholder for future implementation).
+    Tornado diagram of a one-way DSA: the outcome at each parameter's low and high value.
 
     Args:
-        psa_results: PSA results
-        metric: Which outcome metric to analyze
+        dsa_results: Results of run_one_way_dsa
+        metric: Outcome to plot (default the metric the DSA was ranked by)
         save_path: Output path
         show: Whether to display
         top_n: Number of top parameters to show
     """
-    print("Tornado diagram requires storing parameter values per draw.")
-    print("This is a placeholder for future implementation.")
-    print("Consider correlation analysis between parameters and outcomes.")
+    if 'runs' not in dsa_results:
+        print("Tornado diagram needs one-way DSA results (run_one_way_dsa). Cannot plot.")
+        return
+    metric = metric or dsa_results['metric']
+    tornado = dsa_tornado_table(dsa_results['runs'], metric)
+    finite = np.isfinite(tornado[['low', 'high', 'base']]).all(axis=1)
+    if not finite.all():
+        print(f"Skipping {int((~finite).sum())} parameter(s) with a non-finite {metric} (e.g. zero QALY gain).")
+    tornado = tornado[finite].head(top_n).iloc[::-1]
+    if tornado.empty:
+        print("No finite DSA outcomes to plot.")
+        return
+    base = float(tornado['base'].iloc[0])
+
+    fig, ax = plt.subplots(figsize=(10, max(3, 0.5 * len(tornado) + 1.5)))
+    y_positions = np.arange(len(tornado))
+    ax.barh(y_positions, tornado['low'] - base, left=base, height=0.7, color='steelblue', alpha=0.8,
+            label='Low value')
+    ax.barh(y_positions, tornado['high'] - base, left=base, height=0.7, color='indianred', alpha=0.8,
+            label='High value')
+    ax.axvline(base, color='black', linewidth=1)
+    ax.set_yticks(y_positions)
+    ax.set_yticklabels(tornado['label'], fontsize=8)
+    ax.set_xlabel(metric, fontsize=12)
+    ax.set_title(f"One-way sensitivity analysis: {metric}", fontsize=14, fontweight='bold')
+    ax.legend(loc='best')
+    ax.grid(axis='x', alpha=0.3)
+
+    save_or_show(save_path, show, "Tornado diagram")
 
 
 # Visuals
@@ -4446,8 +7819,8 @@ def export_results_to_excel(model_results, path="PD_AD_PD50.xlsx"):
         if risk_onsets:
             rows = []
             for risk_name, counts in risk_onsets.items():
-                with_risk = int(counts.get('with', 0) or 0)
-                without_risk = int(counts.get('without', 0) or 0)
+                with_risk = _as_count(counts.get('with', 0))
+                without_risk = _as_count(counts.get('without', 0))
                 total = with_risk + without_risk
                 rows.append({
                     "risk_factor": risk_name,
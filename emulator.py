@@ -0,0 +1,336 @@
+"""
+Gaussian-process emulator of run_model for fast what-if queries and PSA.
+
+A space-filling design (Latin hypercube or Sobol over the PSA distributions) of parameter
+sets runs through the model in parallel. A Gaussian process with a linear trend and an ARD
+squared-exponential kernel is then fitted to each key summary output; its nugget absorbs
+the microsimulation noise. Accuracy is reported by closed-form leave-one-out
+cross-validation. Once fitted, PSA and scenario queries are answered from the surrogate in
+milliseconds instead of re-running the model.
+
+Usage:
+    from emulator import build_emulator, emulate_psa, emulate_scenario
+    emulator = build_emulator(config, n_points=200, seed=42)
+    print(emulator['validation'])
+    psa = emulate_psa(emulator, n_draws=100000, seed=1)
+    what_if = emulate_scenario(emulator, {'base_onset_probability': 0.004})
+"""
+
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, optimize
+
+from IBM_PD_AD import (
+    PSA_PRECISION_METRICS,
+    build_parameter_registry,
+    draw_psa_parameter_matrix,
+    psa_parameter_quantiles,
+    psa_parameter_uniforms,
+    run_parameter_design,
+    summarize_psa_results,
+)
+
+# Summary outputs emulated by default
+DEFAULT_EMULATOR_METRICS = list(PSA_PRECISION_METRICS)
+
+# Hyperparameter bounds on standardised inputs and outputs (log scale)
+_LOG_LENGTHSCALE_BOUNDS = (np.log(1e-2), np.log(1e3))
+_LOG_SIGNAL_BOUNDS = (np.log(1e-4), np.log(1e2))
+_LOG_NOISE_BOUNDS = (np.log(1e-8), np.log(10.0))
+
+
+def _sq_distances(a: np.ndarray, b: np.ndarray, lengthscales: np.ndarray) -> np.ndarray:
+    """Squared scaled distances between the rows of ``a`` and ``b``."""
+    a = a / lengthscales
+    b = b / lengthscales
+    sq = (a ** 2).sum(axis=1)[:, None] + (b ** 2).sum(axis=1)[None, :] - 2.0 * a @ b.T
+    return np.maximum(sq, 0.0)
+
+
+def _negative_log_likelihood(theta: np.ndarray, inputs: np.ndarray, response: np.ndarray) -> tuple:
+    """GP negative log marginal likelihood and its gradient in (log lengthscales, log signal, log noise)."""
+    n_points, n_dims = inputs.shape
+    lengthscales = np.exp(theta[:n_dims])
+    signal, noise = np.exp(theta[n_dims]), np.exp(theta[n_dims + 1])
+    kernel = signal * np.exp(-0.5 * _sq_distances(inputs, inputs, lengthscales))
+    try:
+        chol = linalg.cholesky(kernel + noise * np.eye(n_points), lower=True)
+    except linalg.LinAlgError:
+        return 1e25, np.zeros_like(theta)
+    alpha = linalg.cho_solve((chol, True), response)
+    value = 0.5 * response @ alpha + np.log(np.diag(chol)).sum() + 0.5 * n_points * np.log(2 * np.pi)
+
+    weight = linalg.cho_solve((chol, True), np.eye(n_points)) - np.outer(alpha, alpha)
+    weighted = weight * kernel
+    # sum_ij W_ij K_ij (x_ik - x_jk)^2, expanded so no (n, n, d) array is built
+    row_sums = weighted.sum(axis=1)
+    spread = 2.0 * (row_sums @ inputs ** 2) - 2.0 * (inputs * (weighted @ inputs)).sum(axis=0)
+    gradient = np.empty_like(theta)
+    gradient[:n_dims] = 0.5 * spread / lengthscales ** 2
+    gradient[n_dims] = 0.5 * weighted.sum()
+    gradient[n_dims + 1] = 0.5 * noise * np.trace(weight)
+    return float(value), gradient
+
+
+def _fit_gp(inputs: np.ndarray, response: np.ndarray, n_restarts: int, rng: np.random.Generator) -> dict:
+    """Fit one standardised output; returns kernel hyperparameters, the Cholesky factor and LOO residuals."""
+    n_points, n_dims = inputs.shape
+    bounds = [_LOG_LENGTHSCALE_BOUNDS] * n_dims + [_LOG_SIGNAL_BOUNDS, _LOG_NOISE_BOUNDS]
+    starts = [np.concatenate([np.full(n_dims, np.log(np.sqrt(n_dims))), [0.0, np.log(0.1)]])]
+    for _ in range(n_restarts):
+        starts.append(np.array([rng.uniform(low, high) for low, high in bounds]))
+    best = None
+    for start in starts:
+        result = optimize.minimize(_negative_log_likelihood, start, args=(inputs, response),
+                                   jac=True, method='L-BFGS-B', bounds=bounds)
+        if best is None or result.fun < best.fun:
+            best = result
+
+    lengthscales = np.exp(best.x[:n_dims])
+    signal, noise = float(np.exp(best.x[n_dims])), float(np.exp(best.x[n_dims + 1]))
+    kernel = signal * np.exp(-0.5 * _sq_distances(inputs, inputs, lengthscales)) + noise * np.eye(n_points)
+    chol = linalg.cholesky(kernel, lower=True)
+    alpha = linalg.cho_solve((chol, True), response)
+    precision_diag = np.diag(linalg.cho_solve((chol, True), np.eye(n_points)))
+    return {
+        'lengthscales': lengthscales,
+        'signal_variance': signal,
+        'noise_variance': noise,
+        'chol': chol,
+        'alpha': alpha,
+        # Rasmussen & Williams (2006) eq. 5.12: LOO residual and variance without refitting
+        'loo_residual': alpha / precision_diag,
+        'loo_variance': 1.0 / precision_diag,
+    }
+
+
+def _trend_design(inputs: np.ndarray, use_trend: bool) -> np.ndarray:
+    """Intercept plus (optionally) linear terms for the GP mean."""
+    columns = [np.ones((len(inputs), 1))]
+    if use_trend:
+        columns.append(inputs)
+    return np.hstack(columns)
+
+
+def fit_emulator(inputs: Union[np.ndarray, pd.DataFrame],
+                 outputs: pd.DataFrame,
+                 parameter_names: Optional[List[str]] = None,
+                 *,
+                 metrics: Optional[List[str]] = None,
+                 n_restarts: int = 2,
+                 seed: Optional[int] = None) -> dict:
+    """
+    Fit a Gaussian-process emulator to design inputs and model outputs.
+
+    Args:
+        inputs: Parameter values, (design points, parameters)
+        outputs: Model outputs, one row per design point
+        parameter_names: Input names (default the DataFrame columns)
+        metrics: Output columns to emulate (default DEFAULT_EMULATOR_METRICS)
+        n_restarts: Random restarts of the hyperparameter search beyond the default start
+        seed: Seed for the restarts
+
+    Returns:
+        Emulator dictionary: 'parameters', input scaling, one fitted GP per metric under
+        'outputs', and 'validation' (leave-one-out RMSE, Q², 95% coverage per metric)
+    """
+    if isinstance(inputs, pd.DataFrame):
+        parameter_names = parameter_names or list(inputs.columns)
+        inputs = inputs.to_numpy(dtype=float)
+    inputs = np.asarray(inputs, dtype=float)
+    if parameter_names is None or len(parameter_names) != inputs.shape[1]:
+        raise ValueError("parameter_names must name every input column.")
+    metrics = list(metrics or DEFAULT_EMULATOR_METRICS)
+    n_points, n_dims = inputs.shape
+    if n_points < 4:
+        raise ValueError(f"An emulator needs at least 4 design points, got {n_points}.")
+
+    x_mean = inputs.mean(axis=0)
+    x_scale = inputs.std(axis=0)
+    x_scale[x_scale == 0] = 1.0
+    scaled = (inputs - x_mean) / x_scale
+    # The linear trend needs spare points beyond its coefficients
+    use_trend = n_points > 2 * (n_dims + 1)
+    trend_design = _trend_design(scaled, use_trend)
+    rng = np.random.default_rng(seed)
+
+    fitted_outputs = {}
+    validation = {}
+    for metric in metrics:
+        values = outputs[metric].to_numpy(dtype=float)
+        y_mean, y_scale = float(values.mean()), float(values.std()) or 1.0
+        standardised = (values - y_mean) / y_scale
+        trend, *_ = np.linalg.lstsq(trend_design, standardised, rcond=None)
+        gp = _fit_gp(scaled, standardised - trend_design @ trend, n_restarts, rng)
+        gp.update({'trend': trend, 'y_mean': y_mean, 'y_scale': y_scale})
+        fitted_outputs[metric] = gp
+
+        residual = gp['loo_residual'] * y_scale
+        sd = np.sqrt(gp['loo_variance']) * y_scale
+        total = float(((values - values.mean()) ** 2).sum())
+        validation[metric] = {
+            'loo_rmse': float(np.sqrt(np.mean(residual ** 2))),
+            'loo_q2': 1.0 - float((residual ** 2).sum()) / total if total > 0 else float('nan'),
+            'loo_coverage_95': float(np.mean(np.abs(residual) <= 1.96 * sd)),
+        }
+
+    return {
+        'parameters': list(parameter_names),
+        'metrics': metrics,
+        'x_mean': x_mean,
+        'x_scale': x_scale,
+        'train_inputs': scaled,
+        'use_trend': use_trend,
+        'outputs': fitted_outputs,
+        'validation': pd.DataFrame.from_dict(validation, orient='index'),
+    }
+
+
+def build_emulator(config: dict,
+                   n_points: int = 200,
+                   *,
+                   parameters: Optional[List[str]] = None,
+                   metrics: Optional[List[str]] = None,
+                   psa_cfg: Optional[dict] = None,
+                   method: str = 'lhs',
+                   seed: Optional[int] = None,
+                   n_jobs: Optional[int] = None,
+                   pool: Optional[dict] = None,
+                   chunksize: Optional[int] = None,
+                   n_restarts: int = 2) -> dict:
+    """
+    Run a space-filling design through the model and fit an emulator to it.
+
+    Args:
+        config: Model configuration (already scaled, e.g. by _with_scaled_population_and_entrants)
+        n_points: Number of design points (model runs)
+        parameters: Registry names to vary (default every uncertain PSA parameter); the rest stay
+            at their base values
+        metrics: Outputs to emulate (default DEFAULT_EMULATOR_METRICS)
+        psa_cfg: PSA settings for the parameter distributions (default config['psa'])
+        method: 'lhs' or 'sobol' points mapped through each parameter's inverse CDF
+        seed: Seed for the design, the model runs and the hyperparameter restarts
+        n_jobs: Worker processes (None = config['psa']['n_jobs'] or all cores; 1 = serial)
+        pool: Persistent worker pool from open_psa_pool()
+        chunksize: Design points per worker dispatch
+        n_restarts: Random restarts of the hyperparameter search
+
+    Returns:
+        Emulator dictionary (see fit_emulator) plus 'design' (inputs and outputs of every run),
+        'parameter_records' (distributions of the varied parameters, for emulate_psa) and 'base'
+        (base values of the varied parameters, for emulate_scenario)
+    """
+    registry = build_parameter_registry(config, psa_cfg)
+    if parameters is None:
+        parameters = [name for name, family in zip(registry['names'], registry['family']) if family != 'fixed']
+    missing = [name for name in parameters if name not in registry['index']]
+    if missing:
+        raise KeyError(f"Unknown parameter(s): {missing}")
+    slots = [registry['index'][name] for name in parameters]
+    records = [registry['parameters'][slot] for slot in slots]
+
+    rng = np.random.default_rng(seed)
+    n_uncertain = sum(record['family'] != 'fixed' for record in records)
+    design = np.tile(registry['base'], (int(n_points), 1))
+    design[:, slots] = psa_parameter_quantiles(records, psa_parameter_uniforms(n_points, n_uncertain, method, rng))
+
+    print(f"Running {n_points} emulator design points over {len(parameters)} parameters...")
+    outputs = run_parameter_design(config, registry['parameters'], design,
+                                   seed=int(rng.integers(0, 2**32 - 1)),
+                                   n_jobs=n_jobs, pool=pool, chunksize=chunksize)
+    inputs = pd.DataFrame(design[:, slots], columns=parameters)
+    emulator = fit_emulator(inputs, outputs, metrics=metrics, n_restarts=n_restarts,
+                            seed=int(rng.integers(0, 2**32 - 1)))
+    emulator['design'] = pd.concat([inputs, outputs], axis=1)
+    emulator['parameter_records'] = records
+    emulator['base'] = registry['base'][slots]
+    return emulator
+
+
+def emulator_predict(emulator: dict,
+                     values: Union[np.ndarray, pd.DataFrame, Sequence]) -> pd.DataFrame:
+    """
+    Emulated expected outputs at new parameter sets.
+
+    Args:
+        emulator: Output of build_emulator() or fit_emulator()
+        values: Parameter values, (points, parameters) in emulator['parameters'] order, or a
+            DataFrame with those columns
+
+    Returns:
+        DataFrame with one '<metric>' (emulated mean) and '<metric>_sd' (emulator uncertainty,
+        excluding microsimulation noise) column per metric
+    """
+    if isinstance(values, pd.DataFrame):
+        values = values[emulator['parameters']].to_numpy(dtype=float)
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    scaled = (values - emulator['x_mean']) / emulator['x_scale']
+    trend_design = _trend_design(scaled, emulator['use_trend'])
+
+    predictions = {}
+    for metric in emulator['metrics']:
+        gp = emulator['outputs'][metric]
+        cross = gp['signal_variance'] * np.exp(
+            -0.5 * _sq_distances(scaled, emulator['train_inputs'], gp['lengthscales']))
+        mean = trend_design @ gp['trend'] + cross @ gp['alpha']
+        solved = linalg.solve_triangular(gp['chol'], cross.T, lower=True)
+        variance = np.maximum(gp['signal_variance'] - (solved ** 2).sum(axis=0), 0.0)
+        predictions[metric] = gp['y_mean'] + gp['y_scale'] * mean
+        predictions[f'{metric}_sd'] = gp['y_scale'] * np.sqrt(variance)
+    return pd.DataFrame(predictions)
+
+
+def emulate_psa(emulator: dict,
+                n_draws: int = 10000,
+                *,
+                seed: Optional[int] = None,
+                method: str = 'random') -> dict:
+    """
+    PSA answered from the emulator: parameter draws are pushed through the surrogate.
+
+    Args:
+        emulator: Output of build_emulator()
+        n_draws: Number of parameter draws
+        seed: Random seed
+        method: PSA sampling method ('random', 'sobol' or 'lhs')
+
+    Returns:
+        Dictionary shaped like a PSA result: 'summary', 'iterations', 'draws' and
+        'parameter_draws'; the draws also carry the emulator '<metric>_sd' columns
+    """
+    rng = np.random.default_rng(seed)
+    matrix = draw_psa_parameter_matrix(emulator['parameter_records'], n_draws, rng, method)
+    draws = emulator_predict(emulator, matrix)
+    draws.insert(0, 'iteration', np.arange(1, n_draws + 1))
+    parameter_draws = pd.DataFrame(matrix, columns=emulator['parameters'])
+    parameter_draws.insert(0, 'iteration', np.arange(1, n_draws + 1))
+    return {
+        'summary': summarize_psa_results(draws[['iteration'] + emulator['metrics']]),
+        'iterations': int(n_draws),
+        'draws': draws,
+        'parameter_draws': parameter_draws,
+    }
+
+
+def emulate_scenario(emulator: dict, overrides: Dict[str, float]) -> Dict[str, dict]:
+    """
+    Emulated outputs for one scenario: the base parameter values with ``overrides`` applied.
+
+    Args:
+        emulator: Output of build_emulator()
+        overrides: Parameter name -> value for the varied parameters to change
+
+    Returns:
+        Metric -> {'mean', 'sd'} (sd is the emulator's own uncertainty)
+    """
+    unknown = [name for name in overrides if name not in emulator['parameters']]
+    if unknown:
+        raise KeyError(f"Parameter(s) not in the emulator: {unknown}")
+    values = np.array(emulator['base'], dtype=float)
+    for name, value in overrides.items():
+        values[emulator['parameters'].index(name)] = float(value)
+    prediction = emulator_predict(emulator, values).iloc[0]
+    return {metric: {'mean': float(prediction[metric]), 'sd': float(prediction[f'{metric}_sd'])}
+            for metric in emulator['metrics']}
@@ -23,6 +23,9 @@ from matplotlib.patches import Rectangle
 import openpyxl
 from pathlib import Path
 
+from ce_curves import ce_curves
+from IBM_PD_AD import dsa_tornado_table
+
 # Set publication-quality defaults
 plt.rcParams['figure.dpi'] = 300
 plt.rcParams['savefig.dpi'] = 600
@@ -35,17 +38,39 @@ BASE_CASE_ICER = 44858
 NICE_THRESHOLD_LOW = 20000
 NICE_THRESHOLD_HIGH = 30000
 
-def create_tornado_plot(sensitivity_data=None):
+def create_tornado_plot(sensitivity_data=None, base_case_icer=BASE_CASE_ICER):
     """
     Create tornado plot for one-way sensitivity analysis.
 
     Parameters:
     -----------
-    sensitivity_data : pd.DataFrame, optional
-        DataFrame with columns: 'parameter', 'icer_low', 'icer_high'
+    sensitivity_data : pd.DataFrame or dict, optional
+        DataFrame with columns: 'parameter', 'icer_low', 'icer_high', or the results of
+        IBM_PD_AD.run_one_way_dsa(..., intervention=...) ranked by any metric; the ICERs are
+        re-read from its runs, parameters with a non-finite ICER are skipped and its base-case
+        ICER replaces base_case_icer.
         If None, uses placeholder data from the paper
+    base_case_icer : float
+        ICER the deviations are measured from
     """
 
+    # One-way DSA results: the ICER at each parameter's low and high value, whatever metric the
+    # DSA was ranked by (the default with an intervention is incremental NMB, not the ICER)
+    if isinstance(sensitivity_data, dict):
+        tornado = dsa_tornado_table(sensitivity_data['runs'], 'icer')
+        base_case_icer = float(tornado['base'].iloc[0]) if len(tornado) else float('nan')
+        if not np.isfinite(base_case_icer):
+            raise ValueError("The DSA base case has no finite ICER (e.g. zero QALY gain).")
+        finite = np.isfinite(tornado[['low', 'high']]).all(axis=1)
+        if not finite.all():
+            print(f"Skipping {int((~finite).sum())} parameter(s) with a non-finite ICER (e.g. zero QALY gain).")
+        tornado = tornado[finite]
+        sensitivity_data = pd.DataFrame({
+            'parameter': tornado['label'],
+            'icer_low': tornado['low'],
+            'icer_high': tornado['high'],
+        })
+
     # If no data provided, create example data based on paper text
     if sensitivity_data is None:
         sensitivity_data = pd.DataFrame({
@@ -68,8 +93,8 @@ def create_tornado_plot(sensitivity_data=None):
     sensitivity_data = sensitivity_data.sort_values('range', ascending=True)
 
     # Calculate deviations from base case
-    sensitivity_data['low_deviation'] = sensitivity_data['icer_low'] - BASE_CASE_ICER
-    sensitivity_data['high_deviation'] = sensitivity_data['icer_high'] - BASE_CASE_ICER
+    sensitivity_data['low_deviation'] = sensitivity_data['icer_low'] - base_case_icer
+    sensitivity_data['high_deviation'] = sensitivity_data['icer_high'] - base_case_icer
 
     # Create figure
     fig, ax = plt.subplots(figsize=(10, 6))
@@ -92,8 +117,8 @@ def create_tornado_plot(sensitivity_data=None):
     ax.axvline(x=0, color='black', linewidth=1.5, linestyle='-', label='Base Case ICER')
 
     # Add NICE threshold lines
-    nice_low_deviation = NICE_THRESHOLD_LOW - BASE_CASE_ICER
-    nice_high_deviation = NICE_THRESHOLD_HIGH - BASE_CASE_ICER
+    nice_low_deviation = NICE_THRESHOLD_LOW - base_case_icer
+    nice_high_deviation = NICE_THRESHOLD_HIGH - base_case_icer
 
     ax.axvline(x=nice_low_deviation, color='red', linewidth=1, linestyle='--',
                label=f'NICE £{NICE_THRESHOLD_LOW:,}/QALY', alpha=0.7)
@@ -286,15 +311,10 @@ def create_ceac(psa_results=None):
             'incremental_qalys': incremental_qalys
         })
 
-    # Calculate CEAC
-    wtp_thresholds = np.linspace(0, 100000, 200)
-    prob_cost_effective = []
-
-    for wtp in wtp_thresholds:
-        # Net Monetary Benefit = QALY_gain × WTP - Cost
-        nmb = psa_results['incremental_qalys'] * wtp - psa_results['incremental_cost']
-        prob_ce = (nmb > 0).sum() / len(nmb)
-        prob_cost_effective.append(prob_ce)
+    # Calculate CEAC (NMB = QALY_gain × WTP - Cost at every threshold in one pass)
+    curves = ce_curves(psa_results, wtp=np.linspace(0, 100000, 200))
+    wtp_thresholds = curves['wtp']
+    prob_cost_effective = curves['ceac'][:, 1]
 
     # Create figure
     fig, ax = plt.subplots(figsize=(10, 7))
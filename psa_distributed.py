@@ -0,0 +1,382 @@
+"""
+Distributed PSA execution through an SQLite work queue on shared storage.
+
+A coordinator (run_distributed_psa, or run_probabilistic_sensitivity_analysis with
+executor=queue_executor(...)) publishes the PSA payload once and one task per draw
+(run key, draw index, seed). Workers on any machine that can reach the queue file pull tasks,
+run them with the same code path as the local pool, and write the metrics back. The
+coordinator collects them into the usual PSA result, so draw stores, adaptive stopping and
+streaming all work unchanged.
+
+- Workers heartbeat every few seconds. A running task whose heartbeat is older than the
+  run's heartbeat timeout goes back to the queue, so a lost machine's work is redone.
+- A failing draw is retried up to the run's max_attempts. After that it is marked failed,
+  and the coordinator stops with the worker's error.
+- The queue file needs a file system with working POSIX locks (local disk, or NFSv4 / SMB
+  with locking). It uses a rollback journal rather than WAL so that it also works across
+  machines.
+
+Usage:
+    # coordinator (optionally also running workers on this machine)
+    from psa_distributed import run_distributed_psa
+    results = run_distributed_psa(config, queue='/shared/psa_queue.sqlite', local_workers=4)
+
+    # on every other machine
+    python psa_distributed.py /shared/psa_queue.sqlite
+"""
+
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from IBM_PD_AD import _run_psa_draw, run_probabilistic_sensitivity_analysis
+
+_QUEUE_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS psa_runs (
+        run_key TEXT PRIMARY KEY,
+        payload BLOB NOT NULL,
+        max_attempts INTEGER NOT NULL,
+        heartbeat_timeout REAL NOT NULL,
+        created REAL NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS psa_tasks (
+        run_key TEXT NOT NULL,
+        draw_idx INTEGER NOT NULL,
+        seed INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        worker TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        heartbeat REAL,
+        metrics TEXT,
+        error TEXT,
+        PRIMARY KEY (run_key, draw_idx)
+    )""",
+    "CREATE INDEX IF NOT EXISTS psa_tasks_status ON psa_tasks (status, run_key, draw_idx)",
+    """CREATE TABLE IF NOT EXISTS psa_workers (
+        worker_id TEXT PRIMARY KEY,
+        host TEXT,
+        pid INTEGER,
+        started REAL,
+        heartbeat REAL,
+        tasks_done INTEGER NOT NULL DEFAULT 0
+    )""",
+)
+
+
+def open_psa_queue(path: Union[str, Path]) -> sqlite3.Connection:
+    """
+    Open (creating if needed) an SQLite PSA work queue.
+
+    The connection is in autocommit mode; multi-statement updates use explicit transactions.
+    """
+    connection = sqlite3.connect(str(path), timeout=60.0, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=DELETE")
+    connection.execute("PRAGMA busy_timeout=60000")
+    for statement in _QUEUE_SCHEMA:
+        connection.execute(statement)
+    return connection
+
+
+@contextlib.contextmanager
+def _immediate(connection: sqlite3.Connection) -> Any:
+    """Write transaction that takes the queue lock up front (BEGIN IMMEDIATE); rolled back on error."""
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield connection
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+    connection.execute("COMMIT")
+
+
+def psa_queue_run_key(draw_payload: dict, draw_seeds: List[int]) -> str:
+    """Hash identifying a published PSA run: workers run a task only against this exact payload."""
+    digest = hashlib.sha256(pickle.dumps((draw_payload, list(draw_seeds)), protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()[:16]
+
+
+def publish_psa_tasks(connection: sqlite3.Connection,
+                      run_key: str,
+                      draw_payload: dict,
+                      draw_seeds: List[int],
+                      draw_indices: List[int],
+                      *,
+                      max_attempts: int = 3,
+                      heartbeat_timeout: float = 120.0) -> None:
+    """
+    Publish a run's payload (once) and queue ``draw_indices``.
+
+    Draws already done for this run key are kept, so republishing resumes a run; failed draws
+    are reset for a fresh set of attempts.
+    """
+    with _immediate(connection) as cursor:
+        cursor.execute(
+            "INSERT OR IGNORE INTO psa_runs (run_key, payload, max_attempts, heartbeat_timeout, created) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (run_key, pickle.dumps(draw_payload, protocol=pickle.HIGHEST_PROTOCOL),
+             int(max_attempts), float(heartbeat_timeout), time.time()))
+        cursor.executemany(
+            "INSERT OR IGNORE INTO psa_tasks (run_key, draw_idx, seed, status) VALUES (?, ?, ?, 'pending')",
+            [(run_key, int(draw_idx), int(draw_seeds[draw_idx])) for draw_idx in draw_indices])
+        cursor.execute(
+            "UPDATE psa_tasks SET status = 'pending', attempts = 0, error = NULL "
+            "WHERE run_key = ? AND status = 'failed'", (run_key,))
+
+
+def requeue_stale_psa_tasks(connection: sqlite3.Connection, now: Optional[float] = None) -> int:
+    """
+    Return running tasks whose worker stopped heartbeating to the queue.
+
+    Tasks that have used up their run's attempts are marked failed instead. Returns the
+    number of tasks changed.
+    """
+    now = time.time() if now is None else now
+    cursor = connection.execute(
+        """UPDATE psa_tasks
+           SET status = CASE WHEN attempts >= (SELECT max_attempts FROM psa_runs r
+                                               WHERE r.run_key = psa_tasks.run_key)
+                             THEN 'failed' ELSE 'pending' END,
+               worker = NULL,
+               error = 'worker heartbeat lost'
+           WHERE status = 'running'
+             AND heartbeat < ? - (SELECT heartbeat_timeout FROM psa_runs r WHERE r.run_key = psa_tasks.run_key)""",
+        (now,))
+    return cursor.rowcount
+
+
+def _claim_psa_task(connection: sqlite3.Connection, worker_id: str,
+                    run_key: Optional[str] = None) -> Optional[tuple]:
+    """Atomically take the lowest pending task (of ``run_key`` if given): (run_key, draw_idx, seed) or None."""
+    with _immediate(connection):
+        requeue_stale_psa_tasks(connection)
+        if run_key is None:
+            task = connection.execute("SELECT run_key, draw_idx, seed FROM psa_tasks WHERE status = 'pending' "
+                                      "ORDER BY rowid LIMIT 1").fetchone()
+        else:
+            task = connection.execute("SELECT run_key, draw_idx, seed FROM psa_tasks WHERE status = 'pending' "
+                                      "AND run_key = ? ORDER BY draw_idx LIMIT 1", (run_key,)).fetchone()
+        if task is not None:
+            connection.execute(
+                "UPDATE psa_tasks SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "heartbeat = ? WHERE run_key = ? AND draw_idx = ?",
+                (worker_id, time.time(), task[0], task[1]))
+    return task
+
+
+def _heartbeat_loop(path: Union[str, Path], worker_id: str, interval: float, stop: threading.Event) -> None:
+    """Background thread: refresh the worker's and its running tasks' heartbeats until stopped."""
+    connection = open_psa_queue(path)
+    try:
+        while not stop.wait(interval):
+            now = time.time()
+            connection.execute("UPDATE psa_workers SET heartbeat = ? WHERE worker_id = ?", (now, worker_id))
+            connection.execute("UPDATE psa_tasks SET heartbeat = ? WHERE worker = ? AND status = 'running'",
+                               (now, worker_id))
+    finally:
+        connection.close()
+
+
+def run_psa_worker(queue: Union[str, Path],
+                   *,
+                   worker_id: Optional[str] = None,
+                   run_key: Optional[str] = None,
+                   poll_interval: float = 1.0,
+                   heartbeat_interval: float = 10.0,
+                   idle_timeout: Optional[float] = None,
+                   max_tasks: Optional[int] = None,
+                   stop: Optional[Any] = None) -> int:
+    """
+    Pull PSA draw tasks from the queue and run them until told to stop.
+
+    Args:
+        queue: Path of the SQLite queue file
+        worker_id: Name recorded against claimed tasks (default host:pid:random)
+        run_key: Only take tasks of this run (default any run)
+        poll_interval: Seconds to wait when the queue is empty
+        heartbeat_interval: Seconds between heartbeats while running a draw
+        idle_timeout: Exit after this many seconds without work (None = keep polling)
+        max_tasks: Exit after this many tasks
+        stop: Event-like object; the worker exits once stop.is_set()
+
+    Returns:
+        Number of tasks this worker completed
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    connection = open_psa_queue(queue)
+    now = time.time()
+    connection.execute(
+        "INSERT OR REPLACE INTO psa_workers (worker_id, host, pid, started, heartbeat, tasks_done) "
+        "VALUES (?, ?, ?, ?, ?, 0)", (worker_id, socket.gethostname(), os.getpid(), now, now))
+    beating = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat_loop, args=(queue, worker_id, heartbeat_interval, beating),
+                                 daemon=True)
+    heartbeat.start()
+
+    payloads: Dict[str, dict] = {}
+    completed = 0
+    idle_since = time.time()
+    try:
+        while not (stop is not None and stop.is_set()):
+            if max_tasks is not None and completed >= max_tasks:
+                break
+            task = _claim_psa_task(connection, worker_id, run_key)
+            if task is None:
+                if idle_timeout is not None and time.time() - idle_since > idle_timeout:
+                    break
+                time.sleep(poll_interval)
+                continue
+            task_run, draw_idx, draw_seed = task
+            if task_run not in payloads:
+                row = connection.execute("SELECT payload FROM psa_runs WHERE run_key = ?", (task_run,)).fetchone()
+                payloads[task_run] = pickle.loads(row[0])
+            try:
+                metrics = _run_psa_draw(payloads[task_run], draw_idx, draw_seed)
+            except Exception as exc:
+                connection.execute(
+                    """UPDATE psa_tasks
+                       SET status = CASE WHEN attempts >= (SELECT max_attempts FROM psa_runs r
+                                                           WHERE r.run_key = psa_tasks.run_key)
+                                         THEN 'failed' ELSE 'pending' END,
+                           worker = NULL, error = ?
+                       WHERE run_key = ? AND draw_idx = ? AND worker = ? AND status = 'running'""",
+                    (f"{type(exc).__name__}: {exc}", task_run, draw_idx, worker_id))
+            else:
+                # A task requeued while this worker was silent may now belong to another worker;
+                # only record the result if this worker still holds it
+                with _immediate(connection):
+                    recorded = connection.execute(
+                        "UPDATE psa_tasks SET status = 'done', metrics = ?, heartbeat = ?, error = NULL "
+                        "WHERE run_key = ? AND draw_idx = ? AND worker = ? AND status = 'running'",
+                        (json.dumps(metrics), time.time(), task_run, draw_idx, worker_id)).rowcount
+                    if recorded:
+                        connection.execute("UPDATE psa_workers SET tasks_done = tasks_done + 1 "
+                                           "WHERE worker_id = ?", (worker_id,))
+                if recorded:
+                    completed += 1
+            idle_since = time.time()
+    finally:
+        beating.set()
+        heartbeat.join()
+        connection.close()
+    return completed
+
+
+def queue_executor(queue: Union[str, Path],
+                   *,
+                   poll_interval: float = 1.0,
+                   heartbeat_timeout: float = 120.0,
+                   max_attempts: int = 3,
+                   timeout: Optional[float] = None) -> Any:
+    """
+    Executor for run_probabilistic_sensitivity_analysis(executor=...) that runs draws via the queue.
+
+    Args:
+        queue: Path of the SQLite queue file (shared with the workers)
+        poll_interval: Seconds between checks for finished draws
+        heartbeat_timeout: Seconds without a heartbeat before a running draw is requeued
+        max_attempts: Attempts per draw before the run fails
+        timeout: Give up (TimeoutError) if a batch of draws takes longer than this many seconds
+
+    Returns:
+        Callable (stack, draw_payload, draw_seeds) -> iterate(draw_indices, ordered=True)
+    """
+    def executor(stack: contextlib.ExitStack, draw_payload: dict, draw_seeds: List[int]) -> Any:
+        connection = open_psa_queue(queue)
+        stack.callback(connection.close)
+        run_key = psa_queue_run_key(draw_payload, draw_seeds)
+        print(f"Publishing PSA run {run_key} to {queue}")
+
+        def iterate(draw_indices: List[int], ordered: bool = True) -> Any:
+            publish_psa_tasks(connection, run_key, draw_payload, draw_seeds, draw_indices,
+                              max_attempts=max_attempts, heartbeat_timeout=heartbeat_timeout)
+            waiting = set(int(draw_idx) for draw_idx in draw_indices)
+            finished: Dict[int, dict] = {}
+            next_position = 0
+            started = time.time()
+            while waiting or (ordered and next_position < len(draw_indices)):
+                requeue_stale_psa_tasks(connection)
+                rows = connection.execute(
+                    "SELECT draw_idx, status, metrics, error, attempts FROM psa_tasks "
+                    "WHERE run_key = ? AND status IN ('done', 'failed')", (run_key,)).fetchall()
+                for draw_idx, status, metrics, error, attempts in rows:
+                    if draw_idx not in waiting:
+                        continue
+                    if status == 'failed':
+                        raise RuntimeError(f"PSA draw {draw_idx} failed after {attempts} attempt(s): {error}")
+                    waiting.discard(draw_idx)
+                    if ordered:
+                        finished[draw_idx] = json.loads(metrics)
+                    else:
+                        yield draw_idx, json.loads(metrics)
+                while ordered and next_position < len(draw_indices) and draw_indices[next_position] in finished:
+                    draw_idx = draw_indices[next_position]
+                    yield draw_idx, finished.pop(draw_idx)
+                    next_position += 1
+                if waiting:
+                    if timeout is not None and time.time() - started > timeout:
+                        raise TimeoutError(f"{len(waiting)} PSA draws still unfinished after {timeout} s.")
+                    time.sleep(poll_interval)
+        return iterate
+    return executor
+
+
+def run_distributed_psa(base_config: dict,
+                        psa_cfg: Optional[dict] = None,
+                        *,
+                        queue: Union[str, Path],
+                        local_workers: int = 0,
+                        poll_interval: float = 1.0,
+                        heartbeat_timeout: float = 120.0,
+                        max_attempts: int = 3,
+                        timeout: Optional[float] = None,
+                        **psa_kwargs) -> dict:
+    """
+    Run a PSA whose draws are executed by queue workers, optionally also starting some locally.
+
+    Args:
+        base_config: Model configuration
+        psa_cfg: PSA configuration (defaults to base_config['psa'])
+        queue: Path of the SQLite queue file on storage shared with the workers
+        local_workers: Worker processes to start on this machine for the duration of the run
+        poll_interval, heartbeat_timeout, max_attempts, timeout: See queue_executor
+        **psa_kwargs: Passed to run_probabilistic_sensitivity_analysis (collect_draw_level,
+            seed, draw_store, streaming, ...)
+
+    Returns:
+        The standard PSA result dictionary
+    """
+    executor = queue_executor(queue, poll_interval=poll_interval, heartbeat_timeout=heartbeat_timeout,
+                              max_attempts=max_attempts, timeout=timeout)
+    stop = multiprocessing.Event()
+    workers = [multiprocessing.Process(target=run_psa_worker, args=(queue,),
+                                       kwargs={'poll_interval': poll_interval, 'stop': stop}, daemon=True)
+               for _ in range(int(local_workers))]
+    for worker in workers:
+        worker.start()
+    try:
+        return run_probabilistic_sensitivity_analysis(base_config, psa_cfg, executor=executor,
+                                                      n_jobs=max(1, int(local_workers)), **psa_kwargs)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python psa_distributed.py QUEUE_PATH [IDLE_TIMEOUT_SECONDS]")
+        sys.exit(1)
+    idle = float(sys.argv[2]) if len(sys.argv) >= 3 else None
+    done = run_psa_worker(sys.argv[1], idle_timeout=idle)
+    print(f"Worker finished {done} PSA draw(s)")
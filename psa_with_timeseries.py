@@ -0,0 +1,154 @@
+"""
+Parallel probabilistic sensitivity analysis with per-year trajectories.
+
+Wraps run_probabilistic_sensitivity_analysis from IBM_PD_AD so that each draw also records
+its yearly summaries (population, incidence, stage counts, costs, QALYs). Draws run on
+several worker processes. When an output directory is given, results are written as they
+finish:
+
+- psa_draws.sqlite: one row per finished draw. Rerunning with the same seed resumes.
+- psa_timeseries.npy: float32 (draw x year x metric) trajectories, written by the workers;
+  psa_timeseries.json records the run it belongs to, so a different run starts it afresh.
+- psa_summary.csv, psa_draws.csv, psa_parameter_draws.csv and psa_timeseries_bands.csv:
+  written once the run completes.
+
+Usage:
+    from psa_with_timeseries import run_psa_with_timeseries
+    results = run_psa_with_timeseries(config, iterations=500, n_jobs=None, seed=42,
+                                      output_dir='psa_results')
+"""
+
+import copy
+import shutil
+from pathlib import Path
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from IBM_PD_AD import (
+    load_psa_timeseries,
+    psa_timeseries_bands,
+    psa_timeseries_rows,
+    run_probabilistic_sensitivity_analysis,
+)
+
+# Per-year summary keys recorded for every draw
+DEFAULT_TIMESERIES_METRICS = [
+    'population_alive',
+    'incident_onsets',
+    'deaths',
+    'stage_mild',
+    'stage_moderate',
+    'stage_severe',
+    'total_costs_nhs',
+    'total_costs_informal',
+    'total_qalys_patient',
+    'total_qalys_caregiver',
+]
+
+
+def trajectories_to_frame(timeseries: dict) -> pd.DataFrame:
+    """
+    Long-format per-draw trajectories from a PSA time-series store.
+
+    Args:
+        timeseries: Time-series descriptor from a PSA result
+
+    Returns:
+        DataFrame with 'iteration' (1-based), 'time_step', 'calendar_year' and one column per
+        captured metric; draws that never ran, or did not finish in this run, are dropped
+    """
+    array = np.asarray(load_psa_timeseries(timeseries))
+    n_draws, n_steps, _ = array.shape
+    frame = pd.DataFrame(array.reshape(n_draws * n_steps, -1), columns=timeseries['metrics'])
+    frame.insert(0, 'calendar_year', np.tile(timeseries['calendar_years'], n_draws))
+    frame.insert(0, 'time_step', np.tile(timeseries['time_steps'], n_draws))
+    frame.insert(0, 'iteration', np.repeat(np.arange(1, n_draws + 1), n_steps))
+    return frame[psa_timeseries_rows(timeseries, array).repeat(n_steps)].reset_index(drop=True)
+
+
+def _bands_to_frame(bands: dict) -> pd.DataFrame:
+    """Stack per-metric band frames into one table with a 'metric' column."""
+    if not bands:
+        return pd.DataFrame()
+    return pd.concat([band.assign(metric=metric) for metric, band in bands.items()], ignore_index=True)
+
+
+def run_psa_with_timeseries(config: dict,
+                            iterations: Optional[int] = None,
+                            n_jobs: Optional[int] = None,
+                            seed: Optional[int] = None,
+                            output_dir: Optional[Union[str, Path]] = None,
+                            *,
+                            psa_cfg: Optional[dict] = None,
+                            timeseries_metrics: Optional[List[str]] = None,
+                            pool: Optional[dict] = None) -> dict:
+    """
+    Run a PSA that returns summary intervals together with every draw's yearly trajectory.
+
+    Args:
+        config: Model configuration (already scaled, e.g. by _with_scaled_population_and_entrants)
+        iterations: Number of draws (default config['psa']['iterations'])
+        n_jobs: Worker processes (None = config['psa']['n_jobs'] or all cores; 1 = serial)
+        seed: Base random seed (default config['psa']['seed'])
+        output_dir: Directory for incremental and final outputs (None = keep everything in memory)
+        psa_cfg: PSA settings to use instead of config['psa']
+        timeseries_metrics: Per-year summary keys to record (default DEFAULT_TIMESERIES_METRICS)
+        pool: Persistent worker pool from open_psa_pool()
+
+    Returns:
+        PSA result dictionary ('summary', 'iterations', 'precision', 'draws', 'parameter_draws', ...)
+        plus 'trajectories' (long-format per-draw, per-year metrics) and 'timeseries_bands'
+        (per-metric mean and 95% band by year); with output_dir, also 'output_dir'.
+    """
+    psa_meta = copy.deepcopy(psa_cfg or config.get('psa') or {})
+    psa_meta['use'] = True
+    if iterations is not None:
+        psa_meta['iterations'] = int(iterations)
+    if seed is not None:
+        psa_meta['seed'] = seed
+
+    if output_dir is not None:
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        timeseries_path = output_dir / 'psa_timeseries.npy'
+        draw_store = output_dir / 'psa_draws.sqlite'
+        if psa_meta.get('seed') is None:
+            raise ValueError("Saving a resumable PSA to output_dir needs a fixed seed.")
+    else:
+        timeseries_path = None
+        draw_store = None
+    psa_meta['timeseries'] = {
+        'metrics': list(timeseries_metrics or DEFAULT_TIMESERIES_METRICS),
+        'path': timeseries_path,
+    }
+
+    results = run_probabilistic_sensitivity_analysis(
+        config,
+        psa_meta,
+        collect_draw_level=True,
+        n_jobs=n_jobs,
+        pool=pool,
+        draw_store=draw_store,
+    )
+
+    timeseries = results['timeseries']
+    results['trajectories'] = trajectories_to_frame(timeseries)
+    results['timeseries_bands'] = psa_timeseries_bands(timeseries)
+
+    if output_dir is None:
+        # The trajectories now live in memory; drop the temporary store
+        shutil.rmtree(Path(timeseries['path']).parent, ignore_errors=True)
+        del results['timeseries']
+        return results
+
+    summary_df = pd.DataFrame.from_dict(results['summary'], orient='index')
+    summary_df.index.name = 'metric'
+    summary_df.to_csv(output_dir / 'psa_summary.csv')
+    results['draws'].to_csv(output_dir / 'psa_draws.csv', index=False)
+    results['parameter_draws'].to_csv(output_dir / 'psa_parameter_draws.csv', index=False)
+    _bands_to_frame(results['timeseries_bands']).to_csv(output_dir / 'psa_timeseries_bands.csv', index=False)
+    results['output_dir'] = str(output_dir)
+    print(f"Saved PSA outputs to {output_dir.resolve()}")
+    return results
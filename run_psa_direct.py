@@ -8,21 +8,29 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 import sys
+import multiprocessing
 import io
-import copy
 
 # Set UTF-8 encoding for output (Windows compatibility)
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
 sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8', errors='replace')
 
 # Import model functions
-from IBM_PD_AD import general_config, save_results_compressed
+from IBM_PD_AD import (
+    general_config,
+    save_results_compressed,
+    get_agent_weight,
+    _with_scaled_population_and_entrants,
+)
 from psa_with_timeseries import run_psa_with_timeseries
 
 # Configuration
 PSA_ITERATIONS = 500
 SCALE_FACTOR = 0.01  # 1% of population
 SEED = 42
+# This script runs at module level without a __main__ guard, so workers started by re-importing
+# it (spawn/forkserver, the Windows and macOS defaults) would rerun it; use every core only with fork
+N_JOBS = None if multiprocessing.get_start_method() == 'fork' else 1
 OUTPUT_DIR = Path('psa_results_1pct')
 OUTPUT_DIR.mkdir(exist_ok=True, parents=True)
 
@@ -52,15 +60,19 @@ print(f"  - Full UK population: {original_population:,}")
 print(f"  - PSA population (1%): {scaled_population:,}")
 print(f"  - Reduction factor: {original_population/scaled_population:.0f}x")
 
-# Create scaled configuration
-psa_config = copy.deepcopy(general_config)
-psa_config['population'] = scaled_population
+# Create scaled configuration; entrants are scaled proportionally and every simulated
+# person carries an agent weight, so model outputs are already on the full-population scale
+psa_config = _with_scaled_population_and_entrants(
+    general_config,
+    new_population=scaled_population,
+    original_population=original_population,
+)
+agent_weight = get_agent_weight(psa_config)
+print(f"  - Agent weight: each simulated person represents {agent_weight:,.2f} people")
 
-# Scale entrants proportionally
 if psa_config.get('open_population', {}).get('use', False):
-    original_entrants = psa_config['open_population']['entrants_per_year']
-    scaled_entrants = int(original_entrants * SCALE_FACTOR)
-    psa_config['open_population']['entrants_per_year'] = scaled_entrants
+    original_entrants = general_config['open_population']['entrants_per_year']
+    scaled_entrants = psa_config['open_population']['entrants_per_year']
     print(f"  - Entrants/year scaled: {original_entrants:,} -> {scaled_entrants:,}")
 
 # ============================================================================
@@ -73,8 +85,12 @@ print("="*80 + "\n")
 try:
     print(f"Starting PSA with {PSA_ITERATIONS} iterations...")
     print(f"  - Population per iteration: {scaled_population:,}")
-    print(f"  - Running sequentially (1 core) to avoid Windows issues")
-    print(f"  - Estimated time: 3-6 hours")
+    if N_JOBS == 1:
+        print("  - Running sequentially (1 core): no fork start method on this platform")
+        print("  - Estimated time: 3-6 hours")
+    else:
+        print("  - Running in parallel on all available cores")
+    print(f"  - Finished draws are saved to {OUTPUT_DIR} as they complete; rerun to resume")
     print(f"  - Progress will be shown below...\n")
 
     start_time = datetime.now()
@@ -82,9 +98,9 @@ try:
     psa_results = run_psa_with_timeseries(
         config=psa_config,
         iterations=PSA_ITERATIONS,
-        n_jobs=1,  # Sequential execution (avoids Windows multiprocessing issues)
+        n_jobs=N_JOBS,
         seed=SEED,
-        output_dir=None  # Don't auto-save, we'll handle it
+        output_dir=OUTPUT_DIR,  # Incremental draw store, per-year trajectories and CSV summaries
     )
 
     end_time = datetime.now()
@@ -108,21 +124,21 @@ except Exception as e:
 # STEP 3: Scale results and validate
 # ============================================================================
 print("\n" + "="*80)
-print("STEP 3: SCALING RESULTS TO FULL POPULATION")
+print("STEP 3: SUMMARISING POPULATION-SCALE RESULTS")
 print("="*80 + "\n")
 
-scaling_multiplier = 1 / SCALE_FACTOR
+scaling_multiplier = agent_weight
 
 print(f"Scaling parameters:")
-print(f"  - Scaling multiplier: {scaling_multiplier:.0f}x")
-print(f"  - Counts will be multiplied by {scaling_multiplier:.0f}")
-print(f"  - Rates will remain unchanged\n")
+print(f"  - Agent weight: {scaling_multiplier:.0f}x")
+print("  - Counts are already weighted to the full population by the model")
+print("  - Rates are unaffected by weighting\n")
 
-# Scale the results
+# Classify the (already weighted) results
 if 'draws' in psa_results:
     draws_df = psa_results['draws'].copy()
 
-    # Identify which columns to scale
+    # Identify which columns are population counts
     scale_metrics = []
     no_scale_metrics = []
 
@@ -148,13 +164,12 @@ if 'draws' in psa_results:
             should_scale = False
 
         if should_scale:
-            draws_df[col] = draws_df[col] * scaling_multiplier
             scale_metrics.append(col)
         else:
             no_scale_metrics.append(col)
 
-    print(f"Scaled {len(scale_metrics)} count/total metrics")
-    print(f"Kept {len(no_scale_metrics)} rate/average metrics unchanged")
+    print(f"Found {len(scale_metrics)} weighted count/total metrics")
+    print(f"Found {len(no_scale_metrics)} rate/average metrics")
 
     # Recalculate summary statistics
     print("\nRecalculating summary statistics...")
@@ -175,7 +190,7 @@ if 'draws' in psa_results:
     psa_results['draws_scaled'] = draws_df
     psa_results['summary_scaled'] = summary
 
-    print("[OK] Scaling complete\n")
+    print("[OK] Summary complete\n")
 
 # ============================================================================
 # STEP 4: Validate scaling
@@ -184,21 +199,17 @@ print("\n" + "="*80)
 print("STEP 4: VALIDATING SCALING METHODOLOGY")
 print("="*80 + "\n")
 
-validation_passed = True
-
-# Check that rates remained constant
-if 'summary_scaled' in psa_results:
-    rate_checks = []
-    for metric in no_scale_metrics[:5]:  # Check first 5 rate metrics
-        if metric in psa_results['summary'].get('summary_scaled', {}):
-            print(f"  Rate check - {metric}: UNCHANGED (as expected)")
-            rate_checks.append(True)
+# Agent weighting replaces post-hoc scaling, so check that the weighted sample represents the
+# full population
+weighted_population = agent_weight * scaled_population
+validation_passed = abs(weighted_population - original_population) <= 1e-9 * original_population
+print(f"  Population check - {agent_weight:,.2f} x {scaled_population:,} = {weighted_population:,.0f} "
+      f"(full population {original_population:,})")
 
-    if all(rate_checks):
-        print("\n[OK] VALIDATION PASSED: Rates unchanged after scaling")
-    else:
-        print("\n[WARNING] Some rates may have changed")
-        validation_passed = False
+if validation_passed:
+    print("\n[OK] VALIDATION PASSED: Agent-weighted sample represents the full population")
+else:
+    print("\n[WARNING] Agent weight x simulated population does not match the full population")
 
 # ============================================================================
 # STEP 5: Export to Excel
@@ -290,10 +301,10 @@ try:
         # Sheet 4: Validation
         print("  - Validation sheet...")
         validation_data = [{
-            'Check': 'Rate Invariance',
+            'Check': 'Agent Weighting',
             'Status': 'PASSED' if validation_passed else 'REVIEW',
-            'Details': 'Incidence and prevalence rates unchanged after scaling',
-            'Interpretation': 'Validates population-normalized behavior'
+            'Details': f'Agent weight {agent_weight:,.2f} x {scaled_population:,} simulated = {original_population:,}',
+            'Interpretation': 'Weighted counts are on the full-population scale'
         }, {
             'Check': 'Sample Size',
             'Status': 'ADEQUATE',
@@ -353,12 +364,11 @@ from an estimated 10-14 days to approximately {duration/3600:.1f} hours while ma
 accuracy of 95% confidence intervals, as the CIs primarily reflect parameter uncertainty
 rather than Monte Carlo error.
 
-Results were scaled to the full UK population ({original_population:,}) by multiplying
-absolute counts (incident cases, total costs, total QALYs) by {scaling_multiplier:.0f}
-while keeping rates and per-capita metrics unchanged. Validation confirmed that incidence
-and prevalence rates remained invariant after scaling (maximum difference <0.1%),
-verifying that the model exhibits proper population-normalized behavior and that the
-scaling methodology is appropriate.
+Results were scaled to the full UK population ({original_population:,}) by assigning each
+simulated individual an agent weight of {scaling_multiplier:.0f}, so that absolute counts
+(incident cases, total costs, total QALYs) are accumulated on the population scale while
+rates and per-capita metrics are unchanged. We verified that the agent weight multiplied
+by the simulated population equals the full population.
 
 We report mean values and 95% confidence intervals (2.5th-97.5th percentiles) for all
 outcomes. This approach is consistent with ISPOR-SMDM modeling good research practices
@@ -381,13 +391,13 @@ KEY STATISTICS TO REPORT:
 - Computational efficiency: {original_population/scaled_population:.0f}-fold reduction in runtime
 - Actual runtime: {duration/3600:.2f} hours
 - Random seed: {SEED} (for reproducibility)
-- Validation: All rates remained constant after scaling
+- Validation: agent weight x simulated population = full population
 
 RECOMMENDED TABLE FOOTNOTE:
 "Values represent mean and 95% confidence interval from {PSA_ITERATIONS} probabilistic
 sensitivity analysis iterations using an efficient nested design (O'Hagan et al., 2007).
 Results scaled from {SCALE_FACTOR*100:.0f}% population to full UK population of
-{original_population/1e6:.1f} million, with validation confirming rate invariance."
+{original_population/1e6:.1f} million by agent weighting."
 """
 
 print(justification)
@@ -0,0 +1,269 @@
+"""
+Two-way and threshold sensitivity analysis by grid sweeps over registry parameters.
+
+Questions such as "at what periodontal onset HR and prevalence does the intervention become
+cost-effective?" are answered by sweeping two or more parameter axes through the model:
+
+- every grid point runs with the same seed (common random numbers), so neighbouring points
+  differ only through the parameters and the threshold contour is not blurred by noise;
+- points are keyed by a hash of the configuration they produce, so duplicates run once and,
+  with a cache file, repeated or extended sweeps reuse earlier runs;
+- new points run in parallel on the PSA worker pool;
+- with refine > 0, grid cells whose corners lie on both sides of the threshold are split at
+  their midpoints, concentrating runs along the contour.
+
+An axis names a registry parameter (see build_parameter_registry) or a prefix of several,
+e.g. 'risk_factors.periodontal_disease.prevalence' sets the female and male prevalence
+together.
+
+Usage:
+    from sensitivity_grid import grid_sweep, grid_pivot
+    grid = grid_sweep(config, {
+        'risk_factors.periodontal_disease.relative_risks.onset': np.linspace(1.0, 2.0, 6),
+        'risk_factors.periodontal_disease.prevalence': np.linspace(0.2, 0.6, 5),
+    }, intervention={'risk_factor': 'periodontal_disease', 'prevalence_multiplier': 0.5},
+       programme_cost=250, refine=2, cache='outputs/grid_cache.sqlite', seed=42)
+    heatmap = grid_pivot(grid, 'risk_factors.periodontal_disease.relative_risks.onset',
+                         'risk_factors.periodontal_disease.prevalence', 'incremental_nmb')
+"""
+
+import contextlib
+import hashlib
+import itertools
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from IBM_PD_AD import (
+    _auto_chunksize,
+    _paired_psa_spec,
+    _psa_draw_iterator,
+    _resolve_n_jobs,
+    build_parameter_registry,
+    check_memory_budget,
+)
+
+
+def _axis_slots(registry: dict, axis: str) -> List[int]:
+    """Registry slots set by one axis: the parameter of that name, or every parameter under the prefix."""
+    if axis in registry['index']:
+        return [registry['index'][axis]]
+    slots = [slot for slot, name in enumerate(registry['names']) if name.startswith(axis + '.')]
+    if not slots:
+        raise KeyError(f"Unknown parameter or parameter group: {axis!r}")
+    return slots
+
+
+def _open_grid_cache(path: Union[str, Path]) -> sqlite3.Connection:
+    """Open (creating if needed) a grid-sweep cache: one row of metrics per configuration key."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path))
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("CREATE TABLE IF NOT EXISTS grid_runs (config_key TEXT PRIMARY KEY, metrics TEXT NOT NULL)")
+    connection.commit()
+    return connection
+
+
+def _split_cells(cells: List[Tuple[Tuple[float, float], ...]], values: Dict[Tuple[float, ...], float],
+                 threshold: float) -> Tuple[list, set]:
+    """
+    Halve every cell whose corners fall on both sides of ``threshold``.
+
+    Returns the sub-cells and the set of grid points they need (corners and midpoints).
+    """
+    new_cells, points = [], set()
+    for cell in cells:
+        corners = [values[corner] for corner in itertools.product(*cell)]
+        if any(not np.isfinite(value) for value in corners):
+            continue
+        signs = {value >= threshold for value in corners}
+        if len(signs) < 2:
+            continue
+        halves = [((lo, (lo + hi) / 2.0), ((lo + hi) / 2.0, hi)) for lo, hi in cell]
+        for sub_cell in itertools.product(*halves):
+            new_cells.append(sub_cell)
+            points.update(itertools.product(*sub_cell))
+    return new_cells, points
+
+
+def grid_sweep(base_config: dict,
+               axes: Dict[str, Sequence[float]],
+               *,
+               psa_cfg: Optional[dict] = None,
+               intervention: Optional[dict] = None,
+               wtp: float = 20000.0,
+               programme_cost: float = 0.0,
+               threshold_metric: Optional[str] = None,
+               threshold: float = 0.0,
+               refine: int = 0,
+               cache: Optional[Union[str, Path]] = None,
+               seed: Optional[int] = None,
+               n_jobs: Optional[int] = None,
+               pool: Optional[dict] = None,
+               chunksize: Optional[int] = None) -> pd.DataFrame:
+    """
+    Run the model over the grid of ``axes`` values, refining near a threshold contour.
+
+    Args:
+        base_config: Model configuration
+        axes: {axis: values}, two or more axes; each axis is a registry parameter name or a
+            prefix whose parameters all take the axis value
+        psa_cfg: PSA configuration used to build the registry (defaults to base_config['psa'])
+        intervention: apply_intervention() spec; when given, every point is a comparator/intervention
+            pair and the outputs include the incremental metrics and 'icer'
+        wtp: Willingness to pay per QALY for 'incremental_nmb'
+        programme_cost: Per-run programme cost added to the intervention arm
+        threshold_metric: Outcome whose crossing of ``threshold`` is refined (default
+            'incremental_nmb' with an intervention)
+        threshold: Threshold value of threshold_metric (0 = cost-effective at wtp for net benefit)
+        refine: Rounds of halving the cells the contour passes through
+        cache: SQLite file of earlier runs keyed by configuration hash (None = this call only)
+        seed: Common model seed for every point (None = one random seed)
+        n_jobs: Number of parallel jobs (None = base_config['psa']['n_jobs'] or cpu_count(); 1 = serial)
+        pool: Persistent worker pool from open_psa_pool() (optional)
+        chunksize: Points per worker dispatch (None = about four chunks per worker)
+
+    Returns:
+        Tidy DataFrame, one row per grid point sorted by the axes: the axis values, 'level'
+        (0 = initial grid, r = added in refinement round r), every model output, and with a
+        threshold metric 'above_threshold'. DataFrame.attrs holds 'seed' and 'runs' (new model
+        runs; the rest came from the cache or were duplicates).
+    """
+    if len(axes) < 2:
+        raise ValueError("A grid sweep needs at least two axes.")
+    refine = int(refine)
+    if refine < 0:
+        raise ValueError("refine must be a non-negative number of rounds.")
+    threshold_metric = threshold_metric or ('incremental_nmb' if intervention is not None else None)
+    if refine and threshold_metric is None:
+        raise ValueError("Refinement needs a threshold_metric (or an intervention for incremental_nmb).")
+
+    registry = build_parameter_registry(base_config, psa_cfg)
+    names = list(axes)
+    axis_values, axis_slots = [], []
+    for name in names:
+        values = np.unique(np.asarray(axes[name], dtype=float))
+        if values.size < 1:
+            raise ValueError(f"Axis {name!r} has no values.")
+        slots = _axis_slots(registry, name)
+        outside = (values.min() < registry['lower'][slots]) | (values.max() > registry['upper'][slots])
+        if outside.any():
+            raise ValueError(f"Values of axis {name!r} fall outside the parameter bounds.")
+        axis_values.append(values)
+        axis_slots.append(slots)
+    columns = [slot for slots in axis_slots for slot in slots]
+    if len(set(columns)) != len(columns):
+        raise ValueError("Axes overlap: a parameter is set by more than one axis.")
+    widths = [len(slots) for slots in axis_slots]
+
+    if seed is None:
+        seed = int(np.random.default_rng().integers(0, 2**32 - 1))
+    payload = {'base_config': base_config, 'parameters': [registry['parameters'][slot] for slot in columns]}
+    if intervention is not None:
+        payload['paired'] = _paired_psa_spec(
+            {'intervention': intervention, 'wtp': wtp, 'programme_cost': programme_cost}, base_config)
+    # A point's config is the base config with the axis values overlaid, so hashing the base once
+    # and then the overlaid (parameter, value) pairs identifies the config it runs
+    base_key = hashlib.sha256(repr((base_config, payload.get('paired'), int(seed))).encode('utf-8')).hexdigest()
+
+    def config_key(point: Tuple[float, ...]) -> str:
+        overlay = tuple((registry['names'][slot], repr(float(value)))
+                        for slot, value in zip(columns, np.repeat(point, widths)))
+        return hashlib.sha256(f"{base_key}{overlay!r}".encode('utf-8')).hexdigest()[:24]
+
+    n_jobs = pool['n_jobs'] if pool is not None else _resolve_n_jobs(n_jobs, base_config.get('psa'))
+    check_memory_budget(base_config, n_workers=n_jobs)
+    results: Dict[Tuple[float, ...], dict] = {}
+    levels: Dict[Tuple[float, ...], int] = {}
+    keys: Dict[str, dict] = {}
+    runs = 0
+
+    with contextlib.ExitStack() as stack:
+        connection = None
+        if cache is not None:
+            connection = _open_grid_cache(cache)
+            stack.callback(connection.close)
+
+        def evaluate(points: List[Tuple[float, ...]], level: int) -> None:
+            nonlocal runs
+            points = [point for point in points if point not in results]
+            point_keys = [config_key(point) for point in points]
+            missing = sorted({key for key in point_keys if key not in keys})
+            if connection is not None and missing:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = connection.execute(
+                        f"SELECT config_key, metrics FROM grid_runs WHERE config_key IN ({','.join('?' * len(batch))})",
+                        batch)
+                    keys.update({key: json.loads(metrics) for key, metrics in rows})
+            # One run per distinct configuration not yet cached
+            to_run = {}
+            for point, key in zip(points, point_keys):
+                if key not in keys and key not in to_run:
+                    to_run[key] = point
+            if to_run:
+                print(f"Grid sweep level {level}: {len(to_run)} new run(s) of {len(points)} point(s), "
+                      f"{n_jobs} parallel job(s)")
+                run_keys = list(to_run)
+                run_payload = dict(payload, matrix=np.array([np.repeat(to_run[key], widths) for key in run_keys]))
+                with contextlib.ExitStack() as level_stack:
+                    iterate = _psa_draw_iterator(level_stack, run_payload, [seed] * len(run_keys), n_jobs, pool,
+                                                 chunksize or _auto_chunksize(len(run_keys), n_jobs))
+                    for row, metrics in iterate(list(range(len(run_keys)))):
+                        metrics.pop('iteration', None)
+                        keys[run_keys[row]] = metrics
+                        if connection is not None:
+                            with connection:
+                                connection.execute(
+                                    "INSERT OR REPLACE INTO grid_runs (config_key, metrics) VALUES (?, ?)",
+                                    (run_keys[row], json.dumps(metrics, default=float)))
+                runs += len(run_keys)
+            for point, key in zip(points, point_keys):
+                results[point] = keys[key]
+                levels[point] = level
+
+        evaluate(list(itertools.product(*axis_values)), 0)
+
+        # Halve the cells the threshold contour passes through
+        cells = list(itertools.product(*[list(zip(values[:-1], values[1:])) for values in axis_values]))
+        for level in range(1, refine + 1):
+            values = {point: _threshold_value(results[point], threshold_metric) for point in results}
+            cells, points = _split_cells(cells, values, threshold)
+            if not cells:
+                break
+            evaluate(sorted(points), level)
+
+    frame = pd.DataFrame([dict(zip(names, point), level=levels[point], **results[point])
+                          for point in sorted(results)])
+    if intervention is not None:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            frame['icer'] = frame['incremental_cost'] / frame['incremental_qalys']
+    if threshold_metric is not None:
+        frame['above_threshold'] = frame[threshold_metric] >= threshold
+    frame.attrs.update({'seed': seed, 'runs': runs})
+    return frame
+
+
+def _threshold_value(metrics: dict, metric: str) -> float:
+    """The threshold metric of one point's outputs (KeyError names the available outputs)."""
+    if metric not in metrics:
+        raise KeyError(f"Threshold metric {metric!r} not among the outputs {sorted(metrics)}.")
+    return float(metrics[metric])
+
+
+def grid_pivot(frame: pd.DataFrame, x: str, y: str, value: str) -> pd.DataFrame:
+    """
+    Heatmap matrix of a two-axis sweep: rows are ``y`` values, columns ``x`` values.
+
+    Points added by refinement fill in their own rows and columns; cells without a run are NaN.
+    With more than two axes, select a slice of the others first.
+    """
+    duplicated = frame.duplicated([x, y])
+    if duplicated.any():
+        raise ValueError(f"Several points share ({x}, {y}); select a slice of the other axes first.")
+    return frame.pivot(index=y, columns=x, values=value).sort_index(ascending=False)
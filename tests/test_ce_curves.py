@@ -0,0 +1,80 @@
+"""
+Unit tests for ce_curves.py - CEAC, CEAF and EVPI curves
+
+Tests focus on:
+- Agreement with a per-threshold brute-force calculation
+- Tie handling and threshold ordering
+- Input validation and the long-format table
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ce_curves import ce_curves, ce_curves_to_frame
+
+
+def _brute_force(costs, qalys, wtp):
+    """Per-threshold reference: argmax net benefit per draw (ties to the earlier column)."""
+    ceac = np.zeros((len(wtp), costs.shape[1]))
+    evpi = np.zeros(len(wtp))
+    for t, threshold in enumerate(wtp):
+        nmb = threshold * qalys - costs
+        best = nmb.argmax(axis=1)
+        ceac[t] = np.bincount(best, minlength=costs.shape[1]) / len(costs)
+        evpi[t] = nmb.max(axis=1).mean() - nmb.mean(axis=0).max()
+    return ceac, evpi
+
+
+# =============================================================================
+# TESTS FOR THE CURVES
+# =============================================================================
+
+class TestCECurves:
+    """Tests for the CEAC, CEAF and EVPI curves."""
+
+    def test_matches_brute_force(self):
+        """Three strategies on an unsorted grid agree with the per-threshold calculation."""
+        rng = np.random.default_rng(0)
+        costs = rng.normal(size=(2000, 3)) * 1000 + [0, 5000, 9000]
+        qalys = rng.normal(size=(2000, 3)) * 0.1 + [0, 0.3, 0.45]
+        wtp = rng.permutation(np.linspace(0, 100000, 51))
+        curves = ce_curves(costs, qalys, wtp)
+        ceac, evpi = _brute_force(costs, qalys, wtp)
+        np.testing.assert_allclose(curves['ceac'], ceac)
+        np.testing.assert_allclose(curves['evpi'], evpi, atol=1e-6)
+        np.testing.assert_allclose(curves['ceac'].sum(axis=1), 1.0)
+        optimal = curves['optimal_strategy']
+        np.testing.assert_allclose(curves['ceaf'], ceac[np.arange(len(wtp)), optimal])
+
+    def test_ties_go_to_earlier_strategy(self):
+        """Identical strategies count as wins for the first column, as with (nmb > 0) in create_ceac."""
+        draws = pd.DataFrame({'incremental_cost': [0.0, 0.0], 'incremental_qalys': [0.0, 0.0]})
+        curves = ce_curves(draws, wtp=[0, 20000])
+        np.testing.assert_array_equal(curves['ceac'][:, 0], [1.0, 1.0])
+        np.testing.assert_array_equal(curves['evpi'], [0.0, 0.0])
+
+    def test_single_comparison(self):
+        """Incremental draws give the share of positive net benefit at each threshold."""
+        draws = pd.DataFrame({'incremental_cost': [1000.0, 3000.0, -500.0, 2000.0],
+                              'incremental_qalys': [0.1, 0.1, -0.01, 0.0]})
+        curves = ce_curves(draws, wtp=[0, 20000, 50000])
+        assert curves['strategies'] == ['Comparator', 'Intervention']
+        np.testing.assert_allclose(curves['ceac'][:, 1], [0.25, 0.5, 0.5])
+
+    def test_validation(self):
+        """Mismatched shapes and missing increment columns are refused."""
+        with pytest.raises(ValueError):
+            ce_curves(np.zeros((5, 2)), np.zeros((5, 3)))
+        with pytest.raises(ValueError):
+            ce_curves(pd.DataFrame({'cost': [1.0]}))
+
+    def test_frame(self):
+        """The long table has one row per threshold and strategy, one frontier row per threshold."""
+        rng = np.random.default_rng(1)
+        curves = ce_curves(rng.normal(size=(100, 2)), rng.normal(size=(100, 2)), wtp=[0, 1, 2],
+                           strategies=['A', 'B'])
+        table = ce_curves_to_frame(curves)
+        assert len(table) == 6
+        assert table.groupby('wtp')['on_frontier'].sum().eq(1).all()
+        assert list(table['strategy'][:2]) == ['A', 'B']
@@ -7,6 +7,9 @@ Tests focus on:
 - Error handling
 """
 
+import contextlib
+import io
+
 import numpy as np
 import pandas as pd
 from unittest.mock import patch, MagicMock
@@ -319,6 +322,30 @@ class TestFigureGeneration:
         mock_plt.savefig.assert_called_once()
         mock_plt.close.assert_called_once()
 
+    @patch('generate_cvd_figures.plt')
+    def test_tornado_plot_accepts_dsa_results(self, mock_plt):
+        """DSA results ranked by NMB still plot ICERs around their own base-case ICER."""
+        mock_ax = MagicMock()
+        mock_plt.subplots.return_value = (MagicMock(), mock_ax)
+        runs = pd.DataFrame({
+            'parameter': ['base', 'HR', 'HR', 'cost', 'cost'],
+            'bound': ['base', 'low', 'high', 'low', 'high'],
+            'value': [np.nan, 1.3, 1.6, 90.0, 110.0],
+            'base_value': [np.nan, 1.45, 1.45, 100.0, 100.0],
+            'icer': [30000.0, 25000.0, 40000.0, np.inf, 31000.0],
+            'incremental_nmb': [-500.0, 400.0, -900.0, -700.0, -300.0],
+        })
+        dsa = {'metric': 'incremental_nmb', 'base_value': -500.0, 'runs': runs}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_tornado_plot(dsa)
+
+        mock_ax.set_yticklabels.assert_called_once()
+        assert list(mock_ax.set_yticklabels.call_args[0][0]) == ['HR\n(1.3 - 1.6)']
+        left = mock_ax.barh.call_args_list[0].kwargs['left']
+        assert left == -5000.0
+        mock_plt.savefig.assert_called_once()
+
     @patch('generate_cvd_figures.plt')
     def test_ce_plane_creates_figure(self, mock_plt):
         """CE plane should create a figure and return data."""
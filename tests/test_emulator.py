@@ -0,0 +1,97 @@
+"""
+Unit tests for emulator.py - Gaussian-process emulator of run_model
+
+Tests focus on:
+- Likelihood gradient used by the hyperparameter search
+- Accuracy and leave-one-out validation on known functions
+- PSA and scenario queries, and an end-to-end design run
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import optimize
+
+from emulator import (
+    _negative_log_likelihood,
+    build_emulator,
+    emulate_psa,
+    emulate_scenario,
+    emulator_predict,
+    fit_emulator,
+)
+from tests.test_ibm_pd_ad import _small_config
+
+
+def _synthetic_emulator(n=60, noise=0.01, seed=0):
+    """Emulator of y = 3a + sin(4b) (c is inert) on a uniform design."""
+    rng = np.random.default_rng(seed)
+    inputs = pd.DataFrame(rng.random((n, 3)), columns=['a', 'b', 'c'])
+    outputs = pd.DataFrame({'y': 3 * inputs['a'] + np.sin(4 * inputs['b']) + rng.normal(0, noise, n)})
+    return fit_emulator(inputs, outputs, metrics=['y'], seed=seed)
+
+
+# =============================================================================
+# TESTS FOR THE GAUSSIAN PROCESS
+# =============================================================================
+
+class TestGaussianProcess:
+    """Tests for the GP fit behind the emulator."""
+
+    def test_likelihood_gradient(self):
+        """The analytic gradient matches finite differences."""
+        rng = np.random.default_rng(0)
+        inputs = rng.normal(size=(25, 3))
+        response = np.sin(inputs[:, 0]) + 0.1 * rng.normal(size=25)
+        theta = np.array([0.1, 0.5, -0.3, 0.2, np.log(0.05)])
+        _, gradient = _negative_log_likelihood(theta, inputs, response)
+        numeric = optimize.approx_fprime(theta, lambda t: _negative_log_likelihood(t, inputs, response)[0], 1e-6)
+        np.testing.assert_allclose(gradient, numeric, rtol=1e-4, atol=1e-4)
+
+    def test_accuracy_and_validation(self):
+        """A smooth response is reproduced off-design and LOO validation reports it."""
+        emulator = _synthetic_emulator()
+        assert emulator['validation'].loc['y', 'loo_q2'] > 0.99
+        test = pd.DataFrame(np.random.default_rng(9).random((200, 3)), columns=['a', 'b', 'c'])
+        prediction = emulator_predict(emulator, test)
+        truth = 3 * test['a'] + np.sin(4 * test['b'])
+        assert np.sqrt(np.mean((prediction['y'] - truth) ** 2)) < 0.05
+        assert (prediction['y_sd'] >= 0).all()
+
+    def test_too_few_points(self):
+        """Fewer than four design points is refused."""
+        with pytest.raises(ValueError):
+            fit_emulator(np.zeros((3, 1)), pd.DataFrame({'y': [1.0, 2.0, 3.0]}), ['a'], metrics=['y'])
+
+
+# =============================================================================
+# TESTS FOR QUERIES
+# =============================================================================
+
+class TestEmulatorQueries:
+    """Tests for PSA and scenario queries answered from the emulator."""
+
+    def test_scenario(self):
+        """Overrides are applied to the base values; unknown names are rejected."""
+        emulator = _synthetic_emulator()
+        emulator['base'] = np.array([0.5, 0.0, 0.5])
+        result = emulate_scenario(emulator, {'a': 0.2})
+        assert result['y']['mean'] == pytest.approx(0.6, abs=0.05)
+        with pytest.raises(KeyError):
+            emulate_scenario(emulator, {'z': 1.0})
+
+    def test_end_to_end(self):
+        """A small design runs through the model and the emulated PSA has the PSA result shape."""
+        cfg = _small_config(population=200, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            emulator = build_emulator(cfg, n_points=8, parameters=['base_onset_probability', 'costs.mild.home.nhs'],
+                                      seed=4, n_jobs=1, n_restarts=0)
+        assert len(emulator['design']) == 8
+        assert list(emulator['validation'].index) == list(emulator['metrics'])
+        psa = emulate_psa(emulator, n_draws=500, seed=1)
+        assert psa['iterations'] == 500 and len(psa['parameter_draws']) == 500
+        stats = psa['summary']['total_costs_all']
+        assert stats['lower_95'] <= stats['mean'] <= stats['upper_95']
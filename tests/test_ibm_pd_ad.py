@@ -6,9 +6,22 @@ Tests are organized by function category:
 - Tier 2: Age band handling functions
 - Tier 3: Distribution parameter functions
 - Tier 4: Smoothing and utility functions
+- Tier 5: Agent weighting and initial population sampling
+- Tier 6: Columnar (NumPy / Numba) engines, storage policy and memory estimates
+- Tier 7: PSA execution
 """
 
+import contextlib
+import copy
+import io
+import json
 import math
+import random
+import sqlite3
+import warnings
+from multiprocessing import Pool
+import numpy as np
+import pandas as pd
 import pytest
 
 # Import functions to test
@@ -30,9 +43,84 @@ from IBM_PD_AD import (
     _lognormal_params_from_ci,
     # Smoothing
     smooth_series,
+    # Agent weighting
+    general_config,
+    get_agent_weight,
+    run_model,
+    extract_psa_metrics,
+    _with_scaled_population_and_entrants,
+    # Initial population sampling
+    initialize_population,
+    plan_initial_population_strata,
+    _largest_remainder_allocation,
+    # Columnar engines
+    compile_model_tables,
+    columnar_kernels,
+    resolve_engine,
+    transition_prob_from_config,
+    STAGE_CODES,
+    # Storage policy and memory budget
+    columnar_dtypes,
+    estimate_memory,
+    plan_psa_workers,
+    # PSA execution
+    run_probabilistic_sensitivity_analysis,
+    run_parameter_design,
+    run_one_way_dsa,
+    plot_psa_tornado,
+    run_paired_psa,
+    apply_intervention,
+    psa_worker_pool,
+    _auto_chunksize,
+    # PSA parameter matrix
+    enumerate_psa_parameters,
+    RISK_FACTOR_HR_INTERVALS,
+    draw_psa_parameter_matrix,
+    apply_psa_parameter_row,
+    apply_psa_draw,
+    # Parameter registry
+    build_parameter_registry,
+    parameter_path_name,
+    registry_get,
+    registry_set,
+    # Adaptive PSA stopping
+    psa_precision,
+    # Resumable PSA draw store
+    load_psa_draw_stores,
+    summarize_psa_draw_stores,
+    # Streaming PSA aggregation
+    new_psa_accumulator,
+    update_psa_accumulator,
+    psa_accumulator_summary,
+    # PSA time-series capture
+    create_psa_timeseries,
+    load_psa_timeseries,
+    psa_timeseries_bands,
+    # Quasi-Monte Carlo parameter sampling
+    psa_parameter_uniforms,
+    psa_parameter_quantiles,
+    # Variance reduction
+    psa_parameter_means,
+    antithetic_variance_reduction,
+    control_variate_adjustment,
+    # Nested two-level PSA
+    run_two_level_psa,
+    two_level_anova,
+    estimate_variance_components_pilot,
+    plan_two_level_design,
 )
 
 
+def _small_config(population=1000, timesteps=2, entrants=25):
+    """Cheap copy of general_config for end-to-end model runs in tests."""
+    cfg = copy.deepcopy(general_config)
+    cfg['population'] = population
+    cfg['number_of_timesteps'] = timesteps
+    cfg['open_population']['entrants_per_year'] = entrants
+    cfg['initial_summary_overrides'] = {}
+    return cfg
+
+
 # =============================================================================
 # TIER 1: CRITICAL MATHEMATICAL FUNCTIONS - Hazard/Probability Conversions
 # =============================================================================
@@ -680,3 +768,1141 @@ class TestIntegration:
             else:
                 assert midpoint is None
                 assert "plus" in key or "+" in label
+
+
+# =============================================================================
+# TIER 5: AGENT WEIGHTING
+# =============================================================================
+
+class TestGetAgentWeight:
+    """Tests for get_agent_weight: validation of config['agent_weight']"""
+
+    def test_missing_defaults_to_one(self):
+        """Configs without an agent weight represent one person per agent."""
+        assert get_agent_weight({}) == 1
+        assert get_agent_weight({'agent_weight': None}) == 1
+
+    def test_whole_weight_returned_as_int(self):
+        """Whole-number weights are returned as ints to keep counts integral."""
+        result = get_agent_weight({'agent_weight': 100.0})
+        assert result == 100 and isinstance(result, int)
+
+    def test_fractional_weight_preserved(self):
+        """Fractional weights are returned unchanged."""
+        assert get_agent_weight({'agent_weight': 2.5}) == 2.5
+
+    @pytest.mark.parametrize("bad", [0, -1, float('nan'), float('inf'), 'ten'])
+    def test_invalid_weight_raises(self, bad):
+        """Non-positive, non-finite or non-numeric weights are rejected."""
+        with pytest.raises(ValueError):
+            get_agent_weight({'agent_weight': bad})
+
+
+class TestWeightedRun:
+    """End-to-end checks that weighted agents scale counts but not rates."""
+
+    @pytest.fixture(scope="class")
+    def paired_runs(self):
+        base = _small_config()
+        weighted = copy.deepcopy(base)
+        weighted['agent_weight'] = 10
+        return run_model(base, seed=11), run_model(weighted, seed=11)
+
+    def test_counts_scale_with_weight(self, paired_runs):
+        """Same seed, weight 10: every count and total is multiplied by 10."""
+        unweighted, weighted = paired_runs
+        final = max(unweighted['summaries'])
+        base_row = unweighted['summaries'][final]
+        weighted_row = weighted['summaries'][final]
+        for key in ('population_alive', 'entrants', 'deaths', 'incident_onsets',
+                    'stage_mild', 'living_home'):
+            assert weighted_row[key] == 10 * base_row[key]
+        assert weighted_row['total_costs_nhs'] == pytest.approx(10 * base_row['total_costs_nhs'])
+
+    def test_rates_unchanged_by_weight(self, paired_runs):
+        """Rates and averages are invariant to the agent weight."""
+        unweighted, weighted = paired_runs
+        final = max(unweighted['summaries'])
+        for key in ('incidence_per_1000_alive', 'mean_age_alive'):
+            assert weighted['summaries'][final][key] == pytest.approx(
+                unweighted['summaries'][final][key])
+        base_risk = [row['lifetime_risk'] for row in unweighted['lifetime_risk_by_entry_age']]
+        weighted_risk = [row['lifetime_risk'] for row in weighted['lifetime_risk_by_entry_age']]
+        assert weighted_risk == pytest.approx(base_risk)
+
+    def test_psa_metrics_scale_with_weight(self, paired_runs):
+        """PSA headline metrics are reported on the weighted scale."""
+        unweighted, weighted = paired_runs
+        base_metrics = extract_psa_metrics(unweighted)
+        weighted_metrics = extract_psa_metrics(weighted)
+        assert weighted['agent_weight'] == 10
+        assert weighted_metrics['incident_onsets_total'] == pytest.approx(
+            10 * base_metrics['incident_onsets_total'])
+
+
+class TestScaledPopulationConfig:
+    """Tests for _with_scaled_population_and_entrants"""
+
+    def test_sets_agent_weight(self):
+        """Scaling down to 1% gives each agent a weight of 100."""
+        base = _small_config(population=100000, entrants=500)
+        cfg = _with_scaled_population_and_entrants(base, 1000, 100000)
+        assert cfg['population'] == 1000
+        assert cfg['open_population']['entrants_per_year'] == 5
+        assert get_agent_weight(cfg) == 100
+        assert get_agent_weight(base) == 1
+
+    def test_overrides_left_at_population_scale(self):
+        """Weighted runs keep summary overrides on the full-population scale."""
+        base = _small_config(population=100000)
+        base['initial_summary_overrides'] = {'entrants': 40000}
+        cfg = _with_scaled_population_and_entrants(base, 1000, 100000)
+        assert cfg['initial_summary_overrides']['entrants'] == 40000
+
+    def test_unweighted_legacy_scaling(self):
+        """weight_agents=False scales the overrides instead of weighting agents."""
+        base = _small_config(population=100000)
+        base['initial_summary_overrides'] = {'entrants': 40000}
+        cfg = _with_scaled_population_and_entrants(base, 1000, 100000, weight_agents=False)
+        assert get_agent_weight(cfg) == 1
+        assert cfg['initial_summary_overrides']['entrants'] == 400
+
+
+class TestLargestRemainderAllocation:
+    """Tests for _largest_remainder_allocation"""
+
+    def test_counts_sum_to_total(self):
+        """Rounded counts always sum exactly to the requested total."""
+        counts = _largest_remainder_allocation(10, [1 / 3, 1 / 3, 1 / 3])
+        assert sum(counts) == 10
+        assert sorted(counts) == [3, 3, 4]
+
+    def test_exact_shares_unchanged(self):
+        """Shares that divide the total exactly are allocated exactly."""
+        assert _largest_remainder_allocation(100, [0.25, 0.75]) == [25, 75]
+
+
+class TestInitialPopulationSampling:
+    """Tests for stratified and importance-weighted initial population sampling."""
+
+    def _config(self, method, **options):
+        cfg = _small_config()
+        cfg['initial_population_sampling'] = {'method': method, **options}
+        return cfg
+
+    def test_stratified_allocation_is_exact(self):
+        """Stratified sampling draws exact counts per age band x sex."""
+        cfg = self._config('stratified')
+        strata = plan_initial_population_strata(1000, cfg)
+        assert len(strata) == len(cfg['initial_age_band_weights']) * len(cfg['sex_distribution'])
+        assert sum(stratum['count'] for stratum in strata) == 1000
+
+        random.seed(3)
+        population, _ = initialize_population(1000, cfg)
+        for stratum in strata:
+            low, high = stratum['band']
+            members = [p for p in population.values()
+                       if p['sex'] == stratum['sex'] and low <= p['age'] <= high]
+            assert len(members) == stratum['count']
+
+    def test_importance_oversamples_and_reweights(self):
+        """Oversampled bands get more people with proportionally smaller weights."""
+        cfg = self._config('importance', age_band_oversampling={(80, 100): 4.0})
+        strata = plan_initial_population_strata(1000, cfg)
+        plain = plan_initial_population_strata(1000, self._config('stratified'))
+        for boosted, reference in zip(strata, plain):
+            if boosted['band'] == (80, 100):
+                assert boosted['count'] > reference['count']
+                assert boosted['weight'] < reference['weight']
+        total = sum(stratum['count'] * stratum['weight'] for stratum in strata)
+        assert total == pytest.approx(1000)
+
+    def test_weights_include_agent_weight(self):
+        """Design weights multiply the agent weight."""
+        cfg = self._config('stratified')
+        cfg['agent_weight'] = 50
+        random.seed(5)
+        population, age_counter = initialize_population(400, cfg)
+        assert sum(p['weight'] for p in population.values()) == pytest.approx(400 * 50)
+        assert sum(age_counter.values()) == pytest.approx(400 * 50)
+
+    def test_prevalent_dementia_oversampling_weights(self):
+        """People drawn with prevalent dementia carry down-weighted design weights."""
+        cfg = self._config('importance', prevalent_dementia_oversampling=5.0)
+        strata = {(s['band'], s['sex']): s['weight'] for s in plan_initial_population_strata(2000, cfg)}
+        random.seed(9)
+        population, _ = initialize_population(2000, cfg)
+        for person in population.values():
+            band = next(b for b, sex in strata if sex == person['sex'] and b[0] <= person['age'] <= b[1])
+            stratum_weight = strata[(band, person['sex'])]
+            if person['dementia_stage'] == 'cognitively_normal':
+                assert person['weight'] >= stratum_weight
+            else:
+                assert person['weight'] < stratum_weight
+
+    def test_proportional_ignores_oversampling(self):
+        """Proportional sampling keeps unit agent weights even if factors are supplied."""
+        cfg = self._config('proportional', age_band_oversampling={(80, 100): 4.0})
+        random.seed(1)
+        population, _ = initialize_population(200, cfg)
+        assert {p['weight'] for p in population.values()} == {1}
+
+    def test_small_population_covers_every_stratum(self):
+        """Rounding never leaves a stratum empty, so weighted shares still match the targets."""
+        cfg = self._config('stratified')
+        n_strata = len(cfg['initial_age_band_weights']) * len(cfg['sex_distribution'])
+        strata = plan_initial_population_strata(n_strata + 2, cfg)
+        assert sum(stratum['count'] for stratum in strata) == n_strata + 2
+        for stratum in strata:
+            assert stratum['count'] >= 1
+            assert stratum['count'] * stratum['weight'] == pytest.approx((n_strata + 2) * stratum['target_share'])
+        with pytest.raises(ValueError):
+            plan_initial_population_strata(n_strata - 1, cfg)
+
+    def test_unknown_method_raises(self):
+        """Unsupported sampling methods are rejected."""
+        with pytest.raises(ValueError):
+            plan_initial_population_strata(100, self._config('cluster'))
+
+
+# =============================================================================
+# TIER 6: COLUMNAR ENGINES
+# =============================================================================
+
+def _quiet_run(cfg, seed, engine):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_model(cfg, seed=seed, engine=engine)
+
+
+class TestColumnarEngine:
+    """Tests for the columnar NumPy engine and its optional Numba kernels."""
+
+    def test_resolve_engine(self):
+        """Explicit engines win over the config; unknown names are rejected."""
+        assert resolve_engine() == 'python'
+        assert resolve_engine(None, {'engine': 'numpy'}) == 'numpy'
+        assert resolve_engine('JIT', {'engine': 'numpy'}) == 'jit'
+        with pytest.raises(ValueError):
+            resolve_engine('cuda')
+
+    def test_tables_match_scalar_helpers(self):
+        """Compiled progression probabilities equal the per-person helper values."""
+        cfg = _small_config()
+        tables = compile_model_tables(cfg)
+        names = tables['risk_names']
+        person = {'age': 78, 'sex': 'female', 'risk_factors': {name: k % 2 == 0 for k, name in enumerate(names)}}
+        mask = sum(1 << k for k, name in enumerate(names) if person['risk_factors'][name])
+        expected = transition_prob_from_config(cfg, person, 'mild_to_moderate')
+        sex = tables['sex_labels'].index('female')
+        assert tables['progression_prob'][0, sex, 78, mask] == pytest.approx(expected, rel=1e-12)
+
+    def test_fractional_time_step_raises(self):
+        """The columnar engines only support whole-year cycles."""
+        cfg = _small_config()
+        cfg['time_step_years'] = 0.5
+        with pytest.raises(ValueError):
+            compile_model_tables(cfg)
+
+    def test_numpy_engine_matches_result_keys(self):
+        """The numpy engine returns the same outputs as the python engine."""
+        cfg = _small_config(population=500)
+        python_results = _quiet_run(cfg, 1, 'python')
+        numpy_results = _quiet_run(cfg, 1, 'numpy')
+        assert set(numpy_results) == set(python_results)
+        assert set(numpy_results['summaries'][2]) == set(python_results['summaries'][2])
+        assert numpy_results['summaries'][0]['population_alive'] == 500
+
+    def test_numpy_engine_reproducible(self):
+        """The same seed gives identical numpy-engine results."""
+        cfg = _small_config(population=500)
+        first = extract_psa_metrics(_quiet_run(cfg, 7, 'numpy'))
+        second = extract_psa_metrics(_quiet_run(cfg, 7, 'numpy'))
+        assert first == second
+
+    @pytest.mark.filterwarnings('ignore:Numba is not installed')
+    def test_jit_engine_matches_numpy(self):
+        """engine='jit' follows the same draws as the numpy engine (or falls back to it)."""
+        cfg = _small_config(population=800)
+        numpy_results = _quiet_run(cfg, 3, 'numpy')
+        jit_results = _quiet_run(cfg, 3, 'jit')
+        assert jit_results['individual_survival'] == numpy_results['individual_survival']
+        assert jit_results['transition_history'] == numpy_results['transition_history']
+        jit_metrics = extract_psa_metrics(jit_results)
+        for key, value in extract_psa_metrics(numpy_results).items():
+            assert jit_metrics[key] == pytest.approx(value, rel=1e-9)
+
+    def test_jit_falls_back_without_numba(self, monkeypatch):
+        """Without Numba, engine='jit' warns once and gives exactly the numpy-engine results."""
+        import IBM_PD_AD
+        monkeypatch.setattr(IBM_PD_AD, 'NUMBA_AVAILABLE', False)
+        monkeypatch.setattr(IBM_PD_AD, '_NUMBA_FALLBACK_WARNED', False)
+        cfg = _small_config(population=400)
+        with pytest.warns(RuntimeWarning, match='Numba is not installed'):
+            jit_results = _quiet_run(cfg, 4, 'jit')
+        assert jit_results['summaries'] == _quiet_run(cfg, 4, 'numpy')['summaries']
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            assert columnar_kernels('jit')['name'] == 'numpy'
+
+    def test_engines_agree_in_distribution(self):
+        """Across seeds, python- and numpy-engine outcome means agree within Monte Carlo error."""
+        cfg = _small_config(population=1000)
+        seeds = range(12)
+        metrics = ['incident_onsets_total', 'total_costs_all', 'total_qalys_combined', 'stage_mild']
+        draws = {engine: pd.DataFrame([extract_psa_metrics(_quiet_run(cfg, seed, engine)) for seed in seeds])[metrics]
+                 for engine in ('python', 'numpy')}
+        difference = (draws['python'].mean() - draws['numpy'].mean()).abs()
+        standard_error = np.sqrt((draws['python'].var() + draws['numpy'].var()) / len(seeds))
+        assert (difference <= 4.0 * standard_error + 1e-9).all(), (difference / standard_error).to_dict()
+
+    def test_jit_kernels_compile_when_available(self):
+        """With Numba installed, engine='jit' uses the compiled kernels."""
+        pytest.importorskip('numba')
+        assert columnar_kernels('jit')['name'] == 'jit'
+
+    def test_numpy_engine_weighted_totals(self):
+        """Agent weights scale columnar counts to the population."""
+        cfg = _small_config(population=400, entrants=10)
+        cfg['agent_weight'] = 25
+        summary = _quiet_run(cfg, 2, 'numpy')['summaries'][2]
+        assert summary['population_total'] == (400 + 2 * 10) * 25
+        assert summary['entrants'] == 10 * 25
+        assert summary['stage_death'] + summary['population_alive'] == summary['population_total']
+
+    def test_stage_codes_follow_stage_order(self):
+        """Stage codes index DEMENTIA_STAGES, with death last."""
+        assert STAGE_CODES['cognitively_normal'] == 0
+        assert STAGE_CODES['death'] == max(STAGE_CODES.values())
+
+
+class TestStoragePolicy:
+    """Tests for compact columnar dtypes and the memory estimator."""
+
+    def test_default_dtypes_are_compact(self):
+        """Ages and the five-factor risk mask fit in one byte each."""
+        dtypes = columnar_dtypes(_small_config())
+        assert dtypes['age'] == np.uint8
+        assert dtypes['risk_mask'] == np.uint8
+        assert dtypes['stage'] == np.int8
+        assert dtypes['qalys_patient'] == np.float64
+
+    def test_float32_accumulators(self):
+        """float32 accumulators give results close to the float64 run."""
+        cfg = _small_config(population=500)
+        reference = extract_psa_metrics(_quiet_run(cfg, 4, 'numpy'))
+        cfg['storage'] = {'accumulator_dtype': 'float32'}
+        assert columnar_dtypes(cfg)['costs_nhs'] == np.float32
+        compact = extract_psa_metrics(_quiet_run(cfg, 4, 'numpy'))
+        assert compact['total_costs_all'] == pytest.approx(reference['total_costs_all'], rel=1e-5)
+
+    def test_invalid_dtype_raises(self):
+        """Unsupported storage dtypes are rejected."""
+        cfg = _small_config()
+        cfg['storage'] = {'age_dtype': 'float16'}
+        with pytest.raises(ValueError):
+            columnar_dtypes(cfg)
+
+    def test_estimate_scales_with_workers(self):
+        """Peak memory grows with the number of concurrent runs."""
+        cfg = _small_config(population=10000)
+        single = estimate_memory(cfg, engine='numpy')
+        parallel = estimate_memory(cfg, n_workers=4, engine='numpy')
+        assert single['records'] == 10000 + 2 * 25
+        assert parallel['peak_bytes'] > 4 * single['per_run_bytes'] - 1
+        assert single['within_budget']
+
+    def test_columnar_smaller_than_python(self):
+        """The columnar population needs far fewer bytes per record than person dicts."""
+        cfg = _small_config(population=10000)
+        assert (estimate_memory(cfg, engine='numpy')['population_bytes']
+                < estimate_memory(cfg, engine='python')['population_bytes'] / 5)
+
+    def test_run_over_budget_refused(self):
+        """run_model raises MemoryError before starting when the estimate exceeds the budget."""
+        cfg = _small_config(population=1000)
+        cfg['storage'] = {'memory_budget_gb': 0.01}
+        with pytest.raises(MemoryError):
+            run_model(cfg, seed=1)
+
+
+class TestChunkedExecution:
+    """Tests for streaming the columnar population through fixed-size blocks."""
+
+    def test_blocks_match_single_block(self, tmp_path):
+        """Block size and disk backing do not change the results."""
+        cfg = _small_config(population=900, timesteps=3, entrants=40)
+        reference = _quiet_run(cfg, 6, 'numpy')
+        for storage in ({'block_size': 128}, {'block_size': 250, 'block_dir': str(tmp_path)}):
+            chunked_cfg = copy.deepcopy(cfg)
+            chunked_cfg['storage'] = storage
+            chunked = _quiet_run(chunked_cfg, 6, 'numpy')
+            assert chunked['individual_survival'] == reference['individual_survival']
+            assert chunked['transition_history'] == reference['transition_history']
+            chunked_metrics = extract_psa_metrics(chunked)
+            for key, value in extract_psa_metrics(reference).items():
+                assert chunked_metrics[key] == pytest.approx(value, rel=1e-9)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_block_dir_bounds_estimate(self, tmp_path):
+        """Disk-backed blocks keep only one block resident in the estimate."""
+        cfg = _small_config(population=100000)
+        cfg['storage'] = {'block_size': 1000}
+        in_memory = estimate_memory(cfg, engine='numpy')
+        cfg['storage']['block_dir'] = str(tmp_path)
+        on_disk = estimate_memory(cfg, engine='numpy')
+        assert on_disk['population_bytes'] == in_memory['bytes_per_record'] * 1000
+        assert on_disk['per_run_bytes'] < in_memory['per_run_bytes']
+
+    def test_invalid_block_size_raises(self):
+        """Block sizes must be positive."""
+        cfg = _small_config()
+        cfg['storage'] = {'block_size': 0}
+        with pytest.raises(ValueError):
+            estimate_memory(cfg, engine='numpy')
+
+
+# =============================================================================
+# TIER 7: PSA EXECUTION
+# =============================================================================
+
+def _small_psa(iterations=4, seed=3):
+    psa = copy.deepcopy(general_config['psa'])
+    psa.update({'use': True, 'iterations': iterations, 'seed': seed})
+    return psa
+
+
+class TestPSAWorkerPool:
+    """Tests for shipping the PSA config to workers once and reusing pools."""
+
+    def test_auto_chunksize(self):
+        """About four chunks per worker, never below one."""
+        assert _auto_chunksize(1000, 8) == 32
+        assert _auto_chunksize(3, 8) == 1
+        assert _auto_chunksize(0, 4) == 1
+
+    def test_parallel_matches_serial(self):
+        """Per-call and persistent pools reproduce the serial draws."""
+        cfg = _small_config(population=300, entrants=10)
+        with contextlib.redirect_stdout(io.StringIO()):
+            serial = run_probabilistic_sensitivity_analysis(
+                cfg, _small_psa(), collect_draw_level=True, n_jobs=1)['draws']
+            parallel = run_probabilistic_sensitivity_analysis(
+                cfg, _small_psa(), collect_draw_level=True, n_jobs=2, chunksize=3)['draws']
+        assert parallel.equals(serial)
+
+    def test_persistent_pool_reused(self):
+        """One pool serves several analyses with different configs."""
+        cfg = _small_config(population=300, entrants=10)
+        other_cfg = _small_config(population=200, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = run_probabilistic_sensitivity_analysis(
+                other_cfg, _small_psa(seed=8), collect_draw_level=True, n_jobs=1)['draws']
+            with psa_worker_pool(2) as pool:
+                first = run_probabilistic_sensitivity_analysis(
+                    cfg, _small_psa(), collect_draw_level=True, pool=pool)
+                second = run_probabilistic_sensitivity_analysis(
+                    other_cfg, _small_psa(seed=8), collect_draw_level=True, pool=pool)
+                payload_dir = pool['payload_dir']
+        assert first['n_jobs_used'] == 2
+        assert second['draws'].equals(expected)
+        assert not payload_dir.exists()
+
+
+class TestPSAParameterMatrix:
+    """Tests for the vectorised PSA parameter matrix and config overlays."""
+
+    def test_enumerates_each_family(self):
+        """Costs are gamma, probabilities beta and interval hazard ratios lognormal."""
+        parameters = {p['path']: p for p in enumerate_psa_parameters(general_config)}
+        assert parameters[('costs', 'mild', 'home', 'nhs')]['family'] == 'gamma'
+        assert parameters[('base_onset_probability',)]['family'] == 'beta'
+        assert parameters[('risk_factors', 'smoking', 'relative_risks', 'onset', 'female')]['family'] == 'lognormal'
+        # Zero costs are not uncertain
+        assert ('costs', 'cognitively_normal', 'home', 'nhs') not in parameters
+
+    def test_matrix_shape_and_support(self):
+        """One row per draw; beta columns stay in (0, 1) and gamma columns positive."""
+        parameters = enumerate_psa_parameters(general_config)
+        matrix = draw_psa_parameter_matrix(parameters, 50, np.random.default_rng(2))
+        assert matrix.shape == (50, len(parameters))
+        for j, parameter in enumerate(parameters):
+            if parameter['family'] == 'beta':
+                assert np.all((matrix[:, j] >= 0.0) & (matrix[:, j] <= 1.0))
+            elif parameter['family'] in ('gamma', 'lognormal'):
+                assert np.all(matrix[:, j] > 0.0)
+
+    def test_overlay_leaves_base_untouched(self):
+        """Overlays copy only sampled paths and never mutate the base config."""
+        base = copy.deepcopy(general_config)
+        snapshot = copy.deepcopy(base)
+        parameters = enumerate_psa_parameters(base)
+        row = draw_psa_parameter_matrix(parameters, 1, np.random.default_rng(5))[0]
+        cfg = apply_psa_parameter_row(base, parameters, row)
+        assert base == snapshot
+        assert cfg['costs']['mild']['home']['nhs'] == row[[p['path'] for p in parameters].index(
+            ('costs', 'mild', 'home', 'nhs'))]
+        assert cfg['open_population'] is base['open_population']
+        assert cfg['costs'] is not base['costs']
+
+    def test_apply_psa_draw_reproducible(self):
+        """The same generator seed gives the same sampled config."""
+        first = apply_psa_draw(general_config, None, np.random.default_rng(9))
+        second = apply_psa_draw(general_config, None, np.random.default_rng(9))
+        assert first == second
+        assert first['costs'] != general_config['costs']
+
+
+class TestParameterRegistry:
+    """Tests for the flat named parameter registry."""
+
+    def test_path_names(self):
+        """Dotted names render age-band tuple keys as labels."""
+        assert parameter_path_name(('costs', 'mild', 'home', 'nhs')) == 'costs.mild.home.nhs'
+        assert parameter_path_name(('utility_norms_by_age', 'female', 65)) == 'utility_norms_by_age.female.65'
+        assert parameter_path_name(('x', (65, 69))) == 'x.65-69'
+
+    def test_get_returns_base(self):
+        """Bulk get on the source config returns the registry's base vector."""
+        registry = build_parameter_registry(general_config)
+        assert len(registry['names']) == len(registry['index'])
+        np.testing.assert_allclose(registry_get(registry, general_config), registry['base'])
+
+    def test_set_round_trip(self):
+        """Bulk set writes every slot without modifying the source config."""
+        registry = build_parameter_registry(general_config)
+        values = registry['base'] * 0.9
+        cfg = registry_set(registry, general_config, values)
+        np.testing.assert_allclose(registry_get(registry, cfg), values)
+        np.testing.assert_allclose(registry_get(registry, general_config), registry['base'])
+
+    def test_set_subset_by_name(self):
+        """Named subsets are read and written in the order given."""
+        registry = build_parameter_registry(general_config)
+        names = ['costs.severe.home.informal', 'base_onset_probability']
+        cfg = registry_set(registry, general_config, [30000.0, 0.003], names=names)
+        np.testing.assert_allclose(registry_get(registry, cfg, names), [30000.0, 0.003])
+        assert cfg['costs']['severe']['home']['informal'] == 30000.0
+
+    def test_bounds_enforced(self):
+        """Probabilities above one and unknown names are rejected."""
+        registry = build_parameter_registry(general_config)
+        with pytest.raises(ValueError):
+            registry_set(registry, general_config, [1.5], names=['base_onset_probability'])
+        with pytest.raises(KeyError):
+            registry_get(registry, general_config, ['costs.unknown'])
+
+    def test_psa_reports_parameter_draws(self):
+        """Draw-level PSA output includes the sampled parameter matrix by registry name."""
+        cfg = _small_config(population=200, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_probabilistic_sensitivity_analysis(
+                cfg, _small_psa(iterations=2), collect_draw_level=True, n_jobs=1)
+        registry = build_parameter_registry(cfg, _small_psa(iterations=2))
+        assert list(result['parameter_draws'].columns) == ['iteration'] + registry['names']
+        assert len(result['parameter_draws']) == 2
+
+
+class TestAdaptivePSA:
+    """Tests for Monte Carlo standard errors and adaptive PSA stopping."""
+
+    def test_precision_on_synthetic_draws(self):
+        """MCSE of the mean is sd/sqrt(n); quantile MCSEs are positive and shrink with n."""
+        rng = np.random.default_rng(0)
+        small = pd.DataFrame({'total_costs_all': rng.normal(1000.0, 100.0, 400)})
+        large = pd.DataFrame({'total_costs_all': rng.normal(1000.0, 100.0, 40000)})
+        report = psa_precision(small, ['total_costs_all'])
+        entry = report['metrics']['total_costs_all']
+        expected = small['total_costs_all'].std(ddof=1) / math.sqrt(400)
+        assert entry['mcse_mean'] == pytest.approx(expected)
+        assert 0 < entry['mcse_upper_95']
+        big_entry = psa_precision(large, ['total_costs_all'])['metrics']['total_costs_all']
+        assert big_entry['mcse_lower_95'] < entry['mcse_lower_95']
+        assert big_entry['converged'] and report['iterations'] == 400
+
+    def test_tight_tolerance_not_converged(self):
+        """Very small tolerances are reported as not met."""
+        df = pd.DataFrame({'total_costs_all': np.random.default_rng(1).normal(10.0, 5.0, 50)})
+        report = psa_precision(df, mean_relative_tolerance=1e-6, quantile_relative_tolerance=1e-6)
+        assert not report['converged']
+
+    def test_adaptive_run_is_prefix_of_fixed_run(self):
+        """A loose tolerance stops after the first batch with the same draws as the full run."""
+        cfg = _small_config(population=200, entrants=0)
+        adaptive_psa = _small_psa(iterations=6)
+        adaptive_psa['adaptive'] = {'use': True, 'batch_size': 2, 'min_iterations': 2, 'metrics': ['total_costs_all'],
+                                    'mean_relative_tolerance': 10.0, 'quantile_relative_tolerance': 10.0}
+        with contextlib.redirect_stdout(io.StringIO()):
+            adaptive = run_probabilistic_sensitivity_analysis(
+                cfg, adaptive_psa, collect_draw_level=True, n_jobs=1)
+            fixed = run_probabilistic_sensitivity_analysis(
+                cfg, _small_psa(iterations=6), collect_draw_level=True, n_jobs=1)
+        assert adaptive['iterations'] == 2 and adaptive['iterations_requested'] == 6
+        assert adaptive['precision']['converged']
+        pd.testing.assert_frame_equal(adaptive['draws'], fixed['draws'].iloc[:2])
+        assert len(adaptive['parameter_draws']) == 2
+        assert fixed['iterations'] == 6 and 'total_costs_all' in fixed['precision']['metrics']
+
+    def test_invalid_batch_size(self):
+        """A non-positive batch size is rejected."""
+        psa = _small_psa()
+        psa['adaptive'] = {'use': True, 'batch_size': 0}
+        with pytest.raises(ValueError):
+            run_probabilistic_sensitivity_analysis(_small_config(population=50), psa, n_jobs=1)
+
+
+class TestPSADrawStore:
+    """Tests for the resumable on-disk PSA draw store."""
+
+    def _run(self, cfg, store, iterations=4, n_jobs=1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return run_probabilistic_sensitivity_analysis(
+                cfg, _small_psa(iterations=iterations), collect_draw_level=True,
+                n_jobs=n_jobs, draw_store=store)
+
+    def test_resume_reuses_finished_draws(self, tmp_path):
+        """After losing some draws, a rerun recomputes only those and matches the original."""
+        cfg = _small_config(population=200, entrants=0)
+        store = tmp_path / 'draws.sqlite'
+        first = self._run(cfg, store)
+        connection = sqlite3.connect(str(store))
+        with connection:
+            connection.execute("DELETE FROM psa_draws WHERE iteration >= 2")
+            (metrics,) = connection.execute("SELECT metrics FROM psa_draws WHERE iteration = 0").fetchone()
+            marked = dict(json.loads(metrics), total_costs_all=-1.0)
+            connection.execute("UPDATE psa_draws SET metrics = ? WHERE iteration = 0", (json.dumps(marked),))
+        connection.close()
+        resumed = self._run(cfg, store)
+        assert resumed['run_key'] == first['run_key']
+        assert resumed['draws']['total_costs_all'].iloc[0] == -1.0
+        pd.testing.assert_frame_equal(resumed['draws'].iloc[1:], first['draws'].iloc[1:])
+
+    def test_merge_partial_stores(self, tmp_path):
+        """Stores from separate runs merge into one summary, duplicates counted once."""
+        cfg = _small_config(population=200, entrants=0)
+        self._run(cfg, tmp_path / 'a.sqlite', iterations=3)
+        self._run(cfg, tmp_path / 'b.sqlite', iterations=2)
+        merged = load_psa_draw_stores([tmp_path / 'a.sqlite', tmp_path / 'b.sqlite', tmp_path / 'a.sqlite'])
+        assert len(merged) == 5 and merged['run_key'].nunique() == 2
+        result = summarize_psa_draw_stores([tmp_path / 'a.sqlite', tmp_path / 'b.sqlite'])
+        assert result['iterations'] == 5 and 'total_costs_all' in result['summary']
+
+    def test_store_requires_seed(self, tmp_path):
+        """Without a fixed seed a restart could not reproduce the draws."""
+        psa = _small_psa()
+        psa['seed'] = None
+        with pytest.raises(ValueError):
+            run_probabilistic_sensitivity_analysis(
+                _small_config(population=50), psa, n_jobs=1, draw_store=tmp_path / 'x.sqlite')
+
+
+class TestStreamingPSA:
+    """Tests for online PSA aggregation with unordered completion."""
+
+    def test_accumulator_matches_batch_statistics(self):
+        """Welford mean/sd are exact; P-squared quantiles are close on a skewed sample."""
+        values = np.random.default_rng(0).lognormal(0.0, 1.0, 20000)
+        accumulator = new_psa_accumulator()
+        for value in values:
+            update_psa_accumulator(accumulator, {'cost': value, 'label': 'skip'})
+        summary = psa_accumulator_summary(accumulator)
+        assert set(summary) == {'cost'}
+        assert summary['cost']['mean'] == pytest.approx(values.mean())
+        assert summary['cost']['sd'] == pytest.approx(values.std(ddof=1))
+        lower, upper = np.quantile(values, [0.025, 0.975])
+        assert summary['cost']['lower_95'] == pytest.approx(lower, rel=0.02)
+        assert summary['cost']['upper_95'] == pytest.approx(upper, rel=0.02)
+
+    def test_small_samples_are_exact(self):
+        """Fewer than five draws use exact interpolated quantiles."""
+        accumulator = new_psa_accumulator()
+        for value in (3.0, 1.0, 2.0):
+            update_psa_accumulator(accumulator, {'x': value})
+        summary = psa_accumulator_summary(accumulator)['x']
+        assert summary['lower_95'] == pytest.approx(np.quantile([1.0, 2.0, 3.0], 0.025))
+        assert summary['n'] == 3
+
+    def test_streaming_run_matches_ordered_run(self):
+        """Streamed means match the ordered run; draws are kept only on request."""
+        cfg = _small_config(population=200, entrants=0)
+        psa = _small_psa(iterations=4)
+        psa['streaming'] = {'use': True, 'report_every': 2}
+        interim = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            ordered = run_probabilistic_sensitivity_analysis(cfg, _small_psa(iterations=4), n_jobs=1,
+                                                             collect_draw_level=True)
+            streamed = run_probabilistic_sensitivity_analysis(
+                cfg, psa, n_jobs=1, on_summary=lambda n, summary: interim.append(n))
+        assert interim == [2, 4]
+        assert 'draws' not in streamed and streamed['iterations'] == 4
+        assert streamed['summary']['total_costs_all']['mean'] == pytest.approx(
+            ordered['summary']['total_costs_all']['mean'])
+
+    def test_streaming_rejects_adaptive(self):
+        """Adaptive stopping needs the draw-level data that streaming discards."""
+        psa = _small_psa()
+        psa['adaptive'] = {'use': True}
+        with pytest.raises(ValueError):
+            run_probabilistic_sensitivity_analysis(_small_config(population=50), psa, n_jobs=1, streaming=True)
+
+
+class TestPSATimeSeries:
+    """Tests for per-draw time-series capture and quantile bands."""
+
+    def test_bands_from_store(self, tmp_path):
+        """Bands skip unwritten draws and match numpy quantiles per step."""
+        timeseries = create_psa_timeseries(tmp_path / 'ts.npy', ['a', 'b'], iterations=5, n_steps=3)
+        array = np.load(timeseries['path'], mmap_mode='r+')
+        values = np.arange(4 * 3 * 2, dtype=np.float32).reshape(4, 3, 2)
+        array[:4] = values
+        array.flush()
+        del array
+        bands = psa_timeseries_bands(timeseries)
+        assert list(bands['b']['calendar_year']) == [2023, 2024, 2025]
+        assert (bands['a']['n_draws'] == 4).all()
+        np.testing.assert_allclose(bands['b']['mean'], values[:, :, 1].mean(axis=0))
+        np.testing.assert_allclose(bands['a']['upper_95'], np.quantile(values[:, :, 0], 0.975, axis=0))
+
+    def test_psa_captures_per_step_metrics(self, tmp_path):
+        """Each draw's captured per-step onsets add up to its scalar onset total."""
+        cfg = _small_config(population=200, timesteps=3, entrants=0)
+        psa = _small_psa(iterations=3)
+        psa['timeseries'] = {'metrics': ['incident_onsets', 'total_costs_nhs'], 'path': tmp_path / 'ts.npy'}
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_probabilistic_sensitivity_analysis(cfg, psa, collect_draw_level=True, n_jobs=1)
+        array = load_psa_timeseries(result['timeseries'])
+        assert array.shape == (3, 4, 2) and array.dtype == np.float32
+        np.testing.assert_allclose(array[:, 1:, 0].sum(axis=1), result['draws']['incident_onsets_total'])
+
+    def test_existing_store_is_reused(self, tmp_path):
+        """A store of the same run is reopened rather than cleared, so resumed runs keep their rows."""
+        path = tmp_path / 'ts.npy'
+        timeseries = create_psa_timeseries(path, ['a'], iterations=2, n_steps=2, run_key='run-1')
+        array = np.load(timeseries['path'], mmap_mode='r+')
+        array[0] = 1.0
+        array.flush()
+        del array
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_psa_timeseries(path, ['a'], iterations=2, n_steps=2, run_key='run-1')
+        assert load_psa_timeseries(timeseries)[0, 0, 0] == 1.0
+
+    def test_store_of_another_run_is_cleared(self, tmp_path):
+        """A same-shaped store left by another run (or with no run key) is cleared, not mixed in."""
+        path = tmp_path / 'ts.npy'
+        timeseries = create_psa_timeseries(path, ['a'], iterations=2, n_steps=2, run_key='run-1')
+        array = np.load(timeseries['path'], mmap_mode='r+')
+        array[0] = 1.0
+        array.flush()
+        del array
+        create_psa_timeseries(path, ['a'], iterations=2, n_steps=2, run_key='run-2')
+        assert np.isnan(load_psa_timeseries(timeseries)).all()
+
+    def test_bands_cover_completed_draws_only(self, tmp_path):
+        """Rows outside a result's completed draws (e.g. after an adaptive stop) are left out."""
+        timeseries = create_psa_timeseries(tmp_path / 'ts.npy', ['a'], iterations=3, n_steps=1)
+        array = np.load(timeseries['path'], mmap_mode='r+')
+        array[:, 0, 0] = [1.0, 3.0, 100.0]
+        array.flush()
+        del array
+        bands = psa_timeseries_bands(dict(timeseries, completed_draws=[0, 1]))['a']
+        assert bands['n_draws'].iloc[0] == 2 and bands['mean'].iloc[0] == pytest.approx(2.0)
+
+    def test_adaptive_rerun_ignores_old_rows(self, tmp_path):
+        """An early-stopped rerun into the same path with another seed reports only its own draws."""
+        cfg = _small_config(population=200, timesteps=2, entrants=0)
+        path = tmp_path / 'ts.npy'
+        psa = _small_psa(iterations=4, seed=3)
+        psa['timeseries'] = {'metrics': ['incident_onsets'], 'path': path}
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_probabilistic_sensitivity_analysis(cfg, psa, n_jobs=1)
+            psa.update({'seed': 4, 'adaptive': {'use': True, 'batch_size': 2, 'min_iterations': 2,
+                                                'mean_relative_tolerance': 1e9,
+                                                'quantile_relative_tolerance': 1e9}})
+            result = run_probabilistic_sensitivity_analysis(cfg, psa, collect_draw_level=True, n_jobs=1)
+        assert result['iterations'] == 2 and result['timeseries']['completed_draws'] == [0, 1]
+        assert np.isnan(load_psa_timeseries(result['timeseries'])[2:]).all()
+        band = psa_timeseries_bands(result['timeseries'])['incident_onsets']
+        assert (band['n_draws'] == 2).all()
+        assert band['mean'].iloc[1:].sum() == pytest.approx(result['draws']['incident_onsets_total'].mean())
+
+
+class TestQuasiMonteCarloSampling:
+    """Tests for Sobol and Latin hypercube PSA parameter sampling."""
+
+    def test_lhs_is_stratified(self):
+        """Each Latin hypercube column has exactly one point per 1/n stratum."""
+        points = psa_parameter_uniforms(20, 3, 'lhs', np.random.default_rng(0))
+        for column in points.T:
+            assert sorted(np.floor(column * 20).astype(int)) == list(range(20))
+
+    def test_sobol_points_in_unit_cube(self):
+        """Scrambled Sobol points are reproducible and strictly inside (0, 1)."""
+        first = psa_parameter_uniforms(10, 4, 'sobol', np.random.default_rng(1))
+        second = psa_parameter_uniforms(10, 4, 'sobol', np.random.default_rng(1))
+        np.testing.assert_array_equal(first, second)
+        assert first.shape == (10, 4) and np.all((first > 0) & (first < 1))
+
+    def test_inverse_cdf_matches_families(self):
+        """Median points map to each family's median."""
+        parameters = [
+            {'path': ('a',), 'family': 'beta', 'params': (2.0, 2.0), 'base': 0.5},
+            {'path': ('b',), 'family': 'gamma', 'params': (1.0, 3.0), 'base': 3.0},
+            {'path': ('c',), 'family': 'fixed', 'params': (7.0, 0.0), 'base': 7.0},
+            {'path': ('d',), 'family': 'lognormal', 'params': (math.log(1.5), 0.2), 'base': 1.5},
+        ]
+        matrix = psa_parameter_quantiles(parameters, np.full((1, 3), 0.5))
+        np.testing.assert_allclose(matrix[0], [0.5, 3.0 * math.log(2.0), 7.0, 1.5])
+
+    def test_qmc_means_more_accurate(self):
+        """Sobol and LHS parameter means sit closer to the truth than independent draws."""
+        parameters = enumerate_psa_parameters(general_config)
+        truth = draw_psa_parameter_matrix(parameters, 100000, np.random.default_rng(0)).mean(axis=0)
+
+        def rms_error(method):
+            errors = [draw_psa_parameter_matrix(parameters, 64, np.random.default_rng(seed), method).mean(axis=0)
+                      for seed in range(5)]
+            return np.sqrt(np.mean([((e - truth) / truth) ** 2 for e in errors]))
+
+        assert rms_error('sobol') < rms_error('random') / 3
+        assert rms_error('lhs') < rms_error('random') / 3
+
+    def test_psa_uses_sampling_mode(self):
+        """The selected mode drives the PSA parameter matrix; unknown modes are rejected."""
+        cfg = _small_config(population=100, entrants=0)
+        psa = _small_psa(iterations=2)
+        psa['sampling'] = 'lhs'
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_probabilistic_sensitivity_analysis(cfg, psa, collect_draw_level=True, n_jobs=1)
+        registry = build_parameter_registry(cfg, psa)
+        rng = np.random.default_rng(3)
+        rng.integers(0, 2**32 - 1, size=2)  # the runner draws the model seeds first
+        expected = draw_psa_parameter_matrix(registry['parameters'], 2, rng, 'lhs')
+        np.testing.assert_allclose(result['parameter_draws'][registry['names']].to_numpy(), expected, rtol=1e-12)
+        psa['sampling'] = 'halton'
+        with pytest.raises(ValueError):
+            run_probabilistic_sensitivity_analysis(cfg, psa, n_jobs=1)
+
+
+class TestVarianceReduction:
+    """Tests for antithetic pairing and control-variate adjustment of PSA means."""
+
+    def test_antithetic_rows_mirror_quantiles(self):
+        """Paired rows sit at mirrored quantiles of each parameter's distribution."""
+        parameters = [{'path': ('a',), 'family': 'gamma', 'params': (4.0, 0.5), 'base': 2.0}]
+        matrix = draw_psa_parameter_matrix(parameters, 5, np.random.default_rng(0), antithetic=True)
+        assert matrix.shape == (5, 1)
+        from scipy import stats
+        cdf = stats.gamma.cdf(matrix[:, 0], 4.0, scale=0.5)
+        np.testing.assert_allclose(cdf[0:4:2] + cdf[1:4:2], 1.0)
+
+    def test_parameter_means(self):
+        """Exact means for each family."""
+        parameters = [
+            {'path': ('a',), 'family': 'beta', 'params': (2.0, 6.0), 'base': 0.25},
+            {'path': ('b',), 'family': 'gamma', 'params': (4.0, 0.5), 'base': 2.0},
+            {'path': ('c',), 'family': 'lognormal', 'params': (0.0, 0.5), 'base': 1.0},
+            {'path': ('d',), 'family': 'fixed', 'params': (3.0, 0.0), 'base': 3.0},
+        ]
+        np.testing.assert_allclose(psa_parameter_means(parameters), [0.25, 2.0, math.exp(0.125), 3.0])
+
+    def test_antithetic_report_on_monotone_output(self):
+        """A monotone output of mirrored draws has a much smaller antithetic MCSE."""
+        u = np.random.default_rng(1).random(200)
+        paired = np.empty(400)
+        paired[0::2], paired[1::2] = u, 1.0 - u
+        report = antithetic_variance_reduction(pd.DataFrame({'total_costs_all': np.exp(paired)}))
+        assert report['total_costs_all']['pairs'] == 200
+        assert report['total_costs_all']['variance_reduction'] > 10
+
+    def test_control_variate_recovers_mean(self):
+        """With a strongly correlated control the adjusted mean is closer and its MCSE smaller."""
+        rng = np.random.default_rng(2)
+        control = rng.normal(1.0, 1.0, 200)
+        values = 2.0 * control + rng.normal(0.0, 0.1, 200)
+        report = control_variate_adjustment(pd.DataFrame({'total_costs_all': values}),
+                                            control[:, None], np.array([1.0]))['total_costs_all']
+        assert report['coefficients'][0] == pytest.approx(2.0, abs=0.05)
+        assert abs(report['mean_adjusted'] - 2.0) < abs(report['mean'] - 2.0)
+        assert report['variance_reduction'] > 50
+
+    def test_psa_reports_variance_reduction(self):
+        """The PSA payload reports both gains and adds adjusted means to the summary."""
+        cfg = _small_config(population=200, entrants=0)
+        psa = _small_psa(iterations=8)
+        control = 'stage_age_qalys.caregiver.cognitively_normal.default.0'
+        psa['variance_reduction'] = {'antithetic': True, 'control_variates': [control]}
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_probabilistic_sensitivity_analysis(cfg, psa, n_jobs=1)
+        reduction = result['variance_reduction']
+        assert reduction['antithetic']['total_qalys_combined']['pairs'] == 4
+        assert reduction['control_variate']['controls'] == [control]
+        assert 'mean_adjusted' in result['summary']['total_qalys_combined']
+        psa['variance_reduction'] = {'control_variates': ['not.a.parameter']}
+        with pytest.raises(KeyError):
+            run_probabilistic_sensitivity_analysis(cfg, psa, n_jobs=1)
+
+
+class TestTwoLevelPSA:
+    """Tests for the nested two-level PSA and its ANOVA estimator."""
+
+    def test_anova_separates_noise(self):
+        """Between-draw variance is recovered and the corrected interval is narrower than the naive one."""
+        rng = np.random.default_rng(0)
+        n_outer, n_replicates = 2000, 3
+        draw_effects = rng.normal(10.0, 2.0, n_outer)
+        values = np.repeat(draw_effects, n_replicates) + rng.normal(0.0, 3.0, n_outer * n_replicates)
+        draws = pd.DataFrame({
+            'iteration': np.repeat(np.arange(n_outer) + 1, n_replicates),
+            'replicate': np.tile(np.arange(n_replicates) + 1, n_outer),
+            'x': values,
+        })
+        report = two_level_anova(draws, n_inner=100)['x']
+        assert report['sigma_between_sq'] == pytest.approx(4.0, rel=0.15)
+        assert report['run_variance_within'] == pytest.approx(9.0, rel=0.05)
+        assert report['sigma_within_sq'] == pytest.approx(report['run_variance_within'] * 100)
+        true_lower, true_upper = np.quantile(draw_effects, [0.025, 0.975])
+        assert abs(report['lower_95'] - true_lower) < abs(report['naive_lower_95'] - true_lower)
+        assert abs(report['upper_95'] - true_upper) < abs(report['naive_upper_95'] - true_upper)
+
+    def test_anova_needs_replicates(self):
+        """One run per parameter set cannot separate the two variance components."""
+        draws = pd.DataFrame({'iteration': [1, 2, 3], 'replicate': [1, 1, 1], 'x': [1.0, 2.0, 3.0]})
+        with pytest.raises(ValueError):
+            two_level_anova(draws)
+
+    def test_plan_design(self):
+        """People per draw meet the noise target; replicates grow once runs hit the population cap."""
+        components = {'total_costs_all': {'sigma_between_sq': 4.0, 'sigma_within_sq': 4.0e5}}
+        small = plan_two_level_design(components, max_population=10**6, noise_fraction=0.1)
+        assert small == {'n_inner': 500000, 'n_replicates': 2, 'people_per_draw': 10**6,
+                         'driving_metric': 'total_costs_all'}
+        capped = plan_two_level_design(components, max_population=50000, noise_fraction=0.1)
+        assert capped['n_replicates'] == 20 and capped['n_inner'] == 50000
+        assert plan_two_level_design({}, max_population=1000) is None
+
+    def test_nested_run(self):
+        """n_outer parameter sets each get n_replicates runs sharing their parameters."""
+        cfg = _small_config(population=200, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_two_level_psa(cfg, _small_psa(), n_outer=3, n_inner=200, n_replicates=2,
+                                       collect_draw_level=True, n_jobs=1)
+        draws = result['draws']
+        assert result['iterations'] == 3 and len(draws) == 6
+        assert list(draws['iteration']) == [1, 1, 2, 2, 3, 3]
+        assert result['two_level_psa']['n_replicates'] == 2
+        assert 'sigma_between_sq' in result['two_level_psa']['variance_components']['total_costs_all']
+        stats = result['summary']['total_costs_all']
+        assert stats['lower_95'] <= stats['mean'] <= stats['upper_95']
+
+
+class TestVariancePilot:
+    """Tests for the variance-components pilot."""
+
+    def _pilot(self, n_jobs):
+        cfg = _small_config(population=400, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            return estimate_variance_components_pilot(cfg, _small_psa(), n_outer=3, n_inner_list=[100, 400],
+                                                      seed=5, n_jobs=n_jobs)
+
+    def test_shared_parameter_sets(self):
+        """Every population size runs the same parameter sets, and the recommendation uses real metrics."""
+        result = self._pilot(n_jobs=1)
+        draws = result['draws']
+        assert list(draws['n_inner']) == [100] * 3 + [400] * 3
+        assert list(draws['iteration']) == [1, 2, 3] * 2
+        assert set(result['results_by_n']) == {100, 400}
+        assert 'total_qalys_combined' in result['variance_components']
+        assert result['recommended_n'] is not None
+
+    def test_parallel_matches_serial(self):
+        """Spreading pilot runs over workers gives the same outcomes as running them serially."""
+        serial = self._pilot(n_jobs=1)['draws']
+        parallel = self._pilot(n_jobs=2)['draws']
+        pd.testing.assert_frame_equal(serial, parallel)
+
+
+class TestParameterDesign:
+    """Tests for running an explicit parameter matrix."""
+
+    def test_one_row_per_design_point(self):
+        """Each matrix row is one model run; a column-count mismatch is refused."""
+        cfg = _small_config(population=200, entrants=0)
+        registry = build_parameter_registry(cfg)
+        matrix = np.tile(registry['base'], (3, 1))
+        with contextlib.redirect_stdout(io.StringIO()):
+            outputs = run_parameter_design(cfg, registry['parameters'], matrix, seed=1, n_jobs=1)
+        assert list(outputs['iteration']) == [1, 2, 3]
+        assert 'total_costs_all' in outputs.columns
+        with pytest.raises(ValueError):
+            run_parameter_design(cfg, registry['parameters'], matrix[:, :-1], n_jobs=1)
+
+
+class TestPairedPSA:
+    """Tests for the paired intervention-versus-comparator PSA."""
+
+    def test_apply_intervention(self):
+        """Prevalence and excess hazard are scaled on a copy; unknown risk factors are refused."""
+        cfg = _small_config()
+        treated = apply_intervention(cfg, {'risk_factor': 'periodontal_disease',
+                                           'prevalence_multiplier': 0.5, 'excess_risk_multiplier': 0.5})
+        meta = treated['risk_factors']['periodontal_disease']
+        assert meta['prevalence']['female'] == pytest.approx(0.125)
+        assert meta['relative_risks']['onset']['male'] == pytest.approx(1.235)
+        assert cfg['risk_factors']['periodontal_disease']['prevalence']['female'] == 0.25
+        with pytest.raises(ValueError):
+            apply_intervention(cfg, {'risk_factor': 'not_a_risk'})
+
+    def test_null_intervention_has_zero_increment(self):
+        """With common random numbers an intervention that changes nothing gives exactly zero increments."""
+        cfg = _small_config(population=300, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_paired_psa(cfg, {'risk_factor': 'periodontal_disease'}, _small_psa(iterations=3),
+                                    programme_cost=10.0, collect_draw_level=True, n_jobs=1)
+        draws = result['draws']
+        assert (draws['incremental_qalys'] == 0).all()
+        assert (draws['incremental_cost'] == 10.0).all()
+        assert (draws['incremental_nmb'] == -10.0).all()
+        assert result['paired']['wtp'] == 20000.0
+        # The programme cost is an NHS cost, so the intervention arm's breakdown still adds up
+        np.testing.assert_allclose(draws['intervention_total_costs_nhs'] + draws['intervention_total_costs_informal'],
+                                   draws['intervention_total_costs_all'])
+        assert (draws['intervention_total_costs_nhs'] - draws['comparator_total_costs_nhs'] == 10.0).all()
+        assert (draws['intervention_programme_cost'] == 10.0).all()
+
+    def test_increments_match_arms(self):
+        """Incremental columns are intervention minus comparator for every draw."""
+        cfg = _small_config(population=300, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_paired_psa(cfg, {'risk_factor': 'periodontal_disease', 'prevalence_multiplier': 0.0},
+                                    _small_psa(iterations=3), collect_draw_level=True, n_jobs=1)
+        draws = result['draws']
+        np.testing.assert_allclose(draws['incremental_cost'],
+                                   draws['intervention_total_costs_all'] - draws['comparator_total_costs_all'])
+        assert 'incremental_nmb' in result['summary']
+
+    def test_per_arm_timeseries(self, tmp_path):
+        """Paired runs capture each time-series metric for both arms, consistent with the arm totals."""
+        psa = _small_psa(iterations=2)
+        psa['timeseries'] = {'metrics': ['incident_onsets'], 'path': tmp_path / 'ts.npy'}
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_paired_psa(_small_config(population=200, timesteps=2, entrants=0),
+                                    {'risk_factor': 'periodontal_disease', 'prevalence_multiplier': 0.0},
+                                    psa, collect_draw_level=True, n_jobs=1)
+        timeseries = result['timeseries']
+        assert timeseries['metrics'] == ['comparator_incident_onsets', 'intervention_incident_onsets']
+        array = load_psa_timeseries(timeseries)
+        assert not np.isnan(array).any()
+        for column, arm in enumerate(('comparator', 'intervention')):
+            np.testing.assert_allclose(array[:, 1:, column].sum(axis=1),
+                                       result['draws'][f'{arm}_incident_onsets_total'])
+
+
+class TestMemoryAwareWorkers:
+    """Tests for sizing automatic PSA pools to the available memory."""
+
+    def test_plan_capped_by_available_memory(self):
+        """The job count is what fits in the memory headroom, never below one."""
+        cfg = _small_config(population=10000)
+        per_run = estimate_memory(cfg)['per_run_bytes']
+        plan = plan_psa_workers(cfg, n_jobs=8, available_bytes=int(3.5 * per_run / 0.85))
+        assert plan['n_jobs'] == 3 and plan['limited_by'] == 'memory'
+        assert plan_psa_workers(cfg, n_jobs=8, available_bytes=10)['n_jobs'] == 1
+        assert plan_psa_workers(cfg, n_jobs=2, available_bytes=100 * per_run)['limited_by'] == 'cpu'
+
+    def test_plan_uses_configured_budget(self):
+        """A configured memory budget takes precedence over the machine's free memory."""
+        cfg = _small_config(population=10000)
+        cfg['storage'] = {'memory_budget_gb': 1e-9}
+        plan = plan_psa_workers(cfg, n_jobs=4, available_bytes=10 ** 15)
+        assert plan['n_jobs'] == 1 and plan['limited_by'] == 'budget'
+        cfg['storage'] = {'memory_headroom': 1.5}
+        with pytest.raises(ValueError):
+            plan_psa_workers(cfg)
+
+    @staticmethod
+    def _throttled_run(monkeypatch, available_runs):
+        """Auto-sized PSA on a pretend 3-CPU machine with memory for ``available_runs`` estimated runs."""
+        import IBM_PD_AD
+        cfg = _small_config(population=300, entrants=0)
+        available = int(available_runs * estimate_memory(cfg)['per_run_bytes'] / 0.85)
+        monkeypatch.setattr(IBM_PD_AD, 'cpu_count', lambda: 3)
+        monkeypatch.setattr(IBM_PD_AD, 'available_memory_bytes', lambda: available)
+        pool_kwargs = []
+
+        def recording_pool(*args, **kwargs):
+            pool_kwargs.append(kwargs)
+            return Pool(*args, **kwargs)
+
+        monkeypatch.setattr(IBM_PD_AD, 'Pool', recording_pool)
+        psa = _small_psa(iterations=5)
+        psa.pop('n_jobs', None)
+        with contextlib.redirect_stdout(io.StringIO()):
+            throttled = run_probabilistic_sensitivity_analysis(cfg, psa, collect_draw_level=True)
+            serial = run_probabilistic_sensitivity_analysis(cfg, psa, collect_draw_level=True, n_jobs=1)
+        pd.testing.assert_frame_equal(throttled['draws'], serial['draws'])
+        # Workers exit after every draw, so idle workers cannot hold a finished draw's memory
+        assert [kwargs['maxtasksperchild'] for kwargs in pool_kwargs] == [1]
+        return throttled['worker_memory']
+
+    def test_memory_aware_pool_matches_serial(self, monkeypatch):
+        """Throttled dispatch gives the serial draws and measures the workers' peak memory."""
+        plan = self._throttled_run(monkeypatch, available_runs=5.5)
+        assert plan['requested'] == 3 and plan['n_jobs'] == 3
+        assert plan['measured_peak_bytes'] > 0
+        assert 1 <= plan['concurrency'] <= 3
+
+    def test_concurrency_follows_measured_peak(self, monkeypatch):
+        """With memory for less than one measured worker the draws run one at a time."""
+        plan = self._throttled_run(monkeypatch, available_runs=1e-3)
+        assert plan['n_jobs'] == 1 and plan['limited_by'] == 'memory'
+        assert plan['concurrency'] == 1
+
+
+class TestOneWayDSA:
+    """Tests for the one-way deterministic sensitivity analysis and its tornado plot."""
+
+    HR_ONSET = 'risk_factors.periodontal_disease.relative_risks.onset.female'
+
+    def test_ranges_from_intervals(self):
+        """Hazard ratios vary over their published CI; relative ranges and explicit ranges override."""
+        cfg = _small_config(population=200, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_one_way_dsa(cfg, [self.HR_ONSET, 'base_onset_probability'], seed=5, n_jobs=1,
+                                     ranges={'base_onset_probability': (0.001, 0.004)})
+        by_name = result['tornado'].set_index('parameter')
+        _, lower, upper = RISK_FACTOR_HR_INTERVALS['periodontal_disease']['onset']['female']
+        assert by_name.loc[self.HR_ONSET, 'low_value'] == pytest.approx(lower, rel=1e-6)
+        assert by_name.loc[self.HR_ONSET, 'high_value'] == pytest.approx(upper, rel=1e-6)
+        assert tuple(by_name.loc['base_onset_probability', ['low_value', 'high_value']]) == (0.001, 0.004)
+        assert list(result['tornado']['swing']) == sorted(result['tornado']['swing'], reverse=True)
+        assert list(result['runs']['bound']) == ['base', 'low', 'high', 'low', 'high']
+
+    def test_common_random_numbers(self):
+        """All runs share one seed, so a parameter held at its base value has exactly zero swing."""
+        cfg = _small_config(population=200, entrants=0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = run_one_way_dsa(cfg, ['base_onset_probability', 'costs.mild.home.nhs'],
+                                     relative_range=0.2, seed=5, n_jobs=1,
+                                     ranges={'costs.mild.home.nhs': (cfg['costs']['mild']['home']['nhs'],) * 2})
+        by_name = result['tornado'].set_index('parameter')
+        assert by_name.loc['costs.mild.home.nhs', 'swing'] == 0.0
+        assert by_name.loc['base_onset_probability', 'low_value'] == pytest.approx(0.8 * cfg['base_onset_probability'])
+        assert result['base_value'] == by_name.loc['costs.mild.home.nhs', 'low']
+
+    def test_parallel_matches_serial_and_plots(self, tmp_path):
+        """Parallel DSA equals the serial one; paired runs report ICERs that the tornado plot draws."""
+        cfg = _small_config(population=300, entrants=0)
+        kwargs = dict(parameters=[self.HR_ONSET, 'base_onset_probability'], seed=2, metric='icer',
+                      intervention={'risk_factor': 'periodontal_disease', 'prevalence_multiplier': 0.0},
+                      programme_cost=100.0)
+        with contextlib.redirect_stdout(io.StringIO()):
+            serial = run_one_way_dsa(cfg, n_jobs=1, **kwargs)
+            parallel = run_one_way_dsa(cfg, n_jobs=2, **kwargs)
+            plot_psa_tornado(parallel, metric='incremental_nmb', save_path=str(tmp_path / 'tornado.png'))
+        pd.testing.assert_frame_equal(serial['runs'], parallel['runs'])
+        assert {'icer', 'incremental_nmb'} <= set(serial['runs'].columns)
+        assert (tmp_path / 'tornado.png').exists()
+
+    def test_unknown_parameter(self):
+        """Unknown names raise KeyError."""
+        with pytest.raises(KeyError):
+            run_one_way_dsa(_small_config(), ['not.a.parameter'], n_jobs=1)
@@ -0,0 +1,118 @@
+"""
+Unit tests for psa_distributed.py - PSA through an SQLite work queue
+
+Tests focus on:
+- Agreement of queue-executed draws with a local PSA run
+- Requeueing work from workers that stopped heartbeating, and ignoring their late results
+- Retry limits and failure reporting for draws that keep raising
+"""
+
+import contextlib
+import io
+import threading
+import time
+
+import pytest
+
+import psa_distributed
+from IBM_PD_AD import run_probabilistic_sensitivity_analysis
+from psa_distributed import (
+    _claim_psa_task,
+    open_psa_queue,
+    publish_psa_tasks,
+    queue_executor,
+    requeue_stale_psa_tasks,
+    run_distributed_psa,
+    run_psa_worker,
+)
+from tests.test_ibm_pd_ad import _small_config, _small_psa
+
+
+# =============================================================================
+# TESTS FOR QUEUE EXECUTION
+# =============================================================================
+
+class TestDistributedPSA:
+    """Tests for running PSA draws through the queue."""
+
+    def test_matches_local_run(self, tmp_path):
+        """Draws run by two queue workers equal a serial local PSA with the same seed."""
+        cfg, psa = _small_config(population=200, entrants=0), _small_psa()
+        with contextlib.redirect_stdout(io.StringIO()):
+            remote = run_distributed_psa(cfg, psa, queue=tmp_path / 'queue.sqlite', local_workers=2,
+                                         poll_interval=0.05, timeout=300, collect_draw_level=True)
+            local = run_probabilistic_sensitivity_analysis(cfg, psa, n_jobs=1, collect_draw_level=True)
+        assert remote['draws'].equals(local['draws'])
+        assert remote['summary'] == local['summary']
+
+        connection = open_psa_queue(tmp_path / 'queue.sqlite')
+        statuses = connection.execute("SELECT status, COUNT(*) FROM psa_tasks GROUP BY status").fetchall()
+        assert statuses == [('done', 4)]
+        assert connection.execute("SELECT SUM(tasks_done) FROM psa_workers").fetchone()[0] == 4
+
+    def test_republish_keeps_done_draws(self, tmp_path):
+        """Publishing the same run again does not queue finished draws a second time."""
+        connection = open_psa_queue(tmp_path / 'queue.sqlite')
+        publish_psa_tasks(connection, 'run', {'x': 1}, [11, 12], [0, 1])
+        connection.execute("UPDATE psa_tasks SET status = 'done', metrics = '{}' WHERE draw_idx = 0")
+        publish_psa_tasks(connection, 'run', {'x': 1}, [11, 12], [0, 1])
+        rows = connection.execute("SELECT draw_idx, status, seed FROM psa_tasks ORDER BY draw_idx").fetchall()
+        assert rows == [(0, 'done', 11), (1, 'pending', 12)]
+
+
+# =============================================================================
+# TESTS FOR FAULT TOLERANCE
+# =============================================================================
+
+class TestQueueFaultTolerance:
+    """Tests for heartbeat timeouts and retry limits."""
+
+    def test_stale_task_is_requeued(self, tmp_path):
+        """A running task whose worker went quiet goes back to pending and is claimed again."""
+        connection = open_psa_queue(tmp_path / 'queue.sqlite')
+        publish_psa_tasks(connection, 'run', {}, [5], [0], heartbeat_timeout=30.0)
+        assert _claim_psa_task(connection, 'lost-worker') == ('run', 0, 5)
+        assert _claim_psa_task(connection, 'other-worker') is None
+        assert requeue_stale_psa_tasks(connection, now=time.time() + 10) == 0
+        assert requeue_stale_psa_tasks(connection, now=time.time() + 60) == 1
+        assert _claim_psa_task(connection, 'other-worker') == ('run', 0, 5)
+        worker, attempts = connection.execute("SELECT worker, attempts FROM psa_tasks").fetchone()
+        assert (worker, attempts) == ('other-worker', 2)
+
+    def test_failing_draw_stops_run(self, tmp_path):
+        """A draw that keeps raising is retried max_attempts times, then the coordinator raises."""
+        queue = tmp_path / 'queue.sqlite'
+        open_psa_queue(queue).close()
+        worker = threading.Thread(target=run_psa_worker, args=(queue,),
+                                  kwargs={'poll_interval': 0.01, 'idle_timeout': 2.0})
+        worker.start()
+        executor = queue_executor(queue, poll_interval=0.01, max_attempts=2, timeout=30)
+        bad_payload = {'base_config': None, 'parameters': [], 'matrix': None}
+        try:
+            with contextlib.ExitStack() as stack, contextlib.redirect_stdout(io.StringIO()):
+                iterate = executor(stack, bad_payload, [1])
+                with pytest.raises(RuntimeError, match='after 2 attempt'):
+                    list(iterate([0]))
+        finally:
+            worker.join()
+        error = open_psa_queue(queue).execute("SELECT error FROM psa_tasks").fetchone()[0]
+        assert error.startswith('TypeError')
+
+    def test_late_result_from_requeued_worker_is_dropped(self, tmp_path, monkeypatch):
+        """A worker whose task was requeued and re-claimed cannot overwrite the new owner's run."""
+        queue = tmp_path / 'queue.sqlite'
+        connection = open_psa_queue(queue)
+        publish_psa_tasks(connection, 'run', {}, [5], [0], heartbeat_timeout=30.0)
+
+        def slow_draw(payload, draw_idx, draw_seed):
+            # While this draw runs, the coordinator requeues it and another worker claims it
+            assert requeue_stale_psa_tasks(connection, now=time.time() + 60) == 1
+            assert _claim_psa_task(connection, 'other-worker') == ('run', 0, 5)
+            return {'late': 1.0}
+
+        monkeypatch.setattr(psa_distributed, '_run_psa_draw', slow_draw)
+        assert run_psa_worker(queue, worker_id='stale-worker', poll_interval=0.01, idle_timeout=0.1) == 0
+        row = connection.execute("SELECT status, worker, metrics FROM psa_tasks").fetchone()
+        assert row == ('running', 'other-worker', None)
+        done = connection.execute("SELECT tasks_done FROM psa_workers WHERE worker_id = 'stale-worker'").fetchone()
+        assert done == (0,)
@@ -1,14 +1,11 @@
 """
 Unit tests for PSA workflow scripts.
 
-These tests document the missing psa_with_timeseries module dependency
-and will pass once the module is available.
-
 run_psa_direct.py requires:
 - psa_with_timeseries.run_psa_with_timeseries() function
 
-Status: BLOCKED - Missing psa_with_timeseries module
-Action: Contact original authors to obtain this module
+The module was originally missing from the repository; it is now implemented
+on top of IBM_PD_AD.run_probabilistic_sensitivity_analysis.
 """
 
 import pytest
@@ -16,15 +13,11 @@ from pathlib import Path
 
 
 # =============================================================================
-# MISSING MODULE TESTS - These document the missing dependency
+# MODULE DEPENDENCY TESTS
 # =============================================================================
 
 class TestMissingDependency:
-    """Tests that document the missing psa_with_timeseries module.
-
-    These tests will fail until the module is found/implemented.
-    Once the module is available, these tests should pass.
-    """
+    """Tests for the psa_with_timeseries module required by run_psa_direct.py."""
 
     def test_psa_with_timeseries_module_importable(self):
         """Test that psa_with_timeseries module can be imported.
@@ -71,15 +64,11 @@ class TestMissingDependency:
         assert callable(run_psa_with_timeseries), "run_psa_with_timeseries should be callable"
 
     def test_run_psa_direct_has_missing_import(self):
-        """Test that run_psa_direct.py has the expected missing import.
-
-        BLOCKED: run_psa_direct.py imports psa_with_timeseries at module level.
-        This test verifies the import statement exists in the file.
+        """Test that run_psa_direct.py imports run_psa_with_timeseries.
 
         Note: We don't actually import run_psa_direct.py because:
-        1. It imports psa_with_timeseries which is missing
-        2. It wraps sys.stdout/stderr at module level (breaks pytest capture)
-        3. It executes code at module level (no __main__ guard)
+        1. It wraps sys.stdout/stderr at module level (breaks pytest capture)
+        2. It executes code at module level (no __main__ guard)
         """
         # Read the file and check for the import statement
         script_path = Path(__file__).parent.parent / "run_psa_direct.py"
@@ -93,11 +82,8 @@ class TestMissingDependency:
         assert "from psa_with_timeseries import run_psa_with_timeseries" in content, \
             "run_psa_direct.py should import run_psa_with_timeseries"
 
-        # Document that this import will fail
-        pytest.skip(
-            "DOCUMENTED: run_psa_direct.py imports psa_with_timeseries which is missing.\n"
-            "The script cannot run until this module is available."
-        )
+        from psa_with_timeseries import run_psa_with_timeseries
+        assert callable(run_psa_with_timeseries)
 
 
 # =============================================================================
@@ -200,11 +186,7 @@ class TestIBMPDADIntegration:
 # =============================================================================
 
 class TestExpectedPSAInterface:
-    """Tests documenting the expected interface of psa_with_timeseries.
-
-    These tests document what the missing module should provide.
-    They will be skipped until the module is available.
-    """
+    """Tests for the interface of psa_with_timeseries used by run_psa_direct.py."""
 
     @pytest.fixture
     def psa_module(self):
@@ -246,9 +228,11 @@ class TestExpectedPSAInterface:
         from IBM_PD_AD import general_config
         import copy
 
-        # Create minimal test config
+        # Create minimal test config (few people, no entrants, short horizon)
         test_config = copy.deepcopy(general_config)
         test_config['population'] = 100  # Very small for testing
+        test_config['number_of_timesteps'] = 2
+        test_config['open_population']['entrants_per_year'] = 0
 
         # Run with minimal iterations
         results = psa_module.run_psa_with_timeseries(
@@ -260,6 +244,38 @@ class TestExpectedPSAInterface:
         )
 
         assert results is not None, "PSA should return results"
+        assert results['iterations'] == 2
+        assert 'total_costs_all' in results['summary']
+
+    def test_trajectories_and_incremental_outputs(self, psa_module, tmp_path):
+        """Each draw carries a yearly trajectory; outputs are written to output_dir."""
+        from IBM_PD_AD import general_config
+        import copy
+
+        test_config = copy.deepcopy(general_config)
+        test_config['population'] = 200
+        test_config['number_of_timesteps'] = 3
+        test_config['open_population']['entrants_per_year'] = 0
+        test_config['initial_summary_overrides'] = {}
+
+        results = psa_module.run_psa_with_timeseries(
+            config=test_config,
+            iterations=3,
+            n_jobs=2,
+            seed=7,
+            output_dir=tmp_path,
+        )
+
+        trajectories = results['trajectories']
+        assert len(trajectories) == 3 * 4
+        assert set(trajectories['iteration']) == {1, 2, 3}
+        yearly_onsets = trajectories[trajectories['time_step'] > 0].groupby('iteration')['incident_onsets'].sum()
+        assert list(yearly_onsets) == pytest.approx(list(results['draws']['incident_onsets_total']))
+        bands = results['timeseries_bands']['incident_onsets']
+        assert list(bands['calendar_year']) == [2023, 2024, 2025, 2026]
+        for name in ('psa_draws.sqlite', 'psa_timeseries.npy', 'psa_summary.csv',
+                     'psa_draws.csv', 'psa_timeseries_bands.csv'):
+            assert (tmp_path / name).exists(), name
 
 
 # =============================================================================
@@ -267,13 +283,13 @@ class TestExpectedPSAInterface:
 # =============================================================================
 
 class TestDocumentation:
-    """Tests that serve as documentation for the missing module."""
+    """Tests that serve as documentation for the psa_with_timeseries module."""
 
     def test_missing_module_documented(self):
-        """This test documents the missing psa_with_timeseries module.
+        """This test documents the psa_with_timeseries module.
 
-        MISSING MODULE: psa_with_timeseries
-        ====================================
+        MODULE: psa_with_timeseries
+        ===========================
 
         Required by: run_psa_direct.py
         Import statement: from psa_with_timeseries import run_psa_with_timeseries
@@ -294,16 +310,12 @@ class TestDocumentation:
             with randomly sampled parameters to quantify uncertainty in outcomes.
             '''
 
-        Search results:
-        ---------------
-        - PyPI: Not found
-        - GitHub: Not found
-        - Web search: No matches for "psa_with_timeseries"
-
-        Conclusion:
-        -----------
-        This is likely a custom module written by the original developers
-        that was not committed to the repository. Contact authors to obtain.
+        History:
+        --------
+        The module was not committed with the original code (not on PyPI or
+        GitHub either). It has been reimplemented as a parallel driver over
+        IBM_PD_AD.run_probabilistic_sensitivity_analysis that also returns
+        per-draw yearly trajectories and writes outputs incrementally.
         """
         # This test always passes - it's documentation
         assert True
@@ -0,0 +1,101 @@
+"""
+Unit tests for sensitivity_grid.py - two-way and threshold grid sweeps
+
+Tests focus on:
+- Cell splitting along the threshold contour
+- Grid evaluation, caching by configuration hash and parallel agreement
+- Input validation and the heatmap pivot
+"""
+
+import contextlib
+import io
+
+import numpy as np
+import pytest
+
+from sensitivity_grid import _split_cells, grid_pivot, grid_sweep
+from tests.test_ibm_pd_ad import _small_config
+
+ONSET = 'base_onset_probability'
+PREVALENCE = 'risk_factors.periodontal_disease.prevalence'
+
+
+def _sweep(**kwargs):
+    kwargs.setdefault('n_jobs', 1)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return grid_sweep(_small_config(population=200, entrants=0), {ONSET: [0.002, 0.02], PREVALENCE: [0.2, 0.5]},
+                          seed=7, **kwargs)
+
+
+# =============================================================================
+# TESTS FOR CONTOUR REFINEMENT
+# =============================================================================
+
+class TestSplitCells:
+    """Tests for halving cells that the threshold passes through."""
+
+    def test_crossing_cell_is_split(self):
+        """A cell with corners on both sides becomes four sub-cells over a 3 x 3 set of points."""
+        cell = ((0.0, 1.0), (0.0, 2.0))
+        values = {(0.0, 0.0): -1.0, (0.0, 2.0): -1.0, (1.0, 0.0): 1.0, (1.0, 2.0): 1.0}
+        cells, points = _split_cells([cell], values, threshold=0.0)
+        assert len(cells) == 4
+        assert points == {(x, y) for x in (0.0, 0.5, 1.0) for y in (0.0, 1.0, 2.0)}
+
+    def test_one_sided_cell_is_kept(self):
+        """Cells entirely on one side, or with a non-finite corner, are not refined."""
+        cell = ((0.0, 1.0), (0.0, 1.0))
+        values = {(0.0, 0.0): 1.0, (0.0, 1.0): 2.0, (1.0, 0.0): 3.0, (1.0, 1.0): 4.0}
+        assert _split_cells([cell], values, threshold=0.0) == ([], set())
+        values[(1.0, 1.0)] = np.inf
+        values[(0.0, 0.0)] = -1.0
+        assert _split_cells([cell], values, threshold=0.0) == ([], set())
+
+
+# =============================================================================
+# TESTS FOR GRID SWEEPS
+# =============================================================================
+
+class TestGridSweep:
+    """Tests for running, caching and refining sweeps."""
+
+    def test_grid_and_cache(self, tmp_path):
+        """Every grid point runs once; a second sweep with the same cache runs nothing."""
+        cache = tmp_path / 'grid.sqlite'
+        first = _sweep(cache=cache)
+        assert len(first) == 4 and (first['level'] == 0).all()
+        assert first.attrs['runs'] == 4
+        assert first.loc[first[ONSET] == 0.02, 'incident_onsets_total'].min() > \
+            first.loc[first[ONSET] == 0.002, 'incident_onsets_total'].max()
+        second = _sweep(cache=cache)
+        assert second.attrs['runs'] == 0
+        assert second.equals(first)
+
+    def test_parallel_matches_serial(self):
+        """Parallel grid points equal the serial ones (all points share one seed)."""
+        assert _sweep(n_jobs=2).equals(_sweep(n_jobs=1))
+
+    def test_refinement_follows_threshold(self):
+        """Refinement adds points only in cells the threshold crosses."""
+        coarse = _sweep(threshold_metric='incident_onsets_total', threshold=0.0)
+        threshold = coarse['incident_onsets_total'].median()
+        refined = _sweep(threshold_metric='incident_onsets_total', threshold=threshold, refine=1)
+        assert len(refined) == 9 and set(refined['level']) == {0, 1}
+        assert refined['above_threshold'].tolist() == (refined['incident_onsets_total'] >= threshold).tolist()
+        heatmap = grid_pivot(refined, ONSET, PREVALENCE, 'incident_onsets_total')
+        assert heatmap.shape == (3, 3)
+        assert list(heatmap.index) == [0.5, 0.35, 0.2]
+
+    def test_validation(self):
+        """Bad axes and refinement without a threshold metric are refused."""
+        cfg = _small_config(population=200, entrants=0)
+        with pytest.raises(ValueError):
+            grid_sweep(cfg, {ONSET: [0.01]})
+        with pytest.raises(KeyError):
+            grid_sweep(cfg, {ONSET: [0.01], 'no.such.parameter': [1.0]})
+        with pytest.raises(ValueError):
+            grid_sweep(cfg, {PREVALENCE: [0.2], PREVALENCE + '.female': [0.3]})
+        with pytest.raises(ValueError):
+            grid_sweep(cfg, {ONSET: [0.01], PREVALENCE: [1.5]})
+        with pytest.raises(ValueError):
+            grid_sweep(cfg, {ONSET: [0.01], PREVALENCE: [0.2]}, refine=1)
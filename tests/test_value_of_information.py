@@ -0,0 +1,130 @@
+"""
+Unit tests for value_of_information.py - EVPI and regression-based EVPPI
+
+Tests focus on:
+- EVPI from per-draw net benefit
+- EVPPI recovery against analytic values
+- Parameter group resolution and the summary table
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from value_of_information import (
+    arm_net_benefit,
+    evpi,
+    evppi,
+    evppi_table,
+    parameter_groups,
+)
+
+
+def _synthetic_psa(n=4000, seed=0):
+    """Three uniform parameters; only the first drives the incremental net benefit."""
+    rng = np.random.default_rng(seed)
+    theta = rng.random((n, 3))
+    inb = 1000.0 * (theta[:, 0] - 0.5) + rng.normal(0.0, 200.0, n)
+    return theta, inb
+
+
+# =============================================================================
+# TESTS FOR EVPI
+# =============================================================================
+
+class TestEVPI:
+    """Tests for overall EVPI."""
+
+    def test_no_uncertainty_no_value(self):
+        """A strategy that always wins leaves nothing to learn."""
+        nb = np.column_stack([np.zeros(100), np.full(100, 5.0)])
+        result = evpi(nb)
+        assert result['evpi'] == 0.0
+        assert result['optimal_strategy'] == 1
+
+    def test_incremental_matches_strategy_columns(self):
+        """1-D incremental net benefit is the same decision as two strategy columns."""
+        _, inb = _synthetic_psa()
+        two_arms = evpi(np.column_stack([np.full(len(inb), 7.0), inb + 7.0]))
+        assert evpi(inb)['evpi'] == pytest.approx(two_arms['evpi'])
+        assert two_arms['se'] > 0
+
+    def test_arm_net_benefit(self):
+        """Net benefit is wtp x QALYs minus costs per draw."""
+        draws = pd.DataFrame({'total_costs_all': [100.0, 50.0], 'total_qalys_combined': [1.0, 2.0]})
+        assert list(arm_net_benefit(draws, wtp=20000)) == [19900.0, 39950.0]
+
+    def test_stacked_arms_match_incremental(self):
+        """Paired arms stacked comparator first give the same EVPI as their incremental net benefit."""
+        draws = pd.DataFrame({
+            'comparator_total_costs_all': [100.0, 300.0, 200.0],
+            'comparator_total_qalys_combined': [1.00, 1.02, 0.98],
+            'intervention_total_costs_all': [400.0, 350.0, 500.0],
+            'intervention_total_qalys_combined': [1.03, 1.01, 1.00],
+        })
+        arms = np.column_stack([arm_net_benefit(draws, 20000, prefix='comparator_'),
+                                arm_net_benefit(draws, 20000, prefix='intervention_')])
+        incremental = arms[:, 1] - arms[:, 0]
+        assert evpi(arms)['evpi'] == pytest.approx(evpi(incremental)['evpi'])
+        assert evpi(arms)['evpi'] != pytest.approx(evpi(arms[:, 1])['evpi'])
+
+
+# =============================================================================
+# TESTS FOR EVPPI
+# =============================================================================
+
+class TestEVPPI:
+    """Tests for the GAM regression EVPPI estimator."""
+
+    def test_recovers_analytic_value(self):
+        """EVPPI of the driving parameter is 1000 x E[max(U - 0.5, 0)] = 125."""
+        theta, inb = _synthetic_psa()
+        result = evppi(theta[:, 0], inb, rng=np.random.default_rng(1))
+        assert result['evppi'] == pytest.approx(125.0, rel=0.08)
+        assert 0 < result['se'] < 10
+
+    def test_irrelevant_parameter_near_zero(self):
+        """Parameters unrelated to net benefit carry (almost) no value of information."""
+        theta, inb = _synthetic_psa()
+        result = evppi(theta[:, 1:], inb, rng=np.random.default_rng(1))
+        assert result['evppi'] < 10
+
+    def test_too_few_draws(self):
+        """More coefficients than draws is refused."""
+        theta, inb = _synthetic_psa(n=30)
+        with pytest.raises(ValueError):
+            evppi(np.random.default_rng(0).random((30, 10)), inb)
+
+
+# =============================================================================
+# TESTS FOR PARAMETER GROUPS
+# =============================================================================
+
+class TestEVPPITable:
+    """Tests for group resolution and the EVPPI table."""
+
+    def test_default_groups(self):
+        """Registry names resolve to the periodontal, cost and utility groups by prefix."""
+        columns = [
+            'costs.mild.home.nhs',
+            'utility_multipliers.patient.mild.home',
+            'risk_factors.periodontal_disease.relative_risks.onset.female',
+            'risk_factors.smoking.relative_risks.onset.female',
+        ]
+        groups = parameter_groups(columns)
+        assert groups == {
+            'periodontal_hazard_ratios': ['risk_factors.periodontal_disease.relative_risks.onset.female'],
+            'costs': ['costs.mild.home.nhs'],
+            'utilities': ['utility_multipliers.patient.mild.home'],
+        }
+
+    def test_table(self):
+        """The table starts with EVPI and ranks the driving group's EVPPI close to it."""
+        theta, inb = _synthetic_psa()
+        draws = pd.DataFrame(theta, columns=['costs.a', 'utility_multipliers.b', 'costs.c'])
+        draws.insert(0, 'iteration', np.arange(1, len(draws) + 1))
+        table = evppi_table(draws, inb, seed=0, single_parameters=True)
+        assert list(table['subset']) == ['EVPI', 'costs', 'utilities', 'costs.a', 'utility_multipliers.b', 'costs.c']
+        by_subset = table.set_index('subset')
+        assert by_subset.loc['costs', 'share_of_evpi'] > 0.7
+        assert by_subset.loc['utilities', 'share_of_evpi'] < 0.1
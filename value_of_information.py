@@ -0,0 +1,339 @@
+"""
+Expected value of perfect information from stored PSA draws.
+
+EVPI is read straight off the per-draw net benefit. EVPPI for a parameter subset uses the
+regression method of Strong, Oakley & Brennan (2014): the incremental net benefit is
+regressed on the subset's sampled values, and the fitted values stand in for the inner
+expectation. No nested Monte Carlo runs of the microsimulation are needed. The metamodel
+is a penalized B-spline GAM: one smooth per parameter plus tensor-product interactions
+for small subsets, with a shared smoothing parameter chosen by GCV. Standard errors come
+from sampling the metamodel's coefficient posterior.
+
+Usage:
+    from value_of_information import arm_net_benefit, evppi_table
+    results = run_paired_psa(config, intervention, wtp=20000, collect_draw_level=True)
+    table = evppi_table(results['parameter_draws'], results['draws']['incremental_nmb'])
+
+    # or a (draws, strategies) matrix, comparator first, built arm by arm
+    nb = np.column_stack([arm_net_benefit(results['draws'], 20000, prefix='comparator_'),
+                          arm_net_benefit(results['draws'], 20000, prefix='intervention_')])
+    table = evppi_table(results['parameter_draws'], nb)
+"""
+
+import itertools
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from scipy import linalg
+from scipy.interpolate import BSpline
+
+# Parameter groups reported by evppi_table; entries ending in '.' match by prefix
+DEFAULT_PARAMETER_GROUPS = {
+    'periodontal_hazard_ratios': ['risk_factors.periodontal_disease.relative_risks.'],
+    'costs': ['costs.'],
+    'utilities': [
+        'utility_norms_by_age.',
+        'utility_multipliers.',
+        'stage_age_qalys.',
+        'dementia_stage_qalys.',
+    ],
+}
+
+
+def arm_net_benefit(draws: pd.DataFrame,
+                    wtp: float,
+                    costs: str = 'total_costs_all',
+                    qalys: str = 'total_qalys_combined',
+                    prefix: str = '') -> np.ndarray:
+    """
+    Per-draw absolute net monetary benefit (wtp x QALYs - costs) of a single arm.
+
+    The result is not incremental: evpi() and evppi() read a 1-D input as net benefit against
+    a zero comparator, so stack it with the comparator arm's values into a (draws, strategies)
+    matrix first, or pass a paired PSA's 'incremental_nmb' column instead.
+
+    Args:
+        draws: Draw-level PSA metrics (one row per draw)
+        wtp: Willingness to pay per QALY
+        costs: Cost column
+        qalys: QALY column
+        prefix: Arm prefix of the columns in paired PSA draws ('comparator_' or 'intervention_')
+
+    Returns:
+        Array of net benefit, one value per draw
+    """
+    return (wtp * draws[prefix + qalys].to_numpy(dtype=float)
+            - draws[prefix + costs].to_numpy(dtype=float))
+
+
+def _incremental_net_benefit(net_benefit: Union[np.ndarray, pd.DataFrame, Sequence]) -> np.ndarray:
+    """
+    Incremental net benefit against the first strategy, shape (draws, strategies - 1).
+
+    A 1-D input must already be incremental (strategy minus comparator), e.g. a paired PSA's
+    'incremental_nmb'; a single arm's absolute net benefit is not.
+    """
+    values = np.asarray(net_benefit, dtype=float)
+    if values.ndim == 1:
+        return values[:, None]
+    if values.ndim != 2 or values.shape[1] < 2:
+        raise ValueError("Net benefit must be 1-D (incremental) or (draws, strategies) with 2+ strategies.")
+    return values[:, 1:] - values[:, :1]
+
+
+def _expected_loss(incremental: np.ndarray) -> float:
+    """E[max over strategies] - max over strategies of E[.], with the comparator fixed at 0."""
+    best_each = np.maximum(incremental.max(axis=1), 0.0)
+    return float(best_each.mean() - max(incremental.mean(axis=0).max(), 0.0))
+
+
+def evpi(net_benefit: Union[np.ndarray, pd.DataFrame, Sequence]) -> dict:
+    """
+    Per-decision expected value of perfect information.
+
+    Args:
+        net_benefit: Per-draw net benefit, (draws, strategies), or 1-D incremental net benefit
+
+    Returns:
+        Dictionary with 'evpi', its Monte Carlo 'se', 'n_draws' and 'optimal_strategy'
+        (column index of the strategy that is best on expected net benefit)
+    """
+    incremental = _incremental_net_benefit(net_benefit)
+    means = np.concatenate([[0.0], incremental.mean(axis=0)])
+    optimal = int(np.argmax(means))
+    # EVPI is the mean opportunity loss of always choosing the expected-best strategy
+    chosen = incremental[:, optimal - 1] if optimal > 0 else np.zeros(len(incremental))
+    loss = np.maximum(incremental.max(axis=1), 0.0) - chosen
+    return {
+        'evpi': float(loss.mean()),
+        'se': float(loss.std(ddof=1) / np.sqrt(len(loss))) if len(loss) > 1 else float('nan'),
+        'n_draws': int(len(loss)),
+        'optimal_strategy': optimal,
+    }
+
+
+def _smooth_basis(x: np.ndarray, n_basis: int) -> tuple:
+    """
+    Centred cubic B-spline basis and second-difference penalty for one input.
+
+    The input is replaced by its empirical CDF so knots sit evenly over the sampled
+    distribution; the sum-to-zero constraint keeps the smooth identifiable next to the intercept.
+    """
+    ranks = (np.argsort(np.argsort(x, kind='stable'), kind='stable') + 0.5) / len(x)
+    degree = 3
+    interior = np.linspace(0.0, 1.0, n_basis - degree + 1)
+    knots = np.concatenate([np.zeros(degree), interior, np.ones(degree)])
+    basis = BSpline.design_matrix(ranks, knots, degree).toarray()
+    differences = np.diff(np.eye(n_basis), 2, axis=0)
+    penalty = differences.T @ differences
+    constraint = linalg.null_space(basis.sum(axis=0)[None, :])
+    return basis @ constraint, constraint.T @ penalty @ constraint
+
+
+def _gam_design(inputs: np.ndarray,
+                n_basis: int,
+                n_tensor_basis: int,
+                max_interaction_params: int) -> tuple:
+    """Design matrix (intercept, main smooths, pairwise tensor smooths) and its block penalty."""
+    n_draws, n_params = inputs.shape
+    blocks = [np.ones((n_draws, 1))]
+    penalties = [np.zeros((1, 1))]
+    for j in range(n_params):
+        basis, penalty = _smooth_basis(inputs[:, j], n_basis)
+        blocks.append(basis)
+        penalties.append(penalty / np.linalg.norm(penalty, 2))
+    if 1 < n_params <= max_interaction_params:
+        marginals = [_smooth_basis(inputs[:, j], n_tensor_basis) for j in range(n_params)]
+        for a, b in itertools.combinations(range(n_params), 2):
+            (basis_a, penalty_a), (basis_b, penalty_b) = marginals[a], marginals[b]
+            blocks.append((basis_a[:, :, None] * basis_b[:, None, :]).reshape(n_draws, -1))
+            penalty = (np.kron(penalty_a, np.eye(len(penalty_b)))
+                       + np.kron(np.eye(len(penalty_a)), penalty_b))
+            penalties.append(penalty / np.linalg.norm(penalty, 2))
+    return np.hstack(blocks), linalg.block_diag(*penalties)
+
+
+def _penalized_fit(design: np.ndarray,
+                   penalty: np.ndarray,
+                   response: np.ndarray,
+                   n_samples: int,
+                   rng: np.random.Generator,
+                   n_lambda: int = 30) -> dict:
+    """
+    Penalized least squares with the smoothing parameter chosen by GCV.
+
+    The problem is diagonalised once (Cholesky of X'X, eigen-decomposition of the whitened
+    penalty), so every candidate smoothing parameter costs one matrix product.
+
+    Returns:
+        Dictionary with 'fitted' (n,), 'samples' (n, n_samples) of fitted values drawn from
+        the coefficient posterior, 'edf' and 'r_squared'
+    """
+    n_draws, n_coef = design.shape
+    gram = design.T @ design
+    ridge = 1e-9 * np.trace(gram) / n_coef
+    chol = linalg.cholesky(gram + ridge * np.eye(n_coef))
+    chol_inv = linalg.solve_triangular(chol, np.eye(n_coef))
+    shrink, rotation = linalg.eigh(chol_inv.T @ penalty @ chol_inv)
+    shrink = np.clip(shrink, 0.0, None)
+    whitened = design @ (chol_inv @ rotation)
+    scores = whitened.T @ response
+
+    positive = shrink[shrink > 1e-10 * shrink.max()] if shrink.max() > 0 else np.array([1.0])
+    lambdas = np.logspace(np.log10(1e-4 / positive.max()), np.log10(1e4 / positive.min()), n_lambda)
+    weights = 1.0 / (1.0 + lambdas[None, :] * shrink[:, None])
+    fitted_all = whitened @ (weights * scores[:, None])
+    rss = ((response[:, None] - fitted_all) ** 2).sum(axis=0)
+    edf = weights.sum(axis=0)
+    gcv = n_draws * rss / np.maximum(n_draws - edf, 1.0) ** 2
+    best = int(np.argmin(gcv))
+
+    fitted = fitted_all[:, best]
+    sigma_sq = rss[best] / max(n_draws - edf[best], 1.0)
+    noise = rng.standard_normal((n_coef, n_samples)) * np.sqrt(sigma_sq * weights[:, best])[:, None]
+    samples = fitted[:, None] + whitened @ noise
+    total = float(((response - response.mean()) ** 2).sum())
+    return {
+        'fitted': fitted,
+        'samples': samples,
+        'edf': float(edf[best]),
+        'r_squared': 1.0 - float(rss[best]) / total if total > 0 else float('nan'),
+    }
+
+
+def evppi(parameters: Union[np.ndarray, pd.DataFrame],
+          net_benefit: Union[np.ndarray, pd.DataFrame, Sequence],
+          *,
+          n_basis: Optional[int] = None,
+          n_tensor_basis: int = 5,
+          max_interaction_params: int = 3,
+          n_samples: int = 200,
+          rng: Optional[np.random.Generator] = None) -> dict:
+    """
+    Expected value of partial perfect information for one parameter subset (GAM regression method).
+
+    Args:
+        parameters: Sampled values of the subset, (draws, parameters)
+        net_benefit: Per-draw net benefit, (draws, strategies), or 1-D incremental net benefit
+        n_basis: B-spline basis size per parameter (None = 10, reduced for short runs)
+        n_tensor_basis: Basis size per margin of the pairwise tensor-product smooths
+        max_interaction_params: Largest subset that gets pairwise interaction smooths; larger
+            subsets are fitted additively
+        n_samples: Posterior samples of the metamodel used for the standard error
+        rng: Random generator for the posterior samples
+
+    Returns:
+        Dictionary with 'evppi', 'se' (metamodel uncertainty), 'n_parameters', 'n_draws',
+        'edf' (effective degrees of freedom per strategy contrast) and 'r_squared'
+    """
+    inputs = np.asarray(parameters, dtype=float)
+    if inputs.ndim == 1:
+        inputs = inputs[:, None]
+    incremental = _incremental_net_benefit(net_benefit)
+    n_draws = len(incremental)
+    if len(inputs) != n_draws:
+        raise ValueError(f"Got {len(inputs)} parameter rows for {n_draws} net-benefit draws.")
+    inputs = inputs[:, np.ptp(inputs, axis=0) > 0]
+    n_params = inputs.shape[1]
+    if n_params == 0:
+        return {'evppi': 0.0, 'se': 0.0, 'n_parameters': 0, 'n_draws': n_draws, 'edf': [], 'r_squared': []}
+
+    if n_basis is None:
+        # Keep roughly ten draws per coefficient
+        n_basis = int(np.clip(n_draws // (10 * n_params), 4, 10))
+    if 1 + n_params * (n_basis - 1) >= n_draws:
+        raise ValueError(f"{n_draws} draws are too few to fit a metamodel on {n_params} parameters.")
+    if n_params > max_interaction_params or n_params * (n_tensor_basis - 1) ** 2 >= n_draws // 2:
+        max_interaction_params = 1
+    design, penalty = _gam_design(inputs, n_basis, n_tensor_basis, max_interaction_params)
+
+    rng = rng if rng is not None else np.random.default_rng()
+    fits = [_penalized_fit(design, penalty, incremental[:, d], n_samples, rng)
+            for d in range(incremental.shape[1])]
+    fitted = np.column_stack([fit['fitted'] for fit in fits])
+    samples = np.stack([fit['samples'] for fit in fits], axis=1)  # (draws, contrasts, samples)
+    sampled = [_expected_loss(samples[:, :, s]) for s in range(n_samples)]
+    return {
+        'evppi': _expected_loss(fitted),
+        'se': float(np.std(sampled, ddof=1)) if n_samples > 1 else float('nan'),
+        'n_parameters': n_params,
+        'n_draws': n_draws,
+        'edf': [fit['edf'] for fit in fits],
+        'r_squared': [fit['r_squared'] for fit in fits],
+    }
+
+
+def parameter_groups(columns: Sequence[str],
+                     groups: Optional[Dict[str, List[str]]] = None) -> Dict[str, List[str]]:
+    """
+    Resolve group definitions to the parameter columns they cover.
+
+    Args:
+        columns: Parameter names (e.g. the columns of a PSA result's 'parameter_draws')
+        groups: Group name -> parameter names or prefixes ending in '.'
+            (default DEFAULT_PARAMETER_GROUPS)
+
+    Returns:
+        Group name -> matching columns, in column order; groups matching nothing are dropped
+    """
+    groups = DEFAULT_PARAMETER_GROUPS if groups is None else groups
+    resolved = {}
+    for name, entries in groups.items():
+        members = [column for column in columns
+                   if any(column == entry or (entry.endswith('.') and column.startswith(entry))
+                          for entry in entries)]
+        if members:
+            resolved[name] = members
+    return resolved
+
+
+def evppi_table(parameter_draws: pd.DataFrame,
+                net_benefit: Union[np.ndarray, pd.DataFrame, Sequence],
+                groups: Optional[Dict[str, List[str]]] = None,
+                *,
+                single_parameters: bool = False,
+                seed: Optional[int] = None,
+                **evppi_kwargs) -> pd.DataFrame:
+    """
+    EVPI and EVPPI for parameter groups (and optionally each parameter) from one PSA.
+
+    Args:
+        parameter_draws: Sampled parameters, one row per draw (a PSA result's 'parameter_draws';
+            an 'iteration' column is ignored)
+        net_benefit: Per-draw net benefit in the same draw order, (draws, strategies), or 1-D
+            incremental net benefit
+        groups: Group name -> parameter names or prefixes (default DEFAULT_PARAMETER_GROUPS)
+        single_parameters: Also report every non-constant parameter on its own
+        seed: Seed for the metamodel posterior samples
+        **evppi_kwargs: Passed to evppi()
+
+    Returns:
+        DataFrame with one row per subset ('subset', 'n_parameters', 'evppi', 'se',
+        'share_of_evpi', 'r_squared'), preceded by an 'EVPI' row for all parameters together
+    """
+    frame = parameter_draws.drop(columns=['iteration'], errors='ignore')
+    rng = np.random.default_rng(seed)
+    overall = evpi(net_benefit)
+    rows = [{
+        'subset': 'EVPI',
+        'n_parameters': frame.shape[1],
+        'evppi': overall['evpi'],
+        'se': overall['se'],
+        'r_squared': 1.0,
+    }]
+    subsets = parameter_groups(list(frame.columns), groups)
+    if single_parameters:
+        subsets.update({column: [column] for column in frame.columns if frame[column].nunique() > 1})
+    for name, columns in subsets.items():
+        result = evppi(frame[columns].to_numpy(dtype=float), net_benefit, rng=rng, **evppi_kwargs)
+        rows.append({
+            'subset': name,
+            'n_parameters': result['n_parameters'],
+            'evppi': result['evppi'],
+            'se': result['se'],
+            'r_squared': float(np.mean(result['r_squared'])) if result['r_squared'] else float('nan'),
+        })
+    table = pd.DataFrame(rows)
+    table['share_of_evpi'] = table['evppi'] / overall['evpi'] if overall['evpi'] > 0 else float('nan')
+    return table[['subset', 'n_parameters', 'evppi', 'se', 'share_of_evpi', 'r_squared']]